@@ -13,6 +13,9 @@ Currently these Detectors are available:
     detector and should be used by default.
   - SiegfriedDetector: Uses the pygfried library to identify
     file formats based on file content.
+  - ConsensusDetector: Runs several of the detectors above concurrently
+    and merges their results. Returns a ConsensusFormatInfo object with a
+    confidence score and the disagreeing opinions.
 
 All detectors implement the FormatDetector abstract base class
 and return FormatInfo objects with the detected format information.
@@ -30,6 +33,8 @@ Features:
     - Detector selection based on configuration ('general.format_detector').
     - Support for multiple detectors (e.g., Magika, MinimalDetector).
     - Extensible for future REST-based detectors (e.g., FITS).
+    - Opt-in audit trail of the detection stages run for each file
+      (see the `audit` module).
 
 Usage:
     Use `detect_format(filepath)` to get format information for a file.
@@ -48,6 +53,7 @@ from functools import lru_cache
 from pathlib import Path
 
 from ..projectconfiguration import MissingConfigurationException, get_configuration
+from .consensusdetector import ConsensusDetector
 from .formatdetector import FormatDetector
 from .formatinfo import FormatInfo
 from .minimaldetector import MinimalDetector
@@ -69,7 +75,8 @@ def make_detector(detector_name: str, detector_url: str = "") -> FormatDetector:
     Return a detector object based on the given name and optional URL.
 
     Args:
-        detector_name (str): Name of the detector to use ('base', 'magika', etc.).
+        detector_name (str): Name of the detector to use ('base', 'magika', 'siegfried'
+            or 'consensus').
         detector_url (str): Optional URL for REST-based detectors.
 
     Returns:
@@ -98,6 +105,8 @@ def make_detector(detector_name: str, detector_url: str = "") -> FormatDetector:
             )
     elif detector_name == "siegfried":
         detector = SiegfriedDetector()
+    elif detector_name == "consensus":
+        detector = ConsensusDetector()
     if detector is None:
         raise ValueError(f"Unknown detector '{detector_name}'")
     return detector
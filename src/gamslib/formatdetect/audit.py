@@ -0,0 +1,200 @@
+"""Opt-in audit trail for format detection.
+
+Format detectors run several (partly expensive) fallback stages for some files.
+This module allows to record which stages were run for which file, how long they took,
+how many bytes they read and why a fallback was necessary.
+
+Auditing is disabled by default and costs (almost) nothing then. To enable it, run
+the detection inside the `collect_audits()` context manager:
+
+```python
+from gamslib import formatdetect
+from gamslib.formatdetect.audit import collect_audits, summarize_audits
+
+with collect_audits() as audits:
+    for file in files:
+        formatdetect.detect_format(file)
+summary = summarize_audits(audits)
+for audit in summary.slowest:
+    print(audit.filepath, audit.seconds, [stage.name for stage in audit.stages])
+```
+
+Detectors use `audit_file()` to create a DetectionAudit record for a file and
+`audit_stage()` to add stages to this record.
+"""
+
+import contextvars
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Number of files listed in AuditSummary.slowest by default
+DEFAULT_TOP_FILES = 10
+
+
+@dataclass
+class AuditStage:
+    """A single stage executed during the detection of a file format.
+
+    Attributes:
+        name (str): Name of the stage (e.g. 'pronom' or 'xml_declaration_retry').
+        seconds (float): Wall time used by this stage.
+        bytes_read (int): (Approximate) number of bytes read by this stage.
+        reason (str): Why this stage was run. Empty for regular (non fallback) stages.
+    """
+
+    name: str
+    seconds: float = 0.0
+    bytes_read: int = 0
+    reason: str = ""
+
+    @property
+    def is_fallback(self) -> bool:
+        "Return True if this stage is a fallback stage."
+        return self.reason != ""
+
+
+@dataclass
+class DetectionAudit:
+    """The audit record for the format detection of a single file."""
+
+    filepath: Path
+    detector: str
+    stages: list[AuditStage] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        "Return the wall time of all stages."
+        return sum(stage.seconds for stage in self.stages)
+
+    @property
+    def bytes_read(self) -> int:
+        "Return the number of bytes read by all stages."
+        return sum(stage.bytes_read for stage in self.stages)
+
+    @property
+    def fallbacks(self) -> list[AuditStage]:
+        "Return all fallback stages."
+        return [stage for stage in self.stages if stage.is_fallback]
+
+
+@dataclass
+class AuditSummary:
+    """Summary of a list of DetectionAudit objects (e.g. a whole project run).
+
+    Attributes:
+        num_files (int): Number of audited files.
+        seconds (float): Wall time of all stages of all files.
+        bytes_read (int): Bytes read by all stages of all files.
+        stage_counts (dict[str, int]): How often each stage was run.
+        stage_seconds (dict[str, float]): Wall time spent in each stage.
+        slowest (list[DetectionAudit]): The slowest files, slowest first.
+    """
+
+    num_files: int = 0
+    seconds: float = 0.0
+    bytes_read: int = 0
+    stage_counts: dict[str, int] = field(default_factory=dict)
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+    slowest: list[DetectionAudit] = field(default_factory=list)
+
+
+# The list of collected audits, or None if auditing is disabled
+_collected_audits: contextvars.ContextVar[list[DetectionAudit] | None] = (
+    contextvars.ContextVar("collected_audits", default=None)
+)
+# The audit record of the file currently being detected
+_current_audit: contextvars.ContextVar[DetectionAudit | None] = contextvars.ContextVar(
+    "current_audit", default=None
+)
+
+
+def is_auditing() -> bool:
+    "Return True if audits are currently collected."
+    return _collected_audits.get() is not None
+
+
+@contextmanager
+def collect_audits() -> Iterator[list[DetectionAudit]]:
+    """Enable auditing and yield the list where DetectionAudit objects are collected.
+
+    The list is filled while format detections are run inside the context.
+    """
+    audits: list[DetectionAudit] = []
+    token = _collected_audits.set(audits)
+    try:
+        yield audits
+    finally:
+        _collected_audits.reset(token)
+
+
+@contextmanager
+def audit_file(filepath: Path, detector: str) -> Iterator[DetectionAudit | None]:
+    """Create an audit record for the detection of filepath.
+
+    Yields None if auditing is disabled.
+    """
+    audits = _collected_audits.get()
+    if audits is None:
+        yield None
+        return
+    audit = DetectionAudit(filepath, detector)
+    token = _current_audit.set(audit)
+    try:
+        yield audit
+    finally:
+        _current_audit.reset(token)
+        audits.append(audit)
+
+
+@contextmanager
+def audit_stage(name: str, bytes_read: int = 0, reason: str = "") -> Iterator[None]:
+    """Record the execution of a detection stage in the current audit record.
+
+    Does nothing if auditing is disabled or if called outside of `audit_file()`.
+
+    Args:
+        name (str): Name of the stage.
+        bytes_read (int): (Approximate) number of bytes read by the stage.
+        reason (str): Reason why the stage is run. Set this for fallback stages.
+    """
+    audit = _current_audit.get()
+    if audit is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        audit.stages.append(
+            AuditStage(name, time.perf_counter() - start, bytes_read, reason)
+        )
+
+
+def summarize_audits(
+    audits: list[DetectionAudit], top: int = DEFAULT_TOP_FILES
+) -> AuditSummary:
+    """Summarize a list of DetectionAudit objects.
+
+    Args:
+        audits (list[DetectionAudit]): The audits, e.g. as collected by `collect_audits()`.
+        top (int): Number of files to list in AuditSummary.slowest.
+
+    Returns:
+        AuditSummary: The summary.
+    """
+    summary = AuditSummary(num_files=len(audits))
+    for audit in audits:
+        for stage in audit.stages:
+            summary.seconds += stage.seconds
+            summary.bytes_read += stage.bytes_read
+            summary.stage_counts[stage.name] = summary.stage_counts.get(stage.name, 0) + 1
+            summary.stage_seconds[stage.name] = (
+                summary.stage_seconds.get(stage.name, 0.0) + stage.seconds
+            )
+    summary.slowest = sorted(audits, key=lambda audit: audit.seconds, reverse=True)[
+        :top
+    ]
+    return summary
@@ -0,0 +1,155 @@
+"""A detector that combines the results of several other detectors.
+
+The ConsensusDetector is meant for difficult material, where a single detector might
+be wrong. It runs the configured detectors concurrently and merges their results
+into a single ConsensusFormatInfo object, which also contains a confidence score and
+the opinions of all detectors which disagree with the final result.
+
+Voting scheme:
+
+  - Each detector casts one vote for the (mimetype, subtype) pair it detected.
+  - The pair with the most votes wins. On a tie, the pair detected by the detector
+    with the highest priority (the earlier one in the list of detectors) wins.
+  - The confidence score is the number of votes for the winning pair divided by the
+    number of detectors which were run.
+  - The PRONOM id is taken from the highest priority detector of the winning group
+    which provides one.
+
+As running all detectors is expensive, the first two detectors are run first. If they
+agree, the remaining detectors are not run at all.
+"""
+
+import contextvars
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .formatdetector import FormatDetector
+from .formatinfo import FormatInfo
+
+# Detectors used by default, in order of priority.
+DEFAULT_CONSENSUS_DETECTORS = ("siegfried", "magika", "base")
+
+
+@dataclass
+class ConsensusFormatInfo(FormatInfo):
+    """
+    FormatInfo returned by the ConsensusDetector.
+
+    Attributes:
+        confidence (float): Share of votes for the detected format (0.0 - 1.0).
+        opinions (list[FormatInfo]): Results of all detectors which disagree with
+            the detected format.
+    """
+
+    confidence: float = 1.0
+    opinions: list[FormatInfo] = field(default_factory=list)
+
+    @property
+    def is_unanimous(self) -> bool:
+        "Return True if all detectors agreed on the format."
+        return not self.opinions
+
+
+class ConsensusDetector(FormatDetector):
+    """
+    Detector that runs several detectors concurrently and merges their results.
+
+    Unavailable optional detectors (e.g. magika if it is not installed) are skipped.
+    """
+
+    def __init__(self, detector_names: tuple[str, ...] = DEFAULT_CONSENSUS_DETECTORS):
+        """
+        Initialize the ConsensusDetector.
+
+        Args:
+            detector_names (tuple[str, ...]): Names of the detectors to use, in order of
+                priority. Accepts the same names as `make_detector` (except 'consensus').
+
+        Raises:
+            ValueError: If less than two of the requested detectors are available.
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from . import make_detector  # noqa: PLC0415
+
+        self._detectors: list[FormatDetector] = []
+        for name in detector_names:
+            if name == "consensus":
+                raise ValueError("The consensus detector cannot be used recursively.")
+            try:
+                self._detectors.append(make_detector(name))
+            except ImportError as exp:
+                warnings.warn(f"Skipping detector '{name}' for consensus: {exp}")
+        if len(self._detectors) < 2:  # noqa: PLR2004
+            raise ValueError("The consensus detector requires at least two detectors.")
+
+    @property
+    def detectors(self) -> list[FormatDetector]:
+        "Return the detectors used by this detector, in order of priority."
+        return list(self._detectors)
+
+    def guess_file_type(self, filepath: Path) -> ConsensusFormatInfo:
+        """
+        Detect the format of a file by running several detectors and merging the results.
+
+        Args:
+            filepath (Path): Path to the file to analyze.
+
+        Returns:
+            ConsensusFormatInfo: The merged format information, including a confidence
+                score and the disagreeing opinions.
+        """
+        if not filepath.is_file():
+            raise FileNotFoundError(f"File {filepath} does not exist.")
+        with ThreadPoolExecutor(max_workers=len(self._detectors)) as executor:
+            first, second = (
+                self._submit(executor, detector, filepath)
+                for detector in self._detectors[:2]
+            )
+            results = [first.result(), second.result()]
+            if not self._agree(results[0], results[1]):
+                futures = [
+                    self._submit(executor, detector, filepath)
+                    for detector in self._detectors[2:]
+                ]
+                results += [future.result() for future in futures]
+        return self._merge(results)
+
+    @staticmethod
+    def _submit(executor: ThreadPoolExecutor, detector: FormatDetector, filepath: Path):
+        "Run detector in the executor, in a copy of the current context (for auditing)."
+        context = contextvars.copy_context()
+        return executor.submit(context.run, detector.guess_file_type, filepath)
+
+    @staticmethod
+    def _agree(info1: FormatInfo, info2: FormatInfo) -> bool:
+        "Return True if both FormatInfo objects describe the same format."
+        return (info1.mimetype, info1.subtype) == (info2.mimetype, info2.subtype)
+
+    def _merge(self, results: list[FormatInfo]) -> ConsensusFormatInfo:
+        """Merge results (ordered by detector priority) into a ConsensusFormatInfo.
+
+        See the module docstring for a description of the voting scheme.
+        """
+        votes: dict[tuple, int] = {}
+        for result in results:
+            key = (result.mimetype, result.subtype)
+            votes[key] = votes.get(key, 0) + 1
+        # dicts keep insertion order, so max() returns the higher priority pair on a tie
+        winner = max(votes, key=votes.get)
+        agreeing = [res for res in results if (res.mimetype, res.subtype) == winner]
+        pronom_id = next(
+            (res.pronom_id for res in agreeing if res.pronom_id is not None), None
+        )
+        return ConsensusFormatInfo(
+            detector=str(self),
+            mimetype=winner[0],
+            subtype=winner[1],
+            pronom_id=pronom_id,
+            confidence=votes[winner] / len(results),
+            opinions=[res for res in results if (res.mimetype, res.subtype) != winner],
+        )
+
+    def __str__(self):
+        return f"ConsensusDetector ({', '.join(str(d) for d in self._detectors)})"
@@ -22,6 +22,16 @@ DEFAULT_TYPE = "application/octet-stream"
 # DEFAULT_TYPE: Default MIME type for unknown or undetectable formats.
 
 
+class _WellformednessTarget:  # pylint: disable=too-few-public-methods
+    """Parser target which discards all parser events.
+
+    Used to check if a file is well formed without building a tree.
+    """
+
+    def close(self):
+        "Called by the parser at the end of the document."
+
+
 class FormatDetector(abc.ABC):  # pylint: disable=too-few-public-methods
     """
     Abstract base class for file format detectors.
@@ -48,8 +58,10 @@ class FormatDetector(abc.ABC):  # pylint: disable=too-few-public-methods
     @staticmethod
     def looks_like_xml(filepath: Path) -> bool:
         "Return True if the file looks like an XML file."
+        # pylint: disable=c-extension-no-member
+        parser = ET.XMLParser(target=_WellformednessTarget())
         try:
-            ET.parse(filepath) # pylint: disable=c-extension-no-member
+            ET.parse(filepath, parser)
             return True
         except Exception:  # pylint: disable=broad-except
             return False
@@ -17,6 +17,7 @@ import pygfried
 from gamslib.formatdetect.formatinfo import SubType
 
 from . import jsontypes, xmltypes
+from .audit import audit_file, audit_stage
 from .formatdetector import DEFAULT_TYPE, FormatDetector
 from .formatinfo import FormatInfo
 
@@ -28,6 +29,14 @@ PRONOM_IDS = {
 }
 
 
+def _file_size(filepath: Path) -> int:
+    "Return the size of filepath in bytes (0 if the file cannot be accessed)."
+    try:
+        return filepath.stat().st_size
+    except OSError:
+        return 0
+
+
 class SiegfriedDetector(FormatDetector):
     """
     Detector that uses the Pygfried library to detect file formats.
@@ -106,17 +115,32 @@ class SiegfriedDetector(FormatDetector):
             return "application/x-xz", subtype, pronom_id
         # text/plain seems to be a fallback for unrecognized JSON
         if pronom_id == "x-fmt/111":  # text/plain: check for unrecognized JSON
-            result = self._fix_json_info(filepath)
+            with audit_stage(
+                "fix_json_info",
+                _file_size(filepath),
+                "PRONOM id 'x-fmt/111' (text/plain) might be unrecognized JSON",
+            ):
+                result = self._fix_json_info(filepath)
             if result is not None:
                 return result
-            result = self._fix_xml_info(filepath)
+            with audit_stage(
+                "fix_xml_info",
+                _file_size(filepath),
+                "PRONOM id 'x-fmt/111' (text/plain) might be unrecognized XML",
+            ):
+                result = self._fix_xml_info(filepath)
             if result is not None:
                 return result
 
         # xml files without doctype are not recognized by pygfried
         if pronom_id in ("UNKNOWN", "x-fmt/111"):
             if "fmt/101" in pronom_warning:  # we have an xml file without doctype
-                mime_type, subtype = xmltypes.get_format_info(filepath, mime_type)
+                with audit_stage(
+                    "xml_subtype",
+                    _file_size(filepath),
+                    f"PRONOM warning for '{pronom_id}' hints at XML without doctype",
+                ):
+                    mime_type, subtype = xmltypes.get_format_info(filepath, mime_type)
                 # if we detected a xml type, we should check, if the pronom_id can
                 # be fixed to a more specific one, based on the subtype
                 puid = "fmt/101"
@@ -128,7 +152,12 @@ class SiegfriedDetector(FormatDetector):
                         puid = detected_puid
                 return mime_type, subtype, puid
             if "fmt/817" in pronom_warning:  # we have an unrecognized json file
-                mime_type, subtype = jsontypes.get_format_info(filepath, mime_type)
+                with audit_stage(
+                    "json_subtype",
+                    _file_size(filepath),
+                    f"PRONOM warning for '{pronom_id}' hints at unrecognized JSON",
+                ):
+                    mime_type, subtype = jsontypes.get_format_info(filepath, mime_type)
         return mime_type, subtype, pronom_id
 
     def _run_pronom(self, filepath) -> tuple[str, SubType, str, str]:
@@ -169,25 +198,46 @@ class SiegfriedDetector(FormatDetector):
         # pygfried always returns a dict; only indicates missing file in 'errors'
         if not filepath.is_file():
             raise FileNotFoundError(f"File {filepath} does not exist.")
-        mime_type, subtype, pronom_id, pronom_warning = self._run_pronom(filepath)
+        with audit_file(filepath, self._detector_name):
+            return self._guess_file_type(filepath)
+
+    def _guess_file_type(self, filepath: Path) -> FormatInfo:
+        "Do the real work for guess_file_type()."
+        file_size = _file_size(filepath)
+        with audit_stage("pronom", file_size):
+            mime_type, subtype, pronom_id, pronom_warning = self._run_pronom(filepath)
         # siegfried sometime is more accurate if an xml declaration is inserted
-        if pronom_id in ("UNKNOWN", "fmt/101") and self.looks_like_xml(filepath):
-            if not self.has_xml_declaration(filepath):
-                mime_type, subtype, pronom_id, pronom_warning = (
-                    self._detect_with_inserted_xml_declaration(filepath)
-                )
-            if pronom_id in ("UNKNOWN", "fmt/101") and self.looks_like_xml(filepath):
-                mime_type = "application/xml"
-                pronom_id = "fmt/101"
+        if pronom_id in ("UNKNOWN", "fmt/101"):
+            with audit_stage(
+                "looks_like_xml", file_size, f"PRONOM id '{pronom_id}' might be XML"
+            ):
+                looks_like_xml = self.looks_like_xml(filepath)
+            if looks_like_xml:
+                with audit_stage("has_xml_declaration", min(file_size, 500)):
+                    has_xml_declaration = self.has_xml_declaration(filepath)
+                if not has_xml_declaration:
+                    with audit_stage(
+                        "xml_declaration_retry",
+                        file_size,
+                        "XML file without XML declaration",
+                    ):
+                        mime_type, subtype, pronom_id, pronom_warning = (
+                            self._detect_with_inserted_xml_declaration(filepath)
+                        )
+                if pronom_id in ("UNKNOWN", "fmt/101"):
+                    mime_type = "application/xml"
+                    pronom_id = "fmt/101"
         if mime_type in {None, "", "application/undefined"}:
             mime_type = DEFAULT_TYPE
             # warnings.warn(
             #     f"Could not determine mimetype for {filepath}. Using default type."
             # )
         elif xmltypes.is_xml_type(mime_type):
-            mime_type, subtype = xmltypes.get_format_info(filepath, mime_type)
+            with audit_stage("xml_subtype", file_size):
+                mime_type, subtype = xmltypes.get_format_info(filepath, mime_type)
         elif jsontypes.is_json_type(mime_type):
-            mime_type, subtype = jsontypes.get_format_info(filepath, mime_type)
+            with audit_stage("json_subtype", file_size):
+                mime_type, subtype = jsontypes.get_format_info(filepath, mime_type)
 
         mime_type, subtype, pronom_id = self._fix_result(
             filepath, mime_type, subtype, pronom_id, pronom_warning
@@ -45,13 +45,37 @@ Currently, these fields are defined in the `Configuration` class:
     extension for dsid. This field is used when creating datastreams.csv.
   - `general.format_detector="siegfried`: the format detector to use. You might want to
     keep this unless for good reasons because the older detectors might be removed in
-    the future.
+    the future. Use "consensus" to run all available detectors and merge their results
+    (this is much slower and meant for difficult material only).
   - `general.format_detector_url`: the URL for the format detector service.
     Currently not used, so keep it empty.
   - `general.ds_ignore_files`:   a list of filenames/filename patterns
     which should be ignored when creating datastreams.csv. This is useful to
     exclude files which might be in the object directory but but should not be
     added as datastreams. `object.csv`and `datastreams.csv` are automatically ignored.
+  - `general.streaming_validation_threshold`: XML files larger than this value (in bytes)
+    are validated in a single streaming pass, which needs much less memory. Only XML
+    Schema and DTD validation can be done in streaming mode. Default is 100000000 (100 MB),
+    0 disables streaming validation.
+  - `general.schema_cache_size`: the maximum memory (in bytes) used to keep compiled
+    schemas in memory during validation. If this is exceeded, the least recently used
+    schemas are removed. Default is 1000000000 (1 GB), 0 means no limit.
+  - `general.schema_cache_ttl`: downloaded schemas older than this (in seconds) are
+    revalidated with a conditional request. Default is 604800 (one week), 0 means that
+    cached schemas never expire.
+  - `general.schema_negative_cache_ttl`: failed schema downloads are not retried for this
+    many seconds. Default is 300.
+  - `general.validation_max_errors`: the maximum number of errors reported per
+    validation step. Default is 0, which means no limit.
+  - `general.validation_fail_fast`: if true, a file is not validated against further
+    schemas after the first failing one. Default is false.
+  - `general.validation_aggregate_errors`: if true, errors with the same message template
+    are reported once with their number and the first `general.validation_max_locations`
+    (default 5) locations. Default is false.
+  - `general.validation_xinclude`: if true, XIncludes (`xi:include`) of XML files are
+    expanded before validation. Default is false.
+  - `general.pdf_offset_sample_size`: the maximum number of object offsets checked
+    when validating the structure of a PDF file. Default is 10000, 0 means all.
 
 Main features:
 
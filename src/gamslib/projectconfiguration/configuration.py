@@ -34,7 +34,13 @@ from pathlib import Path
 from typing import Annotated, Any, Literal
 
 from dotenv import dotenv_values
-from pydantic import BaseModel, StringConstraints, ValidationError, field_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    StringConstraints,
+    ValidationError,
+    field_validator,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -54,11 +60,21 @@ class General(BaseModel, validate_assignment=True):
 
     dsid_keep_extension: bool = True
     loglevel: Literal["debug", "info", "warning", "error", "critical"] = "info"
-    format_detector: Literal["siegfried", "magika", "base"] = "siegfried"
+    format_detector: Literal["siegfried", "magika", "base", "consensus"] = "siegfried"
     format_detector_url: str = ""
     ds_ignore_files: list[str] = []
     safe_xml_hosts: list[str] = []
     contact_email: str = ""
+    streaming_validation_threshold: Annotated[int, Field(ge=0)] = 100_000_000
+    schema_cache_size: Annotated[int, Field(ge=0)] = 1_000_000_000
+    schema_cache_ttl: Annotated[int, Field(ge=0)] = 604_800
+    schema_negative_cache_ttl: Annotated[int, Field(ge=0)] = 300
+    validation_max_errors: Annotated[int, Field(ge=0)] = 0
+    validation_fail_fast: bool = False
+    validation_aggregate_errors: bool = False
+    validation_max_locations: Annotated[int, Field(ge=0)] = 5
+    validation_xinclude: bool = False
+    pdf_offset_sample_size: Annotated[int, Field(ge=0)] = 10_000
 
     @field_validator("format_detector", mode="before")
     @classmethod
@@ -1,14 +1,43 @@
 """A sub package fpor file format and schema validation." """
 
+import itertools
+import multiprocessing
+import os
 import warnings
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
 
-from gamslib import formatdetect
 from gamslib.formatdetect.formatinfo import FormatInfo
-from gamslib.validation import xmlschemadetector
+
+# importing the validator modules registers the validators in the ValidatorFactory
+from gamslib.validation import (
+    alwaysvalidvalidator,
+    jsonschemadetector,
+    jsonvalidator,
+    pdfvalidator,
+    rdfvalidator,
+    xmlschemadetector,
+    xmlvalidator,
+)
 from gamslib.validation.schemainfo import SchemaInfo
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import ValidationOptions
+from gamslib.validation.validationresult import ValidationResult, ValidationSubResult
 from gamslib.validation.validator import ValidatorFactory
 
+if TYPE_CHECKING:
+    # resultcache imports this package, so it can not be imported at runtime here
+    from gamslib.validation.resultcache import ResultCache
+
+# Maximum number of files validated by a worker in one task of validate_many()
+BATCH_CHUNK_SIZE = 100
+# Number of chunks per worker which validate_many() submits ahead
+MAX_PENDING_CHUNKS_PER_WORKER = 2
+# Validator name of results for files which could not be validated at all
+BATCH_VALIDATOR_NAME = "Batch Validator"
+
 
 # TODO: Check if including https://rda-fair4ml.github.io/FAIR4ML-schema/ makes sense
 #    and https://mlcommons.org/working-groups/data/croissant/
@@ -16,6 +45,7 @@ def extract_referenced_schemas(
     file_path: Path,
     format_info: FormatInfo | None = None,
     use_default_schema: bool = True,
+    context: ValidationContext | None = None,
 ) -> list[SchemaInfo]:
     """Find schema referenced in file_path.
 
@@ -26,16 +56,38 @@ def extract_referenced_schemas(
         if no schema is referenced inside the document.
         E.g.: If True, a TEI file without any referenced schema will be validated
         against tei_all.xsd
+    :param context: The ValidationContext of file_path. If given, the XML tree parsed
+        by the context is used instead of parsing the file again. In streaming mode
+        only the document header is parsed. For JSON files, the document parsed by
+        the context is used.
     :return: A list of SchemaInfo objects
     """
     referenced_schemas = []
     if format_info is not None:
         if format_info.is_xml_type():
+            tree = None
+            if context is not None:
+                # in streaming mode, the schemas are taken from the document header
+                tree = context.header_tree if context.streaming else context.tree
             referenced_schemas = xmlschemadetector.detect_schemata(
-                file_path, format_info, use_default_schema
+                file_path, format_info, use_default_schema, tree=tree
             )
         elif format_info.is_json_type():
-            raise NotImplementedError("JSON schema detection not implemented")
+            document = None
+            try:
+                if context is not None and not jsonschemadetector.is_jsonl(
+                    file_path, format_info
+                ):
+                    document = context.json_document
+                elif context is not None and context.in_memory:
+                    with context.open() as f:
+                        document = jsonschemadetector.read_first_record(f)
+            except ValueError:
+                # syntax errors are reported by the JSONValidator
+                return referenced_schemas
+            referenced_schemas = jsonschemadetector.detect_schemata(
+                file_path, format_info, document=document
+            )
     return referenced_schemas
 
 
@@ -43,6 +95,8 @@ def validate(
     file_path: Path,
     schema_location: str | None = None,
     format_info: FormatInfo | None = None,
+    cache: "ResultCache | None" = None,
+    options: ValidationOptions | None = None,
 ):
     """Validate a file.
 
@@ -51,22 +105,207 @@ def validate(
            If not given, we try to detect the schema from the file.
     :param format_info: The format information of the file. As detecting the format
               can be expensive, you can pass the format information here if you habe it already.
+    :param cache: A ResultCache. If given, a cached result is returned if neither the
+              file nor its schemas have changed, and new results are stored in the cache.
+    :param options: ValidationOptions limiting the reported errors. If not given, the
+              options from the configuration are used.
+    :return: A ValidationResult
+    """
+    key = None
+    if cache is not None:
+        # the key is computed once and used for lookup and storage
+        key = cache.make_key(file_path, _resolve_schema_location(schema_location), options)
+        result = cache.get(file_path, key=key)
+        if result is not None:
+            return result
+    # the context makes sure that the file is parsed only once
+    context = ValidationContext(file_path, format_info, options=options)
+    schemas, result = _validate_context(context, schema_location)
+    if cache is not None:
+        cache.put(file_path, result, schemas, key=key)
+    return result
+
+
+def validate_bytes(
+    data: bytes,
+    base_url: str | Path | None = None,
+    schema_location: str | None = None,
+    format_info: FormatInfo | None = None,
+    options: ValidationOptions | None = None,
+) -> ValidationResult:
+    """Validate an in-memory document, e.g. a document received by an ingest API.
+
+    Works like validate(), without writing the document to a file.
+
+    :param data: The document to validate.
+    :param base_url: The path or file URI the document would have as a file. Relative
+           schema references are resolved against it, but it does not need to exist.
+    :param schema_location: The schema location to validate against.
+           If not given, we try to detect the schema from the document.
+    :param format_info: The format information of the document. If not given, only
+              XML and JSON documents are recognized (without subtypes).
+    :param options: ValidationOptions limiting the reported errors. If not given, the
+              options from the configuration are used.
     :return: A ValidationResult
     """
+    context = ValidationContext.from_bytes(data, base_url, format_info, options=options)
+    return _validate_context(context, schema_location)[1]
+
+
+def validate_stream(
+    stream: BinaryIO,
+    base_url: str | Path | None = None,
+    schema_location: str | None = None,
+    format_info: FormatInfo | None = None,
+    options: ValidationOptions | None = None,
+) -> ValidationResult:
+    """Validate a document read from a binary stream. See validate_bytes().
+
+    The stream is read into memory before it is validated.
+    """
+    context = ValidationContext.from_stream(stream, base_url, format_info, options=options)
+    return _validate_context(context, schema_location)[1]
+
+
+def _resolve_schema_location(schema_location: str | None) -> str | None:
+    "Return the URI of schema_location, which is relative to the working directory."
+    if schema_location is None:
+        return None
+    return Path(schema_location).resolve().as_uri()
+
+
+def _validate_context(
+    context: ValidationContext, schema_location: str | None = None
+) -> tuple[list[SchemaInfo], ValidationResult]:
+    "Validate the document of context. Return the schemas used and the result."
     schemas: list[SchemaInfo] = []
-    if format_info is None:
-        format_info = formatdetect.detect_format(file_path)
+    file_path = context.file_path
+    format_info = context.format_info
     # if a schema location is given, we use only this, unless other
     # referenced schemas are found in the file. This means that we do no not use a
     # default schema for specific suptypes if a schema location is given.
     use_default_schema = True
     if schema_location is not None:
-        schemas.append(SchemaInfo(Path(schema_location).resolve().as_uri()))
+        schemas.append(SchemaInfo(_resolve_schema_location(schema_location)))
         use_default_schema = False
     schemas.extend(
-        extract_referenced_schemas(file_path, format_info, use_default_schema)
+        extract_referenced_schemas(
+            file_path, format_info, use_default_schema, context=context
+        )
     )
 
     validator = ValidatorFactory.get_validator(format_info)
-    result = validator.validate(file_path, schemas)
+    return schemas, validator.validate_context(context, schemas)
+
+
+def _validate_paths(
+    paths: list[Path],
+    options: ValidationOptions | None = None,
+    cache: "ResultCache | None" = None,
+) -> list[ValidationResult]:
+    """Validate paths, using and updating cache.
+
+    Worker function for validate_many(). The cache key of a file is computed once and
+    used for lookup and storage. Each file is read and parsed once: the
+    ValidationContext used to detect the schemas is used for validation, too.
+    Files which could not be validated at all get an invalid result with the error
+    message, which is not cached.
+    """
+    results = []
+    for file_path in paths:
+        try:
+            key = None
+            if cache is not None:
+                key = cache.make_key(file_path, options=options)
+                result = cache.get(file_path, key=key)
+                if result is not None:
+                    results.append(result)
+                    continue
+            context = ValidationContext(file_path, options=options)
+            schemas, result = _validate_context(context)
+            if cache is not None:
+                cache.put(file_path, result, schemas, key)
+            results.append(result)
+        except Exception as exp:  # pylint: disable=broad-exception-caught
+            results.append(_make_error_result(file_path, f"{type(exp).__name__}: {exp!s}"))
+    return results
+
+
+def _make_error_result(file_path: Path, error: str) -> ValidationResult:
+    "Return a ValidationResult for a file which could not be validated at all."
+    result = ValidationResult(file_path)
+    result.add_subresult(
+        ValidationSubResult(
+            False,
+            BATCH_VALIDATOR_NAME,
+            message=f"Unable to validate '{file_path}'",
+            errors=[error],
+        )
+    )
     return result
+
+
+def validate_many(
+    paths: Iterable[Path],
+    workers: int | None = None,
+    cache: "ResultCache | None" = None,
+    options: ValidationOptions | None = None,
+) -> Iterator[ValidationResult]:
+    """Validate many files on a pool of worker processes.
+
+    The files are dispatched in chunks of at most BATCH_CHUNK_SIZE files to the worker
+    processes. A worker detects the format and the referenced schemas of a file and
+    validates it with the same ValidationContext, so each file is parsed only once.
+    Compiled schemas are cached per worker process (see SchemaProvider), so each
+    worker compiles each schema only once. Files are sorted by directory before they
+    are chunked, as files of the same directory usually reference the same schemas.
+
+    Results are yielded as soon as they are available, so they are not in the order
+    of paths. Only MAX_PENDING_CHUNKS_PER_WORKER chunks per worker are submitted ahead,
+    so memory does not grow with the number of files. Files which cannot be validated
+    at all (e.g. because format detection failed) yield an invalid ValidationResult
+    with the error message.
+
+    Cache lookups happen in the workers, too: the cache key of a file is computed once
+    and used for lookup and storage. In a worker process, the cache uses the shared
+    resolver of that process (see ResultCache).
+
+    Worker processes are started with the 'spawn' method, because the Go runtime used
+    by the Siegfried detector does not survive a fork. So scripts calling this function
+    must protect their entry point with `if __name__ == "__main__":`.
+
+    :param paths: The files to validate.
+    :param workers: Number of worker processes. Defaults to the number of CPUs.
+        If 1, all files are validated in the current process.
+    :param cache: A ResultCache. If given, files with a cached result are neither
+        detected nor validated again and new results are stored in the cache.
+    :param options: ValidationOptions limiting the reported errors. If not given, the
+        options from the configuration are used.
+    :return: An iterator of ValidationResult objects.
+    """
+    paths = [Path(path) for path in paths]
+    if not paths:
+        return
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            yield from _validate_paths([path], options, cache)
+        return
+
+    paths.sort(key=lambda path: (str(path.parent), path.name))
+    chunksize = max(1, min(BATCH_CHUNK_SIZE, len(paths) // workers))
+    chunks = (paths[i : i + chunksize] for i in range(0, len(paths), chunksize))
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        # only a few chunks are in flight, so finished results are not kept in memory
+        pending = set()
+        for chunk in itertools.islice(chunks, workers * MAX_PENDING_CHUNKS_PER_WORKER):
+            pending.add(executor.submit(_validate_paths, chunk, options, cache))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.add(executor.submit(_validate_paths, chunk, options, cache))
+                yield from future.result()
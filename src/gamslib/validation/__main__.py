@@ -0,0 +1,115 @@
+"""Validate files from the command line.
+
+```
+python -m gamslib.validation [--workers N] [--no-cache] [--max-errors N] [--fail-fast]
+                             [--aggregate-errors] [--report FILE] path [path ...]
+python -m gamslib.validation --prune-cache DAYS
+```
+
+Directories are searched recursively (hidden directories are skipped). Results are
+cached (see `validation.resultcache`), so unchanged files are not validated again.
+`--no-cache` validates all files and leaves the cache untouched.
+`--max-errors`, `--fail-fast` and `--aggregate-errors` override the configured
+ValidationOptions (see `validation.validationoptions`).
+`--report FILE` writes all results to a JSON Lines report (see `validation.report`).
+"""
+
+import argparse
+import dataclasses
+import os
+import sys
+from pathlib import Path
+
+from gamslib.validation import validate_many
+from gamslib.validation.report import ReportWriter
+from gamslib.validation.resultcache import ResultCache
+from gamslib.validation.validationoptions import get_validation_options
+
+
+def find_files(paths: list[Path]) -> list[Path]:
+    "Return all files in paths. Directories are searched recursively."
+    files = []
+    for path in paths:
+        if not path.is_dir():
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            # skip hidden directories like .git or the .schema_cache
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+            files.extend(Path(root) / name for name in names)
+    return sorted(files)
+
+
+def main(argv: list[str] | None = None) -> int:
+    "Command line entry point. Return 0 if all files are valid, else 1."
+    parser = argparse.ArgumentParser(
+        prog="python -m gamslib.validation", description="Validate files."
+    )
+    parser.add_argument("paths", type=Path, nargs="*", help="Files or directories")
+    parser.add_argument(
+        "--workers", type=int, help="Number of worker processes (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Do not use the validation result cache"
+    )
+    parser.add_argument(
+        "--prune-cache",
+        type=float,
+        metavar="DAYS",
+        help="Remove cached results not used for DAYS days",
+    )
+    parser.add_argument(
+        "--max-errors",
+        type=int,
+        help="Maximum number of errors per validation step (0: no limit)",
+    )
+    parser.add_argument(
+        "--fail-fast", action="store_true", help="Stop at the first failing schema"
+    )
+    parser.add_argument(
+        "--aggregate-errors",
+        action="store_true",
+        help="Report errors with the same message only once",
+    )
+    parser.add_argument(
+        "--report", type=Path, metavar="FILE", help="Write all results to a JSONL report"
+    )
+    args = parser.parse_args(argv)
+    if args.prune_cache is not None:
+        removed = ResultCache().prune(args.prune_cache * 86400)
+        print(f"Removed {removed} cached results.")
+    if not args.paths:
+        return 0
+
+    options = get_validation_options()
+    if args.max_errors is not None:
+        options = dataclasses.replace(options, max_errors=args.max_errors)
+    if args.fail_fast:
+        options = dataclasses.replace(options, fail_fast=True)
+    if args.aggregate_errors:
+        options = dataclasses.replace(options, aggregate_errors=True)
+    cache = None if args.no_cache else ResultCache()
+    report = ReportWriter(args.report) if args.report else None
+    invalid = 0
+    total = 0
+    try:
+        for result in validate_many(
+            find_files(args.paths), args.workers, cache=cache, options=options
+        ):
+            total += 1
+            if report is not None:
+                report.write(result)
+            if not result.is_valid:
+                invalid += 1
+                print(f"{result.file_path}: invalid")
+                for error in result.get_errors():
+                    print(f"  {error}")
+    finally:
+        if report is not None:
+            report.close()
+    print(f"{total} files validated, {invalid} invalid.")
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
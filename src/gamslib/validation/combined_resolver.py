@@ -16,30 +16,200 @@ returned.
 The `get_cache_path` method generates a unique cache file path for the given URL. The cache
 filename is derived from a hash of the URL to ensure uniqueness and avoid issues with special
 characters.
+
+Remote schemas are downloaded via a pooled HTTP session shared by all resolvers
+(`get_session()`), so connections to a schema host are reused. The ETag and
+Last-Modified headers of a download are stored next to the cached file. Cached files
+older than `general.schema_cache_ttl` seconds are revalidated with a conditional request;
+if the schema host cannot be reached, the stale file is used. Failed downloads are
+remembered for `general.schema_negative_cache_ttl` seconds: an unreachable host is not
+contacted again during this time, a URL which returned an HTTP error is not requested again.
+Failures are stored in `failures.json` in the cache directory, so they are shared by all
+processes using the same cache. Cached files and metadata are written atomically.
+
+All schema validators of a process share one resolver (`get_resolver()`). The XML catalog
+is activated only once, catalog lookups are memoised and the content of catalog, cache and
+local schema files is kept in a bounded in-memory LRU cache (`read_file()`), which is
+shared by all resolvers.
 """
 
+import functools
 import hashlib
+import json
 import logging
 import os
 import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import ClassVar, Optional
 from urllib.parse import urlparse
 from urllib.request import url2pathname
 
 import gams_xml_catalog
 import requests
 from lxml import etree as ET
+from requests.adapters import HTTPAdapter
 
 from gamslib.projectconfiguration import (
     MissingConfigurationException,
     get_configuration,
 )
+from gamslib.validation.compositeschema import is_composite_uri, make_wrapper_schema
 
 # pylint: disable=c-extension-no-member, too-many-branches, too-many-return-statements, too-many-nested-blocks
 
 logger = logging.getLogger(__name__)
 
+# Timeout (in seconds) for schema downloads
+DOWNLOAD_TIMEOUT = 30
+# Number of pooled connections per host
+POOL_SIZE = 16
+# Defaults (in seconds) if not set in the configuration
+DEFAULT_CACHE_TTL = 604_800
+DEFAULT_NEGATIVE_CACHE_TTL = 300
+# Name of the file in the cache directory which stores recently failed downloads
+FAILURES_FILE = "failures.json"
+# Maximum number of bytes of schema files kept in memory
+CONTENT_CACHE_SIZE = 64_000_000
+# Environment variables which influence the settings of a resolver
+SETTINGS_ENVIRONMENT = (
+    "GAMSCFG_PROJECT_TOML",
+    "GAMSLIB_SAFE_XML_HOSTS",
+    "GAMSLIB_SCHEMA_CACHE_TTL",
+    "GAMSLIB_SCHEMA_NEGATIVE_CACHE_TTL",
+)
+
+_resolvers: dict[tuple, "CombinedCatalogResolver"] = {}
+_resolvers_lock = threading.Lock()
+
+
+@functools.cache
+def get_session() -> requests.Session:
+    "Return the pooled HTTP session shared by all resolvers."
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_resolver() -> "CombinedCatalogResolver":
+    """Return the resolver shared by all schema validators of this process.
+
+    The resolver is created on first use. A new one is only created if the working
+    directory (which contains the cache directory) or one of the environment variables
+    in SETTINGS_ENVIRONMENT has changed.
+    """
+    key = (os.getcwd(), *(os.environ.get(name) for name in SETTINGS_ENVIRONMENT))
+    with _resolvers_lock:
+        resolver = _resolvers.get(key)
+        if resolver is None:
+            resolver = _resolvers[key] = CombinedCatalogResolver()
+        return resolver
+
+
+class _ContentCache:
+    """A thread-safe LRU cache of file contents with a byte budget (CONTENT_CACHE_SIZE).
+
+    Entries are keyed by path and validated against the modification time and size
+    of the file, so changed files are read again.
+    """
+
+    def __init__(self):
+        self.entries: OrderedDict[str, tuple[int, int, bytes]] = OrderedDict()
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def read(self, path: Path | str) -> bytes:
+        "Return the content of path, from the cache if the file is unchanged."
+        path = str(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self.entries.move_to_end(path)
+                return entry[2]
+        content = Path(path).read_bytes()
+        if len(content) > CONTENT_CACHE_SIZE:
+            return content
+        with self._lock:
+            old_entry = self.entries.pop(path, None)
+            if old_entry is not None:
+                self.size -= len(old_entry[2])
+            self.entries[path] = (stat.st_mtime_ns, stat.st_size, content)
+            self.size += len(content)
+            while self.size > CONTENT_CACHE_SIZE:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+        return content
+
+
+_contents = _ContentCache()
+
+
+def read_file(path: Path | str) -> bytes:
+    """Return the content of a file via a bounded in-memory LRU cache.
+
+    Entries are keyed by path and validated against the modification time and size
+    of the file, so changed files are read again.
+    """
+    return _contents.read(path)
+
+
+def atomic_write(path: Path, data: bytes) -> bool:
+    """Write data to path atomically, so other processes never see partial files.
+
+    The data is written to a temporary file in the same directory, which then replaces
+    path. Used by all on-disk caches of the validation package. Errors are logged.
+
+    Returns:
+        bool: True if the file has been written.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    except OSError as exp:
+        logger.warning("Unable to write cache file %s: %s", path, exp)
+        return False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except OSError as exp:
+        logger.warning("Unable to write cache file %s: %s", path, exp)
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        return False
+    return True
+
+
+@functools.cache
+def _activate_catalog() -> None:
+    "Activate the XML catalog (once per process)."
+    gams_xml_catalog.activate_catalog()
+
+
+@functools.lru_cache(maxsize=4096)
+def _lookup_catalog(url: str) -> Path | None:
+    "Resolve URL via gams_xml_catalog and return an existing local file path (memoised)."
+    path = gams_xml_catalog.resolve_uri_to_path(url)
+    if path is None:
+        return None
+
+    if path.is_file():
+        return path
+
+    # Some catalog entries point to .../3.x.y/<name>.xsd while files live in
+    # .../3.x.y/base/<name>.xsd. Try this fallback before giving up.
+    candidate = path.parent / "base" / path.name
+    if candidate.is_file():
+        return candidate
+
+    return None
+
 
 class CombinedCatalogResolver(ET.Resolver):
     """Custom XML resource resolver.
@@ -49,10 +219,20 @@ class CombinedCatalogResolver(ET.Resolver):
     and local caching.
     """
 
+    # Recently failed downloads (shared by all resolvers of the process):
+    # URL or "host:<hostname>" -> (time of the failure, error message).
+    # Resolvers with a cache directory also share them via FAILURES_FILE.
+    _failures: ClassVar[dict[str, tuple[float, str]]] = {}
+    _failures_lock = threading.Lock()
+    # FAILURES_FILE paths of all resolvers created in this process
+    _failure_files: ClassVar[set[Path]] = set()
+
     def __init__(
         self,
         allowed_hosts: Optional[list[str]] = None,
         cache_dir: str | None = ".schema_cache",
+        cache_ttl: int | None = None,
+        negative_cache_ttl: int | None = None,
     ):
         """
         Create a Resolver instance.
@@ -61,12 +241,20 @@ class CombinedCatalogResolver(ET.Resolver):
             allowed_hosts (Optional[list[str]], optional): _description_. Defaults to None.
             cache_dir (str | None, optional): _description_.
                     Defaults to ".schema_cache". Set to None to disable caching.
+            cache_ttl (int | None, optional): Seconds after which cached files are revalidated.
+                    0 means never. Defaults to the `general.schema_cache_ttl` config value.
+            negative_cache_ttl (int | None, optional): Seconds during which failed downloads
+                    are not retried. Defaults to the `general.schema_negative_cache_ttl`
+                    config value.
         """
-        gams_xml_catalog.activate_catalog()
+        _activate_catalog()
         self._set_allowed_hosts(allowed_hosts)
+        self._set_cache_ttls(cache_ttl, negative_cache_ttl)
         self.cache_dir = cache_dir
         if cache_dir is not None:
             os.makedirs(self.cache_dir, exist_ok=True)
+            with self._failures_lock:
+                self._failure_files.add(Path(cache_dir, FAILURES_FILE).resolve())
 
     def get_cache_path(self, url: str) -> str | None:
         """Generate a unique cache file path for the given URL.
@@ -107,7 +295,7 @@ class CombinedCatalogResolver(ET.Resolver):
         if catalog_path is not None:
             # Keep base_url=url so downstream relative imports remain URL-based
             # and avoid duplicate imports caused by mixed URL/file identities.
-            result = self.resolve_string(catalog_path.read_bytes(), context, base_url=url)
+            result = self.resolve_string(read_file(catalog_path), context, base_url=url)
         else:
             # Resolve local file paths/URIs directly.
             parsed = urlparse(url)
@@ -115,25 +303,14 @@ class CombinedCatalogResolver(ET.Resolver):
             if os.path.isfile(local_path):
                 result = self.resolve_filename(local_path, context)
             elif self._is_allowed_host(url):
-                cache_path = self.get_cache_path(url)
-                if cache_path is not None and Path(cache_path).is_file():
-                    result = self.resolve_string(
-                        Path(cache_path).read_bytes(), context, base_url=url
+                try:
+                    result = self.resolve_string(self._download(url), context, base_url=url)
+                except Exception as exp:
+                    logger.warning(
+                        "Something unexpected happened while loading schema %s: %s",
+                        url,
+                        exp,
                     )
-                else:
-                    try:
-                        response = requests.get(url, timeout=30)
-                        response.raise_for_status()
-                        if cache_path is not None:
-                            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
-                            Path(cache_path).write_bytes(response.content)
-                        result = self.resolve_string(response.content, context, base_url=url)
-                    except Exception as exp:
-                        logger.warning(
-                            "Something unexpected happened while loading schema %s: %s",
-                            url,
-                            exp,
-                        )
 
         return result
 
@@ -145,56 +322,229 @@ class CombinedCatalogResolver(ET.Resolver):
 
         This is a hack for non XML based schema formats (eg. RNC), where we cannot use the
         resolver.resolve mechanism directly, but still want to benefit from the catalog and caching.
+
+        For a composite URI, the generated wrapper schema is returned
+        (see compositeschema.py).
         """
-        cache_path = Path(self.get_cache_path(schema_uri))
-        if cache_path is not None and cache_path.is_file():
-            return cache_path.read_bytes()
+        if is_composite_uri(schema_uri):
+            return make_wrapper_schema(schema_uri)
+        local_file = self._find_local_file(schema_uri)
+        if local_file is not None:
+            return read_file(local_file)
+
+        if self._is_allowed_host(
+            schema_uri
+        ):  # or self._is_allowed_remote_schema_uri(schema_uri):
+            return self._download(schema_uri)
+
+        raise FileNotFoundError(f"Cannot load schema '{schema_uri}'.")
+
+    def get_source_state(self, schema_uri: str) -> dict | None:
+        """Return the state of the file get_content() would read for schema_uri.
+
+        The state contains the modification time and size of the local, catalog or
+        cached file and, for remote schemas, the ETag and fetch time of the cached copy.
+        If the state is unchanged, the content is unchanged, too, so it does not have
+        to be read and hashed again.
 
+        Returns:
+            dict | None: The state or None if there is no such file, the cached copy
+                must be revalidated or schema_uri is a composite URI.
+        """
+        if is_composite_uri(schema_uri):
+            return None
+        local_file = self._find_local_file(schema_uri)
+        metadata = None
+        if local_file is None:
+            cache_path = self.get_cache_path(schema_uri)
+            if cache_path is None or not self._is_allowed_host(schema_uri):
+                return None
+            local_file = Path(cache_path)
+            if not local_file.is_file():
+                return None
+            metadata = self._read_metadata(local_file)
+            if self._is_expired(local_file, metadata):
+                return None
+        try:
+            stat = os.stat(local_file)
+        except OSError:
+            return None
+        state = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        if metadata is not None:
+            state["etag"] = metadata.get("etag")
+            state["fetched"] = metadata.get("fetched")
+        return state
+
+    def _find_local_file(self, schema_uri: str) -> Path | str | None:
+        "Return the local file or catalog file for schema_uri or None if it is remote."
         parsed = urlparse(schema_uri)
         if parsed.scheme == "file":
             schema_uri = url2pathname(parsed.path)
-
         if os.path.isfile(schema_uri):
-            return Path(schema_uri).read_bytes()
+            return schema_uri
+        return self._resolve_catalog_path(schema_uri)
 
-        catalog_path = self._resolve_catalog_path(schema_uri)
-        if catalog_path is not None:
-            return catalog_path.read_bytes()
+    @classmethod
+    def clear_failures(cls) -> None:
+        """Forget all failed downloads, so that they are retried on next access.
 
-        if self._is_allowed_host(
-            schema_uri
-        ):  # or self._is_allowed_remote_schema_uri(schema_uri):
-            resp = requests.get(schema_uri, timeout=30)
-            resp.raise_for_status()
-            content = resp.content
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
-            cache_path.write_bytes(content)
-            return content
+        This also removes the failures files of all resolvers created in this process.
+        """
+        with cls._failures_lock:
+            cls._failures.clear()
+            for path in cls._failure_files:
+                path.unlink(missing_ok=True)
 
-        raise FileNotFoundError(f"Cannot load schema '{schema_uri}'.")
+    def _download(self, url: str) -> bytes:
+        """Return the content of a remote URL, using and updating the cache.
+
+        A cached file is returned as long as it is younger than cache_ttl. Older files are
+        revalidated with a conditional request. If the download fails, a stale cached file
+        is returned if available.
+
+        Raises:
+            requests.RequestException: If the download fails and nothing is cached.
+            FileNotFoundError: If the URL (or its host) failed recently and nothing is cached.
+        """
+        cache_path = self.get_cache_path(url)
+        cache_file = Path(cache_path) if cache_path is not None else None
+        cached = cache_file is not None and cache_file.is_file()
+        metadata = self._read_metadata(cache_file) if cached else {}
+        if cached and not self._is_expired(cache_file, metadata):
+            return read_file(cache_file)
+
+        failure = self._get_failure(url)
+        if failure is not None:
+            if cached:
+                return read_file(cache_file)
+            raise FileNotFoundError(
+                f"Cannot load schema '{url}': {failure} (failed recently, not retried)."
+            )
+
+        headers = {}
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+        try:
+            response = get_session().get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT)
+            if cached and response.status_code == requests.codes.not_modified:
+                self._write_metadata(cache_file, url, response.headers, metadata)
+                return read_file(cache_file)
+            response.raise_for_status()
+        except requests.RequestException as exp:
+            # an unreachable host is not contacted again, other errors only affect the URL
+            if isinstance(exp, (requests.ConnectionError, requests.Timeout)):
+                self._add_failure(f"host:{urlparse(url).hostname}", exp)
+            else:
+                self._add_failure(url, exp)
+            if cached:
+                logger.warning("Cannot revalidate schema %s, using cached file: %s", url, exp)
+                return read_file(cache_file)
+            raise
+
+        content = response.content
+        if cache_file is not None:
+            atomic_write(cache_file, content)
+            self._write_metadata(cache_file, url, response.headers)
+        return content
+
+    def _is_expired(self, cache_file: Path, metadata: dict) -> bool:
+        "Return True if cache_file must be revalidated."
+        if not self.cache_ttl:
+            return False
+        fetched = metadata.get("fetched", cache_file.stat().st_mtime)
+        return time.time() - fetched > self.cache_ttl
+
+    @staticmethod
+    def _read_metadata(cache_file: Path) -> dict:
+        "Return the stored metadata (etag, last_modified, fetched) of a cached file."
+        try:
+            return json.loads(Path(f"{cache_file}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_metadata(cache_file: Path, url: str, headers, old_metadata=None) -> None:
+        "Store ETag and Last-Modified from headers and the current time next to cache_file."
+        old_metadata = old_metadata or {}
+        metadata = {
+            "url": url,
+            "etag": headers.get("ETag", old_metadata.get("etag")),
+            "last_modified": headers.get("Last-Modified", old_metadata.get("last_modified")),
+            "fetched": time.time(),
+        }
+        atomic_write(Path(f"{cache_file}.json"), json.dumps(metadata).encode("utf-8"))
+
+    def _get_failure(self, url: str) -> str | None:
+        "Return the error message if url or its host failed recently, else None."
+        now = time.time()
+        with self._failures_lock:
+            stored = self._read_failures()
+            for key in (url, f"host:{urlparse(url).hostname}"):
+                failure = max(
+                    (f for f in (self._failures.get(key), stored.get(key)) if f is not None),
+                    default=None,
+                )
+                if failure is None:
+                    continue
+                if now - failure[0] < self.negative_cache_ttl:
+                    return failure[1]
+                self._failures.pop(key, None)
+        return None
+
+    def _add_failure(self, key: str, error: Exception) -> None:
+        """Remember a failed download for negative_cache_ttl seconds.
+
+        The failure is added to the failures file in the cache directory. Concurrent
+        updates by other processes may get lost, in which case the URL is just retried.
+        """
+        if not self.negative_cache_ttl:
+            return
+        failure = (time.time(), f"{type(error).__name__}: {error!s}")
+        with self._failures_lock:
+            self._failures[key] = failure
+            if self.cache_dir is None:
+                return
+            failures = {
+                name: stored
+                for name, stored in self._read_failures().items()
+                if failure[0] - stored[0] < self.negative_cache_ttl
+            }
+            failures[key] = failure
+            atomic_write(
+                Path(self.cache_dir, FAILURES_FILE), json.dumps(failures).encode("utf-8")
+            )
+
+    def _read_failures(self) -> dict[str, tuple[float, str]]:
+        "Return the failures stored in the cache directory."
+        if self.cache_dir is None:
+            return {}
+        try:
+            data = json.loads(Path(self.cache_dir, FAILURES_FILE).read_text(encoding="utf-8"))
+            return {key: (float(when), str(message)) for key, (when, message) in data.items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+    @property
+    def allowed_hosts(self) -> list[str]:
+        "The hosts from which schemas may be downloaded."
+        return self._allowed_hosts
+
+    @allowed_hosts.setter
+    def allowed_hosts(self, allowed_hosts: list[str]) -> None:
+        self._allowed_hosts = allowed_hosts
+        self._normalized_hosts = frozenset(entry.lower() for entry in allowed_hosts)
 
     def _is_allowed_host(self, url: str) -> bool:
         """Check if the host of the given URL is in the allowed list."""
         uri = urlparse(url)
         host = (uri.hostname or "").lower()
-        return host in {entry.lower() for entry in self.allowed_hosts}
+        return host in self._normalized_hosts
 
     def _resolve_catalog_path(self, url: str) -> Path | None:
         """Resolve URL via gams_xml_catalog and return an existing local file path."""
-        path = gams_xml_catalog.resolve_uri_to_path(url)
-        if path is None:
-            return None
-
-        if path.is_file():
-            return path
-
-        # Some catalog entries point to .../3.x.y/<name>.xsd while files live in
-        # .../3.x.y/base/<name>.xsd. Try this fallback before giving up.
-        candidate = path.parent / "base" / path.name
-        if candidate.is_file():
-            return candidate
-
-        return None
+        return _lookup_catalog(url)
 
     def _set_allowed_hosts(self, allowed_hosts: Optional[list[str]] = None) -> None:
         """Set the list of allowed hosts from the project configuration or environment variable.
@@ -221,3 +571,30 @@ class CombinedCatalogResolver(ET.Resolver):
                     r"\s*,\s*", os.environ.get("GAMSLIB_SAFE_XML_HOSTS", "")
                 )
                 self.allowed_hosts = [entry for entry in allowed_hosts if entry]
+
+    def _set_cache_ttls(
+        self, cache_ttl: int | None = None, negative_cache_ttl: int | None = None
+    ) -> None:
+        """Set the cache TTLs from the arguments or the project configuration.
+
+        If there is no configuration, the `GAMSLIB_SCHEMA_CACHE_TTL` and
+        `GAMSLIB_SCHEMA_NEGATIVE_CACHE_TTL` environment variables or the defaults are used.
+        """
+        if cache_ttl is None or negative_cache_ttl is None:
+            try:
+                config = get_configuration(os.environ.get("GAMSCFG_PROJECT_TOML"))
+                default_ttl = config.general.schema_cache_ttl
+                default_negative_ttl = config.general.schema_negative_cache_ttl
+            except MissingConfigurationException:
+                default_ttl = int(
+                    os.environ.get("GAMSLIB_SCHEMA_CACHE_TTL", DEFAULT_CACHE_TTL)
+                )
+                default_negative_ttl = int(
+                    os.environ.get(
+                        "GAMSLIB_SCHEMA_NEGATIVE_CACHE_TTL", DEFAULT_NEGATIVE_CACHE_TTL
+                    )
+                )
+        self.cache_ttl = default_ttl if cache_ttl is None else cache_ttl
+        self.negative_cache_ttl = (
+            default_negative_ttl if negative_cache_ttl is None else negative_cache_ttl
+        )
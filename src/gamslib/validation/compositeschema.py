@@ -0,0 +1,77 @@
+"""Composite XML Schemas for documents which reference several schemas.
+
+Documents like METS files with embedded MODS and PREMIS records reference one XML
+Schema per namespace in the `xsi:schemaLocation` attribute of their root element.
+Validating such a document against each schema separately compiles and runs several
+large schemas per file.
+
+Instead, all namespace/location pairs of the root element are combined into one
+synthetic wrapper schema, which imports every referenced namespace (and includes the
+schema referenced by `xsi:noNamespaceSchemaLocation`). The document is then validated
+in a single pass. The wrapper is identified by a composite URI made from the sorted
+set of pairs:
+
+```
+xsd-composite:?http://www.loc.gov/METS/=http://www.loc.gov/mets/mets.xsd&http://www.loc.gov/mods/v3=...
+```
+
+so all documents referencing the same schemas share one compiled schema in the
+SchemaProvider cache. The CombinedCatalogResolver returns the wrapper schema as
+content of a composite URI, so composite schemas are compiled, bundled, prefetched
+and fingerprinted like any other XML Schema.
+"""
+
+# pylint: disable=c-extension-no-member
+from collections.abc import Iterable
+from urllib.parse import parse_qsl, urlencode
+
+from lxml import etree as ET
+
+COMPOSITE_SCHEME = "xsd-composite"
+XSD_NAMESPACE = "http://www.w3.org/2001/XMLSchema"
+
+
+def make_composite_uri(locations: Iterable[tuple[str, str]]) -> str:
+    """Return the composite URI for (namespace, schema location) pairs.
+
+    Use an empty namespace for a `noNamespaceSchemaLocation`. The pairs are sorted
+    and duplicates are removed, so the same set of pairs always gives the same URI.
+    """
+    return f"{COMPOSITE_SCHEME}:?" + urlencode(sorted(set(locations)), safe=":/")
+
+
+def is_composite_uri(uri: str) -> bool:
+    "Return True if uri is a composite URI."
+    return uri.startswith(f"{COMPOSITE_SCHEME}:")
+
+
+def parse_composite_uri(uri: str) -> list[tuple[str, str]]:
+    """Return the (namespace, schema location) pairs of a composite URI.
+
+    Raises:
+        ValueError: If uri is not a composite URI.
+    """
+    if not is_composite_uri(uri):
+        raise ValueError(f"'{uri}' is not a composite schema URI")
+    query = uri[len(COMPOSITE_SCHEME) + 1 :].lstrip("?")
+    return parse_qsl(query, keep_blank_values=True)
+
+
+def make_wrapper_schema(uri: str) -> bytes:
+    """Return the wrapper schema for a composite URI.
+
+    The wrapper imports each namespace from its schema location. A schema without
+    namespace is included.
+    """
+    root = ET.Element(f"{{{XSD_NAMESPACE}}}schema", nsmap={"xs": XSD_NAMESPACE})
+    for namespace, location in parse_composite_uri(uri):
+        if namespace:
+            ET.SubElement(
+                root,
+                f"{{{XSD_NAMESPACE}}}import",
+                namespace=namespace,
+                schemaLocation=location,
+            )
+        else:
+            ET.SubElement(root, f"{{{XSD_NAMESPACE}}}include", schemaLocation=location)
+    return ET.tostring(root, xml_declaration=True, encoding="utf-8")
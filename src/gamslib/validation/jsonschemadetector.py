@@ -0,0 +1,82 @@
+"""Provides functions to detect schema references in JSON files.
+
+A JSON document references its JSON schema via the `$schema` keyword of the top level
+object. For JSON Lines files, the first record is used. Relative references are
+resolved against the path of the JSON file.
+"""
+
+import io
+import json
+from collections.abc import Iterable
+from pathlib import Path
+from typing import BinaryIO
+
+from gamslib.formatdetect.formatinfo import FormatInfo, SubType
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.xmlschemadetector import join_reference_path
+
+
+def is_jsonl(file_path: Path, format_info: FormatInfo | None = None) -> bool:
+    "Return True if file_path is a JSON Lines file (by subtype or extension)."
+    if format_info is not None and format_info.subtype == SubType.JSONL:
+        return True
+    return file_path.suffix.lower() == ".jsonl"
+
+
+def read_first_record(file_path: Path | BinaryIO):
+    """Return the first (non-empty) record of a JSON Lines file or None.
+
+    file_path can also be a binary file object.
+
+    Raises:
+        json.JSONDecodeError: If the first record is not valid JSON.
+    """
+    if hasattr(file_path, "read"):
+        with io.TextIOWrapper(file_path, encoding="utf-8") as lines:
+            return _parse_first_line(lines)
+    with open(file_path, encoding="utf-8") as lines:
+        return _parse_first_line(lines)
+
+
+def _parse_first_line(lines: Iterable[str]):
+    "Return the first non-empty line of lines parsed as JSON or None."
+    for line in lines:
+        if line.strip():
+            return json.loads(line)
+    return None
+
+
+def detect_schemata(
+    file_path: Path, format_info: FormatInfo | None = None, document=None
+) -> list[SchemaInfo]:
+    """Return the JSON schema referenced in a JSON file.
+
+    Args:
+        file_path (Path): The JSON file.
+        format_info (FormatInfo | None): The format information of the file.
+        document: The parsed JSON document (for JSON Lines files: the first record).
+            If None, the file is parsed (only the first record of JSON Lines files).
+
+    Returns:
+        list[SchemaInfo]: A list with one SchemaInfo object or an empty list, if the
+            document does not reference a schema or is not valid JSON (syntax errors
+            are reported by the JSONValidator).
+    """
+    try:
+        if document is None and is_jsonl(file_path, format_info):
+            document = read_first_record(file_path)
+        elif document is None:
+            with open(file_path, "rb") as f:
+                document = json.load(f)
+    except ValueError:
+        return []
+    if not isinstance(document, dict):
+        return []
+    schema_reference = document.get("$schema")
+    if not isinstance(schema_reference, str) or not schema_reference:
+        return []
+    return [
+        SchemaInfo(
+            join_reference_path(file_path, schema_reference), schema_type=SchemaType.JSON
+        )
+    ]
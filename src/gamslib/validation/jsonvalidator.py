@@ -1,20 +1,375 @@
-"""Provides a JSON validator for validating JSON files against JSON schemas."""
+"""Provides a JSON validator for validating JSON files against JSON schemas.
 
+The schema of a document is taken from its `$schema` keyword (see
+jsonschemadetector.py) or passed explicitly. Schemas are loaded with the shared
+CombinedCatalogResolver, so the schema cache and the catalog are used like for XML
+schemas. The meta schemas of all JSON schema drafts are shipped with jsonschema and
+never downloaded.
+
+Compiling a schema (checking it against its meta schema and building the validator)
+happens only once per schema: JSONSchemaValidator objects are kept in the SchemaCache
+of the SchemaProvider, so they share the byte budget with the compiled XML schemas.
+
+JSON Lines files are validated record by record in a single streaming pass. Files
+with a `.jsonl` extension or the JSON Lines subtype are never loaded into memory as a
+whole. If the format of a file is unknown, it is treated as JSON Lines if parsing it as
+JSON fails after the first value. Errors are prefixed with the line number.
+"""
+
+import io
+import json
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional
 
-from gamslib.validation.schemainfo import SchemaInfo
-from gamslib.validation.validationresult import ValidationResult
+from jsonschema import exceptions as jsonschema_exceptions
+from jsonschema import validators
+from jsonschema_specifications import REGISTRY as SPECIFICATIONS
+from referencing import Registry, Resource
+from referencing.exceptions import NoSuchResource, Unresolvable
+from referencing.jsonschema import DRAFT202012
+
+from gamslib.formatdetect.formatinfo import FormatInfo
+from gamslib.validation.combined_resolver import CombinedCatalogResolver, get_resolver
+from gamslib.validation.jsonschemadetector import is_jsonl
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import (
+    ErrorCollector,
+    ValidationOptions,
+    message_template,
+)
+from gamslib.validation.validationresult import ValidationResult, ValidationSubResult
 from gamslib.validation.validator import Validator, ValidatorFactory
+from gamslib.validation.xmlvalidator import SchemaProvider
+
+
+def load_json_schema(
+    schema_uri: str, resolver: CombinedCatalogResolver | None = None
+) -> dict | bool:
+    """Return the parsed JSON schema from schema_uri.
+
+    Meta schemas are taken from jsonschema_specifications, all other schemas are
+    loaded via the resolver.
+    """
+    for uri in (schema_uri, schema_uri.rstrip("#")):
+        try:
+            return SPECIFICATIONS.contents(uri)
+        except NoSuchResource:
+            pass
+    resolver = resolver or get_resolver()
+    return json.loads(resolver.get_content(schema_uri))
+
+
+class JSONSchemaValidator:
+    """A compiled JSON schema.
+
+    Like the XML SchemaValidator classes, a JSONSchemaValidator keeps errors
+    which occurred while loading or checking the schema and returns them as result
+    of each validation.
+    """
+
+    validator_name = "JSON Schema Validator"
+
+    def __init__(self, schema_uri: str):
+        self.schema_uri: str = schema_uri
+        self.resolver = get_resolver()
+        self.schema_validator = None
+        self._creation_error: ValidationSubResult | None = None
+        try:
+            self.schema_validator = self._make_validator(schema_uri)
+        except jsonschema_exceptions.SchemaError as exp:
+            self._creation_error = self._make_creation_error(
+                f"{exp.json_path}: {exp.message}"
+            )
+        except Exception as exp:  # pylint: disable=broad-exception-caught
+            self._creation_error = self._make_creation_error(f"{exp!s}")
+
+    def _make_validator(self, schema_uri: str):
+        "Load and check the schema and return a jsonschema validator object."
+        schema = load_json_schema(schema_uri, self.resolver)
+        validator_cls = validators.validator_for(
+            schema, default=validators.Draft202012Validator
+        )
+        validator_cls.check_schema(schema)
+        if isinstance(schema, dict):
+            # make relative references in the schema resolvable
+            id_keyword = (
+                "id"
+                if validator_cls in (validators.Draft3Validator, validators.Draft4Validator)
+                else "$id"
+            )
+            if id_keyword not in schema:
+                schema = {**schema, id_keyword: schema_uri}
+
+        def retrieve(uri: str) -> Resource:
+            return Resource.from_contents(
+                load_json_schema(uri, self.resolver), default_specification=DRAFT202012
+            )
+
+        return validator_cls(
+            schema,
+            registry=Registry(retrieve=retrieve),
+            format_checker=validator_cls.FORMAT_CHECKER,
+        )
+
+    def _make_creation_error(self, error: str) -> ValidationSubResult:
+        "Return the result used for all validations if the schema is not usable."
+        return ValidationSubResult(
+            False,
+            schema_uri=self.schema_uri,
+            validator_name=self.validator_name,
+            message=f"Unable to create the validator for '{self.schema_uri}'",
+            errors=[error],
+        )
+
+    @property
+    def creation_error(self) -> ValidationSubResult | None:
+        "The result for all validations if the schema could not be loaded or is invalid."
+        return self._creation_error
+
+    def collect_errors(self, instance, collector: ErrorCollector, prefix: str = ""):
+        """Add the errors of instance to collector.
+
+        Errors are strings like '$.name: 1 is not of type ...', prefixed with prefix.
+        """
+        try:
+            for error in self.schema_validator.iter_errors(instance):
+                collector.add(
+                    f"{prefix}{error.json_path}: {error.message}",
+                    template=message_template(error.message),
+                    location=f"{prefix}{error.json_path}",
+                )
+        except Unresolvable as exp:
+            collector.add(f"{prefix}Unresolvable reference: {exp!s}")
+
+    def make_result(self, errors: list[str]) -> ValidationSubResult:
+        "Return the ValidationSubResult for a validation which produced errors."
+        if self._creation_error is not None:
+            return self._creation_error
+        if errors:
+            return ValidationSubResult(
+                False,
+                self.validator_name,
+                schema_uri=self.schema_uri,
+                message=f"Document does not validate against JSON schema {self.schema_uri}",
+                errors=errors,
+            )
+        return ValidationSubResult(
+            True,
+            self.validator_name,
+            schema_uri=self.schema_uri,
+            message=f"Document validates against JSON schema {self.schema_uri}",
+        )
+
+    def validate(
+        self, document, options: ValidationOptions | None = None
+    ) -> ValidationSubResult:
+        "Validate a parsed JSON document against the schema."
+        if self._creation_error is not None:
+            return self._creation_error
+        collector = ErrorCollector(options)
+        self.collect_errors(document, collector)
+        return self.make_result(collector.get_errors())
+
+
+def get_json_schemavalidator(schema_uri: str) -> JSONSchemaValidator:
+    "Return the (cached) JSONSchemaValidator for schema_uri."
+    return SchemaProvider.get_cache().get(
+        (SchemaType.JSON, schema_uri), lambda: JSONSchemaValidator(schema_uri)
+    )
 
 
 @ValidatorFactory.register("application/json")
 @ValidatorFactory.register("application/ld+json")
+@ValidatorFactory.register("application/schema+json")
 class JSONValidator(Validator):
-    """Validator for JSON files."""
+    """Validator for JSON and JSON Lines files."""
 
     def validate(
         self, file_path: Path, schemata: Optional[list[SchemaInfo]] = None
     ) -> ValidationResult:
-        "Validate a JSON file against a schema."
-        raise NotImplementedError("JSON validation not implemented yet.")
+        "Validate a JSON file against a list of JSON schemas."
+        return self.validate_context(ValidationContext(file_path), schemata)
+
+    def validate_context(
+        self, context: ValidationContext, schemata: Optional[list[SchemaInfo]] = None
+    ) -> ValidationResult:
+        """Validate the JSON file of a ValidationContext against a list of JSON schemas.
+
+        The document parsed by the context is used for all schemas. JSON Lines
+        files are validated record by record. Errors are limited according to
+        context.options.
+
+        Args:
+            context (ValidationContext): The context of the JSON file to be validated.
+            schemata (list of SchemaInfo objects): The schemas to validate against.
+
+        Returns:
+            ValidationResult: A ValidationResult object
+        """
+        file_path = context.file_path
+        result = ValidationResult(file_path)
+        schemata = schemata or []
+        schema_validators = self._get_schema_validators(schemata, result)
+
+        document = None
+        format_info = self._get_format_info(context)
+        jsonl = is_jsonl(file_path, format_info)
+        if not jsonl:
+            try:
+                document = context.json_document
+            except json.JSONDecodeError as exp:
+                # if the format is unknown, a JSON Lines file without .jsonl extension
+                # fails after the first record
+                jsonl = exp.msg == "Extra data" and (
+                    format_info is None or format_info.subtype is None
+                )
+                if not jsonl:
+                    result.add_subresult(
+                        self._make_syntax_error_result(file_path, [f"{exp!s}"])
+                    )
+                    return result  # validating does not make sense
+        if jsonl:
+            subresults = self._validate_jsonl(context, schema_validators, result)
+        else:
+            subresults = []
+            for validator in schema_validators:
+                subresults.append(validator.validate(document, context.options))
+                if context.options.fail_fast and not subresults[-1].is_valid:
+                    break
+
+        if not schemata:
+            result.add_subresult(
+                ValidationSubResult(
+                    True,
+                    "JSON Validator",
+                    message="Document has no schemas to validate against",
+                    warnings=[f"Document '{file_path}' has no schemas"],
+                )
+            )
+        for subresult in subresults:
+            result.add_subresult(subresult)
+        return result
+
+    @staticmethod
+    def _get_schema_validators(
+        schemata: list[SchemaInfo], result: ValidationResult
+    ) -> list[JSONSchemaValidator]:
+        "Return the validators for all JSON schemas, other schemas are reported in result."
+        schema_validators = []
+        for schema_info in schemata:
+            if schema_info.schema_type != SchemaType.JSON:
+                result.add_subresult(
+                    ValidationSubResult(
+                        False,
+                        JSONSchemaValidator.validator_name,
+                        schema_uri=schema_info.schema_uri,
+                        message=(
+                            f"Schema '{schema_info.schema_uri}' is not a JSON schema "
+                            f"({schema_info.schema_type})"
+                        ),
+                        errors=[f"Unsupported schema type: {schema_info.schema_type}"],
+                    )
+                )
+            else:
+                schema_validators.append(
+                    get_json_schemavalidator(schema_info.schema_uri)
+                )
+        return schema_validators
+
+    def _validate_jsonl(
+        self,
+        context: ValidationContext,
+        schema_validators: list[JSONSchemaValidator],
+        result: ValidationResult,
+    ) -> list[ValidationSubResult]:
+        """Validate the JSON Lines file of context and return the schema subresults.
+
+        Syntax errors are added to result. If validation stopped at the first invalid
+        record (fail_fast), only the subresults of schemas with errors are returned.
+        """
+        with context.open() as source:
+            syntax_errors, errors = self._validate_lines(
+                source, schema_validators, context.options
+            )
+        if syntax_errors:
+            result.add_subresult(
+                self._make_syntax_error_result(context.file_path, syntax_errors)
+            )
+        subresults = [
+            validator.make_result(validator_errors)
+            for validator, validator_errors in zip(schema_validators, errors)
+        ]
+        if context.options.fail_fast and (syntax_errors or any(errors)):
+            subresults = [subresult for subresult in subresults if not subresult.is_valid]
+        return subresults
+
+    @staticmethod
+    def _get_format_info(context: ValidationContext) -> FormatInfo | None:
+        "Return the format of the file in context or None if it cannot be detected."
+        try:
+            return context.format_info
+        except ValueError:
+            # format detection fails for invalid JSON (and JSON Lines) files
+            return None
+
+    @staticmethod
+    def _validate_lines(
+        source: BinaryIO,
+        schema_validators: list[JSONSchemaValidator],
+        options: ValidationOptions,
+    ) -> tuple[list[str], list[list[str]]]:
+        """Validate each record of a JSON Lines document against all schema_validators.
+
+        A validator is not fed further records once its collector is full (unless
+        errors are aggregated), and reading stops when no collector takes more errors.
+        With options.fail_fast, reading stops after the first invalid record.
+
+        Returns:
+            tuple: The syntax errors and a list of errors for each schema validator.
+        """
+        syntax_errors = ErrorCollector(options)
+        collectors = [ErrorCollector(options) for _ in schema_validators]
+        usable = [
+            (validator, collector)
+            for validator, collector in zip(schema_validators, collectors)
+            if validator.creation_error is None
+        ]
+        with io.TextIOWrapper(source, encoding="utf-8") as lines:
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exp:
+                    syntax_errors.add(
+                        f"line {line_number}: {exp!s}",
+                        template=message_template(exp.msg),
+                        location=f"line {line_number}",
+                    )
+                else:
+                    for validator, collector in usable:
+                        validator.collect_errors(record, collector, f"line {line_number}: ")
+                if options.fail_fast and (
+                    syntax_errors.count or any(collector.count for collector in collectors)
+                ):
+                    break
+                if not options.aggregate_errors:
+                    usable = [item for item in usable if not item[1].is_full]
+                    if not usable and syntax_errors.is_full:
+                        break
+        return syntax_errors.get_errors(), [
+            collector.get_errors() for collector in collectors
+        ]
+
+    @staticmethod
+    def _make_syntax_error_result(
+        file_path: Path, errors: list[str]
+    ) -> ValidationSubResult:
+        "Return the ValidationSubResult for a file which is not valid JSON."
+        return ValidationSubResult(
+            False,
+            "JSON Wellformedness Validator",
+            message=f"JSON document '{file_path}' has syntax errors",
+            errors=[f"Syntax error: {error}" for error in errors],
+        )
@@ -1,18 +1,687 @@
-"""A validator for PDF files."""
+"""A validator for PDF files.
 
+The PDFValidator checks the structure of a PDF file, not its content:
+
+  - the file starts with a `%PDF-x.y` header and ends with `%%EOF`,
+  - `startxref` points at a cross-reference table or a cross-reference stream.
+    Earlier sections referenced by /Prev (incremental updates) and /XRefStm (hybrid
+    files) are read, too,
+  - the offsets in the cross-reference sections point at the objects they are given
+    for. If there are more objects than `general.pdf_offset_sample_size` (default
+    10000), an evenly spread sample of this size is checked, 0 means all objects,
+  - the trailer has a /Root entry, the root object is a /Catalog and its page tree
+    can be walked and contains /Count pages.
+
+The file is memory mapped, so PDFs of several GB (like digitised books) are never
+read into memory. Only cross-reference streams and the object streams needed to
+read the catalog and the page tree are decompressed; content streams are never
+decoded.
+"""
+
+import mmap
+import os
+import re
+import zlib
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional
 
+from gamslib.projectconfiguration import (
+    MissingConfigurationException,
+    get_configuration,
+)
 from gamslib.validation.schemainfo import SchemaInfo
-from gamslib.validation.validationresult import ValidationResult
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import ErrorCollector, message_template
+from gamslib.validation.validationresult import ValidationResult, ValidationSubResult
 from gamslib.validation.validator import Validator, ValidatorFactory
 
+# Default, if the sample size is neither configured nor set in the environment
+DEFAULT_OFFSET_SAMPLE_SIZE = 10_000
+
+VALIDATOR_NAME = "PDF Structure Validator"
+
+# The header is searched in the first, startxref and %%EOF in the last bytes
+HEADER_SEARCH_SIZE = 1024
+TRAILER_SEARCH_SIZE = 1024
+# Number of decompressed object streams kept while walking the page tree
+OBJECT_STREAM_CACHE_SIZE = 8
+
+# Kinds of cross-reference entries (the first field of a cross-reference stream entry)
+FREE_OBJECT = 0
+UNCOMPRESSED_OBJECT = 1
+COMPRESSED_OBJECT = 2
+# Number of fields of a cross-reference stream entry, given by the widths in /W
+XREF_FIELD_COUNT = 3
+# /Predictor values of 10 and above select a PNG predictor
+PNG_PREDICTOR_MIN = 10
+# PNG filter types, given as the first byte of each row
+PNG_NONE, PNG_SUB, PNG_UP, PNG_AVERAGE, PNG_PAETH = range(5)
+# Bytes which need special treatment in literal strings
+BACKSLASH, LEFT_PARENTHESIS, RIGHT_PARENTHESIS = b"\\()"
+
+_WS = rb"[\x00\t\n\x0c\r ]"
+_TOKEN_END = rb"(?=[\x00\t\n\x0c\r ()<>\[\]{}/%]|$)"
+WHITESPACE_PATTERN = re.compile(rb"(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)*")
+HEADER_PATTERN = re.compile(rb"%PDF-(\d\.\d)")
+STARTXREF_PATTERN = re.compile(rb"startxref" + _WS + rb"+(\d+)")
+NUMBER_PATTERN = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+REFERENCE_PATTERN = re.compile(_WS + rb"+(\d+)" + _WS + rb"+R" + _TOKEN_END)
+NAME_PATTERN = re.compile(rb"/([^\x00\t\n\x0c\r ()<>\[\]{}/%]*)")
+KEYWORD_PATTERN = re.compile(rb"[A-Za-z]+")
+OBJECT_HEADER_PATTERN = re.compile(
+    _WS + rb"*(\d+)" + _WS + rb"+(\d+)" + _WS + rb"+obj" + _TOKEN_END
+)
+SUBSECTION_PATTERN = re.compile(rb"(\d+)" + _WS + rb"+(\d+)")
+XREF_ENTRY_PATTERN = re.compile(_WS + rb"*(\d+)" + _WS + rb"+(\d+)" + _WS + rb"+([nf])")
+
+
+def get_offset_sample_size() -> int:
+    """Return the maximum number of object offsets checked per PDF file.
+
+    The value is taken from the project configuration. If there is no configuration,
+    the `GAMSLIB_PDF_OFFSET_SAMPLE_SIZE` environment variable or
+    DEFAULT_OFFSET_SAMPLE_SIZE is used. 0 means, that all offsets are checked.
+    """
+    try:
+        config = get_configuration(os.environ.get("GAMSCFG_PROJECT_TOML"))
+        return config.general.pdf_offset_sample_size
+    except MissingConfigurationException:
+        return int(
+            os.environ.get("GAMSLIB_PDF_OFFSET_SAMPLE_SIZE", DEFAULT_OFFSET_SAMPLE_SIZE)
+        )
+
+
+class PDFStructureError(Exception):
+    """Raised if the structure of a PDF file is broken and checking cannot go on."""
+
+
+class Name(str):
+    """A PDF name object (without the leading slash)."""
+
+
+class Reference(NamedTuple):
+    """An indirect reference like `12 0 R`."""
+
+    number: int
+    generation: int
+
+    def __str__(self):
+        return f"{self.number} {self.generation} R"
+
+
+class Stream(NamedTuple):
+    """A stream object: its dictionary and the offset of its data."""
+
+    dictionary: dict
+    start: int
+
+
+class XRefEntry(NamedTuple):
+    """An entry of a cross-reference section.
+
+    kind is FREE_OBJECT, UNCOMPRESSED_OBJECT for objects at offset `field2` with
+    generation `field3` or COMPRESSED_OBJECT for objects in object stream `field2`
+    at index `field3`.
+    """
+
+    kind: int
+    field2: int
+    field3: int
+
+
+class _Parser:
+    "Parse PDF objects from data (bytes or a mmap), starting at pos."
+
+    def __init__(self, data, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def skip_whitespace(self):
+        "Skip whitespace and comments."
+        self.pos = WHITESPACE_PATTERN.match(self.data, self.pos).end()
+
+    def startswith(self, token: bytes) -> bool:
+        "Return True if the data at the current position starts with token."
+        return self.data[self.pos : self.pos + len(token)] == token
+
+    def parse(self):
+        "Parse and return the object at the current position."
+        self.skip_whitespace()
+        data, pos = self.data, self.pos
+        if self.startswith(b"<<"):
+            return self._parse_dictionary()
+        if self.startswith(b"["):
+            return self._parse_array()
+        if self.startswith(b"/"):
+            match = NAME_PATTERN.match(data, pos)
+            self.pos = match.end()
+            return Name(match[1].decode("latin-1"))
+        if self.startswith(b"("):
+            return self._parse_literal_string()
+        if self.startswith(b"<"):
+            end = data.find(b">", pos)
+            if end < 0:
+                raise PDFStructureError(f"Unterminated hex string at offset {pos}")
+            self.pos = end + 1
+            return bytes(data[pos + 1 : end])
+        return self._parse_number_or_keyword()
+
+    def _parse_number_or_keyword(self):
+        data, pos = self.data, self.pos
+        match = NUMBER_PATTERN.match(data, pos)
+        if match:
+            self.pos = match.end()
+            if b"." in match[0]:
+                return float(match[0])
+            reference = REFERENCE_PATTERN.match(data, self.pos)
+            if reference:
+                self.pos = reference.end()
+                return Reference(int(match[0]), int(reference[1]))
+            return int(match[0])
+        match = KEYWORD_PATTERN.match(data, pos)
+        if match and match[0] in (b"true", b"false", b"null"):
+            self.pos = match.end()
+            return {b"true": True, b"false": False, b"null": None}[match[0]]
+        raise PDFStructureError(
+            f"Unexpected token at offset {pos}: {bytes(data[pos : pos + 20])!r}"
+        )
+
+    def _parse_dictionary(self) -> dict:
+        self.pos += 2
+        dictionary = {}
+        while True:
+            self.skip_whitespace()
+            if self.startswith(b">>"):
+                self.pos += 2
+                return dictionary
+            key = self.parse()
+            if not isinstance(key, Name):
+                raise PDFStructureError(
+                    f"Dictionary key at offset {self.pos} is not a name"
+                )
+            dictionary[key] = self.parse()
+
+    def _parse_array(self) -> list:
+        self.pos += 1
+        array = []
+        while True:
+            self.skip_whitespace()
+            if self.startswith(b"]"):
+                self.pos += 1
+                return array
+            if self.pos >= len(self.data):
+                raise PDFStructureError("Unterminated array")
+            array.append(self.parse())
+
+    def _parse_literal_string(self) -> bytes:
+        data, start = self.data, self.pos
+        depth, pos, end = 0, start, len(data)
+        while pos < end:
+            char = data[pos]
+            if char == BACKSLASH:
+                pos += 1
+            elif char == LEFT_PARENTHESIS:
+                depth += 1
+            elif char == RIGHT_PARENTHESIS:
+                depth -= 1
+                if depth == 0:
+                    self.pos = pos + 1
+                    return bytes(data[start + 1 : pos])
+            pos += 1
+        raise PDFStructureError(f"Unterminated string at offset {start}")
+
+
+def _undo_png_predictor(data: bytes, columns: int) -> bytes:
+    "Undo the PNG predictor (Predictor >= 10) for 1 byte per pixel."
+    row_length = columns + 1
+    previous = bytearray(columns)
+    output = bytearray()
+    for row_start in range(0, len(data) - columns, row_length):
+        filter_type = data[row_start]
+        row = bytearray(data[row_start + 1 : row_start + row_length])
+        if filter_type == PNG_SUB:
+            for i in range(1, len(row)):
+                row[i] = (row[i] + row[i - 1]) & 0xFF
+        elif filter_type == PNG_UP:
+            row = bytearray((a + b) & 0xFF for a, b in zip(row, previous))
+        elif filter_type == PNG_AVERAGE:
+            for i, value in enumerate(row):
+                left = row[i - 1] if i else 0
+                row[i] = (value + (left + previous[i]) // 2) & 0xFF
+        elif filter_type == PNG_PAETH:
+            for i, value in enumerate(row):
+                left = row[i - 1] if i else 0
+                up_left = previous[i - 1] if i else 0
+                estimate = left + previous[i] - up_left
+                distances = (
+                    abs(estimate - left),
+                    abs(estimate - previous[i]),
+                    abs(estimate - up_left),
+                )
+                predictor = (left, previous[i], up_left)[distances.index(min(distances))]
+                row[i] = (value + predictor) & 0xFF
+        elif filter_type != PNG_NONE:
+            raise PDFStructureError(f"Unknown PNG predictor {filter_type}")
+        output += row
+        previous = row
+    return bytes(output)
+
+
+class PDFStructureChecker:
+    """Check the structure of a memory mapped PDF file.
+
+    ```python
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        checker = PDFStructureChecker(data)
+        errors = list(checker.check())
+    ```
+
+    Messages which do not make the file invalid are collected in `warnings`.
+    """
+
+    def __init__(self, data, sample_size: int = DEFAULT_OFFSET_SAMPLE_SIZE):
+        """
+        Args:
+            data: The content of the PDF file (a mmap or bytes).
+            sample_size (int): The maximum number of object offsets to check,
+                0 to check all.
+        """
+        self.data = data
+        self.sample_size = sample_size
+        self.warnings: list[str] = []
+        self.entries: dict[int, XRefEntry] = {}
+        self.trailer: dict = {}
+        # offsets in the file are relative to the header
+        self._base = 0
+        # decompressed object streams: data, offset of the first object, header numbers
+        self._object_streams: dict[int, tuple[bytes, int, list[int]]] = {}
+
+    def check(self) -> Iterator[str]:
+        "Yield an error message for each structural problem found."
+        try:
+            self._check_header()
+            startxref = self._find_startxref()
+            yield from self._read_xref_sections(startxref)
+            yield from self._check_offsets()
+            yield from self._check_page_tree()
+        except PDFStructureError as exp:
+            yield str(exp)
+
+    def _check_header(self):
+        header = HEADER_PATTERN.search(self.data, 0, HEADER_SEARCH_SIZE)
+        if header is None:
+            raise PDFStructureError("No PDF header (%PDF-x.y) at the start of the file")
+        if header.start():
+            self.warnings.append(
+                f"The PDF header is at offset {header.start()} instead of 0"
+            )
+            self._base = header.start()
+
+    def _find_startxref(self) -> int:
+        tail_start = max(0, len(self.data) - TRAILER_SEARCH_SIZE)
+        if self.data.rfind(b"%%EOF", tail_start) < 0:
+            raise PDFStructureError("No %%EOF marker at the end of the file (truncated?)")
+        position = self.data.rfind(b"startxref", tail_start)
+        match = STARTXREF_PATTERN.match(self.data, position) if position >= 0 else None
+        if match is None:
+            raise PDFStructureError("No startxref at the end of the file")
+        return int(match[1])
+
+    def _read_xref_sections(self, startxref: int) -> Iterator[str]:
+        """Read all cross-reference sections, starting with the newest one.
+
+        Entries of newer sections take precedence over older ones, so the first
+        entry read for an object number is kept.
+        """
+        pending = [startxref]
+        seen = set()
+        newest = True
+        while pending:
+            offset = pending.pop(0)
+            if offset in seen:
+                yield f"Cross-reference sections form a loop at offset {offset}"
+                continue
+            seen.add(offset)
+            position = self._base + offset
+            if not 0 <= position < len(self.data):
+                yield f"Cross-reference offset {offset} is beyond the end of the file"
+                if newest:
+                    raise PDFStructureError("No cross-reference section found")
+                continue
+            parser = _Parser(self.data, position)
+            parser.skip_whitespace()
+            try:
+                if parser.startswith(b"xref"):
+                    parser.pos += 4
+                    trailer = self._read_xref_table(parser)
+                else:
+                    trailer = self._read_xref_stream(offset)
+            except PDFStructureError as exp:
+                if newest:
+                    raise
+                yield str(exp)
+                continue
+            newest = False
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            older = [trailer.get("XRefStm"), trailer.get("Prev")]
+            pending[:0] = [value for value in older if isinstance(value, int)]
+
+    def _read_xref_table(self, parser: _Parser) -> dict:
+        "Read a cross-reference table and return its trailer dictionary."
+        data = self.data
+        while True:
+            parser.skip_whitespace()
+            if parser.startswith(b"trailer"):
+                parser.pos += 7
+                trailer = parser.parse()
+                if not isinstance(trailer, dict):
+                    raise PDFStructureError("The trailer is not a dictionary")
+                return trailer
+            subsection = SUBSECTION_PATTERN.match(data, parser.pos)
+            if subsection is None:
+                raise PDFStructureError(
+                    f"Invalid cross-reference table at offset {parser.pos}"
+                )
+            first, count = int(subsection[1]), int(subsection[2])
+            parser.pos = subsection.end()
+            for number in range(first, first + count):
+                entry = XREF_ENTRY_PATTERN.match(data, parser.pos)
+                if entry is None:
+                    raise PDFStructureError(
+                        f"Invalid cross-reference entry for object {number} "
+                        f"at offset {parser.pos}"
+                    )
+                parser.pos = entry.end()
+                self.entries.setdefault(
+                    number,
+                    XRefEntry(
+                        UNCOMPRESSED_OBJECT if entry[3] == b"n" else FREE_OBJECT,
+                        int(entry[1]),
+                        int(entry[2]),
+                    ),
+                )
+
+    def _read_xref_stream(self, offset: int) -> dict:
+        "Read a cross-reference stream and return its dictionary."
+        try:
+            _, stream = self._read_object_at(offset)
+        except PDFStructureError as exp:
+            raise PDFStructureError(
+                f"Offset {offset} does not point at a cross-reference table or stream"
+            ) from exp
+        if not isinstance(stream, Stream) or stream.dictionary.get("Type") != "XRef":
+            raise PDFStructureError(
+                f"Offset {offset} does not point at a cross-reference table or stream"
+            )
+        dictionary = stream.dictionary
+        widths = dictionary.get("W")
+        if not (
+            isinstance(widths, list)
+            and len(widths) == XREF_FIELD_COUNT
+            and all(isinstance(width, int) for width in widths)
+        ):
+            raise PDFStructureError(f"Invalid /W in cross-reference stream at offset {offset}")
+        index = dictionary.get("Index", [0, dictionary.get("Size", 0)])
+        raw = self.stream_data(stream)
+        position = 0
+        for first, count in zip(index[::2], index[1::2]):
+            for number in range(first, first + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(raw[position : position + width], "big"))
+                    position += width
+                if position > len(raw):
+                    raise PDFStructureError(
+                        f"Cross-reference stream at offset {offset} is too short"
+                    )
+                kind = fields[0] if widths[0] else UNCOMPRESSED_OBJECT
+                self.entries.setdefault(number, XRefEntry(kind, fields[1], fields[2]))
+        return dictionary
+
+    def _read_object_at(self, offset: int) -> tuple[Reference, object]:
+        "Read the object at offset (relative to the header)."
+        header = OBJECT_HEADER_PATTERN.match(self.data, self._base + offset)
+        if header is None:
+            raise PDFStructureError(f"No object at offset {offset}")
+        parser = _Parser(self.data, header.end())
+        value = parser.parse()
+        parser.skip_whitespace()
+        if parser.startswith(b"stream"):
+            if not isinstance(value, dict):
+                raise PDFStructureError(f"Stream at offset {offset} has no dictionary")
+            start = parser.pos + 6
+            if self.data[start : start + 2] == b"\r\n":
+                start += 2
+            elif self.data[start : start + 1] in (b"\n", b"\r"):
+                start += 1
+            value = Stream(value, start)
+        return Reference(int(header[1]), int(header[2])), value
+
+    def get_object(self, number: int):
+        "Return the object with number, using the cross-reference entries."
+        entry = self.entries.get(number)
+        if entry is None or entry.kind == FREE_OBJECT:
+            raise PDFStructureError(f"Object {number} is not in the cross-reference table")
+        if entry.kind == COMPRESSED_OBJECT:
+            return self._get_compressed_object(number, entry.field2, entry.field3)
+        reference, value = self._read_object_at(entry.field2)
+        if reference.number != number:
+            raise PDFStructureError(
+                f"Object {number}: offset {entry.field2} points at object {reference.number}"
+            )
+        return value
+
+    def resolve(self, value):
+        "Return value or the object it references."
+        seen = set()
+        while isinstance(value, Reference):
+            if value.number in seen:
+                raise PDFStructureError(f"Reference loop at object {value.number}")
+            seen.add(value.number)
+            value = self.get_object(value.number)
+        return value
+
+    def _get_compressed_object(self, number: int, stream_number: int, index: int):
+        "Return an object stored in an object stream."
+        if stream_number not in self._object_streams:
+            stream = self.get_object(stream_number)
+            if not isinstance(stream, Stream) or stream.dictionary.get("Type") != "ObjStm":
+                raise PDFStructureError(f"Object {stream_number} is not an object stream")
+            data = self.stream_data(stream)
+            header = _Parser(data)
+            offsets = []
+            for _ in range(2 * stream.dictionary.get("N", 0)):
+                value = header.parse()
+                if not isinstance(value, int):
+                    raise PDFStructureError(f"Invalid header of object stream {stream_number}")
+                offsets.append(value)
+            if len(self._object_streams) >= OBJECT_STREAM_CACHE_SIZE:
+                del self._object_streams[next(iter(self._object_streams))]
+            first = self.resolve(stream.dictionary.get("First", 0))
+            self._object_streams[stream_number] = (data, first, offsets)
+        data, first, offsets = self._object_streams[stream_number]
+        if 2 * index + 1 >= len(offsets) or offsets[2 * index] != number:
+            raise PDFStructureError(
+                f"Object {number} is not at index {index} of object stream {stream_number}"
+            )
+        return _Parser(data, first + offsets[2 * index + 1]).parse()
+
+    def stream_data(self, stream: Stream) -> bytes:
+        "Return the decoded data of a (cross-reference or object) stream."
+        length = self.resolve(stream.dictionary.get("Length"))
+        if not isinstance(length, int) or stream.start + length > len(self.data):
+            raise PDFStructureError(f"Invalid /Length of stream at offset {stream.start}")
+        data = bytes(self.data[stream.start : stream.start + length])
+        filters = stream.dictionary.get("Filter", [])
+        params = stream.dictionary.get("DecodeParms") or {}
+        if not isinstance(filters, list):
+            filters = [filters]
+        if isinstance(params, list):
+            params = params[0] if params and params[0] else {}
+        if filters not in ([], ["FlateDecode"]):
+            raise PDFStructureError(f"Unsupported stream filter {filters}")
+        if filters:
+            try:
+                data = zlib.decompress(data)
+            except zlib.error as exp:
+                raise PDFStructureError(
+                    f"Stream at offset {stream.start} cannot be decompressed: {exp}"
+                ) from exp
+        if params.get("Predictor", 1) >= PNG_PREDICTOR_MIN:
+            data = _undo_png_predictor(data, params.get("Columns", 1))
+        return data
+
+    def _check_offsets(self) -> Iterator[str]:
+        "Check that offsets of objects point at these objects."
+        in_use = [
+            (number, entry)
+            for number, entry in self.entries.items()
+            if entry.kind == UNCOMPRESSED_OBJECT
+        ]
+        in_use.sort(key=lambda item: item[0])
+        if self.sample_size and len(in_use) > self.sample_size:
+            step = len(in_use) / self.sample_size
+            self.warnings.append(
+                f"Checked the offsets of {self.sample_size} of {len(in_use)} objects"
+            )
+            in_use = [in_use[int(i * step)] for i in range(self.sample_size)]
+        for number, entry in in_use:
+            if self._base + entry.field2 >= len(self.data):
+                yield f"Object {number}: offset {entry.field2} is beyond the end of the file"
+                continue
+            header = OBJECT_HEADER_PATTERN.match(self.data, self._base + entry.field2)
+            if header is None:
+                yield f"Object {number}: there is no object at offset {entry.field2}"
+            elif (int(header[1]), int(header[2])) != (number, entry.field3):
+                yield (
+                    f"Object {number} {entry.field3}: offset {entry.field2} points at "
+                    f"object {int(header[1])} {int(header[2])}"
+                )
+        for number, entry in self.entries.items():
+            if entry.kind == COMPRESSED_OBJECT:
+                stream_entry = self.entries.get(entry.field2)
+                if stream_entry is None or stream_entry.kind != UNCOMPRESSED_OBJECT:
+                    yield (
+                        f"Object {number} is in object stream {entry.field2}, which is "
+                        f"not in the cross-reference table"
+                    )
+
+    def _get_root_pages(self) -> tuple[Reference, dict]:
+        "Return the reference to and the root node of the page tree of the catalog."
+        if "Root" not in self.trailer:
+            raise PDFStructureError("The trailer has no /Root entry")
+        catalog = self.resolve(self.trailer["Root"])
+        if not isinstance(catalog, dict) or catalog.get("Type") != "Catalog":
+            raise PDFStructureError("The /Root object is not a /Catalog dictionary")
+        if "Pages" not in catalog:
+            raise PDFStructureError("The catalog has no /Pages entry")
+        root_pages = self.resolve(catalog["Pages"])
+        if not isinstance(root_pages, dict) or root_pages.get("Type") != "Pages":
+            raise PDFStructureError("The /Pages entry of the catalog is not a page tree node")
+        return catalog["Pages"], root_pages
+
+    def _check_page_tree(self) -> Iterator[str]:
+        "Check that the catalog and all nodes of the page tree can be reached."
+        root_ref, root_pages = self._get_root_pages()
+        pages = 0
+        visited = set()
+        pending = [root_ref]
+        while pending:
+            node_ref = pending.pop()
+            if isinstance(node_ref, Reference):
+                if node_ref.number in visited:
+                    yield f"The page tree contains object {node_ref.number} more than once"
+                    continue
+                visited.add(node_ref.number)
+            try:
+                node = self.resolve(node_ref)
+            except PDFStructureError as exp:
+                yield f"Page tree: {exp}"
+                continue
+            node_type = node.get("Type") if isinstance(node, dict) else None
+            if node_type == "Pages":
+                kids = self.resolve(node.get("Kids"))
+                if not isinstance(kids, list):
+                    yield f"Page tree node {node_ref} has no /Kids array"
+                    continue
+                pending.extend(reversed(kids))
+            elif node_type == "Page":
+                pages += 1
+            else:
+                yield f"Page tree node {node_ref} is neither a /Pages nor a /Page dictionary"
+        count = root_pages.get("Count")
+        if count != pages:
+            yield f"The page tree contains {pages} pages, but its /Count is {count}"
+
 
 @ValidatorFactory.register("application/pdf")
 class PDFValidator(Validator):
-    """A validator for PDF files."""
+    """Check the structure of PDF files (see module docstring)."""
+
+    def __init__(self, sample_size: int | None = None):
+        """
+        Args:
+            sample_size (int | None): The maximum number of object offsets to check,
+                0 for all. If None, the configured value is used.
+        """
+        self.sample_size = get_offset_sample_size() if sample_size is None else sample_size
 
     def validate(
         self, file_path: Path, schemata: Optional[list[SchemaInfo]] = None
     ) -> ValidationResult:
-        raise NotImplementedError("PDF validation not implemented yet.")
+        "Check the structure of a PDF file. PDF files have no schemas, so schemata is ignored."
+        return self.validate_context(ValidationContext(file_path), schemata)
+
+    def validate_context(
+        self, context: ValidationContext, schemata: Optional[list[SchemaInfo]] = None
+    ) -> ValidationResult:
+        """Check the structure of the PDF file of a ValidationContext.
+
+        Errors are limited according to context.options. Files are memory mapped,
+        in-memory documents are checked in place.
+
+        Args:
+            context (ValidationContext): The context of the PDF file to be checked.
+            schemata (list of SchemaInfo objects): Ignored.
+
+        Returns:
+            ValidationResult: A ValidationResult object
+        """
+        file_path = context.file_path
+        collector = ErrorCollector(context.options)
+        warnings = []
+        if context.size == 0:
+            collector.add("The file is empty")
+        elif context.in_memory:
+            warnings = self._check(context.data, collector)
+        else:
+            with (
+                open(file_path, "rb") as f,
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data,
+            ):
+                warnings = self._check(data, collector)
+        errors = collector.get_errors()
+        result = ValidationResult(file_path)
+        result.add_subresult(
+            ValidationSubResult(
+                not errors,
+                VALIDATOR_NAME,
+                message=(
+                    f"Document '{file_path}' has a broken PDF structure"
+                    if errors
+                    else f"Document '{file_path}' has a valid PDF structure"
+                ),
+                errors=errors,
+                warnings=warnings,
+            )
+        )
+        return result
+
+    def _check(self, data, collector: ErrorCollector) -> list[str]:
+        "Check the structure of data, add the errors to collector and return the warnings."
+        checker = PDFStructureChecker(data, self.sample_size)
+        for message in checker.check():
+            collector.add(message, template=message_template(message))
+        return checker.warnings
@@ -0,0 +1,189 @@
+"""Prefetch all schemas needed to validate a project into the schema cache.
+
+The CombinedCatalogResolver downloads remote schemas lazily, one by one, while the
+first files are validated. For big schemas like tei_all.xsd, which consist of many
+modules, this makes the first validation run of a fresh checkout very slow.
+
+`prefetch_schemas()` scans all XML files of a project for referenced schemas
+(processing instructions, `xsi:schemaLocation`, DTDs and the default schemas for
+some subtypes), resolves the include/import closure of these schemas and downloads
+all documents concurrently into the resolver's cache directory. Later validation runs
+can then work offline.
+
+Only schemas from the XML catalog, local files and hosts listed in
+`general.safe_xml_hosts` can be loaded, like during validation.
+
+Prefetching can also be started from the command line:
+
+```
+python -m gamslib.validation.prefetch path/to/project
+```
+"""
+
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver, get_resolver
+from gamslib.validation.schemadeps import find_schema_references
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.xmlschemadetector import detect_schemata
+
+logger = logging.getLogger(__name__)
+
+# Number of concurrent downloads
+DEFAULT_WORKERS = 8
+
+
+@dataclass
+class PrefetchResult:
+    """The result of a prefetch run.
+
+    Attributes:
+        schemas (list[SchemaInfo]): The schemas referenced by the XML files.
+        loaded (list[str]): URIs of all loaded schema documents (including
+            included and imported documents).
+        failed (dict[str, str]): URIs of documents which could not be loaded
+            mapped to the error message.
+    """
+
+    schemas: list[SchemaInfo] = field(default_factory=list)
+    loaded: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def is_xml_file(file_path: Path) -> bool:
+    "Return True if file_path has an '.xml' extension or starts with a xml declaration."
+    if file_path.suffix.lower() == ".xml":
+        return True
+    try:
+        with file_path.open("rb") as f:
+            return f.read(5) == b"<?xml"
+    except OSError:
+        return False
+
+
+def find_xml_files(project_root: Path) -> list[Path]:
+    "Return all XML files in project_root and its subdirectories (except hidden ones)."
+    xml_files = []
+    for root, dirs, files in os.walk(project_root):
+        # skip hidden directories like .git or the .schema_cache
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in files:
+            file_path = Path(root) / name
+            if is_xml_file(file_path):
+                xml_files.append(file_path)
+    return sorted(xml_files)
+
+
+def find_referenced_schemas(xml_files: list[Path]) -> list[SchemaInfo]:
+    """Return all schemas referenced by xml_files (including default schemas).
+
+    Only the header of each file is parsed. The subtype for the default schemas is
+    taken from the root element, so no full format detection is needed.
+    Files which cannot be parsed are skipped.
+    """
+    schemas: dict[tuple[str, SchemaType], SchemaInfo] = {}
+    for xml_file in xml_files:
+        try:
+            for schema_info in detect_schemata(xml_file, None):
+                schemas.setdefault(
+                    (schema_info.schema_uri, schema_info.schema_type), schema_info
+                )
+        except Exception as exp:  # pylint: disable=broad-exception-caught
+            logger.warning("Unable to find schemas in '%s': %s", xml_file, exp)
+    return list(schemas.values())
+
+
+def fetch_schemas(
+    schemas: list[SchemaInfo],
+    resolver: CombinedCatalogResolver | None = None,
+    workers: int = DEFAULT_WORKERS,
+) -> PrefetchResult:
+    """Load schemas and all (indirectly) included/imported documents concurrently.
+
+    Remote documents are stored in the resolver's cache directory.
+    """
+    resolver = resolver or get_resolver()
+    result = PrefetchResult(schemas=list(schemas))
+    seen = {schema.schema_uri for schema in schemas}
+
+    def fetch(uri: str, schema_type: SchemaType) -> list[tuple[str, SchemaType]]:
+        content = resolver.get_content(uri)
+        return find_schema_references(uri, schema_type, content)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {
+            executor.submit(fetch, schema.schema_uri, schema.schema_type): schema.schema_uri
+            for schema in schemas
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                uri = pending.pop(future)
+                try:
+                    references = future.result()
+                except Exception as exp:  # pylint: disable=broad-exception-caught
+                    result.failed[uri] = f"{type(exp).__name__}: {exp!s}"
+                    continue
+                result.loaded.append(uri)
+                for reference, schema_type in references:
+                    if reference not in seen:
+                        seen.add(reference)
+                        pending[executor.submit(fetch, reference, schema_type)] = (
+                            reference
+                        )
+    return result
+
+
+def prefetch_schemas(
+    project_root: Path,
+    resolver: CombinedCatalogResolver | None = None,
+    workers: int = DEFAULT_WORKERS,
+) -> PrefetchResult:
+    """Prefetch all schemas needed to validate the XML files in project_root.
+
+    Args:
+        project_root (Path): The project directory. All XML files in this directory and
+            its subdirectories are scanned for referenced schemas.
+        resolver (CombinedCatalogResolver | None): The resolver used to load the schemas.
+            Its cache directory is filled. Defaults to the shared resolver.
+        workers (int): Number of concurrent downloads.
+
+    Returns:
+        PrefetchResult: The referenced schemas, all loaded documents and the failures.
+    """
+    schemas = find_referenced_schemas(find_xml_files(Path(project_root)))
+    return fetch_schemas(schemas, resolver, workers)
+
+
+def main(argv: list[str] | None = None) -> int:
+    "Command line entry point. Return 0 if all schemas could be loaded, else 1."
+    parser = argparse.ArgumentParser(
+        prog="python -m gamslib.validation.prefetch",
+        description="Download all schemas needed to validate a project into the schema cache.",
+    )
+    parser.add_argument("project_root", type=Path, help="The project directory")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of concurrent downloads (default: {DEFAULT_WORKERS})",
+    )
+    args = parser.parse_args(argv)
+    result = prefetch_schemas(args.project_root, workers=args.workers)
+    print(
+        f"{len(result.schemas)} referenced schemas, "
+        f"{len(result.loaded)} documents loaded, {len(result.failed)} failed."
+    )
+    for uri, error in result.failed.items():
+        print(f"  {uri}: {error}", file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
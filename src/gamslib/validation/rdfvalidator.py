@@ -1,23 +1,384 @@
-"""Provides a RDF validator for validating RDF files against RDF schemas.
+"""Provides a RDF validator for validating RDF/XML files.
 
-The RDFValidator is a subclass of the abstract Validator class and implements
-the validate method for RDF files.
+The RDFValidator checks the RDF/XML syntax (https://www.w3.org/TR/rdf-syntax-grammar/)
+of a file:
+
+  - node and property elements must alternate (the children of rdf:RDF and of
+    property elements are node elements, the children of node elements are property
+    elements),
+  - forbidden RDF names (like rdf:about as element or rdf:li as node element) are
+    not used,
+  - rdf:about, rdf:resource and rdf:datatype are IRIs, rdf:ID and rdf:nodeID are
+    NCNames, and a node element has at most one of rdf:ID, rdf:about or rdf:nodeID,
+  - rdf:parseType (Resource, Collection and Literal) and the attributes of
+    property elements are combined correctly,
+  - there is no text where the grammar does not allow it (e.g. in node elements).
+
+The file is checked in a single `iterparse` pass and elements are discarded as soon
+as they have been checked, so multi-GB exports are checked in bounded memory. No
+triples are created. Errors are reported with their line numbers and limited by the
+ValidationOptions of the context.
+
+XML schemas referenced by a RDF/XML file are validated like by the XMLValidator.
 """
 
+# pylint: disable=c-extension-no-member
+import re
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional
+
+from lxml import etree as ET
 
 from gamslib.validation.schemainfo import SchemaInfo
-from gamslib.validation.validationresult import ValidationResult
-from gamslib.validation.validator import Validator, ValidatorFactory
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import ErrorCollector, message_template
+from gamslib.validation.validationresult import ValidationResult, ValidationSubResult
+from gamslib.validation.validator import ValidatorFactory
+from gamslib.validation.xmlvalidator import XMLValidator
+
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+
+CORE_SYNTAX_TERMS = frozenset(
+    {"RDF", "ID", "about", "parseType", "resource", "nodeID", "datatype"}
+)
+OLD_TERMS = frozenset({"aboutEach", "aboutEachPrefix", "bagID"})
+FORBIDDEN_NODE_ELEMENTS = CORE_SYNTAX_TERMS | OLD_TERMS | {"li"}
+FORBIDDEN_PROPERTY_ELEMENTS = CORE_SYNTAX_TERMS | OLD_TERMS | {"Description"}
+FORBIDDEN_PROPERTY_ATTRIBUTES = CORE_SYNTAX_TERMS | OLD_TERMS | {"Description", "li"}
+
+# characters which are not allowed in IRIs and percent signs not followed by two hex digits
+INVALID_IRI_PATTERN = re.compile(r"[\x00-\x20<>\"{}|\\^`]|%(?![0-9A-Fa-f]{2})")
+NCNAME_PATTERN = re.compile(r"^[^\W\d][\w.\-]*$")
+
+VALIDATOR_NAME = "RDF/XML Syntax Validator"
+
+# A property element contains at most this many node elements
+MAX_PROPERTY_NODE_ELEMENTS = 1
+# Text which is not allowed is quoted up to this length in error messages
+MAX_SNIPPET_LENGTH = 30
+
+
+def split_name(name: str) -> tuple[str | None, str]:
+    "Split a lxml tag or attribute name into namespace and local name."
+    if name[0] == "{":
+        namespace, local_name = name[1:].split("}", 1)
+        return namespace, local_name
+    return None, name
+
+
+def display_name(namespace: str | None, local_name: str) -> str:
+    "Return a readable name like 'rdf:about' for RDF names, else '{ns}name'."
+    if namespace == RDF_NS:
+        return f"rdf:{local_name}"
+    return f"{{{namespace}}}{local_name}" if namespace else local_name
+
+
+class _Frame:
+    "What is expected inside an open element."
+
+    __slots__ = (
+        "element_children",
+        "empty",
+        "has_text",
+        "kind",
+        "line",
+        "name",
+        "no_elements",
+    )
+
+    def __init__(self, kind: str, name: str = "", line: int = 0):
+        # 'rdf', 'node', 'property', 'resource', 'collection', 'literal' or 'xml'
+        self.kind = kind
+        self.name = name
+        self.line = line
+        self.element_children = 0
+        self.has_text = False
+        # property elements with rdf:resource, rdf:nodeID or property attributes
+        self.empty = False
+        # property elements with rdf:datatype
+        self.no_elements = False
+
+
+class RDFXMLChecker:
+    """Check the RDF/XML syntax of a file in a single pass.
 
+    ```python
+    for line, message in RDFXMLChecker().check(file_path):
+        print(line, message)
+    ```
+    """
 
-@ValidatorFactory.register("application/pdf")
-class RDFValidator(Validator):
-    """Validator for RDF files."""
+    def check(self, file_path: Path | BinaryIO) -> Iterator[tuple[int, str]]:
+        """Yield (line number, message) for each syntax error of file_path.
 
-    def validate(
-        self, file_path: Path, schemata: Optional[list[SchemaInfo]] = None
+        file_path can also be a binary file object (which is not closed).
+
+        Raises:
+            lxml.etree.XMLSyntaxError: If the file is not well formed.
+        """
+        stack: list[_Frame] = []
+        source = file_path if hasattr(file_path, "read") else str(file_path)
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if not isinstance(element.tag, str):  # comments and PIs
+                continue
+            if event == "start":
+                yield from self._start(element, stack)
+            else:
+                yield from self._end(element, stack.pop())
+
+    def _start(self, element: ET._Element, stack: list[_Frame]) -> Iterator[tuple[int, str]]:
+        "Check a start tag and push the frame for its content."
+        line = element.sourceline or 0
+        namespace, local_name = split_name(element.tag)
+        name = display_name(namespace, local_name)
+        errors = []
+        if not stack:
+            if namespace == RDF_NS and local_name == "RDF":
+                stack.append(_Frame("rdf", name, line))
+            else:  # rdf:RDF can be omitted if there is only one node element
+                stack.append(self._node_element_frame(element, name, line, errors))
+            yield from ((line, message) for message in errors)
+            return
+        parent = stack[-1]
+        if parent.kind in ("literal", "xml"):
+            stack.append(_Frame("xml"))
+            return
+        yield from self._check_text_before(element, parent)
+        # elements before this one have been checked and can be discarded
+        parent_element = element.getparent()
+        while element.getprevious() is not None:
+            del parent_element[0]
+
+        if parent.kind == "property":
+            self._add_property_child(parent, errors)
+        if parent.kind in ("rdf", "collection", "property"):
+            frame = self._node_element_frame(element, name, line, errors)
+        else:  # node or parseType="Resource"
+            frame = self._property_element_frame(element, name, line, errors)
+        stack.append(frame)
+        yield from ((line, message) for message in errors)
+
+    @staticmethod
+    def _add_property_child(parent: _Frame, errors: list):
+        "Count a node element in the property element of parent and check if it is allowed."
+        parent.element_children += 1
+        if parent.empty:
+            errors.append(
+                f"Property element {parent.name} with rdf:resource, rdf:nodeID or "
+                f"property attributes must be empty"
+            )
+        elif parent.no_elements:
+            errors.append(
+                f"Property element {parent.name} with rdf:datatype must not "
+                f"contain elements"
+            )
+        elif parent.element_children == MAX_PROPERTY_NODE_ELEMENTS + 1:
+            errors.append(
+                f"Property element {parent.name} must contain at most one node element"
+            )
+
+    def _end(self, element: ET._Element, frame: _Frame) -> Iterator[tuple[int, str]]:
+        "Check the remaining content of an element and discard it."
+        if frame.kind != "xml":
+            last_child = element[-1] if len(element) else None
+            text = element.text if last_child is None else last_child.tail
+            yield from self._check_text(frame, text, frame.line)
+            if frame.kind == "property" and frame.has_text:
+                if frame.element_children:
+                    yield frame.line, (
+                        f"Property element {frame.name} contains text and a node element"
+                    )
+                elif frame.empty:
+                    yield frame.line, (
+                        f"Property element {frame.name} with rdf:resource, rdf:nodeID "
+                        f"or property attributes must be empty"
+                    )
+        if frame.kind != "xml":
+            element.clear(keep_tail=True)
+
+    def _check_text_before(
+        self, element: ET._Element, parent: _Frame
+    ) -> Iterator[tuple[int, str]]:
+        "Check the text of the parent before element."
+        previous = element.getprevious()
+        text = element.getparent().text if previous is None else previous.tail
+        yield from self._check_text(parent, text, element.sourceline or 0)
+
+    @staticmethod
+    def _check_text(frame: _Frame, text: str | None, line: int) -> Iterator[tuple[int, str]]:
+        "Check if text is allowed in the element of frame."
+        if not text or text.isspace():
+            return
+        if frame.kind == "property":
+            frame.has_text = True
+        elif frame.kind not in ("literal", "xml"):
+            snippet = text.strip()
+            if len(snippet) > MAX_SNIPPET_LENGTH:
+                snippet = snippet[:MAX_SNIPPET_LENGTH] + "…"
+            yield line, f"Text '{snippet}' is not allowed in {frame.name}"
+
+    def _node_element_frame(
+        self, element: ET._Element, name: str, line: int, errors: list
+    ) -> _Frame:
+        "Check a node element and return its frame. Errors are appended to errors."
+        namespace, local_name = split_name(element.tag)
+        if namespace is None:
+            errors.append(f"Node element '{name}' has no namespace")
+        elif namespace == RDF_NS and local_name in FORBIDDEN_NODE_ELEMENTS:
+            errors.append(f"{name} is not allowed as node element")
+        identifiers = []
+        for attribute, value in element.attrib.items():
+            attr_namespace, attr_name = split_name(attribute)
+            if attr_namespace == RDF_NS and attr_name in ("ID", "about", "nodeID"):
+                identifiers.append(f"rdf:{attr_name}")
+                self._check_identifier(attr_name, value, errors)
+            else:
+                self._check_property_attribute(attr_namespace, attr_name, value, errors)
+        if len(identifiers) > 1:
+            errors.append(
+                f"Node element {name} must not have more than one of "
+                f"rdf:ID, rdf:about and rdf:nodeID ({', '.join(identifiers)})"
+            )
+        return _Frame("node", name, line)
+
+    def _property_element_frame(
+        self, element: ET._Element, name: str, line: int, errors: list
+    ) -> _Frame:
+        "Check a property element and return its frame. Errors are appended to errors."
+        namespace, local_name = split_name(element.tag)
+        if namespace is None:
+            errors.append(f"Property element '{name}' has no namespace")
+        elif namespace == RDF_NS and local_name in FORBIDDEN_PROPERTY_ELEMENTS:
+            errors.append(f"{name} is not allowed as property element")
+        syntax_attributes = {}
+        property_attributes = 0
+        for attribute, value in element.attrib.items():
+            attr_namespace, attr_name = split_name(attribute)
+            if attr_namespace == RDF_NS and attr_name in (
+                "ID", "resource", "nodeID", "datatype", "parseType"
+            ):
+                syntax_attributes[attr_name] = value
+                if attr_name != "parseType":
+                    self._check_identifier(attr_name, value, errors)
+            elif self._check_property_attribute(attr_namespace, attr_name, value, errors):
+                property_attributes += 1
+
+        if "resource" in syntax_attributes and "nodeID" in syntax_attributes:
+            errors.append(f"{name} must not have both rdf:resource and rdf:nodeID")
+        parse_type = syntax_attributes.get("parseType")
+        if parse_type is not None:
+            others = [
+                f"rdf:{attr}"
+                for attr in ("resource", "nodeID", "datatype")
+                if attr in syntax_attributes
+            ]
+            if property_attributes:
+                others.append("property attributes")
+            if others:
+                errors.append(
+                    f"{name} with rdf:parseType must not have {', '.join(others)}"
+                )
+            kind = {"Resource": "resource", "Collection": "collection"}.get(
+                parse_type, "literal"
+            )
+            return _Frame(kind, name, line)
+        frame = _Frame("property", name, line)
+        frame.empty = bool(
+            property_attributes
+            or "resource" in syntax_attributes
+            or "nodeID" in syntax_attributes
+        )
+        frame.no_elements = "datatype" in syntax_attributes
+        if frame.empty and frame.no_elements:
+            errors.append(
+                f"{name} must not have rdf:datatype together with rdf:resource, "
+                f"rdf:nodeID or property attributes"
+            )
+        return frame
+
+    @staticmethod
+    def _check_identifier(attr_name: str, value: str, errors: list):
+        "Check the value of rdf:about, rdf:resource, rdf:datatype, rdf:ID or rdf:nodeID."
+        if attr_name in ("ID", "nodeID"):
+            if not NCNAME_PATTERN.match(value):
+                errors.append(f"rdf:{attr_name} '{value}' is not a valid NCName")
+        elif INVALID_IRI_PATTERN.search(value):
+            errors.append(f"rdf:{attr_name} '{value}' is not a valid IRI")
+
+    @staticmethod
+    def _check_property_attribute(
+        namespace: str | None, local_name: str, value: str, errors: list
+    ) -> bool:
+        """Check a property attribute. Return True if it is a property attribute.
+
+        xml:* attributes are not property attributes.
+        """
+        if namespace == XML_NS:
+            return False
+        if namespace is None:
+            errors.append(f"Unqualified attribute '{local_name}' is not allowed")
+            return False
+        if namespace == RDF_NS:
+            if local_name in FORBIDDEN_PROPERTY_ATTRIBUTES:
+                errors.append(f"rdf:{local_name} is not allowed here")
+                return False
+            if local_name == "type" and INVALID_IRI_PATTERN.search(value):
+                errors.append(f"rdf:type '{value}' is not a valid IRI")
+        return True
+
+
+@ValidatorFactory.register("application/rdf+xml")
+class RDFValidator(XMLValidator):
+    """Validator for RDF/XML files.
+
+    Checks the RDF/XML syntax in a single streaming pass. Referenced XML schemas are
+    validated like by the XMLValidator.
+    """
+
+    def validate_context(
+        self, context: ValidationContext, schemata: Optional[list[SchemaInfo]] = None
     ) -> ValidationResult:
-        "Validate a RDF file against a schema."
-        raise NotImplementedError("RDF validation not implemented yet.")
+        """Check the RDF/XML syntax of the file of context and validate it against schemata.
+
+        Args:
+            context (ValidationContext): The context of the RDF/XML file to be validated.
+            schemata (list of SchemaInfo objects): XML schemas to validate against.
+
+        Returns:
+            ValidationResult: A ValidationResult object
+        """
+        file_path = context.file_path
+        result = ValidationResult(file_path)
+        collector = ErrorCollector(context.options)
+        try:
+            with context.open() as source:
+                for line, message in RDFXMLChecker().check(source):
+                    collector.add(
+                        f"line {line}: {message}",
+                        template=message_template(message),
+                        location=f"line {line}",
+                    )
+        except ET.XMLSyntaxError as exp:
+            result.add_subresult(self._make_syntax_error_result(file_path, [f"{exp!s}"]))
+            return result  # validating does not make sense
+        errors = collector.get_errors()
+        if errors:
+            subresult = ValidationSubResult(
+                False,
+                VALIDATOR_NAME,
+                message=f"Document '{file_path}' is not valid RDF/XML",
+                errors=errors,
+            )
+        else:
+            subresult = ValidationSubResult(
+                True, VALIDATOR_NAME, message=f"Document '{file_path}' is valid RDF/XML"
+            )
+        result.add_subresult(subresult)
+        if context.options.fail_fast and not subresult.is_valid:
+            return result
+        if schemata:
+            for schema_result in super().validate_context(context, schemata).get_subresults():
+                result.add_subresult(schema_result)
+        return result
@@ -0,0 +1,201 @@
+"""Write and read validation reports as JSON Lines files.
+
+Validating a whole project produces tens of thousands of ValidationResult objects.
+Instead of collecting them for a report at the end, a ReportWriter appends each
+result as one line of compact JSON (see `ValidationResult.to_json()`) as soon as it
+is available, so memory use does not grow with the number of files:
+
+```python
+with ReportWriter("report.jsonl") as report:
+    for result in validate_many(paths):
+        report.write(result)
+```
+
+Reports are read line by line, too. `read_report()` yields the (optionally filtered)
+results and `summarize_report()` counts results, errors and warnings without keeping
+any result in memory. Incomplete lines (e.g. from an interrupted run) are skipped.
+
+From the command line:
+
+```
+python -m gamslib.validation.report summary report.jsonl
+python -m gamslib.validation.report invalid [--validator NAME] report.jsonl
+```
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import sys
+from collections import Counter
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from gamslib.validation.validationresult import ValidationResult
+
+logger = logging.getLogger(__name__)
+
+
+class ReportWriter:
+    """Append ValidationResults to a JSON Lines report file."""
+
+    def __init__(self, report_path: Path | str, append: bool = False):
+        """Open the report file.
+
+        Args:
+            report_path (Path | str): The report file.
+            append (bool): If True, results are appended to an existing report,
+                otherwise an existing report is replaced.
+        """
+        self.report_path = Path(report_path)
+        self.count = 0
+        # the writer owns the file: it is closed by close() or at the end of the with block
+        with contextlib.ExitStack() as stack:
+            self._file = stack.enter_context(
+                open(self.report_path, "a" if append else "w", encoding="utf-8")
+            )
+            self._files = stack.pop_all()
+
+    def write(self, result: ValidationResult):
+        "Append result to the report. The line is flushed, so the report is never partial."
+        self._file.write(result.to_json() + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        "Close the report file."
+        self._files.close()
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_report_dicts(report_path: Path | str) -> Iterator[dict]:
+    "Yield the dicts of all results in a report, one line at a time."
+    with open(report_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exp:
+                logger.warning(
+                    "Skipping invalid line %d of report '%s': %s",
+                    line_number,
+                    report_path,
+                    exp,
+                )
+
+
+def _failed_validators(data: dict) -> set[str]:
+    "Return the names of all validators with an invalid subresult."
+    return {
+        subresult["validator_name"]
+        for subresult in data["subresults"]
+        if not subresult["is_valid"]
+    }
+
+
+def read_report(
+    report_path: Path | str,
+    only_invalid: bool = False,
+    validator_name: str | None = None,
+    predicate: Callable[[dict], bool] | None = None,
+) -> Iterator[ValidationResult]:
+    """Yield the results of a report, one at a time.
+
+    Results are filtered before ValidationResult objects are created.
+
+    Args:
+        report_path (Path | str): The report file.
+        only_invalid (bool): Yield only invalid results.
+        validator_name (str | None): Yield only results where this validator failed.
+        predicate (Callable | None): Yield only results whose dict (as returned by
+            `ValidationResult.to_dict(compact=True)`) passes this function.
+    """
+    for data in iter_report_dicts(report_path):
+        if only_invalid and data.get("is_valid", True):
+            continue
+        if validator_name is not None and validator_name not in _failed_validators(data):
+            continue
+        if predicate is not None and not predicate(data):
+            continue
+        yield ValidationResult.from_dict(data)
+
+
+@dataclass
+class ReportSummary:
+    """Counts of a validation report."""
+
+    files: int = 0
+    invalid: int = 0
+    with_warnings: int = 0
+    errors: int = 0
+    warnings: int = 0
+    # number of files for which a validator failed, by validator name
+    failed_validators: Counter = field(default_factory=Counter)
+
+    @property
+    def valid(self) -> int:
+        "The number of valid files."
+        return self.files - self.invalid
+
+    def __str__(self):
+        lines = [
+            f"{self.files} files, {self.valid} valid, {self.invalid} invalid, "
+            f"{self.with_warnings} with warnings.",
+            f"{self.errors} errors, {self.warnings} warnings.",
+        ]
+        for name, count in self.failed_validators.most_common():
+            lines.append(f"  {name}: {count} files failed")
+        return "\n".join(lines)
+
+
+def summarize_report(report_path: Path | str) -> ReportSummary:
+    "Count the results, errors and warnings of a report in a single pass."
+    summary = ReportSummary()
+    for data in iter_report_dicts(report_path):
+        summary.files += 1
+        subresults = data["subresults"]
+        if not all(subresult["is_valid"] for subresult in subresults):
+            summary.invalid += 1
+        warnings = sum(len(subresult.get("warnings", [])) for subresult in subresults)
+        if warnings:
+            summary.with_warnings += 1
+        summary.warnings += warnings
+        summary.errors += sum(len(subresult.get("errors", [])) for subresult in subresults)
+        summary.failed_validators.update(_failed_validators(data))
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    "Command line entry point."
+    parser = argparse.ArgumentParser(
+        prog="python -m gamslib.validation.report",
+        description="Summarize or filter a validation report.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="Print counts")
+    summary_parser.add_argument("report", type=Path)
+    invalid_parser = subparsers.add_parser("invalid", help="Print invalid files")
+    invalid_parser.add_argument("report", type=Path)
+    invalid_parser.add_argument("--validator", help="Only files this validator failed for")
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        print(summarize_report(args.report))
+        return 0
+    for result in read_report(args.report, only_invalid=True, validator_name=args.validator):
+        print(f"{result.file_path}: invalid")
+        for error in result.get_errors():
+            print(f"  {error}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Persistent cache for validation results.
+
+Validating all XML datastreams of a project takes long, although usually only a few
+files have changed since the last run. A ResultCache stores the ValidationResult of
+each file on disk and returns it on the next run, as long as neither the file nor any
+of the schemas it was validated against has changed.
+
+A result depends on:
+
+  - the content and the absolute path of the validated file (relative references to
+    schemas, DTDs and XIncludes are resolved against its directory, so files with
+    the same content in different directories may use different schemas) and, if
+    XIncludes are expanded, the content of all included files,
+  - the schema location or the schemas requested by the caller (if any),
+  - the ValidationOptions (error limits and fail fast mode),
+  - the content of all schema documents used, including all included/imported
+    documents (the schema closure), and
+  - the versions of gamslib, lxml and saxonche.
+
+The schemas used cannot be known without detecting the format and extracting the
+referenced schemas, which is expensive. So entries are keyed by the hash of the file
+path and content, the requested schema location or schemas, the options and the library
+versions. The URIs and fingerprints of the schemas used are stored in the entry and
+checked on lookup: if a schema closure has changed, the entry is ignored.
+
+```python
+cache = ResultCache()
+result = validate(file_path, cache=cache)
+```
+
+Computing a key reads the whole file (and its XIncludes). To store a result after a
+cache miss, pass the key returned by `make_key()` to `get()` and `put()`, so the file
+is hashed only once.
+
+Schema fingerprints are computed once per ResultCache object, so a cache object should
+not live longer than a validation run. A cache sent to a worker process (see
+`validate_many()`) uses the shared resolver of that process. Entries are stored in the `results` subdirectory
+of the resolver's cache directory. `prune()` removes entries which have not been used
+for some time.
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from lxml import etree as ET
+
+from gamslib.validation.combined_resolver import (
+    CombinedCatalogResolver,
+    atomic_write,
+    get_resolver,
+)
+from gamslib.validation.schemadeps import find_schema_references
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.validationoptions import (
+    ValidationOptions,
+    get_validation_options,
+)
+from gamslib.validation.validationresult import ValidationResult
+from gamslib.validation.xinclude import find_include_targets
+
+logger = logging.getLogger(__name__)
+
+# Increase if the format of cache entries changes
+ENTRY_FORMAT_VERSION = 1
+
+
+def library_versions() -> str:
+    "Return the versions of the libraries which influence validation results."
+    versions = [f"lxml={ET.__version__}"]
+    for package in ("gamslib", "saxonche"):
+        try:
+            versions.append(f"{package}={importlib.metadata.version(package)}")
+        except importlib.metadata.PackageNotFoundError:
+            # e.g. gamslib running from a source checkout which is not installed
+            versions.append(f"{package}=none")
+    return ";".join(sorted(versions))
+
+
+def file_hash(file_path: Path) -> str:
+    "Return the sha256 hex digest of the content of file_path."
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class ResultCache:
+    """Store validation results on disk."""
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        resolver: CombinedCatalogResolver | None = None,
+    ):
+        """Create a ResultCache.
+
+        Args:
+            cache_dir (Path | None): Directory for the cache entries. Defaults to the
+                'results' subdirectory of the resolver's cache directory.
+            resolver (CombinedCatalogResolver | None): The resolver used to load schemas.
+                Defaults to the shared resolver.
+
+        Raises:
+            ValueError: If no cache_dir is given and caching is disabled in the resolver.
+        """
+        self.resolver = resolver or get_resolver()
+        if cache_dir is None:
+            if self.resolver.cache_dir is None:
+                raise ValueError(
+                    "A cache_dir is required if the resolver has no cache_dir."
+                )
+            cache_dir = Path(self.resolver.cache_dir) / "results"
+        self.cache_dir = Path(cache_dir)
+        self._versions = library_versions()
+        self._fingerprints: dict[tuple[str, SchemaType], str] = {}
+
+    def __getstate__(self) -> dict:
+        "Only send the cache directory to worker processes (see validate_many())."
+        return {"cache_dir": self.cache_dir}
+
+    def __setstate__(self, state: dict):
+        "Recreate the cache in a worker process with the shared resolver of the process."
+        self.resolver = get_resolver()
+        self.cache_dir = state["cache_dir"]
+        self._versions = library_versions()
+        self._fingerprints = {}
+
+    def make_key(
+        self,
+        file_path: Path,
+        schema_location: str | None = None,
+        options: ValidationOptions | None = None,
+        schemas: list[SchemaInfo] | None = None,
+    ) -> str:
+        """Return the cache key for file_path.
+
+        Args:
+            file_path (Path): The validated file.
+            schema_location (str | None): The (resolved) schema location requested by
+                the caller of validate().
+            options (ValidationOptions | None): The options used for validation. If None,
+                the options from the configuration are used (like during validation).
+            schemas (list[SchemaInfo] | None): The schemas requested explicitly, e.g. by
+                XMLValidator.validate().
+        """
+        options = options or get_validation_options()
+        hasher = hashlib.sha256(f"{ENTRY_FORMAT_VERSION}\0{self._versions}".encode("utf-8"))
+        hasher.update(f"\0{schema_location or ''}\0".encode("utf-8"))
+        if schemas:
+            hasher.update(f"schemas:{len(schemas)}\0".encode("utf-8"))
+            for schema in schemas:
+                hasher.update(f"{schema.schema_type}:{schema.schema_uri}\0".encode("utf-8"))
+        hasher.update(f"{options.cache_key()}\0".encode("utf-8"))
+        hasher.update(f"{Path(file_path).resolve()}\0".encode("utf-8"))
+        hasher.update(file_hash(file_path).encode("ascii"))
+        if options.xinclude:
+            for target in find_include_targets(file_path):
+                try:
+                    hasher.update(f"\0{target}\0{file_hash(target)}".encode("utf-8"))
+                except OSError:
+                    hasher.update(f"\0{target}\0missing".encode("utf-8"))
+        return hasher.hexdigest()
+
+    def get(
+        self,
+        file_path: Path,
+        schema_location: str | None = None,
+        options: ValidationOptions | None = None,
+        key: str | None = None,
+    ) -> ValidationResult | None:
+        """Return the cached result for file_path or None.
+
+        None is returned if there is no entry or if one of the schemas used has changed.
+        If key (as returned by make_key()) is given, schema_location and options are
+        ignored and the file is not hashed again.
+        """
+        key = key or self.make_key(file_path, schema_location, options)
+        entry_path = self._entry_path(key)
+        try:
+            entry = json.loads(entry_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        for schema in entry["schemas"]:
+            fingerprint = self.schema_fingerprint(schema["uri"], SchemaType(schema["type"]))
+            if fingerprint != schema["fingerprint"]:
+                return None
+        # mark the entry as used for prune()
+        os.utime(entry_path)
+        result = ValidationResult.from_dict(entry["result"])
+        result.file_path = Path(file_path)
+        return result
+
+    def put(
+        self,
+        file_path: Path,
+        result: ValidationResult,
+        schemas: list[SchemaInfo],
+        key: str | None = None,
+    ):
+        """Store the result of validating file_path against schemas.
+
+        key is the key returned by make_key() for the lookup. It defaults to the key of
+        file_path without requested schemas and with the options from the configuration.
+        """
+        key = key or self.make_key(file_path)
+        entry = {
+            "schemas": [
+                {
+                    "uri": schema.schema_uri,
+                    "type": str(schema.schema_type),
+                    "fingerprint": self.schema_fingerprint(
+                        schema.schema_uri, schema.schema_type
+                    ),
+                }
+                for schema in schemas
+            ],
+            "result": result.to_dict(),
+        }
+        atomic_write(self._entry_path(key), json.dumps(entry).encode("utf-8"))
+
+    def schema_fingerprint(self, schema_uri: str, schema_type: SchemaType) -> str:
+        """Return a hash of the content of a schema and all documents it references.
+
+        Documents which cannot be loaded are part of the fingerprint as missing.
+        """
+        key = (schema_uri, schema_type)
+        if key not in self._fingerprints:
+            hasher = hashlib.sha256()
+            seen = {schema_uri}
+            pending = [schema_uri]
+            while pending:
+                uri = pending.pop(0)
+                hasher.update(f"\0{uri}\0".encode("utf-8"))
+                try:
+                    content = self.resolver.get_content(uri)
+                    references = find_schema_references(uri, schema_type, content)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    hasher.update(b"missing")
+                    continue
+                hasher.update(hashlib.sha256(content).digest())
+                for reference, _ in references:
+                    if reference not in seen:
+                        seen.add(reference)
+                        pending.append(reference)
+            self._fingerprints[key] = hasher.hexdigest()
+        return self._fingerprints[key]
+
+    def prune(self, max_age: float) -> int:
+        """Remove all entries which have not been used for max_age seconds.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        removed = 0
+        limit = time.time() - max_age
+        for entry_path in self.cache_dir.glob("*/*.json"):
+            try:
+                if entry_path.stat().st_mtime < limit:
+                    entry_path.unlink()
+                    removed += 1
+            except OSError as exp:
+                logger.warning("Unable to prune %s: %s", entry_path, exp)
+        return removed
+
+    def clear(self) -> int:
+        "Remove all entries and return the number of removed entries."
+        return self.prune(-1)
+
+    def _entry_path(self, key: str) -> Path:
+        "Return the path of the entry for key."
+        return self.cache_dir / key[:2] / f"{key}.json"
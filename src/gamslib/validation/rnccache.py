@@ -0,0 +1,112 @@
+"""Persistent cache for RelaxNG Compact (RNC) to RelaxNG (RNG) conversions.
+
+rnc2rng is written in pure Python and slow on large compact schemas like TEI
+customizations. The RNCConverter stores the converted RNG document on disk, so
+repeated runs can skip the conversion entirely.
+
+rnc2rng inlines `include`d schemas into the converted document. So the cache key
+is built from the content of the RNC schema and all directly or indirectly included
+RNC files, plus the version of rnc2rng. Whenever one of these files changes, the
+schema is converted again.
+
+Converted schemas are stored in the `rnc` subdirectory of the resolver's cache
+directory.
+"""
+
+import hashlib
+import importlib.metadata
+import io
+import re
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+from urllib.request import url2pathname
+
+import rnc2rng
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver, atomic_write
+
+# matches the href of include directives (comments start with '#', so they do not match)
+INCLUDE_PATTERN = re.compile(r"""^\s*include\s+(?:"([^"]+)"|'([^']+)')""", re.MULTILINE)
+
+
+def rnc2rng_version() -> str:
+    "Return the version of the installed rnc2rng package."
+    return importlib.metadata.version("rnc2rng")
+
+
+class RNCConverter:
+    """Convert RNC schemas to RNG and cache the results on disk."""
+
+    def __init__(
+        self, resolver: CombinedCatalogResolver, cache_dir: Path | None = None
+    ):
+        """Create a RNCConverter.
+
+        Args:
+            resolver (CombinedCatalogResolver): The resolver used to load RNC files.
+            cache_dir (Path | None): Directory for converted schemas. Defaults to the 'rnc'
+                subdirectory of the resolver's cache directory. If the resolver has no
+                cache directory either, results are not cached.
+        """
+        if cache_dir is None and resolver.cache_dir is not None:
+            cache_dir = Path(resolver.cache_dir) / "rnc"
+        self.resolver = resolver
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+
+    def collect_sources(self, schema_uri: str) -> dict[str, bytes]:
+        """Return the content of schema_uri and all (indirectly) included RNC files.
+
+        Returns:
+            dict[str, bytes]: Maps the URI of each file to its content.
+                The first entry is schema_uri.
+        """
+        sources: dict[str, bytes] = {}
+        pending = [schema_uri]
+        while pending:
+            uri = pending.pop(0)
+            if uri in sources:
+                continue
+            sources[uri] = self.resolver.get_content(uri)
+            for match in INCLUDE_PATTERN.finditer(sources[uri].decode("utf-8")):
+                pending.append(urljoin(uri, match.group(1) or match.group(2)))
+        return sources
+
+    @staticmethod
+    def make_key(sources: dict[str, bytes]) -> str:
+        "Return the cache key for a set of sources as returned by collect_sources()."
+        hasher = hashlib.sha256(rnc2rng_version().encode("utf-8"))
+        for uri, content in sources.items():
+            hasher.update(f"\0{uri}\0".encode("utf-8"))
+            hasher.update(hashlib.sha256(content).digest())
+        return hasher.hexdigest()
+
+    def get_rng(self, schema_uri: str) -> bytes:
+        """Return the RNG document for the RNC schema at schema_uri.
+
+        The document is taken from the cache if neither the schema nor any
+        of its included files has changed. Otherwise it is converted and cached.
+        """
+        sources = self.collect_sources(schema_uri)
+        if self.cache_dir is None:
+            return self.convert(schema_uri, sources[schema_uri])
+        cache_path = self.cache_dir / f"{self.make_key(sources)}.rng"
+        if cache_path.is_file():
+            return cache_path.read_bytes()
+        rng = self.convert(schema_uri, sources[schema_uri])
+        atomic_write(cache_path, rng)
+        return rng
+
+    @staticmethod
+    def convert(schema_uri: str, rnc: bytes) -> bytes:
+        """Convert a RNC schema to RNG.
+
+        schema_uri is needed to resolve includes relative to the schema.
+        """
+        parsed = urlparse(schema_uri)
+        # rnc2rng resolves includes relative to the name of the file object
+        rnc_file = io.StringIO(rnc.decode("utf-8"))
+        rnc_file.name = (
+            url2pathname(parsed.path) if parsed.scheme == "file" else schema_uri
+        )
+        ast = rnc2rng.load(rnc_file)
+        return rnc2rng.dumps(ast).encode("utf-8")
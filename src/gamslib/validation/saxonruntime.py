@@ -0,0 +1,99 @@
+"""A process-wide Saxon runtime shared by all Schematron validators.
+
+Creating a PySaxonProcessor and compiling the schxslt2 transpiler is expensive.
+Instead of doing this for each SchematronValidator, all validators use a single
+SaxonRuntime object, which is created lazily on first use by `get_saxon_runtime()`.
+
+Thread-safety rules:
+
+  - There is exactly one SaxonRuntime per process. `get_saxon_runtime()` can be
+    called from any thread.
+  - Parsing, transpiling and compiling via the runtime are serialized by a lock,
+    so the runtime can be used from several threads.
+  - `compile_stylesheet()` returns a new PyXsltExecutable which belongs to the caller.
+    An executable keeps per-transformation state (parameters, messages, ...), so it must
+    not be used by several threads at the same time. If an executable is needed in
+    several threads, each thread has to use its own copy (`executable.clone()`).
+
+saxonche is imported when the runtime is created, not when this module is imported,
+so processes which never validate Schematron do not load Saxon.
+"""
+
+import threading
+from pathlib import Path
+
+SCHXSLT_TRANSPILER = Path(__file__).parent / "resources" / "schxslt2" / "transpile.xsl"
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+class SaxonRuntime:
+    """Holds the Saxon processor and the compiled Schematron transpiler."""
+
+    def __init__(self):
+        """Create the Saxon processor.
+
+        Raises:
+            ImportError: If saxonche is not installed.
+        """
+        from saxonche import (  # pylint: disable=import-outside-toplevel # noqa: PLC0415
+            PySaxonProcessor,
+        )
+
+        self._lock = threading.RLock()
+        self.processor = PySaxonProcessor(license=False)
+        self._xslt_processor = self.processor.new_xslt30_processor()
+        self._transpiler = None
+
+    def compile_stylesheet(self, stylesheet_text: str):
+        """Compile an XSLT stylesheet and return a new PyXsltExecutable.
+
+        The returned executable must not be used by several threads at the same time.
+        """
+        with self._lock:
+            return self._xslt_processor.compile_stylesheet(
+                stylesheet_text=stylesheet_text
+            )
+
+    def parse_xml(self, xml_text: str, base_uri: str | None = None):
+        """Parse an XML string and return a PyXdmNode.
+
+        Relative references of the document (e.g. for `document()`) are resolved
+        against base_uri.
+        """
+        with self._lock:
+            if base_uri is None:
+                return self.processor.parse_xml(xml_text=xml_text)
+            builder = self.processor.new_document_builder()
+            builder.set_base_uri(base_uri)
+            return builder.parse_xml(xml_text=xml_text)
+
+    def transpile_schematron(self, schematron_text: str) -> str:
+        """Transpile a Schematron schema into a validating XSLT stylesheet.
+
+        The schxslt2 transpiler is compiled on first use only.
+
+        Returns:
+            str: The validating XSLT stylesheet.
+        """
+        with self._lock:
+            if self._transpiler is None:
+                self._transpiler = self._xslt_processor.compile_stylesheet(
+                    stylesheet_file=SCHXSLT_TRANSPILER.as_posix()
+                )
+            schema_node = self.processor.parse_xml(xml_text=schematron_text)
+            return self._transpiler.transform_to_string(xdm_node=schema_node)
+
+
+def get_saxon_runtime() -> SaxonRuntime:
+    """Return the process-wide SaxonRuntime, create it on first call.
+
+    Raises:
+        ImportError: If saxonche is not installed.
+    """
+    global _runtime  # pylint: disable=global-statement # noqa: PLW0603
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = SaxonRuntime()
+        return _runtime
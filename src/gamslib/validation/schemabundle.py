@@ -0,0 +1,225 @@
+"""Self-contained, disk-persisted bundles of XML Schema (XSD) files.
+
+Compiling a large XML Schema like tei_all.xsd means resolving every `xs:include`,
+`xs:import`, `xs:redefine` and `xs:override` one by one via the
+CombinedCatalogResolver. This has to be done again in every new process.
+
+The SchemaBundler resolves the complete include/import closure of a schema once and
+stores all schema documents in a local bundle directory, where all schema locations
+are rewritten to point to the bundled files. A manifest (`manifest.json`) keeps the
+source URI, a SHA-256 hash and the state of each bundled document: modification time
+and size of the file it was read from and, for remote schemas, the ETag and fetch time
+of the cached copy (see `CombinedCatalogResolver.get_source_state()`).
+
+Later processes compile the schema from the bundle. Before a bundle is used, the states
+of all sources are compared with the manifest. Only sources whose state differs are read
+and hashed again, so the bundle is rebuilt if one of the sources has changed. If the
+content of a source is unchanged (e.g. a touched file), its new state is stored in the
+manifest.
+
+Bundles are stored in the `bundles` subdirectory of the resolver's cache directory,
+one directory per schema URI. A rebuilt bundle replaces the old one by renames only.
+"""
+
+# pylint: disable=c-extension-no-member
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from lxml import etree as ET
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver, atomic_write
+
+logger = logging.getLogger(__name__)
+
+XSD_NAMESPACE = "http://www.w3.org/2001/XMLSchema"
+# Elements which reference other schema documents via @schemaLocation
+REFERENCE_TAGS = tuple(
+    f"{{{XSD_NAMESPACE}}}{name}" for name in ("include", "import", "redefine", "override")
+)
+MANIFEST_FILE = "manifest.json"
+
+
+class SchemaBundler:
+    """Create and maintain self-contained bundles of XML Schema documents."""
+
+    def __init__(
+        self, resolver: CombinedCatalogResolver, bundle_dir: Path | None = None
+    ):
+        """Create a SchemaBundler.
+
+        Args:
+            resolver (CombinedCatalogResolver): The resolver used to load schema documents.
+            bundle_dir (Path | None): The directory where bundles are stored. Defaults to
+                the 'bundles' subdirectory of the resolver's cache directory.
+
+        Raises:
+            ValueError: If no bundle_dir is given and caching is disabled in the resolver.
+        """
+        if bundle_dir is None:
+            if resolver.cache_dir is None:
+                raise ValueError(
+                    "A bundle_dir is required if the resolver has no cache_dir."
+                )
+            bundle_dir = Path(resolver.cache_dir) / "bundles"
+        self.resolver = resolver
+        self.bundle_dir = Path(bundle_dir)
+
+    def get_bundle_path(self, schema_uri: str) -> Path:
+        "Return the path of the bundle directory for schema_uri."
+        return self.bundle_dir / hashlib.sha256(schema_uri.encode("utf-8")).hexdigest()
+
+    def get_bundle(self, schema_uri: str) -> Path:
+        """Return the path to the main schema file of an up to date bundle for schema_uri.
+
+        The bundle is (re)built if it does not exist or if one of its sources has changed.
+        """
+        bundle_path = self.get_bundle_path(schema_uri)
+        manifest = self.read_manifest(schema_uri)
+        if manifest is None or not self.is_up_to_date(manifest):
+            manifest = self.build(schema_uri)
+        return bundle_path / manifest["main"]
+
+    def read_manifest(self, schema_uri: str) -> dict | None:
+        "Return the manifest of the bundle for schema_uri or None if there is no bundle."
+        manifest_file = self.get_bundle_path(schema_uri) / MANIFEST_FILE
+        try:
+            manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if manifest.get("schema_uri") != schema_uri:
+            return None
+        return manifest
+
+    def is_up_to_date(self, manifest: dict) -> bool:
+        """Return True if all sources listed in manifest are unchanged.
+
+        Sources are only read and hashed if their state differs from the manifest.
+        """
+        bundle_path = self.get_bundle_path(manifest["schema_uri"])
+        updated = False
+        for source in manifest["sources"]:
+            if not (bundle_path / source["file"]).is_file():
+                return False
+            state = self.resolver.get_source_state(source["uri"])
+            if state is not None and state == source.get("state"):
+                continue
+            try:
+                content = self.resolver.get_content(source["uri"])
+            except Exception:  # pylint: disable=broad-exception-caught
+                return False
+            if hashlib.sha256(content).hexdigest() != source["sha256"]:
+                logger.info("Schema source %s has changed.", source["uri"])
+                return False
+            # an expired remote source has been revalidated by get_content()
+            state = self.resolver.get_source_state(source["uri"])
+            if state != source.get("state"):
+                source["state"] = state
+                updated = True
+        if updated:
+            self._write_manifest(bundle_path, manifest)
+        return True
+
+    def build(self, schema_uri: str) -> dict:
+        """Resolve the include/import closure of schema_uri and write a new bundle.
+
+        Returns:
+            dict: The manifest of the new bundle.
+        """
+        sources = self._collect_sources(schema_uri)
+        file_names = {
+            uri: f"{index:03d}_{self._make_file_name(uri)}"
+            for index, uri in enumerate(sources)
+        }
+        manifest = {
+            "schema_uri": schema_uri,
+            "main": file_names[schema_uri],
+            "sources": [],
+        }
+        self.bundle_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.bundle_dir, prefix=".tmp"))
+        tmp_dir.chmod(0o755)  # mkdtemp only grants access to the owner
+        try:
+            for uri, (content, root) in sources.items():
+                for element in root.iter(*REFERENCE_TAGS):
+                    location = element.get("schemaLocation")
+                    if location:
+                        element.set("schemaLocation", file_names[urljoin(uri, location)])
+                (tmp_dir / file_names[uri]).write_bytes(
+                    ET.tostring(root, xml_declaration=True, encoding="utf-8")
+                )
+                manifest["sources"].append(
+                    {
+                        "uri": uri,
+                        "file": file_names[uri],
+                        "sha256": hashlib.sha256(content).hexdigest(),
+                        "state": self.resolver.get_source_state(uri),
+                    }
+                )
+            self._write_manifest(tmp_dir, manifest)
+            self._replace_bundle(tmp_dir, self.get_bundle_path(schema_uri))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.debug("Created schema bundle for %s", schema_uri)
+        return manifest
+
+    def _collect_sources(self, schema_uri: str) -> dict[str, tuple[bytes, ET.Element]]:
+        """Load schema_uri and all directly or indirectly referenced schema documents.
+
+        Returns:
+            dict: Maps each source URI to its raw content and its parsed root element.
+                The first entry is schema_uri.
+        """
+        sources: dict[str, tuple[bytes, ET.Element]] = {}
+        pending = [schema_uri]
+        while pending:
+            uri = pending.pop(0)
+            if uri in sources:
+                continue
+            content = self.resolver.get_content(uri)
+            root = ET.fromstring(content, parser=ET.XMLParser(), base_url=uri)
+            sources[uri] = (content, root)
+            for element in root.iter(*REFERENCE_TAGS):
+                location = element.get("schemaLocation")
+                if location:
+                    pending.append(urljoin(uri, location))
+        return sources
+
+    @staticmethod
+    def _write_manifest(bundle_path: Path, manifest: dict):
+        "Write manifest to bundle_path atomically, so other processes never see partial files."
+        atomic_write(
+            bundle_path / MANIFEST_FILE, json.dumps(manifest, indent=2).encode("utf-8")
+        )
+
+    @staticmethod
+    def _make_file_name(uri: str) -> str:
+        "Return a safe file name for a bundled document based on the last part of uri."
+        name = os.path.basename(urlparse(uri).path) or "schema.xsd"
+        return re.sub(r"[^\w.-]", "_", name)
+
+    @staticmethod
+    def _replace_bundle(new_dir: Path, bundle_path: Path):
+        """Replace the bundle at bundle_path with the content of new_dir.
+
+        The old bundle is renamed aside before the new one is renamed into place and
+        only deleted afterwards, so other processes never see a half-deleted bundle.
+        """
+        old_dir = Path(tempfile.mkdtemp(dir=bundle_path.parent, prefix=".old"))
+        try:
+            with contextlib.suppress(FileNotFoundError):
+                bundle_path.rename(old_dir / bundle_path.name)
+            try:
+                new_dir.rename(bundle_path)
+            except OSError:
+                # another process has created the bundle in the meantime: use this one
+                logger.debug("Bundle %s was created by another process.", bundle_path)
+        finally:
+            shutil.rmtree(old_dir, ignore_errors=True)
@@ -0,0 +1,235 @@
+"""A memory-aware, introspectable cache for compiled schema validators.
+
+Compiled schemas can be very big (a compiled tei_all.xsd needs about 200 MB), so
+the SchemaProvider keeps its SchemaValidator objects in a single SchemaCache with a
+byte budget instead of a fixed number of entries. If adding an entry exceeds the
+budget, the least recently used entries are evicted.
+
+The size of an entry is an estimate provided by the cached value itself (its
+`cache_size` attribute, see SchemaValidator.cache_size), which is based on the size
+of the schema documents and counts every pooled copy of a compiled schema. As the
+pool of a validator grows while it is used, the size is read again on each hit.
+Values without a size estimate count as DEFAULT_ENTRY_SIZE bytes.
+
+The cache keeps hit/miss/eviction counters, which are available via `stats()`:
+
+```python
+cache = SchemaProvider.get_cache()
+print(cache.stats())
+```
+
+`prewarm()` compiles schemas in a background thread, e.g. at worker startup, and
+`invalidate()` removes all cached validators of a schema.
+
+The budget is set via the `general.schema_cache_size` configuration value.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from gamslib.projectconfiguration import (
+    MissingConfigurationException,
+    get_configuration,
+)
+
+logger = logging.getLogger(__name__)
+
+# Default byte budget of the schema cache (if not set in the configuration)
+DEFAULT_CACHE_SIZE = 1_000_000_000
+# Size used for an entry if the value does not provide a size estimate
+DEFAULT_ENTRY_SIZE = 1_000_000
+
+
+def get_cache_size() -> int:
+    """Return the byte budget for the schema cache.
+
+    The value is taken from the project configuration. If there is no configuration,
+    the `GAMSLIB_SCHEMA_CACHE_SIZE` environment variable or DEFAULT_CACHE_SIZE is used.
+    """
+    try:
+        config = get_configuration(os.environ.get("GAMSCFG_PROJECT_TOML"))
+        return config.general.schema_cache_size
+    except MissingConfigurationException:
+        return int(os.environ.get("GAMSLIB_SCHEMA_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+
+
+def entry_size(value: Any) -> int:
+    "Return the estimated size of value: its `cache_size` or DEFAULT_ENTRY_SIZE."
+    return getattr(value, "cache_size", 0) or DEFAULT_ENTRY_SIZE
+
+
+@dataclass
+class CacheStats:
+    """A snapshot of the counters of a SchemaCache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size: int = 0
+    max_size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        "Return the ratio of hits to all lookups (0.0 if there was no lookup)."
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class _Entry:
+    "A cached value and its (estimated) size."
+
+    value: Any
+    size: int
+
+
+class SchemaCache:
+    """A thread-safe LRU cache with a byte budget.
+
+    Keys are tuples, whose last element is the schema URI (e.g. (schema_type, schema_uri)).
+    Values are created by a factory function on a cache miss. Each value is created
+    only once, even if several threads request it at the same time.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """Create a SchemaCache.
+
+        Args:
+            max_size (int): The byte budget. 0 means unlimited.
+        """
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._pending: dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: tuple[Hashable, ...], factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key. Create it with factory if not cached."""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    self._resize(entry)
+                    return entry.value
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._misses += 1
+                    self._pending[key] = threading.Event()
+                    break
+            # another thread is creating the value: wait and look again
+            pending.wait()
+        try:
+            value = factory()
+            size = entry_size(value)
+            with self._lock:
+                self._add(key, value, size)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+
+    def invalidate(self, schema_uri: str) -> int:
+        """Remove all cached values for schema_uri.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[-1] == schema_uri]
+            for key in keys:
+                self._size -= self._entries.pop(key).size
+        return len(keys)
+
+    def remove(self, key: tuple[Hashable, ...]) -> bool:
+        "Remove the entry for key. Return True if there was an entry."
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._size -= entry.size
+            return True
+
+    def clear(self):
+        "Remove all entries and reset the counters."
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def prewarm(
+        self, items: Iterable[tuple[tuple[Hashable, ...], Callable[[], Any]]]
+    ) -> threading.Thread:
+        """Create the values for items in a background thread.
+
+        Args:
+            items: (key, factory) pairs as used by get().
+
+        Returns:
+            threading.Thread: The (started) thread. Join it to wait for the end of prewarming.
+        """
+        items = list(items)
+
+        def run():
+            for key, factory in items:
+                try:
+                    self.get(key, factory)
+                except Exception as exp:  # pylint: disable=broad-exception-caught
+                    logger.warning("Unable to prewarm schema cache for %s: %s", key, exp)
+
+        thread = threading.Thread(target=run, name="schema-cache-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> CacheStats:
+        "Return a snapshot of the cache counters."
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+                max_size=self.max_size,
+            )
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _add(self, key: tuple, value: Any, size: int):
+        "Add an entry and evict least recently used entries if over budget. Needs the lock."
+        self._entries[key] = _Entry(value, size)
+        self._size += size
+        self._evict()
+
+    def _resize(self, entry: _Entry):
+        "Update the size of entry (e.g. if the pool of a validator has grown). Needs the lock."
+        size = entry_size(entry.value)
+        if size != entry.size:
+            self._size += size - entry.size
+            entry.size = size
+            self._evict()
+
+    def _evict(self):
+        "Evict least recently used entries while over budget. Needs the lock."
+        # never evict the most recent entry, even if it exceeds the budget on its own
+        while self.max_size and self._size > self.max_size and len(self._entries) > 1:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self._evictions += 1
+            logger.debug("Evicted %s from schema cache (%d bytes)", evicted_key, evicted.size)
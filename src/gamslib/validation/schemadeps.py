@@ -0,0 +1,266 @@
+"""Track the local documents each compiled schema depends on.
+
+Projects often keep their own schemas (e.g. ODD generated RelaxNG and Schematron
+files) next to the data and edit them while workers are running. The SchemaProvider
+keeps compiled schemas in memory, so without tracking, long-running processes would
+validate against outdated schemas until they are restarted.
+
+When a schema is compiled, `collect_sources()` resolves the closure of all documents
+it includes or imports (`xs:include`, `rng:include`, `sch:include`, RNC `include`,
+external DTD entities etc.). The DependencyGraph stores the modification time, size
+and SHA-256 hash of each local file in this closure and maps each file to the cache
+keys of all compiled schemas which depend on it.
+
+Before a compiled schema is used, `changed()` checks its files: a file counts as
+changed if its hash differs (a new modification time alone is not enough). The
+SchemaProvider then removes exactly the cached validators which depend on a changed
+file. Checking a file is a single `stat()` call as long as it is unchanged.
+
+Remote documents and documents from the XML catalog are not tracked: they are
+expected to be stable (and are revalidated by the CombinedCatalogResolver).
+"""
+
+# pylint: disable=c-extension-no-member
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections.abc import Hashable
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urljoin, urlparse
+from urllib.request import url2pathname
+
+from lxml import etree as ET
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver
+from gamslib.validation.compositeschema import is_composite_uri
+from gamslib.validation.rnccache import INCLUDE_PATTERN
+from gamslib.validation.schemabundle import REFERENCE_TAGS as XSD_REFERENCE_TAGS
+from gamslib.validation.schemainfo import SchemaType
+
+logger = logging.getLogger(__name__)
+
+RELAXNG_NAMESPACE = "http://relaxng.org/ns/structure/1.0"
+SCHEMATRON_NAMESPACE = "http://purl.oclc.org/dsdl/schematron"
+# Elements referencing other documents via @href
+HREF_TAGS = {
+    SchemaType.RNG: tuple(
+        f"{{{RELAXNG_NAMESPACE}}}{name}" for name in ("include", "externalRef")
+    ),
+    SchemaType.SCH: (f"{{{SCHEMATRON_NAMESPACE}}}include",),
+}
+# matches the system identifier of external (parameter) entities in a DTD
+DTD_ENTITY_PATTERN = re.compile(
+    r"""<!ENTITY\s+(?:%\s+)?[^\s]+\s+"""
+    r"""(?:SYSTEM|PUBLIC\s+(?:"[^"]*"|'[^']*'))\s+(?:"([^"]+)"|'([^']+)')"""
+)
+
+
+def find_json_references(schema) -> list[str]:
+    "Return all '$ref' values of a JSON schema which point to other documents."
+    references = []
+    pending = [schema]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, dict):
+            reference = node.get("$ref")
+            if isinstance(reference, str) and not reference.startswith("#"):
+                references.append(reference.split("#")[0])
+            pending.extend(node.values())
+        elif isinstance(node, list):
+            pending.extend(node)
+    return list(dict.fromkeys(references))
+
+
+def find_schema_references(
+    schema_uri: str, schema_type: SchemaType, content: bytes
+) -> list[tuple[str, SchemaType]]:
+    """Return the (uri, type) pairs of all documents directly referenced by a schema.
+
+    Relative references are resolved against schema_uri.
+    """
+    if schema_type == SchemaType.RNC:
+        return [
+            (urljoin(schema_uri, match.group(1) or match.group(2)), schema_type)
+            for match in INCLUDE_PATTERN.finditer(content.decode("utf-8"))
+        ]
+    if schema_type == SchemaType.JSON:
+        return [
+            (urljoin(schema_uri, reference), schema_type)
+            for reference in find_json_references(json.loads(content))
+        ]
+    if schema_type == SchemaType.DTD:
+        return [
+            (urljoin(schema_uri, match.group(1) or match.group(2)), schema_type)
+            for match in DTD_ENTITY_PATTERN.finditer(content.decode("utf-8"))
+        ]
+    if schema_type == SchemaType.XSD:
+        tags, attribute = XSD_REFERENCE_TAGS, "schemaLocation"
+    elif schema_type in HREF_TAGS:
+        tags, attribute = HREF_TAGS[schema_type], "href"
+    else:
+        return []
+    root = ET.fromstring(content, parser=ET.XMLParser(), base_url=schema_uri)
+    return [
+        (urljoin(schema_uri, element.get(attribute)), schema_type)
+        for element in root.iter(*tags)
+        if element.get(attribute)
+    ]
+
+
+def local_path(uri: str) -> Path | None:
+    "Return the path of a file URI (or a plain path) or None for other URIs."
+    parsed = urlparse(uri)
+    if parsed.scheme == "file":
+        return Path(url2pathname(parsed.path))
+    if not parsed.scheme or (len(parsed.scheme) == 1 and os.name == "nt"):
+        return Path(uri)
+    return None
+
+
+def collect_sources(
+    schema_uri: str,
+    schema_type: SchemaType,
+    resolver: CombinedCatalogResolver,
+    local_only: bool = False,
+) -> dict[str, bytes | None]:
+    """Return the content of schema_uri and all (indirectly) referenced documents.
+
+    Args:
+        schema_uri (str): The URI of the schema.
+        schema_type (SchemaType): The type of the schema.
+        resolver (CombinedCatalogResolver): The resolver used to load the documents.
+        local_only (bool): If True, only local files (and composite schemas) are
+            loaded and searched for references.
+
+    Returns:
+        dict: Maps each URI to its content or to None if it cannot be loaded.
+            The first entry is schema_uri.
+    """
+    sources: dict[str, bytes | None] = {}
+    pending = [schema_uri]
+    while pending:
+        uri = pending.pop(0)
+        if uri in sources:
+            continue
+        if local_only and local_path(uri) is None and not is_composite_uri(uri):
+            continue
+        try:
+            sources[uri] = resolver.get_content(uri)
+            references = find_schema_references(uri, schema_type, sources[uri])
+        except Exception as exp:  # pylint: disable=broad-exception-caught
+            logger.debug("Cannot read the references of %s: %s", uri, exp)
+            sources.setdefault(uri, None)
+            continue
+        pending.extend(reference for reference, _ in references)
+    return sources
+
+
+class FileState(NamedTuple):
+    """The state of a tracked file. A missing file has size -1."""
+
+    mtime_ns: int
+    size: int
+    sha256: str
+
+    @classmethod
+    def from_content(cls, path: Path, content: bytes | None) -> "FileState":
+        "Return the state of path, with the hash of content (as read when compiling)."
+        try:
+            stat = path.stat()
+        except OSError:
+            return cls(0, -1, "")
+        sha256 = "" if content is None else hashlib.sha256(content).hexdigest()
+        return cls(stat.st_mtime_ns, stat.st_size, sha256)
+
+
+class DependencyGraph:
+    """A thread-safe mapping between cache keys and the local files they depend on.
+
+    The state of each file is stored per key, as the keys may have been compiled
+    from different versions of a file.
+    """
+
+    def __init__(self):
+        self._dependencies: dict[Hashable, dict[Path, FileState]] = {}
+        self._dependents: dict[Path, set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def track(self, key: Hashable, sources: dict[str, bytes | None]):
+        """Record the local files of sources (as returned by collect_sources()) for key.
+
+        Earlier dependencies of key are replaced.
+        """
+        states = {}
+        for uri, content in sources.items():
+            path = local_path(uri)
+            if path is not None:
+                states[path.absolute()] = FileState.from_content(path, content)
+        with self._lock:
+            self._forget(key)
+            self._dependencies[key] = states
+            for path in states:
+                self._dependents.setdefault(path, set()).add(key)
+
+    def changed(self, key: Hashable) -> set[Path]:
+        "Return the files key depends on which have changed since they were tracked."
+        with self._lock:
+            states = dict(self._dependencies.get(key, {}))
+        changed = set()
+        for path, state in states.items():
+            try:
+                stat = path.stat()
+            except OSError:
+                if state.size != -1:
+                    changed.add(path)
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == state[:2]:
+                continue
+            try:
+                sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                changed.add(path)
+                continue
+            if sha256 != state.sha256:
+                changed.add(path)
+            else:
+                # only touched: remember the new time to avoid hashing again
+                with self._lock:
+                    if path in self._dependencies.get(key, {}):
+                        self._dependencies[key][path] = FileState(
+                            stat.st_mtime_ns, stat.st_size, sha256
+                        )
+        return changed
+
+    def dependencies(self, key: Hashable) -> set[Path]:
+        "Return the local files key depends on."
+        with self._lock:
+            return set(self._dependencies.get(key, ()))
+
+    def dependents(self, path: Path) -> set[Hashable]:
+        "Return the keys which depend on path."
+        with self._lock:
+            return set(self._dependents.get(Path(path).absolute(), ()))
+
+    def forget(self, key: Hashable):
+        "Remove key and its dependencies."
+        with self._lock:
+            self._forget(key)
+
+    def clear(self):
+        "Remove all keys."
+        with self._lock:
+            self._dependencies.clear()
+            self._dependents.clear()
+
+    def _forget(self, key: Hashable):
+        "Remove key. Needs the lock."
+        for path in self._dependencies.pop(key, ()):
+            dependents = self._dependents.get(path)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[path]
@@ -11,6 +11,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import ClassVar
 
+from gamslib.validation.compositeschema import is_composite_uri
+
 
 # map extensions to schema types
 class SchemaType(enum.StrEnum):
@@ -21,8 +23,9 @@ class SchemaType(enum.StrEnum):
     RNC = "Relax NG Compact"
     SCH = "Schematron"
     DTD = "Document Type Definition"
+    JSON = "JSON Schema"
 
-    # TODO: add a type for each supported schema type (json etc.)
+    # TODO: add a type for each supported schema type
 
     UNKNOWN = "Unknown Schema Type"
 
@@ -46,11 +49,15 @@ class SchemaInfo:
         ".rnc": SchemaType.RNC,
         ".sch": SchemaType.SCH,
         ".dtd": SchemaType.DTD,
+        ".json": SchemaType.JSON,
     }
 
     def __post_init__(self):
         # make sure schema_location is always a URI
-        if not re.match(r"^(https?|file)://.*", self.schema_uri):
+        if not (
+            re.match(r"^(https?|file)://.*", self.schema_uri)
+            or is_composite_uri(self.schema_uri)
+        ):
             schema_path = Path(self.schema_uri)
             self.schema_uri = schema_path.resolve().as_uri()
 
@@ -96,6 +103,8 @@ class SchemaInfo:
             schema_type = SchemaType.DTD
         elif self.mimetype == "application/relax-ng-compact-syntax":
             schema_type = SchemaType.RNC
+        elif self.mimetype == "application/schema+json":
+            schema_type = SchemaType.JSON
         return schema_type
 
     def _detect_by_extension(self) -> bool:
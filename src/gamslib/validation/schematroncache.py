@@ -0,0 +1,95 @@
+"""On-disk cache for transpiled Schematron validation stylesheets.
+
+Schematron schemas are validated by transpiling them into a validating XSLT
+stylesheet (using schxslt2 for Saxon or the ISO Schematron skeleton shipped
+with lxml). Transpiling is expensive and was done again in every process.
+
+The SchematronCache stores the transpiled stylesheets on disk. Entries are keyed by a
+hash of
+
+  - the content of the Schematron schema,
+  - the transpiler version and
+  - the query binding.
+
+So the first run pays the transpile cost, later processes only have to compile
+the cached stylesheet.
+
+As schxslt2 does not provide a usable version number, the hash of transpile.xsl is
+used as its version. For lxml, the lxml version is used.
+"""
+
+# pylint: disable=c-extension-no-member
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+import lxml.isoschematron
+from lxml import etree as ET
+
+from gamslib.validation.combined_resolver import atomic_write
+from gamslib.validation.saxonruntime import SCHXSLT_TRANSPILER
+
+
+@lru_cache
+def schxslt_transpiler_version() -> str:
+    "Return the version id of the bundled schxslt2 transpiler."
+    return "schxslt2-" + hashlib.sha256(SCHXSLT_TRANSPILER.read_bytes()).hexdigest()
+
+
+def lxml_transpiler_version() -> str:
+    "Return the version id of the ISO Schematron implementation shipped with lxml."
+    return f"lxml-{ET.__version__}"
+
+
+class SchematronCache:
+    """Store and load transpiled Schematron validation stylesheets."""
+
+    def __init__(self, cache_dir: Path):
+        """Create a SchematronCache.
+
+        Args:
+            cache_dir (Path): Directory where the stylesheets are stored.
+        """
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def make_key(schema_content: bytes, transpiler_version: str, binding: str) -> str:
+        "Return the cache key for a schema, a transpiler version and a query binding."
+        hasher = hashlib.sha256(schema_content)
+        hasher.update(f"\0{transpiler_version}\0{binding}".encode("utf-8"))
+        return hasher.hexdigest()
+
+    def get_path(self, key: str) -> Path:
+        "Return the path of the cached stylesheet for key."
+        return self.cache_dir / f"{key}.xsl"
+
+    def get(self, key: str) -> bytes | None:
+        "Return the cached stylesheet for key or None if not cached."
+        try:
+            return self.get_path(key).read_bytes()
+        except OSError:
+            return None
+
+    def put(self, key: str, stylesheet: bytes):
+        "Store a stylesheet in the cache."
+        atomic_write(self.get_path(key), stylesheet)
+
+
+class CachedLxmlSchematron:
+    """A Schematron validator running an already transpiled lxml validation stylesheet.
+
+    Provides the parts of a lxml.isoschematron.Schematron object created with
+    `store_report=True` and `store_xslt=True` which are used by the validators
+    (`validate()`, `validation_report` and `validator_xslt`), but skips the
+    transpilation steps.
+    """
+
+    def __init__(self, validator_xslt: ET.ElementTree):
+        self.validator_xslt = validator_xslt
+        self.validation_report: ET.ElementTree | None = None
+        self._transform = ET.XSLT(validator_xslt)
+
+    def validate(self, tree: ET.ElementTree) -> bool:
+        "Run the stylesheet on tree, keep the SVRL report and return True if no assert failed."
+        self.validation_report = self._transform(tree)
+        return not lxml.isoschematron.svrl_validation_errors(self.validation_report)
@@ -0,0 +1,355 @@
+"""The ValidationContext holds everything known about a file during its validation.
+
+Without a context, validating a single XML file parsed it several times: once to extract
+the referenced schemas and once more in the XMLValidator. The ValidationContext
+detects the format and parses the file at most once. The parsed tree is then shared
+by schema extraction and all SchemaValidators.
+
+```python
+context = ValidationContext(file_path)
+schemas = extract_referenced_schemas(file_path, context.format_info, context=context)
+result = ValidatorFactory.get_validator(context.format_info).validate_context(
+    context, schemas
+)
+```
+
+Validators must not modify the shared tree.
+
+The context also carries the ValidationOptions (error limits, fail fast mode) used by
+all validators of the file.
+
+For JSON files, `json_document` holds the parsed document, which is shared by schema
+extraction and the JSONValidator in the same way.
+
+Very large files are not parsed into a tree at all. If a file is larger than the
+`general.streaming_validation_threshold` configuration value, the context is in
+streaming mode: schema references are extracted from the document header
+(`header_tree`) and validators which support it validate the file in a single pass in
+bounded memory (see `SchemaValidator.validate_stream()`).
+
+If the `xinclude` option is set, the XIncludes of the tree are expanded when the
+file is parsed (see xinclude.py). `xinclude_expansion` then knows the origin of all
+included elements and the includes which could not be processed. As XIncludes can
+only be expanded in a tree, contexts with this option are not in streaming mode,
+unless streaming is forced.
+
+Documents do not have to be files. Contexts created by `from_bytes()` or
+`from_stream()` hold the document in memory (e.g. documents received by an ingest
+API), so they can be validated without writing temporary files:
+
+```python
+context = ValidationContext.from_bytes(data, base_url="project/objects/o1/TEI.xml")
+```
+
+The base URL (a path or file URI) takes the place of the file path: relative
+references (schemas, DTDs, XIncludes) are resolved against it and it is used in
+messages, but it does not need to exist. Validators read the document via `open()`,
+which works for files and in-memory documents. If no format is given, in-memory
+documents are only distinguished into XML, JSON and other data (see
+`guess_in_memory_format()`), so pass the format_info if subtypes matter (e.g. for
+default schemas).
+"""
+
+# pylint: disable=c-extension-no-member
+import io
+import json
+import os
+from pathlib import Path
+from typing import BinaryIO
+
+from lxml import etree as ET
+
+from gamslib import formatdetect
+from gamslib.formatdetect.formatdetector import DEFAULT_TYPE
+from gamslib.formatdetect.formatinfo import FormatInfo
+from gamslib.projectconfiguration import (
+    MissingConfigurationException,
+    get_configuration,
+)
+from gamslib.validation.schemadeps import local_path
+from gamslib.validation.validationoptions import (
+    ValidationOptions,
+    get_validation_options,
+)
+from gamslib.validation.xinclude import XIncludeExpansion, XIncludeProcessor
+from gamslib.validation.xmlschemadetector import read_header_tree
+
+# Files larger than this (in bytes) are validated in streaming mode,
+# if the threshold is not set in the configuration
+DEFAULT_STREAMING_THRESHOLD = 100_000_000
+# Used as file path of in-memory documents without a base URL
+IN_MEMORY_NAME = "<memory>"
+# Detector name of the formats guessed for in-memory documents
+IN_MEMORY_DETECTOR = "InMemoryGuess"
+
+
+def get_streaming_threshold() -> int:
+    """Return the file size (in bytes) above which files are validated in streaming mode.
+
+    The value is taken from the project configuration. If there is no configuration,
+    the `GAMSLIB_STREAMING_VALIDATION_THRESHOLD` environment variable or
+    DEFAULT_STREAMING_THRESHOLD is used. 0 means, that streaming mode is disabled.
+    """
+    try:
+        config = get_configuration(os.environ.get("GAMSCFG_PROJECT_TOML"))
+        return config.general.streaming_validation_threshold
+    except MissingConfigurationException:
+        return int(
+            os.environ.get(
+                "GAMSLIB_STREAMING_VALIDATION_THRESHOLD", DEFAULT_STREAMING_THRESHOLD
+            )
+        )
+
+
+def guess_in_memory_format(data: bytes) -> FormatInfo:
+    """Return the format of an in-memory document, guessed from its first character.
+
+    Only XML ('application/xml'), JSON ('application/json') and other data
+    (DEFAULT_TYPE) are distinguished. No subtype is detected.
+    """
+    start = data[:1024].lstrip(b"\xef\xbb\xbf \t\r\n")
+    if start.startswith(b"<"):
+        mimetype = "application/xml"
+    elif start.startswith((b"{", b"[")):
+        mimetype = "application/json"
+    else:
+        mimetype = DEFAULT_TYPE
+    return FormatInfo(detector=IN_MEMORY_DETECTOR, mimetype=mimetype)
+
+
+def base_path(base_url: str | Path | None) -> Path:
+    """Return the path which takes the place of the file path of an in-memory document.
+
+    Raises:
+        ValueError: If base_url is neither a path nor a file URI.
+    """
+    if base_url is None:
+        return Path(IN_MEMORY_NAME)
+    path = local_path(str(base_url))
+    if path is None:
+        raise ValueError(f"base_url must be a path or a file URI: '{base_url}'")
+    return path
+
+
+class ValidationContext:
+    """Lazily detects the format of a file and parses it (once)."""
+
+    def __init__(
+        self,
+        file_path: Path,
+        format_info: FormatInfo | None = None,
+        streaming: bool | None = None,
+        options: ValidationOptions | None = None,
+        data: bytes | None = None,
+    ):
+        """Create a ValidationContext.
+
+        Args:
+            file_path (Path): The file to validate.
+            format_info (FormatInfo | None): The format of the file, if already known.
+                If None, the format is detected on first access of `format_info`.
+            streaming (bool | None): Force (True) or disable (False) streaming mode.
+                If None, streaming mode is used for files larger than the value
+                returned by get_streaming_threshold() (unless XIncludes are expanded).
+            options (ValidationOptions | None): The options for validating the file.
+                If None, the options are taken from the configuration.
+            data (bytes | None): The document, if it is held in memory. file_path is
+                then only used to resolve relative references and in messages.
+        """
+        self.file_path = Path(file_path)
+        self._data = data
+        self._format_info = format_info
+        self._streaming = streaming
+        self._options = options
+        self._tree: ET.ElementTree | None = None
+        self._header_tree: ET.ElementTree | None = None
+        self._parse_error: ET.XMLSyntaxError | None = None
+        self._xinclude_expansion: XIncludeExpansion | None = None
+        self._json_document = None
+        self._json_error: json.JSONDecodeError | None = None
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: bytes,
+        base_url: str | Path | None = None,
+        format_info: FormatInfo | None = None,
+        streaming: bool | None = None,
+        options: ValidationOptions | None = None,
+    ) -> "ValidationContext":
+        """Create a ValidationContext for an in-memory document.
+
+        Args:
+            data (bytes): The document.
+            base_url (str | Path | None): The path or file URI relative references
+                are resolved against. If None, the current directory is used.
+            format_info (FormatInfo | None): The format of the document. If None,
+                it is guessed by guess_in_memory_format().
+            streaming (bool | None): See __init__().
+            options (ValidationOptions | None): See __init__().
+
+        Raises:
+            ValueError: If base_url is neither a path nor a file URI.
+        """
+        return cls(
+            base_path(base_url),
+            format_info,
+            streaming=streaming,
+            options=options,
+            data=bytes(data),
+        )
+
+    @classmethod
+    def from_stream(
+        cls,
+        stream: BinaryIO,
+        base_url: str | Path | None = None,
+        format_info: FormatInfo | None = None,
+        streaming: bool | None = None,
+        options: ValidationOptions | None = None,
+    ) -> "ValidationContext":
+        """Create a ValidationContext for a document read from a binary stream.
+
+        The stream is read (once) into memory, as most validations need more than
+        one pass over the document. See from_bytes() for the arguments.
+        """
+        return cls.from_bytes(
+            stream.read(), base_url, format_info, streaming=streaming, options=options
+        )
+
+    @property
+    def in_memory(self) -> bool:
+        "Return True if the document is held in memory instead of a file."
+        return self._data is not None
+
+    @property
+    def data(self) -> bytes | None:
+        "Return the in-memory document or None if the document is a file."
+        return self._data
+
+    @property
+    def size(self) -> int:
+        "Return the size of the document in bytes."
+        if self._data is not None:
+            return len(self._data)
+        return self.file_path.stat().st_size
+
+    def open(self) -> BinaryIO:
+        """Return a new binary file object positioned at the start of the document.
+
+        The caller has to close it. For in-memory documents, the `name` of the
+        returned object is the file path, which lxml uses as the URL of the document.
+        """
+        if self._data is None:
+            return open(self.file_path, "rb")  # pylint: disable=consider-using-with
+        source = io.BytesIO(self._data)
+        source.name = str(self.file_path)
+        return source
+
+    @property
+    def format_info(self) -> FormatInfo:
+        "Return the format of the file. The format is detected on first access."
+        if self._format_info is None:
+            if self._data is not None:
+                self._format_info = guess_in_memory_format(self._data)
+            else:
+                self._format_info = formatdetect.detect_format(self.file_path)
+        return self._format_info
+
+    @property
+    def options(self) -> ValidationOptions:
+        "Return the ValidationOptions. If not set, they are read from the configuration."
+        if self._options is None:
+            self._options = get_validation_options()
+        return self._options
+
+    @property
+    def tree(self) -> ET.ElementTree:
+        """Return the parsed XML tree of the file. The file is parsed on first access.
+
+        If the xinclude option is set (and the context is not in streaming mode), the
+        XIncludes of the tree are expanded.
+
+        Raises:
+            lxml.etree.XMLSyntaxError: If the file is not well formed. The error is
+                raised again on each access, without parsing the file again.
+        """
+        if self._parse_error is not None:
+            raise self._parse_error
+        if self._tree is None:
+            try:
+                if self._data is None:
+                    tree = ET.parse(self.file_path)
+                else:
+                    tree = ET.fromstring(
+                        self._data, base_url=str(self.file_path)
+                    ).getroottree()
+            except ET.XMLSyntaxError as exp:
+                self._parse_error = exp
+                raise
+            if self.options.xinclude and not self.streaming:
+                self._xinclude_expansion = XIncludeProcessor().process(tree)
+            self._tree = tree
+        return self._tree
+
+    @property
+    def xinclude_expansion(self) -> XIncludeExpansion | None:
+        "Return the XIncludeExpansion of the tree or None if XIncludes were not expanded."
+        return self._xinclude_expansion
+
+    @property
+    def json_document(self):
+        """Return the parsed JSON document. The file is parsed on first access.
+
+        Raises:
+            json.JSONDecodeError: If the file is not valid JSON. The error is raised
+                again on each access, without parsing the file again.
+        """
+        if self._json_error is not None:
+            raise self._json_error
+        if self._json_document is None:
+            try:
+                with self.open() as f:
+                    self._json_document = json.load(f)
+            except json.JSONDecodeError as exp:
+                self._json_error = exp
+                raise
+        return self._json_document
+
+    @property
+    def streaming(self) -> bool:
+        "Return True if the file should be validated in streaming mode."
+        if self._streaming is None and self.options.xinclude:
+            self._streaming = False
+        if self._streaming is None:
+            threshold = get_streaming_threshold()
+            try:
+                self._streaming = 0 < threshold < self.size
+            except OSError:
+                self._streaming = False
+        return self._streaming
+
+    @property
+    def header_tree(self) -> ET.ElementTree:
+        """Return a tree containing only the prolog and the root element of the file.
+
+        The tree contains processing instructions and the doctype in front of the root
+        element and the root element with its attributes. The content of the root
+        element is missing, as only the beginning of the file is parsed (see
+        `xmlschemadetector.read_header_tree()`). This is enough to find referenced
+        schemas. If the full tree is already available, it is returned instead.
+
+        Raises:
+            lxml.etree.XMLSyntaxError: If the header is not well formed.
+        """
+        if self._tree is not None:
+            return self._tree
+        if self._header_tree is None:
+            with self.open() as f:
+                self._header_tree = read_header_tree(f)
+        return self._header_tree
+
+    @property
+    def is_parsed(self) -> bool:
+        "Return True if the file has already been parsed."
+        return self._tree is not None or self._parse_error is not None
@@ -0,0 +1,226 @@
+"""Options which control how many and which errors a validation reports.
+
+Badly broken documents can produce hundreds of thousands of almost identical errors
+(e.g. the same unexpected element in every record). Keeping all of them as strings
+bloats memory and makes reports unreadable. ValidationOptions limit this:
+
+  - `max_errors`: the maximum number of errors kept per ValidationSubResult. Further
+    errors are only counted and reported as one summary line. 0 (the default) means
+    no limit.
+  - `fail_fast`: stop validating a file after the first schema it does not validate
+    against.
+  - `aggregate_errors`: group errors by their message template (the message with
+    quoted values and numbers replaced) and report each template once, with the
+    number of occurrences and the first `max_locations` locations.
+  - `xinclude`: expand XIncludes before validating XML files (see xinclude.py).
+
+If no options are passed, the values are taken from the project configuration
+(`general.validation_max_errors`, `general.validation_fail_fast`,
+`general.validation_aggregate_errors`, `general.validation_max_locations` and
+`general.validation_xinclude`) or the corresponding `GAMSLIB_VALIDATION_*`
+environment variables.
+
+The ErrorCollector applies the options while errors are collected, so errors beyond
+the limit are never converted to strings.
+"""
+
+import os
+import re
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from gamslib.projectconfiguration import (
+    MissingConfigurationException,
+    get_configuration,
+)
+
+# Defaults, if the options are neither configured nor set in the environment
+DEFAULT_MAX_ERRORS = 0
+DEFAULT_MAX_LOCATIONS = 5
+
+# Quoted values and numbers in error messages, which are replaced in message templates
+TEMPLATE_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"|\b\d+(?:\.\d+)?\b")
+
+
+def _env_flag(name: str) -> bool:
+    "Return True if the environment variable name is set to a true value."
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class ValidationOptions:
+    """Limits for the errors reported by a validation."""
+
+    max_errors: int = DEFAULT_MAX_ERRORS
+    fail_fast: bool = False
+    aggregate_errors: bool = False
+    max_locations: int = DEFAULT_MAX_LOCATIONS
+    xinclude: bool = False
+
+    def cache_key(self) -> str:
+        "Return a string identifying these options, e.g. for the result cache."
+        return (
+            f"max_errors={self.max_errors};fail_fast={self.fail_fast};"
+            f"aggregate_errors={self.aggregate_errors};max_locations={self.max_locations};"
+            f"xinclude={self.xinclude}"
+        )
+
+
+def get_validation_options() -> ValidationOptions:
+    """Return the ValidationOptions from the project configuration.
+
+    If there is no configuration, the `GAMSLIB_VALIDATION_MAX_ERRORS`,
+    `GAMSLIB_VALIDATION_FAIL_FAST`, `GAMSLIB_VALIDATION_AGGREGATE_ERRORS` and
+    `GAMSLIB_VALIDATION_MAX_LOCATIONS` and `GAMSLIB_VALIDATION_XINCLUDE` environment
+    variables or the defaults are used.
+    """
+    try:
+        config = get_configuration(os.environ.get("GAMSCFG_PROJECT_TOML"))
+        return ValidationOptions(
+            max_errors=config.general.validation_max_errors,
+            fail_fast=config.general.validation_fail_fast,
+            aggregate_errors=config.general.validation_aggregate_errors,
+            max_locations=config.general.validation_max_locations,
+            xinclude=config.general.validation_xinclude,
+        )
+    except MissingConfigurationException:
+        return ValidationOptions(
+            max_errors=int(
+                os.environ.get("GAMSLIB_VALIDATION_MAX_ERRORS", DEFAULT_MAX_ERRORS)
+            ),
+            fail_fast=_env_flag("GAMSLIB_VALIDATION_FAIL_FAST"),
+            aggregate_errors=_env_flag("GAMSLIB_VALIDATION_AGGREGATE_ERRORS"),
+            max_locations=int(
+                os.environ.get("GAMSLIB_VALIDATION_MAX_LOCATIONS", DEFAULT_MAX_LOCATIONS)
+            ),
+            xinclude=_env_flag("GAMSLIB_VALIDATION_XINCLUDE"),
+        )
+
+
+def message_template(message: str) -> str:
+    """Return the template of an error message.
+
+    Quoted values and numbers are replaced by placeholders, so that e.g.
+    "Element 'a': This element is not expected." and
+    "Element 'b': This element is not expected." have the same template.
+    """
+    return TEMPLATE_PATTERN.sub(
+        lambda match: "'…'" if match.group(0)[0] in "'\"" else "N", message
+    )
+
+
+class ErrorCollector:
+    """Collect the errors of a single validation step according to ValidationOptions.
+
+    ```python
+    collector = ErrorCollector(options)
+    collector.add_lxml_errors(schema.error_log)
+    result.errors = collector.get_errors()
+    ```
+    """
+
+    def __init__(self, options: ValidationOptions | None = None, kind: str = "errors"):
+        """Create an ErrorCollector.
+
+        Args:
+            options (ValidationOptions | None): The options to apply. Defaults to the
+                options from the configuration.
+            kind (str): What is collected ("errors" or "warnings"), used in the
+                summary of omitted entries.
+        """
+        self.options = options or get_validation_options()
+        self.kind = kind
+        # number of all errors added, including omitted ones
+        self.count = 0
+        self._errors: list[str] = []
+        # template -> [number of occurrences, first locations]
+        self._groups: dict[str, list] = {}
+
+    @property
+    def is_full(self) -> bool:
+        "True, if no more errors (or, if aggregating, no more templates) are kept."
+        stored = len(self._groups) if self.options.aggregate_errors else len(self._errors)
+        return 0 < self.options.max_errors <= stored
+
+    def add(self, error: str, template: str | None = None, location: str = ""):
+        """Add an error.
+
+        Args:
+            error (str): The full error message, as reported without aggregation.
+            template (str | None): The message template used for aggregation.
+                Defaults to the template of error.
+            location (str): The location of the error, reported for aggregated errors.
+        """
+        self.count += 1
+        if not self.options.aggregate_errors:
+            if not self.is_full:
+                self._errors.append(error)
+            return
+        template = template or message_template(error)
+        group = self._groups.get(template)
+        if group is None:
+            if self.is_full:
+                return
+            group = self._groups[template] = [0, []]
+        group[0] += 1
+        if location and len(group[1]) < self.options.max_locations:
+            group[1].append(location)
+
+    def add_lxml_errors(
+        self,
+        error_log: Iterable,
+        locate: Callable[[str | None], str | None] | None = None,
+    ):
+        """Add all entries of an lxml error log (or another iterable of lxml log entries).
+
+        Args:
+            error_log: The lxml log entries.
+            locate: A function returning the file an entry comes from for the path of
+                the entry (or None for the validated file). Used for documents with
+                expanded XIncludes (see XIncludeExpansion.locate()).
+        """
+        for entry in error_log:
+            if self.is_full and not self.options.aggregate_errors:
+                # only count, do not convert to a string
+                self.count += 1
+                continue
+            origin = locate(entry.path) if locate is not None else None
+            if origin is None:
+                error, location = str(entry), f"line {entry.line}"
+            else:
+                error = (
+                    f"{origin}:{entry.line}:{entry.column}:{entry.level_name}:"
+                    f"{entry.domain_name}:{entry.type_name}: {entry.message}"
+                )
+                location = f"{origin} line {entry.line}"
+            self.add(error, template=message_template(entry.message), location=location)
+
+    def get_errors(self) -> list[str]:
+        "Return the collected errors, followed by a summary of omitted errors (if any)."
+        if self.options.aggregate_errors:
+            errors = []
+            for template, (count, locations) in self._groups.items():
+                error = f"{count} x {template}"
+                if locations:
+                    error += f" (first at: {', '.join(locations)})"
+                errors.append(error)
+            reported = sum(count for count, _ in self._groups.values())
+        else:
+            errors = list(self._errors)
+            reported = len(errors)
+        if self.count > reported:
+            errors.append(
+                f"{self.count - reported} more {self.kind} omitted "
+                f"(max_errors={self.options.max_errors})"
+            )
+        return errors
+
+
+def collect_errors(
+    errors: Iterable[str], options: ValidationOptions | None = None
+) -> list[str]:
+    "Apply options to a list of error messages."
+    collector = ErrorCollector(options)
+    for error in errors:
+        collector.add(error)
+    return collector.get_errors()
@@ -29,9 +29,15 @@ errors and warnings collected during validation.
     potential issues or problems with the file, e.g.
     "This file type has no validator registered." or
     "The schema used for validation is deprecated.".
+
+`to_dict()` and `from_dict()` convert a ValidationResult to and from a JSON compatible
+dict, e.g. to store results in the result cache. `to_dict(compact=True)` leaves out empty
+fields of the subresults, and `to_json()`/`from_json()` convert a result to and from a
+single line of compact JSON, as used by the validation reports (see report.py).
 """
 
-from dataclasses import dataclass, field
+import json
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Generator
 
@@ -100,6 +106,50 @@ class ValidationResult:
             warning for subresult in self._subresults for warning in subresult.warnings
         ]
 
+    def to_dict(self, compact: bool = False) -> dict:
+        """Return a JSON compatible dict representation of the result.
+
+        If compact is True, empty fields of the subresults are left out and the
+        overall validity is added as 'is_valid', so reports can be filtered without
+        creating ValidationResult objects.
+        """
+        if not compact:
+            return {
+                "file_path": str(self.file_path),
+                "subresults": [asdict(subresult) for subresult in self._subresults],
+            }
+        return {
+            "file_path": str(self.file_path),
+            "is_valid": self.is_valid,
+            "subresults": [
+                {
+                    key: value
+                    for key, value in asdict(subresult).items()
+                    if value not in ("", [])
+                }
+                for subresult in self._subresults
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ValidationResult":
+        "Create a ValidationResult from a dict returned by to_dict()."
+        result = cls(Path(data["file_path"]))
+        for subresult in data["subresults"]:
+            result.add_subresult(ValidationSubResult(**subresult))
+        return result
+
+    def to_json(self) -> str:
+        "Return the result as a single line of compact JSON."
+        return json.dumps(
+            self.to_dict(compact=True), ensure_ascii=False, separators=(",", ":")
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "ValidationResult":
+        "Create a ValidationResult from a line returned by to_json()."
+        return cls.from_dict(json.loads(line))
+
     def __str__(self):
         "Return a string representation of the ValidationResult object."
         validation_status = "valid" if self.is_valid else "invalid"
@@ -16,14 +16,21 @@ class PDFValidator(Validator):
         ) -> ValidationResult:
         # Implementation of PDF validation logic
 ```
+
+Documents held in memory are validated with `validate_bytes()` or `validate_stream()`,
+which build an in-memory ValidationContext and call `validate_context()`. Validators
+which support in-memory documents read the document via `ValidationContext.open()`
+(or the parsed tree or JSON document of the context) instead of the file path.
 """
 
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import ClassVar, Optional, Type
+from typing import BinaryIO, ClassVar, Optional, Type
 
 from gamslib.formatdetect.formatinfo import FormatInfo
 from gamslib.validation.schemainfo import SchemaInfo
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import ValidationOptions
 from gamslib.validation.validationresult import ValidationResult
 
 
@@ -42,6 +49,66 @@ class Validator(ABC):
         :return: A ValidationResult object containing the result of the validation.
         """
 
+    def validate_context(
+        self,
+        context: ValidationContext,
+        schemata: Optional[list[SchemaInfo]] = None,
+    ) -> ValidationResult:
+        """
+        Validate the file of a ValidationContext.
+
+        Validators which can reuse data from the context (like the parsed XML tree)
+        override this method. The default implementation calls validate().
+
+        :param context: The ValidationContext of the file to be validated.
+        :param schemata: The schemas to validate against.
+        :return: A ValidationResult object containing the result of the validation.
+        """
+        return self.validate(context.file_path, schemata)
+
+    def validate_bytes(
+        self,
+        data: bytes,
+        base_url: str | Path | None = None,
+        schemata: Optional[list[SchemaInfo]] = None,
+        format_info: FormatInfo | None = None,
+        options: ValidationOptions | None = None,
+    ) -> ValidationResult:
+        """
+        Validate an in-memory document against schemata.
+
+        :param data: The document to be validated.
+        :param base_url: The path or file URI relative references of the document are
+            resolved against. It is used as file path of the result.
+        :param schemata: The schemas to validate against.
+        :param format_info: The format of the document, if known.
+        :param options: The ValidationOptions. If None, they are read from the
+            configuration.
+        :return: A ValidationResult object containing the result of the validation.
+        """
+        context = ValidationContext.from_bytes(
+            data, base_url, format_info, options=options
+        )
+        return self.validate_context(context, schemata)
+
+    def validate_stream(
+        self,
+        stream: BinaryIO,
+        base_url: str | Path | None = None,
+        schemata: Optional[list[SchemaInfo]] = None,
+        format_info: FormatInfo | None = None,
+        options: ValidationOptions | None = None,
+    ) -> ValidationResult:
+        """
+        Validate a document read from a binary stream. See validate_bytes().
+
+        The stream is read into memory before it is validated.
+        """
+        context = ValidationContext.from_stream(
+            stream, base_url, format_info, options=options
+        )
+        return self.validate_context(context, schemata)
+
 
 class ValidatorFactory:
     "A factory class for validator objects."
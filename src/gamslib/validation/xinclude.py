@@ -0,0 +1,416 @@
+"""Expand XIncludes of XML documents before validation, with cached include targets.
+
+Many TEI editions are assembled from chapters and shared fragments (e.g. a common
+`teiHeader`) via `xi:include`. If the `xinclude` validation option is set, the
+ValidationContext expands all XIncludes of a document before it is validated, so the
+assembled document is validated instead of the unassembled shell.
+
+Included files are parsed once and kept in a FragmentCache, keyed by path and
+validated by modification time and size. So a corpus where hundreds of documents
+include the same fragments parses each fragment only once. Copies of the cached
+fragments are inserted into the including document.
+
+Errors in included content are reported with the included file and the line in this
+file (`XIncludeExpansion.locate()`, used by the ErrorCollector):
+
+```
+/project/chapters/ch1.xml:12:0:ERROR:SCHEMASV:...: Element 'p': This element is not expected.
+```
+
+Supported are `parse="xml"` and `parse="text"` (with `encoding`), `xi:fallback` and
+`xpointer` values which are shorthand pointers (an `xml:id`), `element()` pointers or
+`xpointer()` expressions which can be evaluated by lxml (namespaces are declared with
+`xmlns()`). Only local files can be included. Unlike lxml's `xinclude()`, no `xml:base`
+attributes are added, so schemas which do not allow `xml:base` are not affected.
+Includes which cannot be processed are removed and reported as errors.
+
+XIncludes are not expanded in streaming mode (see validationcontext.py).
+"""
+
+# pylint: disable=c-extension-no-member
+import copy
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urljoin
+
+from lxml import etree as ET
+
+from gamslib.validation.schemacache import CacheStats
+from gamslib.validation.schemadeps import local_path
+
+logger = logging.getLogger(__name__)
+
+XINCLUDE_NAMESPACES = ("http://www.w3.org/2001/XInclude", "http://www.w3.org/2003/XInclude")
+INCLUDE_TAGS = tuple(f"{{{ns}}}include" for ns in XINCLUDE_NAMESPACES)
+FALLBACK_TAGS = tuple(f"{{{ns}}}fallback" for ns in XINCLUDE_NAMESPACES)
+# Validator name of the subresult reporting XIncludes which cannot be processed
+XINCLUDE_VALIDATOR_NAME = "XInclude Processor"
+# Maximum size (in bytes of the included files) of the fragment cache
+DEFAULT_FRAGMENT_CACHE_SIZE = 100_000_000
+
+# a pointer part like 'element(/1/2)', '^' escapes parentheses
+POINTER_PART_PATTERN = re.compile(r"\s*([\w:.-]+)\(((?:[^()^]|\^.)*)\)")
+NCNAME_PATTERN = re.compile(r"^[^\W\d][\w.-]*$")
+
+
+class FragmentCache:
+    """A thread-safe LRU cache of parsed (or read) include targets.
+
+    Entries are keyed by path and validated against the modification time and size
+    of the file, so changed files are read again. The cached trees must not be
+    modified: use copy_elements() to get copies of their elements. Each tree has its
+    own lock, so threads copying from different fragments do not block each other.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_FRAGMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[Path, str], tuple[int, int, object]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def copy_elements(self, path: Path, xpointer: str | None = None) -> list[ET._Element]:
+        """Return copies of the elements of path selected by xpointer.
+
+        Without xpointer, a copy of the root element is returned.
+
+        Raises:
+            OSError: If the file cannot be read.
+            lxml.etree.XMLSyntaxError: If the file is not well formed.
+            ValueError: If the xpointer is not supported or selects nothing.
+        """
+        tree, tree_lock = self._get(path, "xml")
+        # the cached tree is shared by all threads: never use it concurrently
+        with tree_lock:
+            elements = select_elements(tree, xpointer)
+            copies = [copy.deepcopy(element) for element in elements]
+        for element in copies:
+            element.tail = None
+        return copies
+
+    def get_text(self, path: Path, encoding: str = "utf-8") -> str:
+        "Return the text content of path."
+        return self._get(path, encoding.lower())
+
+    def stats(self) -> CacheStats:
+        "Return a snapshot of the cache counters."
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+                max_size=self.max_size,
+            )
+
+    def clear(self):
+        "Remove all entries and reset the counters."
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def _get(self, path: Path, kind: str):
+        """Return the text of path (kind is the encoding).
+
+        For kind 'xml', return the parsed tree and the lock guarding it.
+        """
+        key = (Path(path).absolute(), kind)
+        stat = key[0].stat()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[2]
+            self._misses += 1
+        if kind == "xml":
+            value = (ET.parse(str(key[0])), threading.Lock())
+        else:
+            value = key[0].read_bytes().decode(kind)
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._size -= old_entry[1]
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, value)
+            self._size += stat.st_size
+            while self.max_size and self._size > self.max_size and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted[1]
+                self._evictions += 1
+        return value
+
+
+# the process-wide FragmentCache (an empty cache is cheap to create)
+_fragment_cache = FragmentCache()
+
+
+def get_fragment_cache() -> FragmentCache:
+    "Return the process-wide FragmentCache."
+    return _fragment_cache
+
+
+def select_elements(tree: ET._ElementTree, xpointer: str | None) -> list[ET._Element]:
+    """Return the elements of tree selected by an XPointer.
+
+    Raises:
+        ValueError: If the xpointer is not supported or selects nothing.
+    """
+    if not xpointer:
+        return [tree.getroot()]
+    xpointer = xpointer.strip()
+    if NCNAME_PATTERN.match(xpointer):
+        parts = [("element", xpointer)]
+    else:
+        parts = []
+        position = 0
+        while position < len(xpointer):
+            match = POINTER_PART_PATTERN.match(xpointer, position)
+            if match is None:
+                raise ValueError(f"Invalid xpointer '{xpointer}'")
+            parts.append((match.group(1), re.sub(r"\^(.)", r"\1", match.group(2))))
+            position = match.end()
+    namespaces = {}
+    for scheme, data in parts:
+        if scheme == "xmlns":
+            prefix, _, uri = data.partition("=")
+            namespaces[prefix.strip()] = uri.strip()
+            continue
+        if scheme == "element":
+            elements = _select_element_scheme(tree, data)
+        elif scheme == "xpointer":
+            try:
+                result = tree.xpath(data, namespaces=namespaces)
+            except ET.XPathError as exp:
+                raise ValueError(f"Invalid xpointer '{xpointer}': {exp}") from exp
+            elements = (
+                [node for node in result if isinstance(node, ET._Element)]
+                if isinstance(result, list)
+                else []
+            )
+        else:
+            logger.debug("Unsupported xpointer scheme '%s'", scheme)
+            continue
+        # the first pointer part which selects something is used
+        if elements:
+            return elements
+    raise ValueError(f"xpointer '{xpointer}' does not select any element")
+
+
+def _select_element_scheme(tree: ET._ElementTree, data: str) -> list[ET._Element]:
+    "Return the element selected by the data of an element() pointer (as a list)."
+    name, *steps = data.split("/")
+    if name:
+        found = tree.xpath("id($name)", name=name)
+        if not found:
+            return []
+        element = found[0]
+    else:
+        # '/1' is the root element
+        if not steps or steps.pop(0) != "1":
+            return []
+        element = tree.getroot()
+    for step in steps:
+        children = list(element.iterchildren(ET.Element))
+        index = int(step) - 1 if step.isdigit() else -1
+        if not 0 <= index < len(children):
+            return []
+        element = children[index]
+    return [element]
+
+
+class XIncludeExpansion:
+    """The result of expanding the XIncludes of a tree.
+
+    Knows the file each inserted element comes from and collects the includes
+    which could not be processed.
+    """
+
+    def __init__(self, tree: ET._ElementTree):
+        self.tree = tree
+        self.errors: list[str] = []
+        # (inserted element, file) in insertion order: nested includes come later
+        self._origins: list[tuple[ET._Element, str]] = []
+        self._paths: dict[str, str] | None = None
+
+    def __len__(self) -> int:
+        "Return the number of inserted elements."
+        return len(self._origins)
+
+    def add(self, element: ET._Element, origin: str):
+        "Record that element (and its content) has been inserted from origin."
+        self._origins.append((element, origin))
+        self._paths = None
+
+    def locate(self, path: str | None) -> str | None:
+        """Return the file the node at path (as in lxml error logs) comes from.
+
+        Returns None for nodes of the including document itself.
+        """
+        if not self._origins or not path:
+            return None
+        if self._paths is None:
+            self._paths = {}
+            root = self.tree.getroot()
+            for element, origin in self._origins:
+                if element.getroottree().getroot() is not root:
+                    continue  # replaced by an include of its own
+                for node in element.iter():
+                    self._paths[self.tree.getpath(node)] = origin
+        while path:
+            origin = self._paths.get(path)
+            if origin is not None:
+                return origin
+            path = path.rpartition("/")[0]
+        return None
+
+
+class XIncludeProcessor:
+    """Expand the XIncludes of a tree with included files from a FragmentCache."""
+
+    def __init__(self, cache: FragmentCache | None = None):
+        self.cache = cache or get_fragment_cache()
+
+    def process(self, tree: ET._ElementTree) -> XIncludeExpansion:
+        """Replace all xi:include elements of tree by the included content (in place).
+
+        Returns:
+            XIncludeExpansion: The origins of the inserted elements and the errors.
+        """
+        expansion = XIncludeExpansion(tree)
+        root = tree.getroot()
+        source = local_path(tree.docinfo.URL or "") or Path("")
+        if root.tag in INCLUDE_TAGS:
+            expansion.errors.append(
+                f"{source}, line {root.sourceline}: The root element must not be xi:include"
+            )
+            return expansion
+        self._expand(root, source, [(source.absolute(), None)], expansion)
+        return expansion
+
+    def _expand(
+        self,
+        element: ET._Element,
+        source: Path,
+        stack: list[tuple[Path, str | None]],
+        expansion: XIncludeExpansion,
+    ):
+        "Expand all includes in element, which comes from source."
+        includes = [
+            include
+            for include in element.iter(*INCLUDE_TAGS)
+            # includes in fallbacks are expanded if the fallback is used
+            if next(include.iterancestors(*INCLUDE_TAGS), None) is None
+        ]
+        for include in includes:
+            self._replace(include, source, stack, expansion)
+
+    def _replace(
+        self,
+        include: ET._Element,
+        source: Path,
+        stack: list[tuple[Path, str | None]],
+        expansion: XIncludeExpansion,
+    ):
+        "Replace include by the included content or its fallback."
+        href = include.get("href", "")
+        parse = include.get("parse", "xml")
+        xpointer = include.get("xpointer")
+        try:
+            target = local_path(urljoin(source.absolute().as_uri(), href)) if href else None
+            if target is None:
+                raise ValueError(
+                    "only local files can be included" if href else "href is missing"
+                )
+            target = target.absolute()
+            if parse == "text":
+                nodes = [self.cache.get_text(target, include.get("encoding") or "utf-8")]
+            elif parse == "xml":
+                if (target, xpointer) in stack:
+                    raise ValueError("inclusion loop")
+                nodes = self.cache.copy_elements(target, xpointer)
+            else:
+                raise ValueError(f"unknown parse value '{parse}'")
+        except (OSError, UnicodeDecodeError, ET.XMLSyntaxError, ValueError) as exp:
+            fallback = next(include.iterchildren(*FALLBACK_TAGS), None)
+            if fallback is None:
+                expansion.errors.append(
+                    f"{source}, line {include.sourceline}: Cannot include '{href}': {exp}"
+                )
+                _replace_with(include, [])
+                return
+            nodes = [fallback.text or ""]
+            for child in fallback:
+                nodes += [child, child.tail or ""]
+                child.tail = None
+            _replace_with(include, nodes)
+            for node in nodes:
+                if not isinstance(node, str):
+                    self._expand(node, source, stack, expansion)
+            return
+        _replace_with(include, nodes)
+        for node in nodes:
+            if not isinstance(node, str):
+                expansion.add(node, str(target))
+                self._expand(node, target, [*stack, (target, xpointer)], expansion)
+
+
+def _replace_with(element: ET._Element, nodes: list):
+    "Replace element by nodes (elements and strings), keeping the tail of element."
+    parent = element.getparent()
+    previous = element.getprevious()
+    index = parent.index(element)
+    tail = element.tail or ""
+    parent.remove(element)
+    leading = ""
+    last = None
+    for node in nodes:
+        if isinstance(node, str):
+            if last is None:
+                leading += node
+            else:
+                last.tail = (last.tail or "") + node
+        else:
+            parent.insert(index, node)
+            index += 1
+            last = node
+    if last is None:
+        leading += tail
+    else:
+        last.tail = (last.tail or "") + tail
+    if leading:
+        if previous is not None:
+            previous.tail = (previous.tail or "") + leading
+        else:
+            parent.text = (parent.text or "") + leading
+
+
+def find_include_targets(file_path: Path) -> list[Path]:
+    """Return all files (directly or indirectly) included by file_path via XInclude.
+
+    Used to detect changes of included files (e.g. by the ResultCache). Files which
+    cannot be parsed are not searched for further includes.
+    """
+    targets: dict[Path, None] = {}
+    pending = [Path(file_path).absolute()]
+    while pending:
+        current = pending.pop(0)
+        try:
+            for _, include in ET.iterparse(str(current), tag=INCLUDE_TAGS):
+                href = include.get("href")
+                target = local_path(urljoin(current.as_uri(), href)) if href else None
+                if target is not None and target.absolute() not in targets:
+                    targets[target.absolute()] = None
+                    if include.get("parse", "xml") == "xml":
+                        pending.append(target.absolute())
+        except (OSError, ET.XMLSyntaxError):
+            continue
+    return list(targets)
@@ -1,20 +1,35 @@
 """Provides functions to detect schema references in XML files.
 
 The main function is detect_schemata, which tries to find all schema references in an XML file.
+
+Schema references (xml-model processing instructions, the DOCTYPE and the
+xsi:schemaLocation attributes of the root element) are all in the document header.
+If no parsed tree is available, detect_schemata therefore reads only the header
+(see read_header_tree), which costs a few KB of reading even for very large files.
 """
 
+import contextlib
+import logging
 import re
 from pathlib import Path
+from typing import BinaryIO
 
 from lxml import etree as ET
 
 from gamslib.formatdetect.formatinfo import FormatInfo, SubType
+from gamslib.formatdetect.xmltypes import NAMESPACES
+from gamslib.validation.compositeschema import make_composite_uri
 
 # from gamslib.validation.xml.schemainfo import SchemaInfo#, XMLSchemaType
 from gamslib.validation.schemainfo import SchemaInfo, SchemaType  # , XMLSchemaType
 
 # pylint: disable=c-extension-no-member
 
+logger = logging.getLogger(__name__)
+
+# The header of a file is read in chunks of this size until the root start tag is parsed
+HEADER_CHUNK_SIZE = 4096
+
 # If no schema is referenced in the xml file, and no schema was set via param, we fall back
 # to these generic schemas for some subtypes.
 DEFAULT_SCHEMAS_FOR_SUBTYPES = {
@@ -38,6 +53,40 @@ def join_reference_path(xml_path, schema_reference) -> str:
     return new_path.as_uri()  # if new_path.is_file() else schema_reference
 
 
+def read_header_tree(
+    xml_file: Path | BinaryIO, chunk_size: int = HEADER_CHUNK_SIZE
+) -> ET.ElementTree:
+    """Return a tree containing only the prolog and the root element of xml_file.
+
+    xml_file is a path or a binary file object, which is not closed.
+
+    The file is fed to a pull parser in chunks until the start tag of the root
+    element has been parsed, so only the beginning of the file is read. The tree
+    contains the processing instructions and the doctype in front of the root element
+    and the root element with its attributes, but without any content.
+    Processing instructions after the root element (which are not allowed for
+    xml-model) are only contained if the whole file fits into the first chunk.
+
+    Raises:
+        lxml.etree.XMLSyntaxError: If the header is not well formed.
+    """
+    parser = ET.XMLPullParser(events=("start",))
+    with (
+        contextlib.nullcontext(xml_file)
+        if hasattr(xml_file, "read")
+        else open(xml_file, "rb")
+    ) as f:
+        while chunk := f.read(chunk_size):
+            parser.feed(chunk)
+            for _, root in parser.read_events():
+                # drop what has been parsed beyond the root start tag
+                root.text = None
+                del root[:]
+                return root.getroottree()
+    # there is no root element: close() raises the XMLSyntaxError
+    return parser.close().getroottree()
+
+
 def find_schemata_in_processing_instructions(
     tree: ET.ElementTree, xml_file: Path
 ) -> list[SchemaInfo]:
@@ -71,28 +120,38 @@ def find_schemata_in_root_element(
     This primarily indented as a helper function for find_schemata_in_file.
     We need the path of the xml file to resolve relative paths in the root element.
     We assume that only XSD files are referenced in root element.
+
+    `xsi:schemaLocation` contains namespace/location pairs and
+    `xsi:noNamespaceSchemaLocation` a single location. If more than one schema is
+    referenced, a single SchemaInfo for a composite schema, which imports all of them,
+    is returned (see compositeschema.py), so the document is validated in one pass.
     """
     namespaces = {"xsi": "http://www.w3.org/2001/XMLSchema-instance"}
-    schemata = []
     root_element = tree.getroot()
     schema_location_name = f"{{{namespaces['xsi']}}}schemaLocation"
     no_namespace_schema_location_name = (
         f"{{{namespaces['xsi']}}}noNamespaceSchemaLocation"
     )
-    schema_refs = []
-    if no_namespace_schema_location_name in root_element.attrib:
-        schema_refs.append(
-            root_element.attrib[no_namespace_schema_location_name].split()[1]
+    # (namespace, location) pairs, the namespace is empty for noNamespaceSchemaLocation
+    locations = []
+    no_namespace_location = root_element.get(no_namespace_schema_location_name, "").strip()
+    if no_namespace_location:
+        locations.append(("", join_reference_path(xml_file, no_namespace_location)))
+    tokens = root_element.get(schema_location_name, "").split()
+    if len(tokens) % 2:
+        logger.warning(
+            "Ignoring '%s' in xsi:schemaLocation of '%s': no schema location for namespace",
+            tokens[-1],
+            xml_file,
         )
-    if schema_location_name in root_element.attrib:
-        schema_refs.append(root_element.attrib[schema_location_name].split()[1])
-    for schema_ref in schema_refs:
-        schemata.append(
-            SchemaInfo(
-                join_reference_path(xml_file, schema_ref), schema_type=SchemaType.XSD
-            )
-        )
-    return schemata
+    for namespace, location in zip(tokens[::2], tokens[1::2]):
+        locations.append((namespace, join_reference_path(xml_file, location)))
+    locations = list(dict.fromkeys(locations))
+    if not locations:
+        return []
+    if len(locations) == 1:
+        return [SchemaInfo(locations[0][1], schema_type=SchemaType.XSD)]
+    return [SchemaInfo(make_composite_uri(locations), schema_type=SchemaType.XSD)]
 
 
 def find_dtd_in_tree(tree, xml_file: Path) -> list[SchemaInfo]:
@@ -129,16 +188,41 @@ def find_schemata_in_tree(tree: ET.ElementTree, xml_file: Path) -> list[SchemaIn
     return schemata
 
 
+def guess_subtype_from_header(tree: ET.ElementTree) -> SubType | None:
+    """Return the subtype of an XML document derived from its root element or None.
+
+    Only the root element is inspected, so the header tree (see read_header_tree)
+    is sufficient. This is enough to find the subtypes in DEFAULT_SCHEMAS_FOR_SUBTYPES
+    without a full format detection.
+    """
+    qname = ET.QName(tree.getroot())
+    if qname.namespace == "http://www.tei-c.org/ns/1.0":
+        return SubType.TEIP5
+    if qname.namespace is None and qname.localname == "TEI.2":
+        return SubType.TEIP4
+    return NAMESPACES.get(qname.namespace)
+
+
 def detect_schemata(
-    xml_file: Path, formatinfo: FormatInfo, use_default_schema: bool = True
+    xml_file: Path,
+    formatinfo: FormatInfo | None,
+    use_default_schema: bool = True,
+    tree: ET.ElementTree | None = None,
 ) -> list[SchemaInfo]:
-    """Return a list of SchemaInfo objects for the given XML file."""
-    tree = ET.parse(xml_file)
+    """Return a list of SchemaInfo objects for the given XML file.
+
+    If the file has already been parsed, pass the tree to avoid parsing it again.
+    Otherwise only the header of the file is read (see read_header_tree).
+    If formatinfo is None, the subtype for the default schema is guessed from
+    the root element (see guess_subtype_from_header).
+    """
+    if tree is None:
+        tree = read_header_tree(xml_file)
     schemata = find_schemata_in_tree(tree, xml_file)
-    if (
-        not schemata
-        and use_default_schema
-        and formatinfo.subtype in DEFAULT_SCHEMAS_FOR_SUBTYPES
-    ):
-        schemata.append(SchemaInfo(DEFAULT_SCHEMAS_FOR_SUBTYPES[formatinfo.subtype]))
+    if not schemata and use_default_schema:
+        subtype = (
+            guess_subtype_from_header(tree) if formatinfo is None else formatinfo.subtype
+        )
+        if subtype in DEFAULT_SCHEMAS_FOR_SUBTYPES:
+            schemata.append(SchemaInfo(DEFAULT_SCHEMAS_FOR_SUBTYPES[subtype]))
     return schemata
@@ -7,31 +7,94 @@ Supported Schema languages are currently
 - RelaxNG Compact (RNC),
 - Schematron
 - DTD.
+
+All SchemaValidators validate parsed trees (`validate()`), in-memory documents
+(`validate_bytes()`) or, in streaming mode, the document of a ValidationContext
+(`validate_stream()`), which may be a file or an in-memory document as well.
 """
 
 # pylint: disable=c-extension-no-member
 import abc
+import contextlib
+import functools
 import io
 import logging
-from functools import lru_cache
+import threading
+from collections.abc import Iterable, Iterator
 from pathlib import Path
-from typing import Final, Optional, Union
+from typing import TYPE_CHECKING, BinaryIO, Final, Optional, Union
 
 import lxml.isoschematron
-import rnc2rng
 from lxml import etree as ET
 
-from gamslib.validation.combined_resolver import CombinedCatalogResolver
+from gamslib.validation.combined_resolver import CombinedCatalogResolver, get_resolver
+from gamslib.validation.schemabundle import SchemaBundler
+from gamslib.validation.schemacache import SchemaCache, get_cache_size
+from gamslib.validation.schemadeps import DependencyGraph, collect_sources, local_path
 from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.rnccache import RNCConverter
+from gamslib.validation.saxonruntime import get_saxon_runtime
+from gamslib.validation.schematroncache import (
+    CachedLxmlSchematron,
+    SchematronCache,
+    lxml_transpiler_version,
+    schxslt_transpiler_version,
+)
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import (
+    ErrorCollector,
+    ValidationOptions,
+    collect_errors,
+    message_template,
+)
 from gamslib.validation.validationresult import ValidationResult, ValidationSubResult
 from gamslib.validation.validator import (
     Validator,
     ValidatorFactory,
 )
+from gamslib.validation.xinclude import XINCLUDE_VALIDATOR_NAME, XIncludeExpansion
+from gamslib.validation.xmlschemadetector import join_reference_path
+
+if TYPE_CHECKING:
+    # resultcache imports the validation package, which imports this module
+    from gamslib.validation.resultcache import ResultCache
 
 logger = logging.getLogger(__name__)
-# Number of cached schemas per schema type
-MAX_CACHE_SIZE = 32
+
+
+def iterparse_errors(
+    source: Path | BinaryIO,
+    resolver: CombinedCatalogResolver | None = None,
+    validation_options: ValidationOptions | None = None,
+    **options,
+) -> list[str]:
+    """Parse source (a path or a binary file object) in a single pass in bounded memory.
+
+    Elements are discarded as soon as they have been parsed. options are passed to
+    lxml's iterparse, e.g. `schema=xmlschema` or `dtd_validation=True`, which validate
+    the document while it is parsed. The errors are limited according to
+    validation_options.
+
+    Returns:
+        list[str]: The parser and validation errors. Empty if the document is valid.
+    """
+    if not hasattr(source, "read"):
+        source = str(source)
+    parser = ET.iterparse(source, events=("end",), **options)
+    if resolver is not None:
+        parser.resolvers.add(resolver)
+    try:
+        for _, element in parser:
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+    except ET.XMLSyntaxError as exp:
+        collector = ErrorCollector(validation_options)
+        collector.add_lxml_errors(parser.error_log)
+        return collector.get_errors() or [f"{exp!s}"]
+    return []
 
 
 class SchemaValidator(abc.ABC):
@@ -43,12 +106,33 @@ class SchemaValidator(abc.ABC):
 
     Each validator represents a specific schema  and provides a validate() method,
     which always returns a ValidationSubResult.
+
+    Concurrency model: SchemaValidator objects are shared by all threads of a process
+    (see SchemaProvider). The compiled schema objects of lxml (and saxon) are not
+    thread-safe, because they store the errors (or the report) of the last validation.
+    So each validation checks out a compiled schema object from a small pool for the
+    exclusive use of the calling thread (see checkout()). If all compiled objects are
+    in use, another one is compiled, so the pool grows to the number of threads which
+    validate against this schema at the same time. Compiling is done from the on-disk
+    caches (bundles, transpiled stylesheets), so additional copies are cheap compared
+    to the first one. The SchemaCache accounts for the memory of all copies
+    (see cache_size).
     """
 
+    # a compiled schema object needs about size_factor times the size of the schema
+    # documents it was compiled from (tei_all.xsd: 1 MB of documents, about 190 MB)
+    size_factor: int = 100
+
     def __init__(self, schema_uri: str):
         self.schema_uri: str = schema_uri
         self.schema_validator = None
-        self.resolver = CombinedCatalogResolver()
+        # the size of the schema documents in bytes (set by the SchemaProvider)
+        self.source_size = 0
+        # compiled schema objects which are not checked out at the moment
+        self._idle_validators: list = []
+        self._pool_size = 0
+        self._pool_lock = threading.Lock()
+        self.resolver = get_resolver()
         self.parser = ET.XMLParser()
         self.parser.resolvers.add(self.resolver)
         # this is a special error message which is set if the creation of
@@ -57,6 +141,8 @@ class SchemaValidator(abc.ABC):
 
         try:
             self.schema_validator = self._make_validator(schema_uri)
+            self._idle_validators.append(self.schema_validator)
+            self._pool_size = 1
         except ET.LxmlError as exp:
             errors = self._extract_lxml_errors_from_exception(exp)
             self._creation_error = ValidationSubResult(
@@ -79,8 +165,58 @@ class SchemaValidator(abc.ABC):
     def _make_validator(self, schema_uri: str) -> ET.XMLSchema:
         raise NotImplementedError
 
+    @contextlib.contextmanager
+    def checkout(self) -> Iterator:
+        """Check out a compiled schema object for the exclusive use of the calling thread.
+
+        The object is returned to the pool when the with block is left. If no object
+        is idle, a new one is compiled. Use it like this:
+
+        ```
+        with self.checkout() as schema_validator:
+            schema_validator.validate(tree)
+            errors = schema_validator.error_log
+        ```
+        """
+        with self._pool_lock:
+            schema_validator = (
+                self._idle_validators.pop() if self._idle_validators else None
+            )
+        if schema_validator is None:
+            # compile outside the lock, so other threads can return their objects
+            schema_validator = self._make_validator(self.schema_uri)
+            with self._pool_lock:
+                self._pool_size += 1
+            logger.debug(
+                "Compiled copy %d of schema %s", self._pool_size, self.schema_uri
+            )
+        try:
+            yield schema_validator
+        finally:
+            with self._pool_lock:
+                self._idle_validators.append(schema_validator)
+
+    @property
+    def pool_size(self) -> int:
+        "The number of compiled schema objects of this validator."
+        with self._pool_lock:
+            return self._pool_size
+
+    @property
+    def cache_size(self) -> int:
+        """The estimated memory of all compiled schema objects of this validator in bytes.
+
+        This is used by the SchemaCache. 0 means that the size is unknown.
+        """
+        return self.source_size * self.size_factor * max(self.pool_size, 1)
+
     @abc.abstractmethod
-    def validate(self, tree: ET.ElementTree) -> ValidationSubResult:
+    def validate(
+        self,
+        tree: ET.ElementTree,
+        options: ValidationOptions | None = None,
+        xinclude: XIncludeExpansion | None = None,
+    ) -> ValidationSubResult:
         """Validate an XML file against the specific subtype.
 
         Args:
@@ -88,12 +224,66 @@ class SchemaValidator(abc.ABC):
             file_path (Path): The xml file to be validated. We use both tree and file_path,
             because both are available when initializing the validator and some validators
             require the path instread of the tree.
+            options (ValidationOptions | None): Limits for the reported errors.
+                If None, the options from the configuration are used.
+            xinclude (XIncludeExpansion | None): If the XIncludes of tree have been
+                expanded, errors in included content are reported with their file.
 
         Returns:
             ValidatioSubnResult: A ValidationSubResult object
         """
         raise NotImplementedError
 
+    def validate_bytes(
+        self,
+        data: bytes,
+        base_url: str | Path | None = None,
+        options: ValidationOptions | None = None,
+    ) -> ValidationSubResult:
+        """Validate an in-memory XML document.
+
+        Args:
+            data (bytes): The xml document.
+            base_url (str | Path | None): The path or file URI relative references
+                of the document (e.g. to a DTD) are resolved against.
+            options (ValidationOptions | None): Limits for the reported errors.
+
+        Returns:
+            ValidationSubResult: A ValidationSubResult object. If data is not well
+                formed, the syntax error is reported.
+        """
+        if self._creation_error:
+            return self._creation_error
+        context = ValidationContext.from_bytes(
+            data, base_url, streaming=False, options=options
+        )
+        try:
+            tree = context.tree
+        except ET.XMLSyntaxError as exp:
+            return ValidationSubResult(
+                False,
+                self.validator_name,
+                schema_uri=self.schema_uri,
+                message=f"XML document '{context.file_path}' has syntax errors",
+                errors=[f"Syntax error: {exp!s}"],
+            )
+        return self.validate(tree, options=options)
+
+    def validate_stream(
+        self, context: ValidationContext
+    ) -> ValidationSubResult | None:
+        """Validate the document of context without building a tree (streaming mode).
+
+        The document may be a file or an in-memory document. Only some schema
+        languages can be validated in a single pass. Validators which can, override
+        this method.
+
+        Returns:
+            ValidationSubResult | None: A ValidationSubResult object or None, if this
+                validator needs the full tree.
+        """
+        return None
+
     @property
     def validator_name(self) -> str:
         """The name of the validator."""
@@ -127,17 +317,41 @@ class SchemaValidator(abc.ABC):
 
 
 class XMLSchemaValidator(SchemaValidator):
-    """A validator for XML Schema (XSD) schemas using lxml."""
+    """A validator for XML Schema (XSD) schemas using lxml.
+
+    If the resolver has a cache directory, a remote schema is compiled from a
+    self-contained bundle of all included/imported schema documents
+    (see schemabundle.py), which is much faster for large schemas like tei_all.xsd.
+    Local schemas are read from disk directly and are never bundled.
+    """
+
+    size_factor = 200
 
     def _make_validator(self, schema_uri: str) -> ET.XMLSchema:
-        tree = self._load_xml_schema_document(schema_uri)
+        tree = None
+        if self.resolver.cache_dir is not None and local_path(schema_uri) is None:
+            try:
+                bundled_schema = SchemaBundler(self.resolver).get_bundle(schema_uri)
+                tree = ET.parse(str(bundled_schema), parser=self.parser)
+            except Exception as exp:  # pylint: disable=broad-exception-caught
+                # fall back to normal loading, which reports errors properly
+                logger.debug("Cannot use a schema bundle for %s: %s", schema_uri, exp)
+        if tree is None:
+            tree = self._load_xml_schema_document(schema_uri)
         return ET.XMLSchema(tree)
 
-    def validate(self, tree: ET.ElementTree) -> ValidationSubResult:
+    def validate(
+        self,
+        tree: ET.ElementTree,
+        options: ValidationOptions | None = None,
+        xinclude: XIncludeExpansion | None = None,
+    ) -> ValidationSubResult:
         """Validate an XML file against the XSD schema.
 
         Args:
             tree (ET.ElementTree): The xml tree to be validated.
+            options (ValidationOptions | None): Limits for the reported errors.
+            xinclude (XIncludeExpansion | None): The expanded XIncludes of tree.
 
         Returns:
             ValidationResult: A ValidationResult object
@@ -153,14 +367,22 @@ class XMLSchemaValidator(SchemaValidator):
         )
 
         try:
-            if self.schema_validator.validate(tree):
-                result.is_valid = True
-                result.message = f"Document validates against schema {self.schema_uri}"
-            else:
-                result.message = (
-                    f"Document does not validate against schema {self.schema_uri}"
-                )
-                result.errors = [str(err) for err in self.schema_validator.error_log]
+            with self.checkout() as schema_validator:
+                if schema_validator.validate(tree):
+                    result.is_valid = True
+                    result.message = (
+                        f"Document validates against schema {self.schema_uri}"
+                    )
+                else:
+                    result.message = (
+                        f"Document does not validate against schema {self.schema_uri}"
+                    )
+                    collector = ErrorCollector(options)
+                    collector.add_lxml_errors(
+                        schema_validator.error_log,
+                        locate=xinclude.locate if xinclude else None,
+                    )
+                    result.errors = collector.get_errors()
         except Exception as e:  # pylint: disable=broad-exception-caught # pragma: no cover
             result.message = (
                 f"Document does not validate against schema {self.schema_uri}"
@@ -168,6 +390,29 @@ class XMLSchemaValidator(SchemaValidator):
             result.errors = [f"XSD Error: {e!s}"]
         return result
 
+    def validate_stream(self, context: ValidationContext) -> ValidationSubResult:
+        """Validate the file of context while parsing it, in bounded memory."""
+        if self._creation_error:
+            return self._creation_error
+        result = ValidationSubResult(
+            False, self.validator_name, schema_uri=self.schema_uri
+        )
+        with self.checkout() as schema_validator, context.open() as source:
+            errors = iterparse_errors(
+                source,
+                validation_options=context.options,
+                schema=schema_validator,
+            )
+        if errors:
+            result.message = (
+                f"Document does not validate against schema {self.schema_uri}"
+            )
+            result.errors = errors
+        else:
+            result.is_valid = True
+            result.message = f"Document validates against schema {self.schema_uri}"
+        return result
+
 
 class SchematronValidator(SchemaValidator):
     """A validator for Schematron schemas.
@@ -207,45 +452,85 @@ class SchematronValidator(SchemaValidator):
             validator = self._make_lxml_validator(schema_uri)
         return validator
 
+    def _get_stylesheet_cache(self) -> SchematronCache | None:
+        "Return the cache for transpiled stylesheets or None if caching is disabled."
+        if self.resolver.cache_dir is None:
+            return None
+        return SchematronCache(Path(self.resolver.cache_dir) / "schematron")
+
+    def _get_sources_content(self, schema_uri: str) -> bytes:
+        """Return the content of the schema and all (indirectly) included documents.
+
+        Used for the key of the stylesheet cache, as the transpiled stylesheet
+        contains the included documents.
+        """
+        sources = collect_sources(schema_uri, SchemaType.SCH, self.resolver)
+        return b"".join(content for content in sources.values() if content)
+
     def _make_lxml_validator(self, schema_uri: str):
         """Set the schema validator to a lxml.Schematron object.
 
+        The transpiled validation stylesheet is cached on disk, so later processes
+        can skip the ISO Schematron transpilation steps.
+
         If something goes wrong (eg. the schema is not well formed or not found),
         self._creation_error is set to a ValidationSubResult with the error message and
         self.schema_validator is left to None.
         """
+        cache = self._get_stylesheet_cache()
+        cache_key = None
+        if cache is not None:
+            cache_key = SchematronCache.make_key(
+                self._get_sources_content(schema_uri),
+                lxml_transpiler_version(),
+                self.binding,
+            )
+            cached_xslt = cache.get(cache_key)
+            if cached_xslt is not None:
+                return CachedLxmlSchematron(ET.ElementTree(ET.fromstring(cached_xslt)))
         schematron_document = self._load_xml_schema_document(schema_uri)
-        return lxml.isoschematron.Schematron(schematron_document, store_report=True)
+        validator = lxml.isoschematron.Schematron(
+            schematron_document, store_report=True, store_xslt=True
+        )
+        if cache is not None:
+            cache.put(cache_key, ET.tostring(validator.validator_xslt))
+        return validator
 
     def _make_saxon_validator(self, schema_uri: str):
         """Set the schema validator to a saxon Schematron validator.
 
+        All validators share the process-wide SaxonRuntime (see saxonruntime.py).
+        The transpiled validation stylesheet is cached on disk, so later processes
+        only have to compile the cached stylesheet.
+
         If something goes wrong (eg. the schema is not well formed or not found),
         self._creation_error is set to a ValidationSubResult with the error message and
         self.schema_validator is left to None.
         """
         try:
-            from saxonche import (  # pylint: disable=import-outside-toplevel # noqa: PLC0415
-                PySaxonProcessor,
-            )
-
-            saxon_proc = PySaxonProcessor(license=False)
-            xslt_proc = saxon_proc.new_xslt30_processor()
-            compiler_file = (
-                Path(__file__).parent / "resources" / "schxslt2" / "transpile.xsl"
-            ).as_posix()
-            # convert Schematron (.sch) into a validating XSLT
-            compiler_executable = xslt_proc.compile_stylesheet(
-                stylesheet_file=compiler_file
-            )
-            schema_content = self.resolver.get_content(schema_uri).decode("utf-8")
-            schema_xdm_node = saxon_proc.parse_xml(xml_text=schema_content)
-            # compile schematron to XSLT
-            validator_xslt_str = compiler_executable.transform_to_string(
-                xdm_node=schema_xdm_node
-            )
+            runtime = get_saxon_runtime()
+            schema_bytes = self.resolver.get_content(schema_uri)
+            cache = self._get_stylesheet_cache()
+            cache_key = None
+            validator_xslt_str = None
+            if cache is not None:
+                cache_key = SchematronCache.make_key(
+                    self._get_sources_content(schema_uri),
+                    schxslt_transpiler_version(),
+                    self.binding,
+                )
+                cached_xslt = cache.get(cache_key)
+                if cached_xslt is not None:
+                    validator_xslt_str = cached_xslt.decode("utf-8")
+            if validator_xslt_str is None:
+                # convert Schematron (.sch) into a validating XSLT
+                validator_xslt_str = runtime.transpile_schematron(
+                    schema_bytes.decode("utf-8")
+                )
+                if cache is not None:
+                    cache.put(cache_key, validator_xslt_str.encode("utf-8"))
             # Compile the XSLT Validator
-            return xslt_proc.compile_stylesheet(stylesheet_text=validator_xslt_str)
+            return runtime.compile_stylesheet(validator_xslt_str)
 
         except ImportError as exp:  # saxon not installed # pragma: no cover
             msg = (
@@ -255,7 +540,11 @@ class SchematronValidator(SchemaValidator):
             raise ImportError(msg) from exp
 
     def validate(
-        self, tree: Optional[ET.ElementTree] = None, file_path: Optional[Path] = None
+        self,
+        tree: Optional[ET.ElementTree] = None,
+        file_path: Optional[Path] = None,
+        options: ValidationOptions | None = None,
+        xinclude: XIncludeExpansion | None = None,
     ) -> ValidationSubResult:
         """Validate an XML file against the Schematron schema.
 
@@ -265,6 +554,8 @@ class SchematronValidator(SchemaValidator):
                 Should be None if a file_path is given.
             file_path (Path): The path to the file to be validated.
                 Should be None if a tree is given.
+            options (ValidationOptions | None): Limits for the reported errors.
+            xinclude (XIncludeExpansion | None): The expanded XIncludes of tree.
 
         Returns:
             ValidationSubResult: A ValidationSubResult object
@@ -284,11 +575,27 @@ class SchematronValidator(SchemaValidator):
             tree = ET.parse(file_path)  # pragma: no cover
 
         if self.binding in ["xslt2", "xslt3", "xpath2", "xpath3"]:
-            file_path = Path(tree.docinfo.URL)
-            return self._validate_with_saxon(file_path)
-        return self._validate_with_lxml(tree)
+            return self._validate_with_saxon(options=options, tree=tree)
+        return self._validate_with_lxml(tree, options)
+
+    def validate_stream(
+        self, context: ValidationContext
+    ) -> ValidationSubResult | None:
+        """Validate the file of context without building a lxml tree.
 
-    def _validate_with_lxml(self, tree: ET.ElementTree) -> ValidationSubResult:
+        Saxon reads the file itself, so no lxml tree is needed. The lxml based
+        validation needs the full tree, so None is returned for xslt1 schemas and
+        for in-memory documents.
+        """
+        if self._creation_error is not None:
+            return self._creation_error
+        if self.binding in ["xslt2", "xslt3", "xpath2", "xpath3"] and not context.in_memory:
+            return self._validate_with_saxon(context.file_path, context.options)
+        return None
+
+    def _validate_with_lxml(
+        self, tree: ET.ElementTree, options: ValidationOptions | None = None
+    ) -> ValidationSubResult:
         """Validate an XML file an return a ValidationSubResult.
 
         Use the lxml validator, which only supports xslt1 and may not work
@@ -299,18 +606,21 @@ class SchematronValidator(SchemaValidator):
         )
 
         try:
-            if self.schema_validator.validate(tree):
-                result.is_valid = True
-                result.message = f"Document validates against schema {self.schema_uri}"
-            else:
-                result.message = (
-                    f"Document does not validate against schema {self.schema_uri}"
-                )
-                result.errors, result.warnings = (
-                    SchematronValidator.srvl_to_message_lists(
-                        self.schema_validator.validation_report
+            with self.checkout() as schema_validator:
+                if schema_validator.validate(tree):
+                    result.is_valid = True
+                    result.message = (
+                        f"Document validates against schema {self.schema_uri}"
+                    )
+                else:
+                    result.message = (
+                        f"Document does not validate against schema {self.schema_uri}"
+                    )
+                    result.errors, result.warnings = (
+                        SchematronValidator.srvl_to_message_lists(
+                            schema_validator.validation_report, options
+                        )
                     )
-                )
         # last ressort
         except Exception as e:  # pylint: disable=broad-exception-caught # pragma: no cover
             result.message = (
@@ -319,21 +629,41 @@ class SchematronValidator(SchemaValidator):
             result.errors = [f"Schematron Error: {e!s}"]
         return result
 
-    def _validate_with_saxon(self, file_path: Path) -> ValidationSubResult:
-        """Validate an XML file an return a ValidationSubResult.
+    def _validate_with_saxon(
+        self,
+        file_path: Path | None = None,
+        options: ValidationOptions | None = None,
+        tree: ET.ElementTree | None = None,
+    ) -> ValidationSubResult:
+        """Validate an XML file or tree an return a ValidationSubResult.
 
         Use the Saxon validator, which supports xslt2/xslt3/xpath2/xpath3 and requires saxon.
+        If tree is given (which may be an in-memory document or have expanded
+        XIncludes), it is passed to Saxon as an in-memory node with the URL of the
+        tree as base URI. Otherwise Saxon reads file_path.
         """
         result = ValidationSubResult(
             False, self.validator_name, schema_uri=self.schema_uri
         )
-        xml_file = file_path.as_posix()
-        svrl_report = self.schema_validator.transform_to_string(
-            source_file=str(xml_file)
-        )
+        if tree is not None:
+            url = tree.docinfo.URL
+            path = local_path(url) if url else None
+            xdm_node = get_saxon_runtime().parse_xml(
+                ET.tostring(tree, encoding="unicode"),
+                base_uri=path.absolute().as_uri() if path is not None else url,
+            )
+        with self.checkout() as schema_validator:
+            if tree is None:
+                svrl_report = schema_validator.transform_to_string(
+                    source_file=file_path.as_posix()
+                )
+            else:
+                svrl_report = schema_validator.transform_to_string(xdm_node=xdm_node)
         # print(svrl_report)
         svrl_report_root = ET.fromstring(svrl_report.encode("utf-8"))
-        errors, warnings = SchematronValidator.srvl_to_message_lists(svrl_report_root)
+        errors, warnings = SchematronValidator.srvl_to_message_lists(
+            svrl_report_root, options
+        )
         if errors:
             result.message = (
                 f"Document does not validate against schema {self.schema_uri}"
@@ -366,42 +696,56 @@ class SchematronValidator(SchemaValidator):
         return binding.lower() if binding else "xslt"
 
     @staticmethod
-    def srvl_to_message_lists(report_root: ET.Element) -> tuple[list[str], list[str]]:
+    def srvl_to_message_lists(
+        report_root: ET.Element, options: ValidationOptions | None = None
+    ) -> tuple[list[str], list[str]]:
         """Convert a Schematron SVRL report to a list of errors and warnings.
 
         Each entry in both lists is a string containing the error or warning message.
-        Both lists may be empty.
+        Both lists may be empty. Errors and warnings are limited (or aggregated by
+        assertion and message) according to options.
         """
-        errors = []
-        warnings = []
+        errors = ErrorCollector(options)
+        warnings = ErrorCollector(options, kind="warnings")
         ns = {"svrl": "http://purl.oclc.org/dsdl/svrl"}
-        for failed_assert in report_root.findall("svrl:failed-assert", ns):
-            for text_element in failed_assert.findall(".//svrl:text", ns):
-                errors.append(
-                    f"Error at {failed_assert.get('location', '')} "
-                    f"({failed_assert.get('test', '')}): {text_element.text}"
-                )
-        for successful_report in report_root.findall("svrl:successful-report", ns):
-            for text_element in successful_report.findall(".//svrl:text", ns):
-                warnings.append(
-                    f"Warning at {successful_report.get('location', '')} "
-                    f"({successful_report.get('test', '')}): {text_element.text}"
-                )
-        return errors, warnings
+        for tag, label, collector in (
+            ("svrl:failed-assert", "Error", errors),
+            ("svrl:successful-report", "Warning", warnings),
+        ):
+            for element in report_root.iterfind(tag, ns):
+                location = element.get("location", "")
+                test = element.get("test", "")
+                for text_element in element.iterfind(".//svrl:text", ns):
+                    text = text_element.text
+                    collector.add(
+                        f"{label} at {location} ({test}): {text}",
+                        template=f"{label} ({test}): {message_template(text or '')}",
+                        location=location,
+                    )
+        return errors.get_errors(), warnings.get_errors()
 
 
 class RelaxNGValidator(SchemaValidator):
     """A validator for RelaxNG schemas using lxml."""
 
+    size_factor = 70
+
     def _make_validator(self, schema_uri: str):
         rng_document = self._load_xml_schema_document(schema_uri)
         return ET.RelaxNG(rng_document)
 
-    def validate(self, tree: ET.ElementTree) -> ValidationSubResult:
+    def validate(
+        self,
+        tree: ET.ElementTree,
+        options: ValidationOptions | None = None,
+        xinclude: XIncludeExpansion | None = None,
+    ) -> ValidationSubResult:
         """Validate an XML file against the RelaxNG schema.
 
         Args:
             tree (ET.ElementTree): The xml tree to be validated.
+            options (ValidationOptions | None): Limits for the reported errors.
+            xinclude (XIncludeExpansion | None): The expanded XIncludes of tree.
 
         Returns:
             ValidationResult: A ValidationResult object
@@ -414,14 +758,22 @@ class RelaxNGValidator(SchemaValidator):
         )
 
         try:
-            if self.schema_validator.validate(tree):
-                result.is_valid = True
-                result.message = f"Document validates against schema {self.schema_uri}"
-            else:
-                result.message = (
-                    f"Document does not validate against schema {self.schema_uri}"
-                )
-                result.errors = [str(err) for err in self.schema_validator.error_log]
+            with self.checkout() as schema_validator:
+                if schema_validator.validate(tree):
+                    result.is_valid = True
+                    result.message = (
+                        f"Document validates against schema {self.schema_uri}"
+                    )
+                else:
+                    result.message = (
+                        f"Document does not validate against schema {self.schema_uri}"
+                    )
+                    collector = ErrorCollector(options)
+                    collector.add_lxml_errors(
+                        schema_validator.error_log,
+                        locate=xinclude.locate if xinclude else None,
+                    )
+                    result.errors = collector.get_errors()
         except Exception as e:  # pylint: disable=broad-exception-caught # pragma: no cover
             result.message = (
                 f"Document does not validate against schema {self.schema_uri}"
@@ -439,10 +791,8 @@ class RelaxNGCompactValidator(RelaxNGValidator):
         Important: This does not create an instance of SchemaValidator, but a schema 
         validator instance used internally by the SchemaVallidator subclass.
         """
-        rnc = self.resolver.get_content(schema_uri).decode("utf-8")
-        # convert rnc to rng using rnc2rngm which expects a string
-        ast = rnc2rng.loads(rnc)
-        rng_xml = rnc2rng.dumps(ast).encode("utf-8")
+        # convert rnc to rng (cached on disk, see rnccache.py)
+        rng_xml = RNCConverter(self.resolver).get_rng(schema_uri)
         rng_document = ET.parse(io.BytesIO(rng_xml), parser=self.parser)
         return ET.RelaxNG(rng_document)
 
@@ -450,6 +800,8 @@ class RelaxNGCompactValidator(RelaxNGValidator):
 class DTDValidator(SchemaValidator):
     """A validator for DTD schemas using lxml."""
 
+    size_factor = 1
+
     def _make_validator(self, schema_uri):
         dtd_parser = ET.XMLParser(load_dtd=True)
         dtd_parser.resolvers.add(self.resolver)
@@ -461,7 +813,12 @@ class DTDValidator(SchemaValidator):
             return tree.docinfo.externalDTD
         raise ValueError(f"Unable to load DTD from {schema_uri}.")
 
-    def validate(self, tree: ET.ElementTree):
+    def validate(
+        self,
+        tree: ET.ElementTree,
+        options: ValidationOptions | None = None,
+        xinclude: XIncludeExpansion | None = None,
+    ):
         if self._creation_error:
             return self._creation_error
 
@@ -472,20 +829,61 @@ class DTDValidator(SchemaValidator):
 
         # do a normal validation
         try:
-            if self.schema_validator.validate(tree):
-                result.is_valid = True
-                result.message = f"Document validates against DTD {self.schema_uri}"
-            else:
-                result.message = (
-                    f"Document does not validate against DTD {self.schema_uri}"
-                )
-                result.errors = [str(err) for err in self.schema_validator.error_log]
+            with self.checkout() as schema_validator:
+                if schema_validator.validate(tree):
+                    result.is_valid = True
+                    result.message = f"Document validates against DTD {self.schema_uri}"
+                else:
+                    result.message = (
+                        f"Document does not validate against DTD {self.schema_uri}"
+                    )
+                    collector = ErrorCollector(options)
+                    collector.add_lxml_errors(
+                        schema_validator.error_log,
+                        locate=xinclude.locate if xinclude else None,
+                    )
+                    result.errors = collector.get_errors()
         # last ressort
         except Exception as e:  # pylint: disable=broad-exception-caught # pragma: no cover
             result.message = f"Document does not validate against DTD {self.schema_uri}"
             result.errors = [f"XSD Error: {e!s}"]
         return result
 
+    def validate_stream(
+        self, context: ValidationContext
+    ) -> ValidationSubResult | None:
+        """Validate the file of context while parsing it, in bounded memory.
+
+        lxml can only validate against the DTD declared in the document's doctype
+        while parsing. For all other DTDs (e.g. a default DTD) None is returned.
+        """
+        if self._creation_error:
+            return self._creation_error
+        system_url = context.header_tree.docinfo.system_url
+        if (
+            not system_url
+            or join_reference_path(context.file_path, system_url) != self.schema_uri
+        ):
+            return None
+        result = ValidationSubResult(
+            False, self.validator_name, schema_uri=self.schema_uri
+        )
+        with context.open() as source:
+            errors = iterparse_errors(
+                source,
+                self.resolver,
+                validation_options=context.options,
+                load_dtd=True,
+                dtd_validation=True,
+            )
+        if errors:
+            result.message = f"Document does not validate against DTD {self.schema_uri}"
+            result.errors = errors
+        else:
+            result.is_valid = True
+            result.message = f"Document validates against DTD {self.schema_uri}"
+        return result
+
 
 # TODO: what about internal DTDs?
 
@@ -493,9 +891,33 @@ class DTDValidator(SchemaValidator):
 class SchemaProvider:
     """Load a schema from schema_uri and return a SchemaValidator instance for this schema.
 
-    Uses caching for performance reasons.
+    SchemaValidator objects are cached in a single SchemaCache with a byte budget
+    (see schemacache.py). Use get_cache() to access the counters of the cache.
+
+    For each compiled schema, the local files it depends on (the schema itself and all
+    included or imported documents) are tracked (see schemadeps.py). Before a cached
+    validator is returned, these files are checked. If one of them has changed, all
+    cached validators depending on it are removed and the schema is compiled again.
+    So edited project schemas are used without restarting the process.
+
+    The returned SchemaValidator objects are shared by all threads of the process, but
+    they can be used from several threads at the same time: each validation checks out
+    its own compiled schema object (see SchemaValidator.checkout()). So files can be
+    validated in a ThreadPoolExecutor (lxml releases the GIL while validating).
     """
 
+    _cache: SchemaCache | None = None
+    _cache_lock = threading.Lock()
+    _dependencies = DependencyGraph()
+
+    @classmethod
+    def get_cache(cls) -> SchemaCache:
+        "Return the cache for SchemaValidator objects, create it on first call."
+        with cls._cache_lock:
+            if cls._cache is None:
+                cls._cache = SchemaCache(get_cache_size())
+            return cls._cache
+
     @staticmethod
     def get_schemavalidator(
         schema_uri: str, schema_type: SchemaType
@@ -513,20 +935,80 @@ class SchemaProvider:
         Returns:
             SchemaValidator: A SchemaValidator instance for the given schema.
         """
-        if schema_type == SchemaType.XSD:
-            return SchemaProvider.get_xsd(schema_uri)
-        if schema_type == SchemaType.RNG:
-            return SchemaProvider.get_relaxng(schema_uri)
-        if schema_type == SchemaType.RNC:
-            return SchemaProvider.get_relaxng_compact(schema_uri)
-        if schema_type == SchemaType.DTD:
-            return SchemaProvider.get_dtd(schema_uri)
-        if schema_type == SchemaType.SCH:
-            return SchemaProvider.get_schematron(schema_uri)
-        raise ValueError(f"Unknown schema type '{schema_type}'")
+        validator_cls = SchemaProvider._get_validator_class(schema_type)
+        key = (schema_type, schema_uri)
+        SchemaProvider._invalidate_changed(key)
+        return SchemaProvider.get_cache().get(
+            key, functools.partial(SchemaProvider._create, validator_cls, key)
+        )
+
+    @staticmethod
+    def prewarm(schemas: Iterable[SchemaInfo]) -> threading.Thread:
+        """Compile the validators for schemas in a background thread.
+
+        Use this e.g. at worker startup for schemas which will be needed soon.
+        Schemas of unknown type are ignored.
+
+        Returns:
+            threading.Thread: The (started) thread.
+        """
+        items = []
+        for schema_info in schemas:
+            try:
+                validator_cls = SchemaProvider._get_validator_class(
+                    schema_info.schema_type
+                )
+            except ValueError:
+                continue
+            key = (schema_info.schema_type, schema_info.schema_uri)
+            items.append(
+                (key, functools.partial(SchemaProvider._create, validator_cls, key))
+            )
+        return SchemaProvider.get_cache().prewarm(items)
+
+    @staticmethod
+    def invalidate(schema_uri: str) -> int:
+        """Remove all cached validators for schema_uri (e.g. after the schema has changed).
+
+        Returns:
+            int: The number of removed validators.
+        """
+        return SchemaProvider.get_cache().invalidate(schema_uri)
+
+    @staticmethod
+    def get_dependencies(schema_uri: str, schema_type: SchemaType) -> set[Path]:
+        "Return the tracked local files the compiled schema depends on."
+        return SchemaProvider._dependencies.dependencies((schema_type, schema_uri))
+
+    @staticmethod
+    def _create(
+        validator_cls: type[SchemaValidator], key: tuple[SchemaType, str]
+    ) -> SchemaValidator:
+        """Create a SchemaValidator for key and track the local files it depends on.
+
+        The size of all schema documents is stored in the validator, so the
+        SchemaCache can estimate its memory.
+        """
+        schema_type, schema_uri = key
+        # read the sources first, so changes made while compiling are detected later
+        sources = collect_sources(schema_uri, schema_type, get_resolver())
+        validator = validator_cls(schema_uri)
+        validator.source_size = sum(len(content or b"") for content in sources.values())
+        SchemaProvider._dependencies.track(key, sources)
+        return validator
+
+    @staticmethod
+    def _invalidate_changed(key: tuple[SchemaType, str]):
+        "Remove all cached validators depending on a changed file key depends on."
+        for path in SchemaProvider._dependencies.changed(key):
+            for dependent in SchemaProvider._dependencies.dependents(path):
+                SchemaProvider.get_cache().remove(dependent)
+                SchemaProvider._dependencies.forget(dependent)
+                logger.info(
+                    "%s has changed: removed the compiled schema %s", path, dependent[1]
+                )
 
     @staticmethod
-    @lru_cache(maxsize=MAX_CACHE_SIZE)
     def get_xsd(schema_uri: str) -> XMLSchemaValidator:
         """Return an lxml XMLSchemaValidator object.
 
@@ -537,10 +1019,9 @@ class SchemaProvider:
 
         Returns: XMLSchemaValidator: An XMLSchemaValidator object
         """
-        return XMLSchemaValidator(schema_uri)
+        return SchemaProvider.get_schemavalidator(schema_uri, SchemaType.XSD)
 
     @staticmethod
-    @lru_cache(maxsize=MAX_CACHE_SIZE)
     def get_schematron(schema_uri: str) -> SchematronValidator:
         """Return an SchematronValidator object.
 
@@ -555,10 +1036,9 @@ class SchemaProvider:
         Returns:
             SchematronValidator: An Schematron object
         """
-        return SchematronValidator(schema_uri)
+        return SchemaProvider.get_schemavalidator(schema_uri, SchemaType.SCH)
 
     @staticmethod
-    @lru_cache(maxsize=MAX_CACHE_SIZE)
     def get_relaxng(schema_uri: str) -> RelaxNGValidator:
         """Return an lxml RelaxNG object.
 
@@ -570,17 +1050,15 @@ class SchemaProvider:
         Returns:
             RelaxNGValidator: A RelaxNGValidator object
         """
-        return RelaxNGValidator(schema_uri)
+        return SchemaProvider.get_schemavalidator(schema_uri, SchemaType.RNG)
 
     @staticmethod
-    @lru_cache(maxsize=MAX_CACHE_SIZE)
     def get_relaxng_compact(schema_uri: str) -> RelaxNGCompactValidator:
         """Return a RelaxNGCompactValidator object."""
-        return RelaxNGCompactValidator(schema_uri)
+        return SchemaProvider.get_schemavalidator(schema_uri, SchemaType.RNC)
 
     @staticmethod
-    @lru_cache(maxsize=MAX_CACHE_SIZE)
-    def get_dtd(schema_uri: str) -> ET.DTD:
+    def get_dtd(schema_uri: str) -> DTDValidator:
         """Return a DTDValidator object.
 
         The schema objects are cached for performance.
@@ -591,10 +1069,24 @@ class SchemaProvider:
         Returns:
             DTDValidator: An DTDValidator object.
         """
-        return DTDValidator(schema_uri)
+        return SchemaProvider.get_schemavalidator(schema_uri, SchemaType.DTD)
+
+    @staticmethod
+    def _get_validator_class(schema_type: SchemaType) -> type[SchemaValidator]:
+        "Return the SchemaValidator class for schema_type. Raise a ValueError if unknown."
+        validator_classes = {
+            SchemaType.XSD: XMLSchemaValidator,
+            SchemaType.RNG: RelaxNGValidator,
+            SchemaType.RNC: RelaxNGCompactValidator,
+            SchemaType.DTD: DTDValidator,
+            SchemaType.SCH: SchematronValidator,
+        }
+        try:
+            return validator_classes[schema_type]
+        except KeyError as exp:
+            raise ValueError(f"Unknown schema type '{schema_type}'") from exp
 
 
-@ValidatorFactory.register("application/rdf+xml")
 @ValidatorFactory.register("application/tei+xml")
 @ValidatorFactory.register("application/xml")
 @ValidatorFactory.register("text/xml")
@@ -602,31 +1094,78 @@ class XMLValidator(Validator):
     """Validate an XML Document against a list of schemas."""
 
     def validate(
-        self, file_path: Path, schemata: Optional[list[SchemaInfo]] = None
+        self,
+        file_path: Path,
+        schemata: Optional[list[SchemaInfo]] = None,
+        cache: "ResultCache | None" = None,
     ) -> ValidationResult:
         """Validate an XML file against a schema.
 
         Args:
             file_path (Path): The xml file to be validated.
             schemata (list of SchemaInfo objects): The schemas to validate against.
+            cache (ResultCache | None): If given, a cached result is returned if neither
+                the file nor the schemas have changed and new results are cached.
 
         Returns:
             ValidationResult: A ValidationResult object
         """
+        schemata = schemata or []
+        key = None
+        if cache is not None:
+            # results for the same file with other schemas must not be mixed up
+            key = cache.make_key(file_path, schemas=schemata)
+            result = cache.get(file_path, key=key)
+            if result is not None:
+                return result
+        result = self.validate_context(ValidationContext(file_path), schemata)
+        if cache is not None:
+            cache.put(file_path, result, schemata, key=key)
+        return result
+
+    def validate_context(
+        self, context: ValidationContext, schemata: Optional[list[SchemaInfo]] = None
+    ) -> ValidationResult:
+        """Validate the XML file of a ValidationContext against a list of schemas.
+
+        The tree parsed by the context is used for all schemas, so the file is
+        parsed only once. In streaming mode, validators which support it validate
+        the file without building a tree (see SchemaValidator.validate_stream()).
+        The full tree is only built for validators which need it. The errors of each
+        schema are limited by context.options; in fail fast mode, no further schemas
+        are used after the first failing one.
+
+        If the XIncludes of the tree have been expanded (xinclude option), includes
+        which cannot be processed are reported in a separate subresult.
+
+        Args:
+            context (ValidationContext): The context of the xml file to be validated.
+            schemata (list of SchemaInfo objects): The schemas to validate against.
+
+        Returns:
+            ValidationResult: A ValidationResult object
+        """
+        file_path = context.file_path
         result = ValidationResult(file_path)
-        # is file well formed?
-        try:
-            doc = ET.parse(file_path)
-        except ET.XMLSyntaxError as exp:
+        schemata = schemata or []
+        syntax_errors = self._check_syntax(context, schemata)
+        if syntax_errors:
+            result.add_subresult(
+                self._make_syntax_error_result(file_path, syntax_errors)
+            )
+            return result  # validating does not make sense
+        expansion = context.xinclude_expansion
+        if expansion is not None and expansion.errors:
             result.add_subresult(
                 ValidationSubResult(
                     False,
-                    "XML Wellformedness Validator",
-                    message=f"XML document '{file_path}' has syntax errors (not well formed?)",
-                    errors=[f"Syntax error: {exp!s}"],
+                    XINCLUDE_VALIDATOR_NAME,
+                    message=f"Some XIncludes of '{file_path}' cannot be processed",
+                    errors=collect_errors(expansion.errors, context.options),
                 )
             )
-            return result  # validating does not make sense
+            if context.options.fail_fast:
+                return result
         # do we have schemas to validate against?
         if not schemata:
             result.add_subresult(
@@ -642,7 +1181,15 @@ class XMLValidator(Validator):
                 validator = SchemaProvider.get_schemavalidator(
                     schema_info.schema_uri, schema_info.schema_type
                 )
-                result.add_subresult(validator.validate(doc))
+                subresult = self._validate_with(validator, context)
+                result.add_subresult(subresult)
+                if context.options.fail_fast and not subresult.is_valid:
+                    break
+            except ET.XMLSyntaxError as exp:  # full tree was needed in streaming mode
+                result.add_subresult(
+                    self._make_syntax_error_result(file_path, [f"{exp!s}"])
+                )
+                return result
             except ValueError as exp:  # this happens if the schema type is unknown
                 result.add_subresult(
                     ValidationSubResult(
@@ -654,3 +1201,52 @@ class XMLValidator(Validator):
                     )
                 )
         return result
+
+    @staticmethod
+    def _check_syntax(context: ValidationContext, schemata: list[SchemaInfo]) -> list[str]:
+        """Return the syntax errors of the file of context.
+
+        In streaming mode, well-formedness is checked during validation or, if there
+        are no schemas, in a separate pass.
+        """
+        if not context.streaming:
+            try:
+                _ = context.tree
+            except ET.XMLSyntaxError as exp:
+                return [f"{exp!s}"]
+        elif not schemata:
+            with context.open() as source:
+                return iterparse_errors(source, validation_options=context.options)
+        return []
+
+    @staticmethod
+    def _validate_with(
+        validator: SchemaValidator, context: ValidationContext
+    ) -> ValidationSubResult:
+        "Validate the file of context with validator, streaming if possible."
+        if context.streaming:
+            subresult = validator.validate_stream(context)
+            if subresult is not None:
+                return subresult
+            logger.info(
+                "%s needs the full tree of '%s' (no streaming possible)",
+                validator.validator_name,
+                context.file_path,
+            )
+        return validator.validate(
+            context.tree,
+            options=context.options,
+            xinclude=context.xinclude_expansion,
+        )
+
+    @staticmethod
+    def _make_syntax_error_result(
+        file_path: Path, errors: list[str]
+    ) -> ValidationSubResult:
+        "Return the ValidationSubResult for a file which is not well formed."
+        return ValidationSubResult(
+            False,
+            "XML Wellformedness Validator",
+            message=f"XML document '{file_path}' has syntax errors (not well formed?)",
+            errors=[f"Syntax error: {error}" for error in errors],
+        )
@@ -0,0 +1,115 @@
+"""Tests for the consensus detector."""
+
+from pathlib import Path
+
+import pytest
+
+from gamslib.formatdetect import make_detector
+from gamslib.formatdetect.consensusdetector import (
+    ConsensusDetector,
+    ConsensusFormatInfo,
+)
+from gamslib.formatdetect.formatdetector import FormatDetector
+from gamslib.formatdetect.formatinfo import FormatInfo, SubType
+
+
+class FakeDetector(FormatDetector):
+    "A detector returning a fixed result and counting calls."
+
+    def __init__(self, name, mimetype, subtype=None, pronom_id=None):
+        self.name = name
+        self.result = FormatInfo(name, mimetype, subtype, pronom_id)
+        self.calls = 0
+
+    def guess_file_type(self, filepath: Path) -> FormatInfo:
+        self.calls += 1
+        return self.result
+
+    def __str__(self):
+        return self.name
+
+
+def make_consensus_detector(*detectors) -> ConsensusDetector:
+    "Return a ConsensusDetector using the given detectors."
+    consensus = ConsensusDetector(("base", "siegfried"))
+    consensus._detectors = list(detectors)  # pylint: disable=protected-access
+    return consensus
+
+
+def test_make_detector():
+    "make_detector('consensus') should return a ConsensusDetector."
+    detector = make_detector("consensus")
+    assert isinstance(detector, ConsensusDetector)
+    assert str(detector).startswith("ConsensusDetector (SiegfriedDetector")
+
+
+def test_init_errors():
+    "Recursive consensus or too few detectors must raise a ValueError."
+    with pytest.raises(ValueError, match="recursively"):
+        ConsensusDetector(("siegfried", "consensus"))
+    with pytest.raises(ValueError, match="at least two"):
+        ConsensusDetector(("siegfried",))
+
+
+def test_short_circuit(tmp_path):
+    "If the first two detectors agree, the third one must not be called."
+    testfile = tmp_path / "foo.xml"
+    testfile.write_text("<foo/>")
+    first = FakeDetector("first", "application/xml", pronom_id="fmt/101")
+    second = FakeDetector("second", "application/xml")
+    third = FakeDetector("third", "text/plain")
+    result = make_consensus_detector(first, second, third).guess_file_type(testfile)
+
+    assert isinstance(result, ConsensusFormatInfo)
+    assert result.mimetype == "application/xml"
+    assert result.pronom_id == "fmt/101"
+    assert result.confidence == 1.0
+    assert result.is_unanimous
+    assert third.calls == 0
+
+
+def test_majority_vote(tmp_path):
+    "Two lower priority detectors outvote the first one."
+    testfile = tmp_path / "foo.json"
+    testfile.write_text("{}")
+    first = FakeDetector("first", "text/plain", pronom_id="x-fmt/111")
+    second = FakeDetector("second", "application/json", SubType.JSON)
+    third = FakeDetector("third", "application/json", SubType.JSON, "fmt/817")
+    result = make_consensus_detector(first, second, third).guess_file_type(testfile)
+
+    assert result.mimetype == "application/json"
+    assert result.subtype == SubType.JSON
+    # second has no pronom id, so it is taken from third
+    assert result.pronom_id == "fmt/817"
+    assert result.confidence == pytest.approx(2 / 3)
+    assert result.opinions == [first.result]
+    assert not result.is_unanimous
+    assert third.calls == 1
+
+
+def test_tie_is_won_by_priority(tmp_path):
+    "If all detectors disagree, the first detector wins."
+    testfile = tmp_path / "foo"
+    testfile.write_text("foo")
+    first = FakeDetector("first", "text/plain")
+    second = FakeDetector("second", "text/csv")
+    third = FakeDetector("third", "text/markdown")
+    result = make_consensus_detector(first, second, third).guess_file_type(testfile)
+    assert result.mimetype == "text/plain"
+    assert result.confidence == pytest.approx(1 / 3)
+    assert result.opinions == [second.result, third.result]
+
+
+def test_missing_file(tmp_path):
+    "A missing file must raise a FileNotFoundError."
+    with pytest.raises(FileNotFoundError):
+        make_detector("consensus").guess_file_type(tmp_path / "missing.xml")
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_real_detectors(shared_datadir):
+    "Run the real detectors on a file, all detectors should agree."
+    result = make_detector("consensus").guess_file_type(shared_datadir / "image.png")
+    assert result.mimetype == "image/png"
+    assert result.pronom_id == "fmt/11"
+    assert result.confidence == 1.0
@@ -3,10 +3,12 @@
 import copy
 import re
 import shutil
+from pathlib import Path
 
 import pygfried
 import pytest
 
+from gamslib.formatdetect import audit
 from gamslib.formatdetect.formatinfo import SubType
 from gamslib.formatdetect.siegfrieddetector import SiegfriedDetector
 
@@ -437,3 +439,44 @@ def test_fix_json_info_with_none(detector, tmp_path, monkeypatch):
 
     result = detector._fix_json_info(file_to_test)  # pylint: disable=protected-access
     assert result is None
+
+
+def test_audit_disabled(detector, tmp_path):
+    "Without collect_audits() no audit data must be collected."
+    xml_file = tmp_path / "foo.xml"
+    xml_file.write_text("<foo/>")
+    with audit.audit_file(xml_file, "foo") as record:
+        assert record is None
+    assert not audit.is_auditing()
+    assert detector.guess_file_type(xml_file).mimetype == "application/xml"
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_audit_xml_without_declaration(detector, tmp_path):
+    "The XML declaration retry must show up in the audit trail."
+    xml_file = tmp_path / "foo.xml"
+    xml_file.write_text("<foo><bar/></foo>")
+    png_file = tmp_path / "foo.png"
+    shutil.copy(Path(__file__).parent / "data" / "image.png", png_file)
+    with audit.collect_audits() as audits:
+        detector.guess_file_type(xml_file)
+        detector.guess_file_type(png_file)
+    xml_audit, png_audit = audits
+    assert xml_audit.filepath == xml_file
+    assert xml_audit.detector.startswith("SiegfriedDetector")
+    stage_names = [stage.name for stage in xml_audit.stages]
+    assert stage_names[0] == "pronom"
+    assert "xml_declaration_retry" in stage_names
+    assert xml_audit.stages[0].bytes_read == xml_file.stat().st_size
+    assert all(stage.reason for stage in xml_audit.fallbacks)
+    assert xml_audit.seconds > 0
+    assert [stage.name for stage in png_audit.stages] == ["pronom"]
+    assert png_audit.fallbacks == []
+
+    summary = audit.summarize_audits(audits, top=1)
+    assert summary.num_files == len(audits)
+    assert summary.stage_counts["pronom"] == len(audits)
+    assert summary.stage_counts["xml_declaration_retry"] == 1
+    assert summary.bytes_read == xml_audit.bytes_read + png_audit.bytes_read
+    assert summary.seconds == pytest.approx(xml_audit.seconds + png_audit.seconds)
+    assert summary.slowest == [max(audits, key=lambda a: a.seconds)]
@@ -11,6 +11,12 @@ import pytest
 import toml
 
 from gamslib.projectconfiguration.configuration import Configuration, General, Metadata
+from gamslib.validation.combined_resolver import DEFAULT_CACHE_TTL, DEFAULT_NEGATIVE_CACHE_TTL
+from gamslib.validation.pdfvalidator import DEFAULT_OFFSET_SAMPLE_SIZE
+from gamslib.validation.schemacache import DEFAULT_CACHE_SIZE
+from gamslib.validation.validationcontext import DEFAULT_STREAMING_THRESHOLD
+from gamslib.validation.validationoptions import DEFAULT_MAX_LOCATIONS
+from pydantic import ValidationError
 
 
 @pytest.fixture(name="configobj")
@@ -56,6 +62,19 @@ def test_general_class():
     assert general.ds_ignore_files == []
     assert general.safe_xml_hosts == []
     assert general.contact_email == ""
+    assert general.streaming_validation_threshold == DEFAULT_STREAMING_THRESHOLD
+    assert general.schema_cache_size == DEFAULT_CACHE_SIZE
+    assert general.schema_cache_ttl == DEFAULT_CACHE_TTL
+    assert general.schema_negative_cache_ttl == DEFAULT_NEGATIVE_CACHE_TTL
+    assert general.validation_max_errors == 0
+    assert general.validation_fail_fast is False
+    assert general.validation_aggregate_errors is False
+    assert general.validation_max_locations == DEFAULT_MAX_LOCATIONS
+    assert general.validation_xinclude is False
+    assert general.pdf_offset_sample_size == DEFAULT_OFFSET_SAMPLE_SIZE
+
+    with pytest.raises(ValidationError):
+        General(streaming_validation_threshold=-1)
 
 
 def test_configuration_class_creation(configobj, datadir):
@@ -0,0 +1,19 @@
+"Conftest for validation tests."
+
+import pytest
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver
+
+
+@pytest.fixture(autouse=True)
+def clear_failures():
+    "Do not let failed downloads of one test affect other tests."
+    CombinedCatalogResolver.clear_failures()
+    yield
+    CombinedCatalogResolver.clear_failures()
+
+
+@pytest.fixture(autouse=True)
+def use_tmp_cache_dir(tmp_path, monkeypatch):
+    "Run each test in tmp_path, so the default .schema_cache is not created in the repo."
+    monkeypatch.chdir(tmp_path)
@@ -2,6 +2,7 @@
 
 import hashlib
 from pathlib import Path
+from typing import ClassVar
 
 import pytest
 import requests
@@ -18,6 +19,7 @@ class FakeResponse:
     def __init__(self, **kwargs):
         self.content = kwargs.get("content", b"")
         self.status_code = kwargs.get("status_code", 200)
+        self.headers = kwargs.get("headers", {})
 
     def raise_for_status(self):
         "Mock requests.Response.raise_for_status()."
@@ -58,6 +60,8 @@ def test_init_with_allowed_hosts_from_config(monkeypatch):
         class General:
             "A dummy configuration class to mock the get_configuration method"
             safe_xml_hosts = ["config.example", "foo.uni-graz.at"]
+            schema_cache_ttl = 60
+            schema_negative_cache_ttl = 10
 
         general = General()
 
@@ -69,6 +73,8 @@ def test_init_with_allowed_hosts_from_config(monkeypatch):
     )
     resolver = CombinedCatalogResolver()
     assert resolver.allowed_hosts == ["config.example", "foo.uni-graz.at"]
+    assert resolver.cache_ttl == DummyConfig.general.schema_cache_ttl
+    assert resolver.negative_cache_ttl == DummyConfig.general.schema_negative_cache_ttl
 
 
 def test_init_with_allowed_hosts_from_env(monkeypatch):
@@ -120,10 +126,10 @@ def test_resolve_prefers_catalog_result(tmp_path, monkeypatch):
 
     def fail_get(*_args, **_kwargs):
         pytest.fail(
-            "requests.get should not be called when catalog resolution succeeds"
+            "session.get should not be called when catalog resolution succeeds"
         )
 
-    monkeypatch.setattr(combined_resolver_mod.requests, "get", fail_get)
+    monkeypatch.setattr(combined_resolver_mod.get_session(), "get", fail_get)
     assert resolver.resolve(url, None, None) is not None
 
 
@@ -135,9 +141,9 @@ def test_resolve_returns_none_for_disallowed_host(tmp_path, monkeypatch):
     monkeypatch.setattr(resolver, "resolve_filename", lambda *_args, **_kwargs: None)
 
     def fail_get(*_args, **_kwargs):
-        pytest.fail("requests.get should not be called for disallowed hosts")
+        pytest.fail("session.get should not be called for disallowed hosts")
 
-    monkeypatch.setattr(combined_resolver_mod.requests, "get", fail_get)
+    monkeypatch.setattr(combined_resolver_mod.get_session(), "get", fail_get)
 
     assert resolver.resolve(url, None, None) is None
 
@@ -158,9 +164,9 @@ def test_resolve_uses_cached_file_when_available(tmp_path, monkeypatch):
     )
 
     def fail_get(*_args, **_kwargs):
-        pytest.fail("requests.get should not be called when cache file exists")
+        pytest.fail("session.get should not be called when cache file exists")
 
-    monkeypatch.setattr(combined_resolver_mod.requests, "get", fail_get)
+    monkeypatch.setattr(combined_resolver_mod.get_session(), "get", fail_get)
 
     assert resolver.resolve(url, None, None) == "CACHED_RESULT"
 
@@ -191,6 +197,8 @@ def test_resolve_downloads_and_caches_when_not_in_catalog_or_cache(
     class MockResponse:
         "Mock a successful HTTP response with schema content for testing purposes."
         content = b"<xsd:schema/>"
+        status_code = 200
+        headers: ClassVar[dict] = {}
 
         @staticmethod
         def raise_for_status():
@@ -198,7 +206,7 @@ def test_resolve_downloads_and_caches_when_not_in_catalog_or_cache(
             return None
 
     monkeypatch.setattr(
-        combined_resolver_mod.requests, "get", lambda *_args, **_kwargs: MockResponse()
+        combined_resolver_mod.get_session(), "get", lambda *_args, **_kwargs: MockResponse()
     )
 
     result = resolver.resolve(url, None, None)
@@ -222,7 +230,7 @@ def test_resolve_returns_none_when_download_fails(tmp_path, monkeypatch):
     monkeypatch.setattr(resolver, "resolve_string", fail_resolve_string)
 
     monkeypatch.setattr(
-        combined_resolver_mod.requests,
+        combined_resolver_mod.get_session(),
         "get",
         lambda *_args, **_kwargs: FakeResponse(status_code=404),
     )
@@ -245,12 +253,12 @@ def test_get_content_from_allowed_uri(tmp_path, lazy_shared_datadir, monkeypatch
     "Test the get_content method with an allowed http URI."
     cache_dir = tmp_path / "schema_cache"
     resolver = CombinedCatalogResolver(["foo.com"], cache_dir=str(cache_dir))
-    # monkeypatch the requests.get method to return a fake response with the
+    # monkeypatch the session.get method to return a fake response with the
     # content of the test schema, since we cannot rely on external network
     # access in tests
     expected_content = (lazy_shared_datadir / "schemas" / "simple.xsd").read_bytes()
     monkeypatch.setattr(
-        combined_resolver_mod.requests,
+        combined_resolver_mod.get_session(),
         "get",
         lambda *args, **kwargs: FakeResponse(content=expected_content),
     )
@@ -268,11 +276,11 @@ def test_get_content_from_allowed_uri_404(tmp_path, monkeypatch):
     "Test the get_content method with an allowed http URI which returns a 404 error."
     cache_dir = tmp_path / "schema_cache"
     resolver = CombinedCatalogResolver(["foo.com"], cache_dir=str(cache_dir))
-    # monkeypatch the requests.get method to return a fake response with the
+    # monkeypatch the session.get method to return a fake response with the
     # content of the test schema, since we cannot rely on external network
     # access in tests
     monkeypatch.setattr(
-        combined_resolver_mod.requests,
+        combined_resolver_mod.get_session(),
         "get",
         lambda *args, **kwargs: FakeResponse(status_code=404),
     )
@@ -298,3 +306,105 @@ def test_get_content_from_disallowed_uri(tmp_path):
     resolver = CombinedCatalogResolver(cache_dir=str(cache_dir))
     with pytest.raises(Exception):
         resolver.get_content("http://unallowed.example.org/schema.xsd")
+
+
+def test_get_resolver_is_shared(tmp_path, monkeypatch):
+    "get_resolver() returns the same resolver until the settings change."
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("GAMSLIB_SAFE_XML_HOSTS", raising=False)
+    resolver = combined_resolver_mod.get_resolver()
+    assert combined_resolver_mod.get_resolver() is resolver
+
+    monkeypatch.setenv("GAMSLIB_SAFE_XML_HOSTS", "foo.com")
+    other_resolver = combined_resolver_mod.get_resolver()
+    assert other_resolver is not resolver
+    assert other_resolver.allowed_hosts == ["foo.com"]
+
+
+def test_catalog_is_activated_once(monkeypatch):
+    "Creating more resolvers does not activate the catalog again."
+    CombinedCatalogResolver()
+    calls = []
+    monkeypatch.setattr(
+        combined_resolver_mod.gams_xml_catalog,
+        "activate_catalog",
+        lambda: calls.append(True),
+    )
+    CombinedCatalogResolver()
+    assert not calls
+
+
+def test_catalog_lookup_is_memoised(monkeypatch):
+    "Catalog lookups are done once per URL."
+    url = "http://www.example.com/not/in/catalog-memo.xsd"
+    calls = []
+    monkeypatch.setattr(
+        combined_resolver_mod.gams_xml_catalog,
+        "resolve_uri_to_path",
+        calls.append,
+    )
+    resolver = CombinedCatalogResolver(cache_dir=None)
+    assert resolver._resolve_catalog_path(url) is None  # pylint: disable=protected-access
+    assert resolver._resolve_catalog_path(url) is None  # pylint: disable=protected-access
+    assert calls == [url]
+
+
+def test_allowed_hosts_are_normalized():
+    "Allowed hosts are compared case-insensitive, also after reassignment."
+    resolver = CombinedCatalogResolver(["Example.ORG"], cache_dir=None)
+    assert resolver.allowed_hosts == ["Example.ORG"]
+    assert resolver._is_allowed_host("https://example.org/a.xsd")  # pylint: disable=protected-access
+    resolver.allowed_hosts = ["foo.com"]
+    assert not resolver._is_allowed_host("https://example.org/a.xsd")  # pylint: disable=protected-access
+    assert resolver._is_allowed_host("https://FOO.com/a.xsd")  # pylint: disable=protected-access
+
+
+def test_read_file_is_cached(tmp_path, monkeypatch):
+    "read_file() keeps file contents in memory until the file changes."
+    schema_file = tmp_path / "schema.xsd"
+    schema_file.write_bytes(b"<schema/>")
+    assert combined_resolver_mod.read_file(schema_file) == b"<schema/>"
+
+    def fail_read_bytes(*_args, **_kwargs):
+        pytest.fail("a cached file should not be read again")
+
+    with monkeypatch.context() as mpatch:
+        mpatch.setattr(Path, "read_bytes", fail_read_bytes)
+        assert combined_resolver_mod.read_file(str(schema_file)) == b"<schema/>"
+
+    schema_file.write_bytes(b"<changed-schema/>")
+    assert combined_resolver_mod.read_file(schema_file) == b"<changed-schema/>"
+
+
+def test_read_file_is_bounded(tmp_path, monkeypatch):
+    "The least recently used contents are evicted if the budget is exceeded."
+    monkeypatch.setattr(combined_resolver_mod, "CONTENT_CACHE_SIZE", 10)
+    contents = combined_resolver_mod._ContentCache()  # pylint: disable=protected-access
+    monkeypatch.setattr(combined_resolver_mod, "_contents", contents)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_bytes(b"1234")
+        combined_resolver_mod.read_file(tmp_path / name)
+    assert list(contents.entries) == [
+        str(tmp_path / "b"),
+        str(tmp_path / "c"),
+    ]
+    # files larger than the budget are not cached at all
+    (tmp_path / "big").write_bytes(b"x" * 11)
+    assert combined_resolver_mod.read_file(tmp_path / "big") == b"x" * 11
+    assert str(tmp_path / "big") not in contents.entries
+
+
+def test_atomic_write(tmp_path, monkeypatch):
+    "atomic_write replaces the file and leaves no temporary file if writing fails."
+    path = tmp_path / "sub" / "file.bin"
+    assert combined_resolver_mod.atomic_write(path, b"first")
+    assert combined_resolver_mod.atomic_write(path, b"second")
+    assert path.read_bytes() == b"second"
+
+    def fail(*_args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(combined_resolver_mod.os, "replace", fail)
+    assert not combined_resolver_mod.atomic_write(path, b"third")
+    assert path.read_bytes() == b"second"
+    assert list(path.parent.iterdir()) == [path]
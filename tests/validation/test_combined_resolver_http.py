@@ -0,0 +1,278 @@
+"""Tests for downloading, revalidating and negative caching in CombinedCatalogResolver.
+
+These tests use a local HTTP server.
+"""
+
+# pylint: disable=c-extension-no-member
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+from lxml import etree as ET
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver, get_session
+
+SCHEMA = b'<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"/>'
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class SchemaHandler(BaseHTTPRequestHandler):
+    """Serve SCHEMA for /schema.xsd with ETag support, 404 for everything else.
+
+    All requests are recorded in server.requests as (path, headers) tuples.
+    """
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        "Handle a GET request."
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.path != "/schema.xsd":
+            self.send_error(404)
+            return
+        if self.headers.get("If-None-Match") == self.server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(self.server.content)))
+        self.end_headers()
+        self.wfile.write(self.server.content)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        "Do not log to stderr."
+
+
+@pytest.fixture(name="server")
+def start_server():
+    "Start a local HTTP server and return it. The base url is in server.url."
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SchemaHandler)
+    server.requests = []
+    server.etag = ETAG
+    server.content = SCHEMA
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_resolver(tmp_path, **kwargs) -> CombinedCatalogResolver:
+    "Return a resolver allowing 127.0.0.1 with a cache in tmp_path."
+    return CombinedCatalogResolver(
+        ["127.0.0.1"], cache_dir=str(tmp_path / "cache"), **kwargs
+    )
+
+
+def expire(resolver, url):
+    "Make the cache entry for url look old."
+    meta_file = Path(f"{resolver.get_cache_path(url)}.json")
+    metadata = json.loads(meta_file.read_text(encoding="utf-8"))
+    metadata["fetched"] = time.time() - 3600
+    meta_file.write_text(json.dumps(metadata), encoding="utf-8")
+
+
+def requested_paths(server) -> list[str]:
+    "Return the paths of all requests the server has received."
+    return [path for path, _headers in server.requests]
+
+
+def test_get_session_is_shared():
+    "All resolvers share one pooled session."
+    assert get_session() is get_session()
+    assert isinstance(get_session(), requests.Session)
+
+
+def test_download_stores_metadata(server, tmp_path):
+    "ETag and Last-Modified are stored next to the cached file."
+    resolver = make_resolver(tmp_path)
+    url = f"{server.url}/schema.xsd"
+    assert resolver.get_content(url) == SCHEMA
+    cache_path = Path(resolver.get_cache_path(url))
+    assert cache_path.read_bytes() == SCHEMA
+    metadata = json.loads(Path(f"{cache_path}.json").read_text(encoding="utf-8"))
+    assert metadata["url"] == url
+    assert metadata["etag"] == ETAG
+    assert metadata["last_modified"] == LAST_MODIFIED
+    assert metadata["fetched"] == pytest.approx(time.time(), abs=60)
+
+
+def test_fresh_cache_is_not_revalidated(server, tmp_path):
+    "Cached files younger than the ttl are used without a request."
+    resolver = make_resolver(tmp_path, cache_ttl=3600)
+    url = f"{server.url}/schema.xsd"
+    resolver.get_content(url)
+    resolver.get_content(url)
+    assert len(server.requests) == 1
+
+
+def test_revalidation_not_modified(server, tmp_path):
+    "Expired files are revalidated with a conditional request."
+    resolver = make_resolver(tmp_path, cache_ttl=60)
+    url = f"{server.url}/schema.xsd"
+    resolver.get_content(url)
+    expire(resolver, url)
+    assert resolver.get_content(url) == SCHEMA
+    assert requested_paths(server) == ["/schema.xsd", "/schema.xsd"]
+    headers = server.requests[1][1]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+    # the revalidated file is fresh again
+    resolver.get_content(url)
+    assert requested_paths(server) == ["/schema.xsd", "/schema.xsd"]
+
+
+def test_revalidation_modified(server, tmp_path):
+    "A changed schema replaces the cached file."
+    resolver = make_resolver(tmp_path, cache_ttl=60)
+    url = f"{server.url}/schema.xsd"
+    resolver.get_content(url)
+    expire(resolver, url)
+    server.etag = '"v2"'
+    server.content = SCHEMA.replace(b"/>", b"></xs:schema>")
+    assert resolver.get_content(url) == server.content
+    assert Path(resolver.get_cache_path(url)).read_bytes() == server.content
+
+
+def test_ttl_zero_never_expires(server, tmp_path):
+    "With a ttl of 0 cached files are used forever."
+    resolver = make_resolver(tmp_path, cache_ttl=0)
+    url = f"{server.url}/schema.xsd"
+    resolver.get_content(url)
+    expire(resolver, url)
+    resolver.get_content(url)
+    assert len(server.requests) == 1
+
+
+def test_resolve_uses_session(server, tmp_path):
+    "resolve() downloads remote schemas, too."
+    resolver = make_resolver(tmp_path, cache_ttl=60)
+    url = f"{server.url}/schema.xsd"
+    parser = ET.XMLParser()
+    parser.resolvers.add(resolver)
+    doc = ET.parse(url, parser)
+    assert doc.getroot().tag == "{http://www.w3.org/2001/XMLSchema}schema"
+    assert len(server.requests) == 1
+
+
+def test_negative_cache_for_http_errors(server, tmp_path):
+    "A URL which returned an error is not requested again."
+    resolver = make_resolver(tmp_path, negative_cache_ttl=60)
+    url = f"{server.url}/missing.xsd"
+    with pytest.raises(requests.HTTPError):
+        resolver.get_content(url)
+    with pytest.raises(FileNotFoundError, match="failed recently"):
+        resolver.get_content(url)
+    # the failure is shared by all resolvers
+    with pytest.raises(FileNotFoundError, match="failed recently"):
+        make_resolver(tmp_path).get_content(url)
+    assert len(server.requests) == 1
+    # other URLs of the host are still requested
+    assert resolver.get_content(f"{server.url}/schema.xsd") == SCHEMA
+
+    CombinedCatalogResolver.clear_failures()
+    with pytest.raises(requests.HTTPError):
+        resolver.get_content(url)
+    assert requested_paths(server) == ["/missing.xsd", "/schema.xsd", "/missing.xsd"]
+
+
+def test_negative_cache_expires(server, tmp_path, monkeypatch):
+    "Failures are retried after negative_cache_ttl."
+    resolver = make_resolver(tmp_path, negative_cache_ttl=60)
+    url = f"{server.url}/missing.xsd"
+    with pytest.raises(requests.HTTPError):
+        resolver.get_content(url)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    with pytest.raises(requests.HTTPError):
+        resolver.get_content(url)
+    assert requested_paths(server) == ["/missing.xsd", "/missing.xsd"]
+
+
+def test_negative_cache_disabled(server, tmp_path):
+    "A negative_cache_ttl of 0 disables negative caching."
+    resolver = make_resolver(tmp_path, negative_cache_ttl=0)
+    url = f"{server.url}/missing.xsd"
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            resolver.get_content(url)
+    assert requested_paths(server) == ["/missing.xsd", "/missing.xsd"]
+
+
+def test_negative_cache_shared_by_processes(server, tmp_path, monkeypatch):
+    "Failures are stored in the cache directory and seen by other processes."
+    resolver = make_resolver(tmp_path, negative_cache_ttl=60)
+    url = f"{server.url}/missing.xsd"
+    with pytest.raises(requests.HTTPError):
+        resolver.get_content(url)
+    failures = json.loads((tmp_path / "cache" / "failures.json").read_text(encoding="utf-8"))
+    assert list(failures) == [url]
+
+    # simulate another process, which does not know the failure in memory
+    monkeypatch.setattr(CombinedCatalogResolver, "_failures", {})
+    with pytest.raises(FileNotFoundError, match="failed recently"):
+        make_resolver(tmp_path, negative_cache_ttl=60).get_content(url)
+    assert len(server.requests) == 1
+
+    # a failure file of another cache directory is not used
+    with pytest.raises(requests.HTTPError):
+        CombinedCatalogResolver(
+            ["127.0.0.1"], cache_dir=str(tmp_path / "other"), negative_cache_ttl=60
+        ).get_content(url)
+    assert requested_paths(server) == ["/missing.xsd", "/missing.xsd"]
+
+    CombinedCatalogResolver.clear_failures()
+    assert not (tmp_path / "cache" / "failures.json").exists()
+
+
+def test_download_writes_atomically(server, tmp_path):
+    "Cached files and metadata are written without leaving temporary files behind."
+    resolver = make_resolver(tmp_path)
+    resolver.get_content(f"{server.url}/schema.xsd")
+    cache_file = Path(resolver.get_cache_path(f"{server.url}/schema.xsd"))
+    assert sorted(path.name for path in cache_file.parent.iterdir()) == [
+        cache_file.name,
+        f"{cache_file.name}.json",
+    ]
+
+
+def test_unreachable_host(tmp_path, monkeypatch):
+    "An unreachable host is contacted only once for all its URLs."
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # nothing listens on port now
+    resolver = make_resolver(tmp_path, negative_cache_ttl=60)
+    calls = []
+    session = get_session()
+    original_get = session.get
+
+    def counting_get(*args, **kwargs):
+        calls.append(args[0])
+        return original_get(*args, **kwargs)
+
+    monkeypatch.setattr(session, "get", counting_get)
+    with pytest.raises(requests.ConnectionError):
+        resolver.get_content(f"http://127.0.0.1:{port}/a.xsd")
+    with pytest.raises(FileNotFoundError, match="ConnectionError"):
+        resolver.get_content(f"http://127.0.0.1:{port}/b.xsd")
+    assert resolver.resolve(f"http://127.0.0.1:{port}/c.xsd", None, None) is None
+    assert len(calls) == 1
+
+
+def test_stale_cache_used_if_host_unreachable(server, tmp_path):
+    "If revalidation fails, the stale cached file is used."
+    resolver = make_resolver(tmp_path, cache_ttl=60, negative_cache_ttl=60)
+    url = f"{server.url}/schema.xsd"
+    resolver.get_content(url)
+    expire(resolver, url)
+    server.shutdown()
+    server.server_close()
+    assert resolver.get_content(url) == SCHEMA
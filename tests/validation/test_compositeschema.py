@@ -0,0 +1,115 @@
+"""Tests for the compositeschema module."""
+
+# pylint: disable=c-extension-no-member
+import pytest
+from lxml import etree as ET
+
+from gamslib.validation import validate
+from gamslib.validation.combined_resolver import CombinedCatalogResolver
+from gamslib.validation.compositeschema import (
+    is_composite_uri,
+    make_composite_uri,
+    make_wrapper_schema,
+    parse_composite_uri,
+)
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.xmlvalidator import SchemaProvider
+
+SCHEMA_A = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="http://example.org/a" elementFormDefault="qualified">
+  <xs:element name="doc">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:any namespace="##other" processContents="lax" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+SCHEMA_B = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="http://example.org/b" elementFormDefault="qualified">
+  <xs:element name="count" type="xs:integer"/>
+</xs:schema>
+"""
+
+
+def write_document(path, count: str, reverse: bool = False):
+    "Write a document of namespace a with an embedded element of namespace b."
+    pairs = ["http://example.org/a a.xsd", "http://example.org/b b.xsd"]
+    if reverse:
+        pairs.reverse()
+    path.write_text(
+        '<a:doc xmlns:a="http://example.org/a" xmlns:b="http://example.org/b" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        f'xsi:schemaLocation="{" ".join(pairs)}"><b:count>{count}</b:count></a:doc>',
+        encoding="utf-8",
+    )
+    return path
+
+
+@pytest.fixture(name="project")
+def create_project(tmp_path, monkeypatch):
+    "Create two schemas in different namespaces."
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.xsd").write_text(SCHEMA_A, encoding="utf-8")
+    (tmp_path / "b.xsd").write_text(SCHEMA_B, encoding="utf-8")
+    return tmp_path
+
+
+def test_composite_uri():
+    "The URI does not depend on the order of the pairs and survives special characters."
+    pairs = [
+        ("http://example.org/b", "http://example.org/b.xsd?version=1&x=y"),
+        ("", "file:///schemas/no%20namespace.xsd"),
+        ("http://example.org/a", "http://example.org/a.xsd"),
+    ]
+    uri = make_composite_uri(pairs)
+    assert is_composite_uri(uri)
+    assert not is_composite_uri("http://example.org/a.xsd")
+    assert uri == make_composite_uri(reversed(pairs + pairs))
+    assert parse_composite_uri(uri) == sorted(pairs)
+    assert SchemaInfo(uri, schema_type=SchemaType.XSD).schema_uri == uri
+    with pytest.raises(ValueError):
+        parse_composite_uri("http://example.org/a.xsd")
+
+
+def test_make_wrapper_schema():
+    "The wrapper imports all namespaces and includes the schema without namespace."
+    uri = make_composite_uri(
+        [("http://example.org/a", "http://example.org/a.xsd"), ("", "file:///c.xsd")]
+    )
+    root = ET.fromstring(make_wrapper_schema(uri))
+    assert [(ET.QName(child).localname, dict(child.attrib)) for child in root] == [
+        ("include", {"schemaLocation": "file:///c.xsd"}),
+        (
+            "import",
+            {"namespace": "http://example.org/a", "schemaLocation": "http://example.org/a.xsd"},
+        ),
+    ]
+    resolver = CombinedCatalogResolver([], cache_dir=None)
+    assert resolver.get_content(uri) == make_wrapper_schema(uri)
+
+
+def test_validate_with_composite_schema(project):
+    "Elements of all referenced namespaces are validated in one pass."
+    result = validate(write_document(project / "valid.xml", "3"))
+    assert result.is_valid
+    (subresult,) = result.get_subresults()
+    assert is_composite_uri(subresult.schema_uri)
+
+    result = validate(write_document(project / "invalid.xml", "three"))
+    assert not result.is_valid
+    assert "'three' is not a valid value of the atomic type 'xs:integer'" in (
+        result.get_errors()[0]
+    )
+
+
+def test_composite_schema_is_compiled_once(project):
+    "Documents with the same pairs in another order share the compiled schema."
+    SchemaProvider.get_cache().clear()
+    validate(write_document(project / "one.xml", "1"))
+    validate(write_document(project / "two.xml", "2", reverse=True))
+    assert SchemaProvider.get_cache().stats().misses == 1
@@ -0,0 +1,315 @@
+"""Tests for the jsonvalidator and jsonschemadetector modules."""
+
+import json
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from gamslib.formatdetect.formatinfo import FormatInfo, SubType
+from gamslib.validation import extract_referenced_schemas, validate, validate_bytes
+from gamslib.validation.jsonschemadetector import detect_schemata
+from gamslib.validation.jsonvalidator import (
+    JSONSchemaValidator,
+    JSONValidator,
+    get_json_schemavalidator,
+    load_json_schema,
+)
+from gamslib.validation.prefetch import find_schema_references
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import ValidationOptions
+from gamslib.validation.xmlvalidator import SchemaProvider
+
+SCHEMA = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "type": "object",
+    "properties": {"name": {"type": "string"}, "count": {"$ref": "count.json"}},
+    "required": ["name"],
+}
+COUNT_SCHEMA = {"type": "integer", "minimum": 0}
+
+
+@pytest.fixture(name="project")
+def create_project(tmp_path):
+    "Create a JSON schema referencing a second schema and some documents."
+    (tmp_path / "schema.json").write_text(json.dumps(SCHEMA), encoding="utf-8")
+    (tmp_path / "count.json").write_text(json.dumps(COUNT_SCHEMA), encoding="utf-8")
+    for name, document in (
+        ("valid.json", {"$schema": "schema.json", "name": "foo", "count": 1}),
+        ("invalid.json", {"$schema": "schema.json", "name": 1, "count": -1}),
+        ("noschema.json", {"name": 1}),
+    ):
+        (tmp_path / name).write_text(json.dumps(document), encoding="utf-8")
+    (tmp_path / "data.jsonl").write_text(
+        '{"$schema": "schema.json", "name": "foo"}\n\n{"name": 2}\n{"count": -1\n',
+        encoding="utf-8",
+    )
+    yield tmp_path
+    SchemaProvider.get_cache().clear()
+
+
+def json_info(subtype=SubType.JSON) -> FormatInfo:
+    "Return a FormatInfo for a JSON file."
+    return FormatInfo(detector="test", mimetype="application/json", subtype=subtype)
+
+
+def schema_info(project, name="schema.json") -> SchemaInfo:
+    "Return a SchemaInfo for a schema in project."
+    return SchemaInfo((project / name).as_uri(), schema_type=SchemaType.JSON)
+
+
+def test_schemainfo_json_type():
+    "JSON schemas are detected by extension and mimetype."
+    assert SchemaInfo("http://example.com/schema.json").schema_type == SchemaType.JSON
+    assert (
+        SchemaInfo("http://example.com/schema", mimetype="application/schema+json").schema_type
+        == SchemaType.JSON
+    )
+
+
+def test_detect_schemata(project):
+    "The $schema keyword is resolved relative to the document."
+    assert detect_schemata(project / "valid.json", json_info()) == [schema_info(project)]
+    assert not detect_schemata(project / "noschema.json", json_info())
+    # for JSON Lines files the first record is used
+    assert detect_schemata(project / "data.jsonl", json_info(SubType.JSONL)) == [
+        schema_info(project)
+    ]
+    # the document can be passed
+    assert not detect_schemata(project / "valid.json", json_info(), document=[1, 2])
+    # syntax errors are reported by the validator
+    (project / "broken.json").write_text("{", encoding="utf-8")
+    assert not detect_schemata(project / "broken.json", json_info())
+
+
+def test_detect_schemata_absolute_uri(tmp_path):
+    "Absolute URIs are used as they are."
+    file_path = tmp_path / "doc.json"
+    file_path.write_text(
+        '{"$schema": "http://json-schema.org/draft-07/schema#"}', encoding="utf-8"
+    )
+    (schema,) = detect_schemata(file_path, json_info())
+    assert schema.schema_uri == "http://json-schema.org/draft-07/schema#"
+    assert schema.schema_type == SchemaType.JSON
+
+
+def test_extract_referenced_schemas_uses_context(project):
+    "The document parsed by the context is used."
+    context = ValidationContext(project / "valid.json", json_info())
+    assert context.json_document["name"] == "foo"
+    with mock.patch("builtins.open", side_effect=AssertionError("parsed again")):
+        assert extract_referenced_schemas(
+            project / "valid.json", json_info(), context=context
+        ) == [schema_info(project)]
+
+
+def test_context_json_document_error(tmp_path):
+    "A JSON syntax error is raised on each access."
+    file_path = tmp_path / "broken.json"
+    file_path.write_text("{", encoding="utf-8")
+    context = ValidationContext(file_path, json_info())
+    for _ in range(2):
+        with pytest.raises(json.JSONDecodeError):
+            _ = context.json_document
+
+
+def test_load_json_schema_meta_schemas():
+    "Meta schemas are never downloaded."
+    resolver = mock.Mock()
+    schema = load_json_schema("http://json-schema.org/draft-07/schema#", resolver)
+    assert schema["title"] == "Core schema meta-schema"
+    resolver.get_content.assert_not_called()
+
+
+def test_validate_valid_and_invalid(project):
+    "Documents are validated against their schema, including referenced schemas."
+    result = JSONValidator().validate(project / "valid.json", [schema_info(project)])
+    assert result.is_valid
+    assert result.get_messages() == [
+        f"Document validates against JSON schema {schema_info(project).schema_uri}"
+    ]
+
+    result = JSONValidator().validate(project / "invalid.json", [schema_info(project)])
+    assert not result.is_valid
+    assert result.get_errors() == [
+        "$.name: 1 is not of type 'string'",
+        "$.count: -1 is less than the minimum of 0",
+    ]
+
+
+def test_validate_without_schema(project):
+    "Without a schema, only the syntax is checked."
+    result = JSONValidator().validate(project / "noschema.json", [])
+    assert result.is_valid
+    assert result.has_warnings
+
+    (project / "broken.json").write_text('{"name": ', encoding="utf-8")
+    result = JSONValidator().validate(project / "broken.json", [])
+    assert not result.is_valid
+    assert result.get_errors()[0].startswith("Syntax error:")
+
+
+@pytest.mark.parametrize("name", ["data.jsonl", "data.json"])
+def test_validate_jsonl(project, name):
+    "JSON Lines files are validated line by line."
+    file_path = project / name
+    if name != "data.jsonl":
+        file_path.write_bytes((project / "data.jsonl").read_bytes())
+    context = ValidationContext(file_path, json_info(SubType.JSONL))
+    result = JSONValidator().validate_context(context, [schema_info(project)])
+    assert not result.is_valid
+    errors = result.get_errors()
+    assert errors[0].startswith("Syntax error: line 4:")
+    assert errors[1:] == ["line 3: $.name: 2 is not of type 'string'"]
+
+
+def test_validate_jsonl_stops_when_full(project):
+    "Records are no longer read once no collector takes more errors."
+    lines = [json.dumps({"name": index}) for index in range(100)] + ["{"]
+    file_path = project / "many.jsonl"
+    file_path.write_text("\n".join(lines), encoding="utf-8")
+    options = ValidationOptions(max_errors=1)
+    context = ValidationContext(file_path, json_info(SubType.JSONL), options=options)
+    with mock.patch.object(
+        JSONSchemaValidator,
+        "collect_errors",
+        autospec=True,
+        side_effect=JSONSchemaValidator.collect_errors,
+    ) as collect_errors:
+        result = JSONValidator().validate_context(context, [schema_info(project)])
+    assert collect_errors.call_count == 1
+    # syntax errors are still collected
+    assert result.get_errors() == [
+        "Syntax error: line 101: Expecting property name enclosed in double quotes: "
+        "line 1 column 2 (char 1)",
+        "line 1: $.name: 0 is not of type 'string'",
+    ]
+
+
+def test_validate_jsonl_fail_fast(project):
+    "With fail_fast, reading stops after the first invalid record."
+    (project / "other.json").write_text(json.dumps({"type": "object"}), encoding="utf-8")
+    file_path = project / "data.jsonl"
+    schemata = [schema_info(project, "other.json"), schema_info(project)]
+    context = ValidationContext(
+        file_path, json_info(SubType.JSONL), options=ValidationOptions(fail_fast=True)
+    )
+    result = JSONValidator().validate_context(context, schemata)
+    assert result.get_errors() == ["line 3: $.name: 2 is not of type 'string'"]
+    assert [sub.schema_uri for sub in result.get_subresults()] == [
+        schemata[1].schema_uri
+    ]
+
+
+def test_validate_jsonl_by_subtype(project):
+    "The JSON Lines subtype is used without parsing the file as JSON first."
+    file_path = project / "data.json"
+    file_path.write_bytes((project / "data.jsonl").read_bytes())
+    context = ValidationContext(file_path, json_info(SubType.JSONL))
+    with mock.patch.object(
+        ValidationContext, "json_document", new_callable=mock.PropertyMock
+    ) as json_document:
+        result = JSONValidator().validate_context(context, [schema_info(project)])
+    json_document.assert_not_called()
+    assert result.get_errors()[1:] == ["line 3: $.name: 2 is not of type 'string'"]
+
+
+def test_validate_extra_data(project):
+    "A file with extra data is only treated as JSON Lines if the format is unknown."
+    file_path = project / "data.json"
+    file_path.write_text('{"name": "foo"}\n{"name": 2}\n', encoding="utf-8")
+    context = ValidationContext(file_path, json_info(SubType.JSON))
+    result = JSONValidator().validate_context(context, [schema_info(project)])
+    assert not result.is_valid
+    assert len(result.get_errors()) == 1
+    assert result.get_errors()[0].startswith("Syntax error: Extra data")
+
+    # without a format_info, format detection fails
+    (project / "broken.json").write_text('{"name": 2}\n{"name": ', encoding="utf-8")
+    result = JSONValidator().validate(project / "broken.json", [schema_info(project)])
+    assert result.get_errors()[0].startswith("Syntax error: line 2:")
+    assert result.get_errors()[1:] == ["line 1: $.name: 2 is not of type 'string'"]
+
+
+def test_validate_bytes_jsonl(project):
+    "In-memory JSON Lines documents are validated line by line."
+    data = (project / "data.jsonl").read_bytes()
+    result = JSONValidator().validate_bytes(
+        data, project / "upload.jsonl", [schema_info(project)]
+    )
+    assert result.get_errors()[1:] == ["line 3: $.name: 2 is not of type 'string'"]
+    result = validate_bytes(
+        data, project / "upload.jsonl", format_info=json_info(SubType.JSONL)
+    )
+    assert result.get_errors()[1:] == ["line 3: $.name: 2 is not of type 'string'"]
+
+
+def test_validate_with_invalid_schema(project):
+    "A schema which does not conform to its meta schema results in an invalid result."
+    (project / "bad.json").write_text(
+        '{"$schema": "http://json-schema.org/draft-07/schema#", "type": 5}', encoding="utf-8"
+    )
+    result = JSONValidator().validate(project / "valid.json", [schema_info(project, "bad.json")])
+    assert not result.is_valid
+    assert result.get_messages()[0].startswith("Unable to create the validator")
+
+
+def test_validate_with_missing_schema(project):
+    "A missing schema results in an invalid result."
+    result = JSONValidator().validate(
+        project / "valid.json", [schema_info(project, "missing.json")]
+    )
+    assert not result.is_valid
+    assert result.get_messages()[0].startswith("Unable to create the validator")
+
+
+def test_validate_with_xml_schema(project):
+    "Non JSON schemas can not be used."
+    schema = SchemaInfo((project / "schema.xsd").as_uri())
+    result = JSONValidator().validate(project / "valid.json", [schema])
+    assert not result.is_valid
+    assert "not a JSON schema" in result.get_messages()[0]
+
+
+def test_compiled_validators_are_cached(project):
+    "Each schema is loaded and checked only once."
+    uri = schema_info(project).schema_uri
+    with mock.patch.object(
+        JSONSchemaValidator, "_make_validator", autospec=True,
+        side_effect=JSONSchemaValidator._make_validator,  # pylint: disable=protected-access
+    ) as make_validator:
+        for name in ("valid.json", "invalid.json", "valid.json"):
+            JSONValidator().validate(project / name, [schema_info(project)])
+    assert make_validator.call_count == 1
+    assert get_json_schemavalidator(uri) is get_json_schemavalidator(uri)
+    assert (SchemaType.JSON, uri) in SchemaProvider.get_cache()
+
+
+def test_validate(project):
+    "validate() detects the format and the referenced schema."
+    assert validate(project / "valid.json").is_valid
+    assert not validate(project / "invalid.json").is_valid
+
+
+def test_find_schema_references():
+    "References to other documents are found, fragments are ignored."
+    schema = {
+        "$defs": {"a": {"$ref": "a.json#/foo"}, "b": {"$ref": "#/$defs/a"}},
+        "items": [{"$ref": "sub/b.json"}, {"$ref": "a.json"}],
+    }
+    references = find_schema_references(
+        "file:///schemas/main.json", SchemaType.JSON, json.dumps(schema).encode("utf-8")
+    )
+    assert sorted(references) == [
+        ("file:///schemas/a.json", SchemaType.JSON),
+        ("file:///schemas/sub/b.json", SchemaType.JSON),
+    ]
+
+
+def test_json_schema_document_against_meta_schema():
+    "JSON schemas are validated against their meta schema."
+    data_dir = Path(__file__).parent.parent / "formatdetect" / "data"
+    file_path = data_dir / "json_schema.json"
+    result = validate(file_path)
+    assert result.is_valid, result.get_errors()
@@ -0,0 +1,258 @@
+"""Tests for the pdfvalidator module."""
+
+import zlib
+
+import pytest
+
+from gamslib.validation import validate
+from gamslib.validation.pdfvalidator import (
+    COMPRESSED_OBJECT,
+    DEFAULT_OFFSET_SAMPLE_SIZE,
+    FREE_OBJECT,
+    UNCOMPRESSED_OBJECT,
+    PDFStructureChecker,
+    PDFValidator,
+    get_offset_sample_size,
+)
+
+# The content stream is not valid Flate data: content streams must never be decoded
+CONTENT_STREAM = b"<< /Length 8 /Filter /FlateDecode >>\nstream\nnot zlib\nendstream"
+
+
+def page_objects(pages: int = 2, count: int | None = None) -> dict[int, bytes]:
+    "Return the objects of a PDF with a catalog, a page tree and pages."
+    kids = b" ".join(b"%d 0 R" % (4 + i) for i in range(pages))
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (kids, pages if count is None else count),
+        3: CONTENT_STREAM,
+    }
+    for i in range(pages):
+        objects[4 + i] = b"<< /Type /Page /Parent 2 0 R /Contents 3 0 R /Title (a (b) \\) c) >>"
+    return objects
+
+
+def write_objects(out: bytearray, objects: dict[int, bytes]) -> dict[int, int]:
+    "Append objects to out and return their offsets."
+    offsets = {}
+    for number, body in objects.items():
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    return offsets
+
+
+def xref_table(offsets: dict[int, int], first: int = 0) -> bytes:
+    "Return a cross-reference table with one subsection for offsets."
+    size = max(offsets) + 1
+    table = b"xref\n%d %d\n" % (first, size - first)
+    for number in range(first, size):
+        if number in offsets:
+            table += b"%010d 00000 n \n" % offsets[number]
+        else:
+            table += b"0000000000 65535 f \n"
+    return table
+
+
+def make_pdf(objects: dict[int, bytes] | None = None, trailer: bytes = b"/Root 1 0 R") -> bytes:
+    "Return a PDF with a cross-reference table."
+    objects = page_objects() if objects is None else objects
+    out = bytearray(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+    offsets = write_objects(out, objects)
+    startxref = len(out)
+    out += xref_table(offsets)
+    out += b"trailer\n<< /Size %d %s >>\n" % (max(offsets) + 1, trailer)
+    out += b"startxref\n%d\n%%%%EOF\n" % startxref
+    return bytes(out)
+
+
+def make_compressed_pdf() -> bytes:
+    """Return a PDF with a cross-reference stream (with PNG predictor).
+
+    The catalog and the page tree are stored in an object stream.
+    """
+    objects = page_objects()
+    out = bytearray(b"%PDF-1.5\n")
+    stream_objects = [(1, objects.pop(1)), (2, objects.pop(2))]
+    header = b""
+    body = b""
+    for number, value in stream_objects:
+        header += b"%d %d " % (number, len(body))
+        body += value + b"\n"
+    objstm = zlib.compress(header + body)
+    objects[6] = (
+        b"<< /Type /ObjStm /N 2 /First %d /Length %d /Filter /FlateDecode >>\nstream\n"
+        % (len(header), len(objstm))
+        + objstm
+        + b"\nendstream"
+    )
+    offsets = write_objects(out, objects)
+    startxref = len(out)
+    xref_number = 7
+    rows = [(FREE_OBJECT, 0, 65535)]
+    for number in range(1, xref_number + 1):
+        if number in (1, 2):
+            rows.append((COMPRESSED_OBJECT, 6, number - 1))
+        elif number == xref_number:
+            rows.append((UNCOMPRESSED_OBJECT, startxref, 0))
+        else:
+            rows.append((UNCOMPRESSED_OBJECT, offsets[number], 0))
+    raw = bytearray()
+    previous = bytes(7)
+    for row in rows:
+        data = row[0].to_bytes(1, "big") + row[1].to_bytes(4, "big") + row[2].to_bytes(2, "big")
+        raw += b"\x02" + bytes((a - b) & 0xFF for a, b in zip(data, previous))
+        previous = data
+    xref = zlib.compress(bytes(raw))
+    out += (
+        b"7 0 obj\n<< /Type /XRef /Size 8 /W [1 4 2] /Root 1 0 R /Length %d "
+        b"/Filter /FlateDecode /DecodeParms << /Predictor 12 /Columns 7 >> >>\nstream\n"
+        % len(xref)
+        + xref
+        + b"\nendstream\nendobj\n"
+    )
+    out += b"startxref\n%d\n%%%%EOF\n" % startxref
+    return bytes(out)
+
+
+def check(data: bytes, sample_size: int = 0) -> tuple[list[str], list[str]]:
+    "Return the errors and warnings of the checker for data."
+    checker = PDFStructureChecker(data, sample_size)
+    return list(checker.check()), checker.warnings
+
+
+def test_valid_pdf():
+    "A valid PDF has no errors and its content stream is not decoded."
+    assert check(make_pdf()) == ([], [])
+
+
+def test_valid_compressed_pdf():
+    "Cross-reference streams and object streams are read."
+    assert check(make_compressed_pdf()) == ([], [])
+
+
+def test_wrong_offset():
+    "Offsets which do not point at their objects are reported."
+    data = make_pdf()
+    offset_4 = data.index(b"4 0 obj")
+    offset_5 = data.index(b"5 0 obj")
+    broken = data.replace(b"%010d 00000 n" % offset_4, b"%010d 00000 n" % offset_5)
+    errors, _ = check(broken)
+    assert f"Object 4 0: offset {offset_5} points at object 5 0" in errors
+
+
+def test_offset_sample():
+    "Only a sample of offsets is checked, if there are more objects."
+    data = make_pdf(page_objects(pages=50))
+    errors, warnings = check(data, sample_size=10)
+    assert not errors
+    assert warnings == ["Checked the offsets of 10 of 53 objects"]
+
+
+def test_truncated_pdf():
+    "A file without %%EOF is reported as truncated."
+    data = make_pdf()
+    errors, _ = check(data[: len(data) // 2])
+    assert errors == ["No %%EOF marker at the end of the file (truncated?)"]
+
+
+def test_no_header():
+    "A file without PDF header is reported."
+    errors, _ = check(b"Hello" + make_pdf()[8:])
+    assert errors == ["No PDF header (%PDF-x.y) at the start of the file"]
+
+
+def test_startxref_not_at_xref():
+    "startxref must point at a cross-reference table or stream."
+    data = make_pdf()
+    startxref = int(data.rsplit(b"startxref\n", 1)[1].split()[0])
+    broken = data.replace(b"startxref\n%d" % startxref, b"startxref\n%d" % (startxref - 10))
+    errors, _ = check(broken)
+    assert errors == [
+        f"Offset {startxref - 10} does not point at a cross-reference table or stream"
+    ]
+
+
+@pytest.mark.parametrize(
+    "objects, trailer, expected",
+    [
+        (None, b"", "The trailer has no /Root entry"),
+        (
+            page_objects(count=3),
+            b"/Root 1 0 R",
+            "The page tree contains 2 pages, but its /Count is 3",
+        ),
+        (
+            {**page_objects(), 1: b"<< /Type /Foo /Pages 2 0 R >>"},
+            b"/Root 1 0 R",
+            "The /Root object is not a /Catalog dictionary",
+        ),
+        (
+            {**page_objects(), 5: b"<< /Type /Annot >>"},
+            b"/Root 1 0 R",
+            "Page tree node 5 0 R is neither a /Pages nor a /Page dictionary",
+        ),
+        (
+            {**page_objects(), 2: b"<< /Type /Pages /Kids [4 0 R 4 0 R] /Count 2 >>"},
+            b"/Root 1 0 R",
+            "The page tree contains object 4 more than once",
+        ),
+    ],
+)
+def test_catalog_and_page_tree(objects, trailer, expected):
+    "The catalog and the page tree must be reachable and consistent."
+    errors, _ = check(make_pdf(objects, trailer))
+    assert expected in errors
+
+
+def test_incremental_update():
+    "Newer sections of an incremental update take precedence over older ones (/Prev)."
+    data = bytearray(make_pdf(page_objects(count=3)))
+    previous_startxref = int(data.rsplit(b"startxref\n", 1)[1].split()[0])
+    offsets = write_objects(data, {2: b"<< /Type /Pages /Kids [4 0 R 5 0 R] /Count 2 >>"})
+    startxref = len(data)
+    data += b"xref\n2 1\n%010d 00000 n \n" % offsets[2]
+    data += b"trailer\n<< /Size 6 /Root 1 0 R /Prev %d >>\n" % previous_startxref
+    data += b"startxref\n%d\n%%%%EOF\n" % startxref
+    assert check(bytes(data)) == ([], [])
+
+
+def test_get_offset_sample_size(monkeypatch, tmp_path):
+    "Without configuration, the environment variable or the default is used."
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("GAMSCFG_PROJECT_TOML", raising=False)
+    assert get_offset_sample_size() == DEFAULT_OFFSET_SAMPLE_SIZE
+    monkeypatch.setenv("GAMSLIB_PDF_OFFSET_SAMPLE_SIZE", "0")
+    assert get_offset_sample_size() == 0
+
+
+def test_validator(tmp_path):
+    "The validator returns a ValidationResult with one subresult."
+    valid_file = tmp_path / "valid.pdf"
+    valid_file.write_bytes(make_compressed_pdf())
+    result = PDFValidator(sample_size=0).validate(valid_file)
+    assert result.is_valid
+    (subresult,) = result.get_subresults()
+    assert subresult.validator_name == "PDF Structure Validator"
+
+    empty_file = tmp_path / "empty.pdf"
+    empty_file.write_bytes(b"")
+    result = PDFValidator().validate(empty_file)
+    assert not result.is_valid
+    assert result.get_errors() == ["The file is empty"]
+
+
+def test_validate_pdf_file(tmp_path):
+    "validate() uses the PDFValidator for PDF files."
+    file_path = tmp_path / "broken.pdf"
+    file_path.write_bytes(make_pdf(page_objects(count=3)))
+    result = validate(file_path)
+    assert not result.is_valid
+    assert result.get_errors() == ["The page tree contains 2 pages, but its /Count is 3"]
+
+
+def test_validate_bytes():
+    "In-memory PDF documents are checked without a file."
+    result = PDFValidator(sample_size=0).validate_bytes(make_pdf(page_objects(count=3)))
+    assert result.get_errors() == ["The page tree contains 2 pages, but its /Count is 3"]
+    assert PDFValidator().validate_bytes(b"").get_errors() == ["The file is empty"]
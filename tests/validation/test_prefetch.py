@@ -0,0 +1,215 @@
+"""Tests for the prefetch module."""
+
+from pathlib import Path
+from unittest import mock
+
+import pytest
+import responses
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver
+from gamslib.validation.prefetch import (
+    find_referenced_schemas,
+    find_schema_references,
+    find_xml_files,
+    main,
+    prefetch_schemas,
+)
+from gamslib.validation.schemainfo import SchemaType
+
+MAIN_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+    <xs:include schemaLocation="types/types.xsd"/>
+    <xs:import namespace="urn:extra" schemaLocation="extra.xsd"/>
+    <xs:element name="products" type="productsType"/>
+</xs:schema>
+"""
+
+TYPES_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+    <xs:include schemaLocation="../main.xsd"/>
+    <xs:complexType name="productsType"/>
+</xs:schema>
+"""
+
+EXTRA_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:extra"/>
+"""
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8"?>
+<products xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+    xsi:schemaLocation="http://example.com/foo {location}"/>
+"""
+
+REMOTE = "https://schemas.example.com/simple/"
+
+
+@pytest.fixture(name="project")
+def create_project(tmp_path):
+    "Create a project with an xml file referencing a remote schema."
+    project = tmp_path / "project"
+    (project / "obj1" / "DC").mkdir(parents=True)
+    (project / "obj1" / "DC" / "data.xml").write_text(
+        DOCUMENT.format(location=REMOTE + "main.xsd"), encoding="utf-8"
+    )
+    (project / "obj1" / "image.jpg").write_bytes(b"\xff\xd8\xff\xe0")
+    return project
+
+
+@pytest.fixture(name="resolver")
+def create_resolver(tmp_path):
+    "Return a resolver which allows schemas.example.com and caches into tmp_path."
+    return CombinedCatalogResolver(
+        allowed_hosts=["schemas.example.com"], cache_dir=str(tmp_path / "cache")
+    )
+
+
+def add_remote_schemas():
+    "Register the remote schema documents with responses."
+    for name, content in (
+        ("main.xsd", MAIN_XSD),
+        ("types/types.xsd", TYPES_XSD),
+        ("extra.xsd", EXTRA_XSD),
+    ):
+        responses.get(REMOTE + name, body=content)
+
+
+def test_find_xml_files(tmp_path):
+    "Files with a .xml extension or a xml declaration are found."
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.xml").write_text("<a/>", encoding="utf-8")
+    (tmp_path / "sub" / "b.tei").write_text('<?xml version="1.0"?><b/>', encoding="utf-8")
+    (tmp_path / "c.txt").write_text("text", encoding="utf-8")
+    (tmp_path / ".schema_cache").mkdir()
+    (tmp_path / ".schema_cache" / "d.xml").write_text("<d/>", encoding="utf-8")
+    assert find_xml_files(tmp_path) == [tmp_path / "a.xml", tmp_path / "sub" / "b.tei"]
+
+
+def test_find_referenced_schemas(project, tmp_path):
+    "Schemas are found in all xml files, duplicates are removed."
+    (project / "obj1" / "DC" / "data2.xml").write_text(
+        DOCUMENT.format(location=REMOTE + "main.xsd"), encoding="utf-8"
+    )
+    (project / "broken.xml").write_text("<a>", encoding="utf-8")
+    schemas = find_referenced_schemas(find_xml_files(project))
+    assert [(s.schema_uri, s.schema_type) for s in schemas] == [
+        (REMOTE + "main.xsd", SchemaType.XSD)
+    ]
+
+
+def test_find_referenced_schemas_reads_header_only(project):
+    "Default schemas are found without format detection, only the header is parsed."
+    (project / "tei.xml").write_text(
+        '<TEI xmlns="http://www.tei-c.org/ns/1.0"><text>' + "<p>x</p>" * 1000 + "<broken>",
+        encoding="utf-8",
+    )
+    with mock.patch(
+        "gamslib.formatdetect.detect_format", side_effect=AssertionError("detected")
+    ):
+        schemas = find_referenced_schemas(find_xml_files(project))
+    assert [s.schema_uri for s in schemas] == [
+        REMOTE + "main.xsd",
+        "http://www.tei-c.org/release/xml/tei/custom/schema/xsd/tei_all.xsd",
+    ]
+
+
+@pytest.mark.parametrize(
+    "schema_type, content, expected",
+    [
+        (
+            SchemaType.XSD,
+            MAIN_XSD,
+            [REMOTE + "types/types.xsd", REMOTE + "extra.xsd"],
+        ),
+        (
+            SchemaType.RNG,
+            '<grammar xmlns="http://relaxng.org/ns/structure/1.0">'
+            '<include href="a.rng"/><start><externalRef href="../b.rng"/></start>'
+            "</grammar>",
+            [REMOTE + "a.rng", "https://schemas.example.com/b.rng"],
+        ),
+        (SchemaType.RNC, 'include "a.rnc"\nstart = element foo { text }', [REMOTE + "a.rnc"]),
+        (
+            SchemaType.DTD,
+            '<!ENTITY % mod SYSTEM "mod.ent">\n'
+            '<!ENTITY % pub PUBLIC "-//FOO//Module" "pub.ent">\n'
+            '<!ENTITY internal "text">',
+            [REMOTE + "mod.ent", REMOTE + "pub.ent"],
+        ),
+        (
+            SchemaType.SCH,
+            '<schema xmlns="http://purl.oclc.org/dsdl/schematron">'
+            '<include href="rules.sch"/></schema>',
+            [REMOTE + "rules.sch"],
+        ),
+    ],
+)
+def test_find_schema_references(schema_type, content, expected):
+    "Directly referenced documents are resolved against the schema uri."
+    references = find_schema_references(
+        REMOTE + "schema", schema_type, content.encode("utf-8")
+    )
+    assert references == [(uri, schema_type) for uri in expected]
+
+
+@responses.activate
+def test_prefetch_schemas(project, resolver):
+    "The whole include/import closure is downloaded into the cache."
+    add_remote_schemas()
+    result = prefetch_schemas(project, resolver, workers=2)
+    assert not result.failed
+    expected = [REMOTE + "main.xsd", REMOTE + "types/types.xsd", REMOTE + "extra.xsd"]
+    assert sorted(result.loaded) == sorted(expected)
+    # each document is downloaded once, even with circular includes
+    assert sorted(call.request.url for call in responses.calls) == sorted(expected)
+    for uri in result.loaded:
+        assert Path(resolver.get_cache_path(uri)).is_file()
+
+    # a second run works offline
+    responses.reset()
+    result = prefetch_schemas(project, resolver)
+    assert not result.failed
+    assert sorted(result.loaded) == sorted(expected)
+    assert not responses.calls
+
+
+@responses.activate
+def test_prefetch_schemas_failures(project, resolver):
+    "Documents which cannot be loaded are reported."
+    responses.get(REMOTE + "main.xsd", body=MAIN_XSD)
+    responses.get(REMOTE + "types/types.xsd", body=TYPES_XSD)
+    responses.get(REMOTE + "extra.xsd", status=404)
+    result = prefetch_schemas(project, resolver)
+    assert sorted(result.loaded) == [REMOTE + "main.xsd", REMOTE + "types/types.xsd"]
+    assert list(result.failed) == [REMOTE + "extra.xsd"]
+    assert "HTTPError" in result.failed[REMOTE + "extra.xsd"]
+
+
+def test_prefetch_schemas_local(tmp_path):
+    "Local schemas are not cached, but their references are followed."
+    schema_dir = tmp_path / "schemas"
+    (schema_dir / "types").mkdir(parents=True)
+    (schema_dir / "main.xsd").write_text(MAIN_XSD, encoding="utf-8")
+    (schema_dir / "types" / "types.xsd").write_text(TYPES_XSD, encoding="utf-8")
+    (tmp_path / "data.xml").write_text(
+        DOCUMENT.format(location="schemas/main.xsd"), encoding="utf-8"
+    )
+    result = prefetch_schemas(tmp_path, CombinedCatalogResolver([], cache_dir=None))
+    assert sorted(result.loaded) == sorted(
+        [(schema_dir / "main.xsd").as_uri(), (schema_dir / "types" / "types.xsd").as_uri()]
+    )
+    assert list(result.failed) == [(schema_dir / "extra.xsd").as_uri()]
+
+
+@responses.activate
+def test_main(project, monkeypatch, capsys, tmp_path):
+    "The command line entry point prints a summary and returns an exit code."
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GAMSLIB_SAFE_XML_HOSTS", "schemas.example.com")
+    add_remote_schemas()
+    assert main([str(project), "--workers", "2"]) == 0
+    assert "1 referenced schemas, 3 documents loaded, 0 failed." in capsys.readouterr().out
+
+    responses.replace(responses.GET, REMOTE + "extra.xsd", status=404)
+    monkeypatch.chdir(project)  # use an empty cache
+    assert main([str(project)]) == 1
+    assert REMOTE + "extra.xsd" in capsys.readouterr().err
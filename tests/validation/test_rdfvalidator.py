@@ -0,0 +1,211 @@
+"""Tests for the rdfvalidator module."""
+
+import pytest
+
+from gamslib.validation import validate
+from gamslib.validation.rdfvalidator import RDFValidator, RDFXMLChecker
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import ValidationOptions
+
+RDF_HEADER = (
+    '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+    'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:ex="http://example.org/">\n'
+)
+
+VALID_RDF = (
+    RDF_HEADER
+    + """  <rdf:Description rdf:about="http://example.org/a" dc:title="A">
+    <dc:creator>Jane Doe</dc:creator>
+    <ex:knows rdf:resource="http://example.org/b"/>
+    <ex:age rdf:datatype="http://www.w3.org/2001/XMLSchema#integer">42</ex:age>
+    <ex:address rdf:parseType="Resource">
+      <ex:city xml:lang="de">Graz</ex:city>
+    </ex:address>
+    <ex:friends rdf:parseType="Collection">
+      <rdf:Description rdf:about="http://example.org/c"/>
+      <ex:Person rdf:nodeID="d"/>
+    </ex:friends>
+    <ex:note rdf:parseType="Literal">Some <b>bold</b> text</ex:note>
+    <ex:homepage>
+      <ex:Page rdf:about="http://example.org/page"/>
+    </ex:homepage>
+  </rdf:Description>
+  <ex:Person rdf:ID="e">
+    <rdf:type rdf:resource="http://example.org/Agent"/>
+  </ex:Person>
+</rdf:RDF>
+"""
+)
+
+
+def check(tmp_path, content: str) -> list[tuple[int, str]]:
+    "Write content to a file and return the errors found by the checker."
+    file_path = tmp_path / "data.rdf"
+    file_path.write_text(content, encoding="utf-8")
+    return list(RDFXMLChecker().check(file_path))
+
+
+def test_valid_rdf(tmp_path):
+    "A valid RDF/XML file has no errors."
+    assert not check(tmp_path, VALID_RDF)
+
+
+def test_root_node_element(tmp_path):
+    "rdf:RDF may be omitted if the root is a node element."
+    content = (
+        '<ex:Person xmlns:ex="http://example.org/" '
+        'xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+        'rdf:about="http://example.org/a"><ex:name>A</ex:name></ex:Person>'
+    )
+    assert not check(tmp_path, content)
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        (
+            '<rdf:Description rdf:about="http://example.org/a b"/>',
+            "rdf:about 'http://example.org/a b' is not a valid IRI",
+        ),
+        (
+            '<rdf:Description><ex:p rdf:resource="http://example.org/&lt;x"/></rdf:Description>',
+            "rdf:resource 'http://example.org/<x' is not a valid IRI",
+        ),
+        ('<rdf:Description rdf:ID="1a"/>', "rdf:ID '1a' is not a valid NCName"),
+        (
+            '<rdf:Description rdf:about="http://example.org/a" rdf:nodeID="a"/>',
+            "Node element rdf:Description must not have more than one of "
+            "rdf:ID, rdf:about and rdf:nodeID (rdf:about, rdf:nodeID)",
+        ),
+        ("<rdf:li/>", "rdf:li is not allowed as node element"),
+        (
+            "<rdf:Description><rdf:Description/></rdf:Description>",
+            "rdf:Description is not allowed as property element",
+        ),
+        ('<rdf:Description about="x"/>', "Unqualified attribute 'about' is not allowed"),
+        ("<rdf:Description>text</rdf:Description>", "Text 'text' is not allowed in rdf:Description"),
+        (
+            "<ex:A><ex:p><ex:B/><ex:C/></ex:p></ex:A>",
+            "Property element {http://example.org/}p must contain at most one node element",
+        ),
+        (
+            "<ex:A><ex:p>text<ex:B/></ex:p></ex:A>",
+            "Property element {http://example.org/}p contains text and a node element",
+        ),
+        (
+            '<ex:A><ex:p rdf:resource="http://example.org/b">text</ex:p></ex:A>',
+            "Property element {http://example.org/}p with rdf:resource, rdf:nodeID or "
+            "property attributes must be empty",
+        ),
+        (
+            '<ex:A><ex:p rdf:parseType="Resource" rdf:resource="http://example.org/b"/></ex:A>',
+            "{http://example.org/}p with rdf:parseType must not have rdf:resource",
+        ),
+        (
+            '<ex:A><ex:p rdf:datatype="http://example.org/t"><ex:B/></ex:p></ex:A>',
+            "Property element {http://example.org/}p with rdf:datatype must not contain elements",
+        ),
+        (
+            '<ex:A><ex:p rdf:parseType="Collection"><ex:q>x</ex:q></ex:p></ex:A>',
+            "Text 'x' is not allowed in {http://example.org/}q",
+        ),
+        ('<ex:A rdf:bagID="x"/>', "rdf:bagID is not allowed here"),
+    ],
+)
+def test_syntax_errors(tmp_path, body, expected):
+    "Syntax errors are detected."
+    errors = check(tmp_path, RDF_HEADER + body + "</rdf:RDF>")
+    assert expected in [message for _, message in errors]
+
+
+def test_line_numbers(tmp_path):
+    "Errors are reported with the line of the element."
+    content = RDF_HEADER + '<ex:A>\n<ex:p/>\n<ex:q rdf:ID="1"/>\n</ex:A>\n</rdf:RDF>'
+    assert check(tmp_path, content) == [(4, "rdf:ID '1' is not a valid NCName")]
+
+
+def test_elements_are_discarded(tmp_path, monkeypatch):
+    """Checked elements are removed from the tree, so memory use is bounded.
+
+    The parser reads ahead, so some elements after the current one are in the tree.
+    """
+    sizes = []
+    original = RDFXMLChecker._start  # pylint: disable=protected-access
+
+    def start(self, element, stack):
+        if stack:
+            sizes.append(len(element.getparent()))
+        yield from original(self, element, stack)
+
+    monkeypatch.setattr(RDFXMLChecker, "_start", start)
+    node_count = 5000
+    nodes = "".join(
+        f'<ex:A rdf:about="http://example.org/{i}"><ex:p>{i}</ex:p></ex:A>'
+        for i in range(node_count)
+    )
+    assert not check(tmp_path, RDF_HEADER + nodes + "</rdf:RDF>")
+    assert max(sizes) < node_count / 5
+
+
+def test_validator_valid(tmp_path):
+    "The validator returns a valid result for valid RDF/XML."
+    file_path = tmp_path / "data.rdf"
+    file_path.write_text(VALID_RDF, encoding="utf-8")
+    result = RDFValidator().validate(file_path)
+    assert result.is_valid
+    (subresult,) = result.get_subresults()
+    assert subresult.validator_name == "RDF/XML Syntax Validator"
+
+
+def test_validator_invalid_with_options(tmp_path):
+    "Errors are prefixed with line numbers and limited by the options."
+    file_path = tmp_path / "data.rdf"
+    nodes = "\n".join(f'<ex:A rdf:about="x {i}"/>' for i in range(5))
+    file_path.write_text(RDF_HEADER + nodes + "\n</rdf:RDF>", encoding="utf-8")
+    context = ValidationContext(file_path, options=ValidationOptions(max_errors=2))
+    result = RDFValidator().validate_context(context)
+    assert not result.is_valid
+    assert result.get_errors() == [
+        "line 2: rdf:about 'x 0' is not a valid IRI",
+        "line 3: rdf:about 'x 1' is not a valid IRI",
+        "3 more errors omitted (max_errors=2)",
+    ]
+    context = ValidationContext(file_path, options=ValidationOptions(aggregate_errors=True))
+    assert RDFValidator().validate_context(context).get_errors() == [
+        "5 x rdf:about '…' is not a valid IRI (first at: line 2, line 3, line 4, line 5, line 6)"
+    ]
+
+
+def test_validator_not_wellformed(tmp_path):
+    "A file which is not well formed gets a wellformedness error."
+    file_path = tmp_path / "data.rdf"
+    file_path.write_text(RDF_HEADER + "<ex:A>", encoding="utf-8")
+    result = RDFValidator().validate(file_path)
+    assert not result.is_valid
+    (subresult,) = result.get_subresults()
+    assert subresult.validator_name == "XML Wellformedness Validator"
+
+
+def test_validator_with_schema(tmp_path):
+    "Referenced XML schemas are validated after the RDF/XML syntax."
+    file_path = tmp_path / "data.rdf"
+    file_path.write_text(VALID_RDF, encoding="utf-8")
+    (tmp_path / "schema.rng").write_text(
+        '<element name="foo" xmlns="http://relaxng.org/ns/structure/1.0"><empty/></element>',
+        encoding="utf-8",
+    )
+    schema = SchemaInfo((tmp_path / "schema.rng").as_uri(), schema_type=SchemaType.RNG)
+    result = RDFValidator().validate(file_path, [schema])
+    names = [subresult.validator_name for subresult in result.get_subresults()]
+    assert names == ["RDF/XML Syntax Validator", "RelaxNG Validator"]
+    assert not result.is_valid
+
+
+def test_validate_rdf_file(tmp_path):
+    "validate() uses the RDFValidator for RDF/XML files."
+    file_path = tmp_path / "data.rdf"
+    file_path.write_text('<?xml version="1.0"?>\n' + VALID_RDF, encoding="utf-8")
+    result = validate(file_path)
+    assert result.is_valid
+    assert [s.validator_name for s in result.get_subresults()] == ["RDF/XML Syntax Validator"]
@@ -0,0 +1,152 @@
+"""Tests for the report module."""
+
+import json
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from gamslib.validation.__main__ import main as validation_main
+from gamslib.validation.report import (
+    ReportSummary,
+    ReportWriter,
+    main,
+    read_report,
+    summarize_report,
+)
+from gamslib.validation.validationresult import ValidationResult, ValidationSubResult
+
+
+def make_result(file_path: str, is_valid: bool, validator_name="XMLSchema Validator"):
+    "Return a result with one subresult."
+    result = ValidationResult(Path(file_path))
+    result.add_subresult(
+        ValidationSubResult(
+            is_valid,
+            validator_name,
+            schema_uri="file:///schema.xsd",
+            message="valid" if is_valid else "invalid",
+            errors=[] if is_valid else ["error 1", "error 2"],
+            warnings=["warning"] if is_valid else [],
+        )
+    )
+    return result
+
+
+@pytest.fixture(name="report_path")
+def write_report(tmp_path):
+    "Write a report with two valid and two invalid results."
+    report_path = tmp_path / "report.jsonl"
+    results = [
+        make_result("a.xml", True),
+        make_result("b.xml", False),
+        make_result("c.xml", False, "DTD Validator"),
+        make_result("d.xml", True),
+    ]
+    with ReportWriter(report_path) as report:
+        for result in results:
+            report.write(result)
+    assert report.count == len(results)
+    return report_path
+
+
+def test_to_json_is_compact():
+    "Empty fields are left out and each result is a single line."
+    line = make_result("a.xml", True).to_json()
+    assert "\n" not in line
+    data = json.loads(line)
+    assert data["is_valid"] is True
+    assert "errors" not in data["subresults"][0]
+    restored = ValidationResult.from_json(line)
+    assert restored.to_dict() == make_result("a.xml", True).to_dict()
+
+
+def test_report_writer_append(report_path):
+    "Results can be appended to an existing report."
+    with ReportWriter(report_path, append=True) as report:
+        report.write(make_result("e.xml", True))
+    assert [str(result.file_path) for result in read_report(report_path)] == [
+        "a.xml",
+        "b.xml",
+        "c.xml",
+        "d.xml",
+        "e.xml",
+    ]
+    with ReportWriter(report_path) as report:
+        report.write(make_result("f.xml", True))
+    assert len(report_path.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_read_report(report_path):
+    "Results are read one by one and can be filtered."
+    results = list(read_report(report_path))
+    assert [str(result.file_path) for result in results] == [
+        "a.xml",
+        "b.xml",
+        "c.xml",
+        "d.xml",
+    ]
+    assert results[1].get_errors() == ["error 1", "error 2"]
+    assert [str(r.file_path) for r in read_report(report_path, only_invalid=True)] == [
+        "b.xml",
+        "c.xml",
+    ]
+    assert [
+        str(r.file_path) for r in read_report(report_path, validator_name="DTD Validator")
+    ] == ["c.xml"]
+    assert [
+        str(r.file_path)
+        for r in read_report(report_path, predicate=lambda data: data["file_path"] > "c")
+    ] == ["c.xml", "d.xml"]
+
+
+def test_read_report_skips_incomplete_lines(report_path):
+    "An incomplete last line (e.g. of an interrupted run) is skipped."
+    with open(report_path, "a", encoding="utf-8") as f:
+        f.write('{"file_path": "e.xml", "subres')
+    assert [str(result.file_path) for result in read_report(report_path)] == [
+        "a.xml",
+        "b.xml",
+        "c.xml",
+        "d.xml",
+    ]
+
+
+def test_summarize_report(report_path):
+    "The summary counts files, errors and warnings."
+    summary = summarize_report(report_path)
+    assert summary == ReportSummary(
+        files=4,
+        invalid=2,
+        with_warnings=2,
+        errors=4,
+        warnings=2,
+        failed_validators=Counter({"XMLSchema Validator": 1, "DTD Validator": 1}),
+    )
+    assert summary.valid == summary.files - summary.invalid
+    assert "4 files, 2 valid, 2 invalid, 2 with warnings." in str(summary)
+
+
+def test_main(report_path, capsys):
+    "The command line prints summaries and invalid files."
+    assert main(["summary", str(report_path)]) == 0
+    assert "4 errors, 2 warnings." in capsys.readouterr().out
+    assert main(["invalid", str(report_path), "--validator", "DTD Validator"]) == 0
+    assert capsys.readouterr().out == "c.xml: invalid\n  error 1\n  error 2\n"
+
+
+def test_validation_main_writes_report(tmp_path, monkeypatch):
+    "python -m gamslib.validation --report writes a report."
+    monkeypatch.chdir(tmp_path)
+    xml_file = tmp_path / "doc.xml"
+    xml_file.write_text("<root/>", encoding="utf-8")
+    report_path = tmp_path / "report.jsonl"
+    assert (
+        validation_main(
+            [str(xml_file), "--workers", "1", "--no-cache", "--report", str(report_path)]
+        )
+        == 0
+    )
+    (result,) = read_report(report_path)
+    assert result.file_path == xml_file
+    assert result.is_valid
@@ -0,0 +1,326 @@
+"""Tests for the resultcache module and the cache parameters of the validate functions."""
+
+import importlib.metadata
+import os
+import pickle
+import time
+from unittest import mock
+
+import pytest
+
+import gamslib.validation
+from gamslib.validation import validate, validate_many
+from gamslib.validation.__main__ import main
+from gamslib.validation.combined_resolver import CombinedCatalogResolver, get_resolver
+from gamslib.validation.resultcache import ResultCache, library_versions
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.validationresult import ValidationResult, ValidationSubResult
+from gamslib.validation.validator import ValidatorFactory
+from gamslib.validation.xmlvalidator import XMLValidator
+
+MAIN_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+    <xs:include schemaLocation="types.xsd"/>
+    <xs:element name="products" type="productsType"/>
+</xs:schema>
+"""
+
+TYPES_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+    <xs:complexType name="productsType">
+        <xs:sequence>
+            <xs:element name="product" type="xs:string" maxOccurs="unbounded"/>
+        </xs:sequence>
+    </xs:complexType>
+</xs:schema>
+"""
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8"?>
+<products xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+    xsi:schemaLocation="http://example.com/foo schemas/main.xsd">
+    <{tag}>Phone</{tag}>
+</products>
+"""
+
+
+@pytest.fixture(name="project")
+def create_project(tmp_path):
+    "Create a valid and an invalid document referencing a schema with an include."
+    project = tmp_path / "project"
+    (project / "schemas").mkdir(parents=True)
+    (project / "schemas" / "main.xsd").write_text(MAIN_XSD, encoding="utf-8")
+    (project / "schemas" / "types.xsd").write_text(TYPES_XSD, encoding="utf-8")
+    (project / "valid.xml").write_text(DOCUMENT.format(tag="product"), encoding="utf-8")
+    (project / "invalid.xml").write_text(DOCUMENT.format(tag="produkt"), encoding="utf-8")
+    return project
+
+
+def make_cache(tmp_path) -> ResultCache:
+    "Return a ResultCache storing its entries in tmp_path."
+    return ResultCache(
+        tmp_path / "results", resolver=CombinedCatalogResolver([], cache_dir=None)
+    )
+
+
+def make_result(file_path) -> ValidationResult:
+    "Return a ValidationResult with one invalid subresult."
+    result = ValidationResult(file_path)
+    result.add_subresult(
+        ValidationSubResult(
+            False, "XML Validator", "file:///schema.xsd", "invalid", ["error"], ["warning"]
+        )
+    )
+    return result
+
+
+def test_library_versions():
+    "The versions of gamslib, lxml and saxonche are part of the key."
+    versions = library_versions()
+    assert "gamslib=" in versions
+    assert "lxml=" in versions
+    assert "saxonche=" in versions
+
+
+def test_cache_dir_from_resolver(tmp_path):
+    "The cache is stored in the 'results' subdirectory of the resolver's cache dir."
+    resolver = CombinedCatalogResolver([], cache_dir=str(tmp_path / "cache"))
+    assert ResultCache(resolver=resolver).cache_dir == tmp_path / "cache" / "results"
+    with pytest.raises(ValueError):
+        ResultCache(resolver=CombinedCatalogResolver([], cache_dir=None))
+
+
+def test_put_and_get(project, tmp_path):
+    "A stored result is returned for the same file with the same content."
+    cache = make_cache(tmp_path)
+    file_path = project / "valid.xml"
+    assert cache.get(file_path) is None
+    cache.put(file_path, make_result(file_path), [])
+    result = cache.get(file_path)
+    assert result.file_path == file_path
+    assert result.to_dict() == make_result(file_path).to_dict()
+
+    # relative references of another file may resolve to other schemas
+    copy = project / "copy.xml"
+    copy.write_bytes(file_path.read_bytes())
+    assert cache.get(copy) is None
+    # the schema location matters, too
+    assert cache.get(file_path, "other.xsd") is None
+
+    file_path.write_text(DOCUMENT.format(tag="changed"), encoding="utf-8")
+    assert cache.get(file_path) is None
+
+
+def test_same_content_in_other_directory(tmp_path):
+    "Identical files in sibling directories are validated against their own schemas."
+    document = (
+        '<doc xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xsi:noNamespaceSchemaLocation="s.xsd">text</doc>'
+    )
+    for name, type_name in (("a", "string"), ("b", "int")):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "s.xsd").write_text(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+            f'<xs:element name="doc" type="xs:{type_name}"/></xs:schema>',
+            encoding="utf-8",
+        )
+        (tmp_path / name / "doc.xml").write_text(document, encoding="utf-8")
+    cache = make_cache(tmp_path)
+    assert validate(tmp_path / "a" / "doc.xml", cache=cache).is_valid
+    assert not validate(tmp_path / "b" / "doc.xml", cache=cache).is_valid
+    results = {
+        result.file_path.parent.name: result.is_valid
+        for result in validate_many(
+            [tmp_path / "a" / "doc.xml", tmp_path / "b" / "doc.xml"],
+            workers=1,
+            cache=make_cache(tmp_path),
+        )
+    }
+    assert results == {"a": True, "b": False}
+
+
+def test_make_key_schemas(project, tmp_path):
+    "Requested schemas are kept apart from a requested schema location."
+    cache = make_cache(tmp_path)
+    file_path = project / "valid.xml"
+    schema = SchemaInfo("file:///schema.xsd", SchemaType.XSD)
+    keys = [
+        cache.make_key(file_path),
+        cache.make_key(file_path, "xsd:file:///schema.xsd"),
+        cache.make_key(file_path, schemas=[schema]),
+        cache.make_key(file_path, schemas=[schema, schema]),
+    ]
+    assert len(set(keys)) == len(keys)
+
+
+def test_key_is_computed_once(project, tmp_path):
+    "validate() hashes the file only once for lookup and storage."
+    cache = make_cache(tmp_path)
+    with mock.patch(
+        "gamslib.validation.resultcache.file_hash", return_value="hash"
+    ) as hash_file:
+        validate(project / "valid.xml", cache=cache)
+    hash_file.assert_called_once()
+
+
+def test_validate_resolves_schema_location(project, tmp_path, monkeypatch):
+    "A relative schema location is resolved against the working directory for the key."
+    cache = make_cache(tmp_path)
+    file_path = project / "valid.xml"
+    (tmp_path / "main.xsd").write_text(
+        '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+        '<xs:element name="other"/></xs:schema>',
+        encoding="utf-8",
+    )
+    monkeypatch.chdir(project / "schemas")
+    assert validate(file_path, "main.xsd", cache=cache).is_valid
+    monkeypatch.chdir(tmp_path)
+    assert not validate(file_path, "main.xsd", cache=cache).is_valid
+
+
+def test_library_versions_without_installed_package():
+    "Packages which are not installed (e.g. a source checkout) do not break the cache."
+    with mock.patch(
+        "importlib.metadata.version",
+        side_effect=importlib.metadata.PackageNotFoundError("gamslib"),
+    ):
+        assert "gamslib=none" in library_versions()
+
+
+def test_get_with_other_versions(project, tmp_path):
+    "Results of other library versions are not used."
+    file_path = project / "valid.xml"
+    make_cache(tmp_path).put(file_path, make_result(file_path), [])
+    with mock.patch(
+        "gamslib.validation.resultcache.library_versions", return_value="lxml=0"
+    ):
+        assert make_cache(tmp_path).get(file_path) is None
+
+
+@pytest.mark.parametrize("changed_schema", ["main.xsd", "types.xsd"])
+def test_schema_change_invalidates(project, tmp_path, changed_schema):
+    "A change of the schema or an included schema document invalidates the entry."
+    file_path = project / "valid.xml"
+    schema = SchemaInfo((project / "schemas" / "main.xsd").as_uri(), SchemaType.XSD)
+    make_cache(tmp_path).put(file_path, make_result(file_path), [schema])
+    assert make_cache(tmp_path).get(file_path) is not None
+
+    schema_file = project / "schemas" / changed_schema
+    schema_file.write_text(
+        schema_file.read_text(encoding="utf-8").replace("</xs:schema>", "<!-- --></xs:schema>"),
+        encoding="utf-8",
+    )
+    assert make_cache(tmp_path).get(file_path) is None
+
+
+def test_schema_fingerprint_missing_document(project, tmp_path):
+    "Missing documents are part of the fingerprint."
+    cache = make_cache(tmp_path)
+    uri = (project / "schemas" / "main.xsd").as_uri()
+    fingerprint = cache.schema_fingerprint(uri, SchemaType.XSD)
+    (project / "schemas" / "types.xsd").unlink()
+    assert make_cache(tmp_path).schema_fingerprint(uri, SchemaType.XSD) != fingerprint
+
+
+def test_prune(project, tmp_path):
+    "prune() removes entries which have not been used for max_age seconds."
+    cache = make_cache(tmp_path)
+    old_file = project / "valid.xml"
+    new_file = project / "invalid.xml"
+    cache.put(old_file, make_result(old_file), [])
+    cache.put(new_file, make_result(new_file), [])
+    old_entry = next(
+        path
+        for path in (tmp_path / "results").glob("*/*.json")
+        if path.stem == cache.make_key(old_file)
+    )
+    an_hour_ago = time.time() - 3600
+    os.utime(old_entry, (an_hour_ago, an_hour_ago))
+    assert cache.prune(60) == 1
+    assert cache.get(old_file) is None
+    assert cache.get(new_file) is not None
+    assert cache.clear() == 1
+    assert cache.get(new_file) is None
+
+
+def test_validate_with_cache(project, tmp_path):
+    "validate() returns cached results without validating again."
+    cache = make_cache(tmp_path)
+    for name, is_valid in (("valid.xml", True), ("invalid.xml", False)):
+        result = validate(project / name, cache=cache)
+        assert result.is_valid is is_valid
+        with mock.patch.object(ValidatorFactory, "get_validator") as get_validator:
+            cached_result = validate(project / name, cache=cache)
+        get_validator.assert_not_called()
+        assert cached_result.to_dict() == result.to_dict()
+
+
+def test_xmlvalidator_validate_with_cache(project, tmp_path):
+    "XMLValidator.validate() keeps results for different schemas apart."
+    cache = make_cache(tmp_path)
+    file_path = project / "valid.xml"
+    schema = SchemaInfo((project / "schemas" / "main.xsd").as_uri(), SchemaType.XSD)
+    assert XMLValidator().validate(file_path, [schema], cache=cache).is_valid
+    with mock.patch.object(
+        XMLValidator, "validate_context", return_value=make_result(file_path)
+    ) as validate_context:
+        assert XMLValidator().validate(file_path, [schema], cache=cache).is_valid
+        validate_context.assert_not_called()
+        XMLValidator().validate(file_path, [], cache=cache)
+        validate_context.assert_called_once()
+
+
+def test_validate_many_with_cache(project, tmp_path):
+    "validate_many() neither detects nor validates cached files."
+    cache = make_cache(tmp_path)
+    paths = [project / "valid.xml", project / "invalid.xml"]
+    results = {result.file_path: result for result in validate_many(paths, 1, cache=cache)}
+    with mock.patch.object(gamslib.validation, "_validate_context") as validate_context:
+        cached = {result.file_path: result for result in validate_many(paths, 1, cache=cache)}
+    validate_context.assert_not_called()
+    assert {path: result.to_dict() for path, result in cached.items()} == {
+        path: result.to_dict() for path, result in results.items()
+    }
+
+
+def test_validate_many_hashes_once(project, tmp_path):
+    "validate_many() computes the key of an uncached file once for lookup and storage."
+    cache = make_cache(tmp_path)
+    paths = [project / "valid.xml", project / "invalid.xml"]
+    with mock.patch.object(cache, "make_key", wraps=cache.make_key) as make_key:
+        list(validate_many(paths, 1, cache=cache))
+    assert [call.args[0] for call in make_key.call_args_list] == paths
+    assert all(cache.get(path) is not None for path in paths)
+
+
+def test_pickled_cache_uses_shared_resolver(tmp_path):
+    "A cache sent to a worker process keeps its directory and uses the shared resolver."
+    cache = pickle.loads(pickle.dumps(make_cache(tmp_path)))
+    assert cache.cache_dir == tmp_path / "results"
+    assert cache.resolver is get_resolver()
+
+
+def test_validate_many_does_not_cache_errors(project, tmp_path):
+    "Files which could not be validated at all are not cached."
+    cache = make_cache(tmp_path)
+    file_path = project / "valid.xml"
+    with mock.patch.object(
+        ValidatorFactory, "get_validator", side_effect=RuntimeError("boom")
+    ):
+        result = next(validate_many([file_path], 1, cache=cache))
+    assert not result.is_valid
+    assert cache.get(file_path) is None
+
+
+def test_main(project, tmp_path, monkeypatch, capsys):
+    "The command line validates files and directories and uses the cache."
+    monkeypatch.chdir(tmp_path)
+    assert main([str(project / "valid.xml"), "--workers", "1"]) == 0
+    assert "1 files validated, 0 invalid." in capsys.readouterr().out
+    assert list((tmp_path / ".schema_cache" / "results").glob("*/*.json"))
+
+    assert main([str(project), "--workers", "1", "--no-cache"]) == 1
+    output = capsys.readouterr().out
+    assert f"{project / 'invalid.xml'}: invalid" in output
+
+    assert main(["--prune-cache", "0"]) == 0
+    assert "Removed 1 cached results." in capsys.readouterr().out
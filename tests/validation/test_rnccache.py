@@ -0,0 +1,120 @@
+"""Tests for the rnccache module."""
+
+import pytest
+import rnc2rng
+from lxml import etree as ET
+
+from gamslib.validation import rnccache
+from gamslib.validation.combined_resolver import CombinedCatalogResolver
+from gamslib.validation.rnccache import RNCConverter, rnc2rng_version
+from gamslib.validation.xmlvalidator import RelaxNGCompactValidator
+
+# pylint: disable=c-extension-no-member
+
+MAIN_RNC = """default namespace = ""
+# include "commented.rnc"
+include "parts/product.rnc"
+
+start = element products { product+ }
+"""
+
+PRODUCT_RNC = """include "price.rnc"
+product = element product { element name { text }, price }
+"""
+
+PRICE_RNC = """price = element price { xsd:decimal }
+"""
+
+
+@pytest.fixture(name="schema_uri")
+def create_schema_files(tmp_path):
+    "Create a RNC schema with nested includes and return the URI of the main schema."
+    schema_dir = tmp_path / "schemas"
+    (schema_dir / "parts").mkdir(parents=True)
+    (schema_dir / "main.rnc").write_text(MAIN_RNC, encoding="utf-8")
+    (schema_dir / "parts" / "product.rnc").write_text(PRODUCT_RNC, encoding="utf-8")
+    (schema_dir / "parts" / "price.rnc").write_text(PRICE_RNC, encoding="utf-8")
+    return (schema_dir / "main.rnc").as_uri()
+
+
+@pytest.fixture(name="converter")
+def create_converter(tmp_path):
+    "Return a RNCConverter with a cache dir in tmp_path."
+    return RNCConverter(CombinedCatalogResolver([], (tmp_path / "cache").as_posix()))
+
+
+def test_init(tmp_path):
+    "The cache dir defaults to a subdir of the resolver cache dir."
+    resolver = CombinedCatalogResolver([], (tmp_path / "cache").as_posix())
+    assert RNCConverter(resolver).cache_dir == tmp_path / "cache" / "rnc"
+    assert RNCConverter(resolver, tmp_path / "foo").cache_dir == tmp_path / "foo"
+    assert RNCConverter(CombinedCatalogResolver([], cache_dir=None)).cache_dir is None
+
+
+def test_collect_sources(converter, schema_uri):
+    "All included files must be collected, commented includes are ignored."
+    sources = converter.collect_sources(schema_uri)
+    base = schema_uri.rsplit("/", 1)[0]
+    assert list(sources) == [
+        schema_uri,
+        f"{base}/parts/product.rnc",
+        f"{base}/parts/price.rnc",
+    ]
+    assert sources[schema_uri] == MAIN_RNC.encode("utf-8")
+
+
+def test_get_rng(converter, schema_uri, monkeypatch):
+    "The converted schema must be cached and includes must be inlined."
+    rng = converter.get_rng(schema_uri)
+    relaxng = ET.RelaxNG(ET.fromstring(rng))
+    assert relaxng.validate(
+        ET.fromstring("<products><product><name>a</name><price>1</price></product></products>")
+    )
+    assert len(list(converter.cache_dir.glob("*.rng"))) == 1
+
+    def fail(*_args):  # pragma: no cover
+        raise AssertionError("Schema should not be converted again.")
+
+    monkeypatch.setattr(rnc2rng, "load", fail)
+    assert converter.get_rng(schema_uri) == rng
+
+
+def test_changed_include_invalidates_cache(converter, schema_uri, tmp_path):
+    "If an included file changes, the schema must be converted again."
+    old_rng = converter.get_rng(schema_uri)
+    (tmp_path / "schemas" / "parts" / "price.rnc").write_text(
+        PRICE_RNC.replace("decimal", "integer"), encoding="utf-8"
+    )
+    rng = converter.get_rng(schema_uri)
+    assert b"integer" in rng
+    # each version of the schema has its own cache file
+    assert len(list(converter.cache_dir.glob("*.rng"))) == len({old_rng, rng})
+
+
+def test_make_key_depends_on_version(monkeypatch):
+    "The key must change with the rnc2rng version."
+    sources = {"file:///foo.rnc": b"start = element foo { text }"}
+    key = RNCConverter.make_key(sources)
+    assert rnc2rng_version()
+    monkeypatch.setattr(rnccache, "rnc2rng_version", lambda: "0.0.0")
+    assert RNCConverter.make_key(sources) != key
+
+
+def test_no_cache(schema_uri):
+    "Without a cache dir, the schema is converted on every call."
+    converter = RNCConverter(CombinedCatalogResolver([], cache_dir=None))
+    assert b"<grammar" in converter.get_rng(schema_uri)
+
+
+def test_rnc_validator_with_includes(schema_uri, tmp_path, monkeypatch):
+    "The RelaxNGCompactValidator must support includes."
+    monkeypatch.chdir(tmp_path)
+    validator = RelaxNGCompactValidator(schema_uri)
+    assert validator._creation_error is None  # pylint: disable=protected-access
+    tree = ET.ElementTree(
+        ET.fromstring(
+            "<products><product><name>a</name><price>x</price></product></products>"
+        )
+    )
+    assert not validator.validate(tree).is_valid
+    assert list((tmp_path / ".schema_cache" / "rnc").glob("*.rng"))
@@ -0,0 +1,56 @@
+"""Tests for the saxonruntime module."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import saxonche  # pylint: disable=import-error
+
+from gamslib.validation import saxonruntime
+from gamslib.validation.saxonruntime import SaxonRuntime, get_saxon_runtime
+from gamslib.validation.xmlvalidator import SchematronValidator
+
+
+def test_get_saxon_runtime_is_singleton():
+    "All threads must get the same runtime object."
+    runtime = get_saxon_runtime()
+    assert isinstance(runtime, SaxonRuntime)
+    assert isinstance(runtime.processor, saxonche.PySaxonProcessor)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        runtimes = list(executor.map(lambda _: get_saxon_runtime(), range(8)))
+    assert all(r is runtime for r in runtimes)
+
+
+def test_transpiler_is_compiled_once(lazy_shared_datadir, monkeypatch):
+    "The transpiler must only be compiled once per runtime."
+    monkeypatch.setattr(saxonruntime, "_runtime", None)
+    runtime = get_saxon_runtime()
+    schema = (lazy_shared_datadir / "schemas" / "simple_xslt3.sch").read_text()
+    xslt = runtime.transpile_schematron(schema)
+    transpiler = runtime._transpiler  # pylint: disable=protected-access
+    assert transpiler is not None
+    assert "stylesheet" in runtime.transpile_schematron(schema)
+    assert runtime._transpiler is transpiler  # pylint: disable=protected-access
+    assert isinstance(runtime.compile_stylesheet(xslt), saxonche.PyXsltExecutable)
+
+
+def test_validators_share_runtime(lazy_shared_datadir, tmp_path, monkeypatch):
+    "Schematron validators using saxon must not create their own processors."
+    monkeypatch.chdir(tmp_path)
+    get_saxon_runtime()
+    created = []
+    monkeypatch.setattr(
+        saxonruntime, "SaxonRuntime", lambda: created.append(1)
+    )
+    for schema in ("simple_xslt2.sch", "simple_xslt3.sch", "simple_xpath2.sch"):
+        schema_uri = (lazy_shared_datadir / "schemas" / schema).resolve().as_uri()
+        validator = SchematronValidator(schema_uri)
+        assert validator._creation_error is None  # pylint: disable=protected-access
+    assert not created
+
+
+def test_missing_saxon(monkeypatch):
+    "If saxonche is not installed, an ImportError is raised."
+    monkeypatch.setattr(saxonruntime, "_runtime", None)
+    monkeypatch.setitem(__import__("sys").modules, "saxonche", None)
+    with pytest.raises(ImportError):
+        get_saxon_runtime()
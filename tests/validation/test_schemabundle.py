@@ -0,0 +1,259 @@
+"""Tests for the schemabundle module."""
+
+import hashlib
+import json
+import os
+import time
+from unittest import mock
+
+import pytest
+import responses
+from lxml import etree as ET
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver
+from gamslib.validation.schemabundle import MANIFEST_FILE, SchemaBundler
+from gamslib.validation.xmlvalidator import XMLSchemaValidator
+
+# pylint: disable=c-extension-no-member
+
+MAIN_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           xmlns:x="urn:extra" elementFormDefault="qualified">
+    <xs:include schemaLocation="types/types.xsd"/>
+    <xs:import namespace="urn:extra" schemaLocation="extra.xsd"/>
+    <xs:element name="products">
+        <xs:complexType>
+            <xs:sequence>
+                <xs:element name="product" type="productType" maxOccurs="unbounded"/>
+                <xs:element ref="x:note" minOccurs="0"/>
+            </xs:sequence>
+        </xs:complexType>
+    </xs:element>
+</xs:schema>
+"""
+
+TYPES_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" elementFormDefault="qualified">
+    <xs:include schemaLocation="../common.xsd"/>
+    <xs:complexType name="productType">
+        <xs:sequence>
+            <xs:element name="name" type="xs:string"/>
+            <xs:element name="price" type="priceType"/>
+        </xs:sequence>
+    </xs:complexType>
+</xs:schema>
+"""
+
+COMMON_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+    <xs:simpleType name="priceType">
+        <xs:restriction base="xs:decimal"/>
+    </xs:simpleType>
+</xs:schema>
+"""
+
+EXTRA_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:extra">
+    <xs:element name="note" type="xs:string"/>
+</xs:schema>
+"""
+
+
+@pytest.fixture(name="schema_uri")
+def create_schema_files(tmp_path):
+    "Create a schema with includes and imports and return the URI of the main schema."
+    schema_dir = tmp_path / "schemas"
+    (schema_dir / "types").mkdir(parents=True)
+    (schema_dir / "main.xsd").write_text(MAIN_XSD, encoding="utf-8")
+    (schema_dir / "types" / "types.xsd").write_text(TYPES_XSD, encoding="utf-8")
+    (schema_dir / "common.xsd").write_text(COMMON_XSD, encoding="utf-8")
+    (schema_dir / "extra.xsd").write_text(EXTRA_XSD, encoding="utf-8")
+    return (schema_dir / "main.xsd").as_uri()
+
+
+@pytest.fixture(name="bundler")
+def create_bundler(tmp_path):
+    "Return a SchemaBundler using a cache dir in tmp_path."
+    resolver = CombinedCatalogResolver([], (tmp_path / "cache").as_posix())
+    return SchemaBundler(resolver)
+
+
+def test_init(tmp_path):
+    "The bundle dir defaults to a subdir of the cache dir and requires a cache dir."
+    resolver = CombinedCatalogResolver([], (tmp_path / "cache").as_posix())
+    assert SchemaBundler(resolver).bundle_dir == tmp_path / "cache" / "bundles"
+    assert SchemaBundler(resolver, tmp_path / "b").bundle_dir == tmp_path / "b"
+    with pytest.raises(ValueError):
+        SchemaBundler(CombinedCatalogResolver([], cache_dir=None))
+
+
+def test_build(bundler, schema_uri):
+    "All included and imported schemas must be bundled and rewritten."
+    main_path = bundler.get_bundle(schema_uri)
+    bundle_path = bundler.get_bundle_path(schema_uri)
+    assert main_path.parent == bundle_path
+    assert main_path.name == "000_main.xsd"
+
+    manifest = json.loads((bundle_path / MANIFEST_FILE).read_text(encoding="utf-8"))
+    assert manifest["schema_uri"] == schema_uri
+    assert [source["file"] for source in manifest["sources"]] == [
+        "000_main.xsd",
+        "001_types.xsd",
+        "002_extra.xsd",
+        "003_common.xsd",
+    ]
+    assert [source["sha256"] for source in manifest["sources"]] == [
+        hashlib.sha256(bundler.resolver.get_content(source["uri"])).hexdigest()
+        for source in manifest["sources"]
+    ]
+
+    # all schemaLocations must point to bundled files
+    for source in manifest["sources"]:
+        root = ET.parse(bundle_path / source["file"]).getroot()
+        for element in root.iter("{http://www.w3.org/2001/XMLSchema}*"):
+            location = element.get("schemaLocation")
+            if location is not None:
+                assert (bundle_path / location).is_file()
+
+    # the bundle must be usable without the original files
+    schema = ET.XMLSchema(ET.parse(main_path))
+    doc = ET.fromstring(
+        "<products><product><name>a</name><price>1</price></product></products>"
+    )
+    assert schema.validate(doc)
+
+
+def test_bundle_is_reused(bundler, schema_uri, monkeypatch):
+    "An up to date bundle must not be rebuilt."
+    bundler.get_bundle(schema_uri)
+
+    def fail(*_args):  # pragma: no cover
+        raise AssertionError("Bundle should not be rebuilt")
+
+    monkeypatch.setattr(bundler, "build", fail)
+    assert bundler.get_bundle(schema_uri).is_file()
+
+
+def test_bundle_is_rebuilt_on_change(bundler, schema_uri, tmp_path):
+    "If a source changes, the bundle must be rebuilt."
+    bundler.get_bundle(schema_uri)
+    manifest = bundler.read_manifest(schema_uri)
+    assert bundler.is_up_to_date(manifest)
+
+    common_xsd = tmp_path / "schemas" / "common.xsd"
+    common_xsd.write_text(COMMON_XSD.replace("xs:decimal", "xs:integer"))
+    # the size is unchanged: make sure the mtime differs on coarse file systems, too
+    mtime_ns = common_xsd.stat().st_mtime_ns + 5_000_000_000
+    os.utime(common_xsd, ns=(mtime_ns, mtime_ns))
+    assert not bundler.is_up_to_date(manifest)
+
+    main_path = bundler.get_bundle(schema_uri)
+    assert "xs:integer" in (main_path.parent / "003_common.xsd").read_text()
+    assert bundler.is_up_to_date(bundler.read_manifest(schema_uri))
+
+
+def test_unchanged_sources_are_not_read(bundler, schema_uri, monkeypatch):
+    "Sources with an unchanged state are neither read nor hashed again."
+    bundler.get_bundle(schema_uri)
+    manifest = bundler.read_manifest(schema_uri)
+    assert all(source["state"]["size"] > 0 for source in manifest["sources"])
+    monkeypatch.setattr(
+        bundler.resolver, "get_content", mock.Mock(side_effect=AssertionError("read"))
+    )
+    assert bundler.is_up_to_date(manifest)
+
+
+def test_touched_source_updates_manifest(bundler, schema_uri, tmp_path):
+    "A touched but unchanged source is hashed once, then its new state is stored."
+    bundler.get_bundle(schema_uri)
+    common_xsd = tmp_path / "schemas" / "common.xsd"
+    mtime_ns = common_xsd.stat().st_mtime_ns + 5_000_000_000
+    os.utime(common_xsd, ns=(mtime_ns, mtime_ns))
+
+    with mock.patch.object(
+        bundler.resolver, "get_content", wraps=bundler.resolver.get_content
+    ) as get_content:
+        assert bundler.is_up_to_date(bundler.read_manifest(schema_uri))
+        assert get_content.call_args_list == [mock.call(common_xsd.as_uri())]
+        get_content.reset_mock()
+        manifest = bundler.read_manifest(schema_uri)
+        assert manifest["sources"][3]["state"]["mtime_ns"] == mtime_ns
+        assert bundler.is_up_to_date(manifest)
+        get_content.assert_not_called()
+
+
+@responses.activate
+def test_remote_source_state(tmp_path):
+    "Remote sources are checked by the ETag and fetch time of the cached copy."
+    url = "https://schemas.example.com/common.xsd"
+    responses.get(url, body=COMMON_XSD, headers={"ETag": '"v1"'})
+    resolver = CombinedCatalogResolver(
+        ["schemas.example.com"], (tmp_path / "cache").as_posix(), cache_ttl=60
+    )
+    bundler = SchemaBundler(resolver)
+    bundler.get_bundle(url)
+    manifest = bundler.read_manifest(url)
+    assert manifest["sources"][0]["state"]["etag"] == '"v1"'
+    assert bundler.is_up_to_date(manifest)
+    assert len(responses.calls) == 1
+
+    # an expired cached copy is revalidated, the new fetch time is stored
+    now = time.time()
+    with mock.patch.object(time, "time", return_value=now + 61):
+        assert bundler.is_up_to_date(bundler.read_manifest(url))
+    assert [call.request.url for call in responses.calls] == [url, url]
+    assert bundler.read_manifest(url)["sources"][0]["state"]["fetched"] == now + 61
+
+
+def test_read_manifest_without_bundle(bundler, schema_uri):
+    "read_manifest returns None if no bundle exists."
+    assert bundler.read_manifest(schema_uri) is None
+
+
+def test_missing_include(bundler, schema_uri, tmp_path):
+    "If a referenced schema cannot be loaded, bundling fails."
+    (tmp_path / "schemas" / "extra.xsd").unlink()
+    with pytest.raises(FileNotFoundError):
+        bundler.get_bundle(schema_uri)
+
+
+def test_replace_bundle(bundler, schema_uri):
+    "A rebuilt bundle replaces the old one, no old or temporary directories are left."
+    bundle_path = bundler.get_bundle(schema_uri).parent
+    (bundle_path / "stale.xsd").write_text(COMMON_XSD, encoding="utf-8")
+    bundler.build(schema_uri)
+    assert not (bundle_path / "stale.xsd").exists()
+    assert bundler.is_up_to_date(bundler.read_manifest(schema_uri))
+    assert list(bundler.bundle_dir.iterdir()) == [bundle_path]
+
+
+@responses.activate
+def test_xmlschemavalidator_uses_bundle(tmp_path, monkeypatch):
+    "The XMLSchemaValidator compiles a remote schema from a bundle in the cache dir."
+    monkeypatch.setenv("GAMSLIB_SAFE_XML_HOSTS", "schemas.example.com")
+    url = "https://schemas.example.com/main.xsd"
+    responses.get(url, body=MAIN_XSD)
+    responses.get("https://schemas.example.com/types/types.xsd", body=TYPES_XSD)
+    responses.get("https://schemas.example.com/common.xsd", body=COMMON_XSD)
+    responses.get("https://schemas.example.com/extra.xsd", body=EXTRA_XSD)
+    validator = XMLSchemaValidator(url)
+    assert validator._creation_error is None  # pylint: disable=protected-access
+    assert SchemaBundler(validator.resolver).read_manifest(url) is not None
+    assert (tmp_path / ".schema_cache" / "bundles").is_dir()
+
+    tree = ET.ElementTree(
+        ET.fromstring(
+            "<products><product><name>a</name><price>x</price></product></products>"
+        )
+    )
+    result = validator.validate(tree)
+    assert not result.is_valid
+    assert len(result.errors) == 1
+
+
+def test_local_schema_is_not_bundled(schema_uri, tmp_path):
+    "Local schemas are compiled from their files, no bundle is written."
+    validator = XMLSchemaValidator(schema_uri)
+    assert validator._creation_error is None  # pylint: disable=protected-access
+    assert SchemaBundler(validator.resolver).read_manifest(schema_uri) is None
+    assert not (tmp_path / ".schema_cache" / "bundles").exists()
@@ -0,0 +1,179 @@
+"Tests for the schemacache module."
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from gamslib.validation import schemacache
+from gamslib.validation.schemacache import CacheStats, SchemaCache, get_cache_size
+
+ENTRY_SIZE = 100
+
+
+@pytest.fixture(name="fixed_size")
+def fixed_size_fixture(monkeypatch):
+    "Make each cache entry without a size estimate ENTRY_SIZE bytes big."
+    monkeypatch.setattr(schemacache, "DEFAULT_ENTRY_SIZE", ENTRY_SIZE)
+
+
+class SizedValue:  # pylint: disable=too-few-public-methods
+    "A cache value with a size estimate."
+
+    def __init__(self, cache_size: int):
+        self.cache_size = cache_size
+
+
+def test_get_hit_and_miss(fixed_size):  # pylint: disable=unused-argument
+    "Values are created once and counted as hits afterwards."
+    cache = SchemaCache()
+    factory = mock.Mock(return_value="validator")
+    assert cache.get(("xsd", "uri"), factory) == "validator"
+    assert cache.get(("xsd", "uri"), factory) == "validator"
+    factory.assert_called_once()
+    assert cache.stats() == CacheStats(
+        hits=1, misses=1, evictions=0, entries=1, size=ENTRY_SIZE, max_size=cache.max_size
+    )
+    assert cache.stats().hit_rate == pytest.approx(0.5)
+
+
+def test_eviction_by_size(fixed_size):  # pylint: disable=unused-argument
+    "Least recently used entries are evicted if the budget is exceeded."
+    cache = SchemaCache(max_size=ENTRY_SIZE * 5 // 2)
+    cache.get(("xsd", "a"), lambda: "a")
+    cache.get(("xsd", "b"), lambda: "b")
+    cache.get(("xsd", "a"), lambda: "a")  # a is now more recently used than b
+    cache.get(("xsd", "c"), lambda: "c")
+    assert ("xsd", "a") in cache
+    assert ("xsd", "b") not in cache
+    assert ("xsd", "c") in cache
+    stats = cache.stats()
+    assert stats.evictions == 1
+    assert stats.size == 2 * ENTRY_SIZE
+
+
+def test_entry_larger_than_budget(fixed_size):  # pylint: disable=unused-argument
+    "An entry larger than the budget is kept (as the only entry)."
+    cache = SchemaCache(max_size=ENTRY_SIZE // 2)
+    cache.get(("xsd", "a"), lambda: "a")
+    cache.get(("xsd", "b"), lambda: "b")
+    assert len(cache) == 1
+    assert ("xsd", "b") in cache
+
+
+def test_unlimited(fixed_size):  # pylint: disable=unused-argument
+    "A max_size of 0 means no limit."
+    cache = SchemaCache(max_size=0)
+    names = "abcdefgh"
+    for name in names:
+        cache.get(("xsd", name), lambda: name)
+    assert len(cache) == len(names)
+
+
+def test_size_estimate():
+    "The size of an entry is the cache_size of the value, it is updated on hits."
+    cache = SchemaCache(max_size=4 * ENTRY_SIZE)
+    first, second = SizedValue(ENTRY_SIZE), SizedValue(ENTRY_SIZE)
+    cache.get(("xsd", "a"), lambda: first)
+    cache.get(("xsd", "b"), lambda: second)
+    assert cache.stats().size == first.cache_size + second.cache_size
+
+    # e.g. a second copy of the compiled schema was added to the pool
+    second.cache_size *= 2
+    assert cache.get(("xsd", "b"), lambda: second) is second
+    assert cache.stats().size == first.cache_size + second.cache_size
+    assert not cache.stats().evictions
+
+    # the hit entry is kept, the least recently used one is evicted
+    second.cache_size *= 2
+    cache.get(("xsd", "b"), lambda: second)
+    assert ("xsd", "a") not in cache
+    assert cache.stats().size == second.cache_size
+
+
+def test_invalidate_and_clear(fixed_size):  # pylint: disable=unused-argument
+    "invalidate() removes all entries of an uri, clear() removes everything."
+    cache = SchemaCache()
+    keys = [("xsd", "a"), ("dtd", "a")]
+    for key in keys:
+        cache.get(key, lambda: "a")
+    cache.get(("xsd", "b"), lambda: "b")
+    assert cache.invalidate("a") == len(keys)
+    assert cache.stats().size == ENTRY_SIZE
+    assert len(cache) == 1
+    cache.clear()
+    assert cache.stats() == CacheStats(max_size=cache.max_size)
+
+
+def test_remove(fixed_size):  # pylint: disable=unused-argument
+    "remove() removes a single entry."
+    cache = SchemaCache()
+    cache.get(("xsd", "a"), lambda: "a")
+    cache.get(("dtd", "a"), lambda: "a")
+    assert cache.remove(("xsd", "a"))
+    assert not cache.remove(("xsd", "a"))
+    assert ("dtd", "a") in cache
+    assert cache.stats().size == ENTRY_SIZE
+
+
+def test_concurrent_get_creates_once(fixed_size):  # pylint: disable=unused-argument
+    "If several threads request the same value, it is created only once."
+    cache = SchemaCache()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get(("xsd", "a"), factory)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    assert cache.stats().misses == 1
+
+
+def test_factory_error_is_not_cached(fixed_size):  # pylint: disable=unused-argument
+    "If the factory raises, nothing is cached and the next get tries again."
+    cache = SchemaCache()
+    with pytest.raises(RuntimeError):
+        cache.get(("xsd", "a"), mock.Mock(side_effect=RuntimeError("boom")))
+    assert cache.get(("xsd", "a"), lambda: "a") == "a"
+
+
+def test_prewarm(fixed_size):  # pylint: disable=unused-argument
+    "prewarm() creates values in a background thread and ignores errors."
+    cache = SchemaCache()
+    thread = cache.prewarm(
+        [
+            (("xsd", "a"), lambda: "a"),
+            (("xsd", "b"), mock.Mock(side_effect=RuntimeError("boom"))),
+        ]
+    )
+    thread.join()
+    assert ("xsd", "a") in cache
+    assert ("xsd", "b") not in cache
+
+
+def test_get_cache_size(monkeypatch):
+    "The byte budget is taken from the configuration or the environment."
+    monkeypatch.setenv("GAMSLIB_SCHEMA_CACHE_SIZE", str(ENTRY_SIZE))
+    with mock.patch(
+        "gamslib.validation.schemacache.get_configuration",
+        side_effect=schemacache.MissingConfigurationException(),
+    ):
+        assert get_cache_size() == ENTRY_SIZE
+    config = mock.Mock()
+    config.general.schema_cache_size = 2 * ENTRY_SIZE
+    with mock.patch(
+        "gamslib.validation.schemacache.get_configuration", return_value=config
+    ):
+        assert get_cache_size() == 2 * ENTRY_SIZE
@@ -0,0 +1,178 @@
+"""Tests for the schemadeps module and the invalidation of changed schemas."""
+
+# pylint: disable=c-extension-no-member
+import os
+
+import pytest
+from lxml import etree as ET
+
+from gamslib.validation.combined_resolver import CombinedCatalogResolver
+from gamslib.validation.compositeschema import make_composite_uri
+from gamslib.validation.schemadeps import DependencyGraph, collect_sources, local_path
+from gamslib.validation.schemainfo import SchemaType
+from gamslib.validation.xmlvalidator import SchemaProvider
+
+MAIN_RNG = """<grammar xmlns="http://relaxng.org/ns/structure/1.0"
+    datatypeLibrary="http://www.w3.org/2001/XMLSchema-datatypes">
+  <include href="types.rng"/>
+  <start><element name="count"><ref name="count.content"/></element></start>
+</grammar>
+"""
+
+TYPES_RNG = """<grammar xmlns="http://relaxng.org/ns/structure/1.0"
+    datatypeLibrary="http://www.w3.org/2001/XMLSchema-datatypes">
+  <define name="count.content"><data type="{}"/></define>
+</grammar>
+"""
+
+SCHEMA_XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="http://example.org/{0}">
+  <xs:element name="doc" type="xs:{1}"/>
+</xs:schema>
+"""
+
+MAIN_SCH = """<schema xmlns="http://purl.oclc.org/dsdl/schematron">
+  <pattern><include href="rule.sch"/></pattern>
+</schema>
+"""
+
+RULE_SCH = """<rule xmlns="http://purl.oclc.org/dsdl/schematron" context="count">
+  <assert test="{}">count is wrong</assert>
+</rule>
+"""
+
+
+def edit(path, content):
+    "Write content to path and make sure the modification time changes."
+    stat = path.stat()
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture(name="project")
+def create_project(tmp_path):
+    "Create a RelaxNG schema with a local include."
+    (tmp_path / "main.rng").write_text(MAIN_RNG, encoding="utf-8")
+    (tmp_path / "types.rng").write_text(TYPES_RNG.format("integer"), encoding="utf-8")
+    return tmp_path
+
+
+def is_valid(validator, xml: str) -> bool:
+    "Return True if xml is valid according to validator."
+    return validator.validate(ET.ElementTree(ET.fromstring(xml))).is_valid
+
+
+def test_local_path(tmp_path):
+    "Only file URIs and plain paths are local."
+    assert local_path((tmp_path / "a.xsd").as_uri()) == tmp_path / "a.xsd"
+    assert local_path("a.xsd").name == "a.xsd"
+    assert local_path("http://example.org/a.xsd") is None
+
+
+def test_collect_sources(project):
+    "All referenced documents are collected, remote ones only if wanted."
+    resolver = CombinedCatalogResolver([], cache_dir=None)
+    main_uri = (project / "main.rng").as_uri()
+    sources = collect_sources(main_uri, SchemaType.RNG, resolver, local_only=True)
+    assert list(sources) == [main_uri, (project / "types.rng").as_uri()]
+    (project / "main.rng").write_text(
+        MAIN_RNG.replace(
+            '<include href="types.rng"/>',
+            '<include href="types.rng"/><include href="http://example.org/remote.rng"/>',
+        ),
+        encoding="utf-8",
+    )
+    sources = collect_sources(main_uri, SchemaType.RNG, resolver, local_only=True)
+    assert "http://example.org/remote.rng" not in sources
+    sources = collect_sources(main_uri, SchemaType.RNG, resolver)
+    assert sources["http://example.org/remote.rng"] is None
+
+
+def test_dependency_graph(project):
+    "Only files with changed content count as changed."
+    resolver = CombinedCatalogResolver([], cache_dir=None)
+    main_uri = (project / "main.rng").as_uri()
+    graph = DependencyGraph()
+    graph.track("a", collect_sources(main_uri, SchemaType.RNG, resolver, local_only=True))
+    graph.track("b", {(project / "types.rng").as_uri(): b"other"})
+    types_path = (project / "types.rng").absolute()
+    assert graph.dependencies("a") == {project / "main.rng", types_path}
+    assert graph.dependents(types_path) == {"a", "b"}
+    assert not graph.changed("a")
+
+    # touched only (for b, the content differs from the tracked content)
+    edit(project / "types.rng", TYPES_RNG.format("integer"))
+    assert not graph.changed("a")
+    assert graph.changed("b") == {types_path}
+    edit(project / "types.rng", TYPES_RNG.format("string"))
+    assert graph.changed("a") == {types_path}
+    (project / "main.rng").unlink()
+    assert graph.changed("a") == {types_path, project / "main.rng"}
+
+    graph.forget("a")
+    assert graph.dependents(types_path) == {"b"}
+    assert graph.dependents(project / "main.rng") == set()
+
+
+def test_changed_include_is_used(project):
+    "A changed included file is used without restart or clearing the cache."
+    main_uri = (project / "main.rng").as_uri()
+    validator = SchemaProvider.get_relaxng(main_uri)
+    assert not is_valid(validator, "<count>three</count>")
+    assert SchemaProvider.get_relaxng(main_uri) is validator
+    assert (project / "types.rng").absolute() in SchemaProvider.get_dependencies(
+        main_uri, SchemaType.RNG
+    )
+
+    edit(project / "types.rng", TYPES_RNG.format("string"))
+    new_validator = SchemaProvider.get_relaxng(main_uri)
+    assert new_validator is not validator
+    assert is_valid(new_validator, "<count>three</count>")
+
+
+def test_only_dependents_are_invalidated(tmp_path):
+    "Only compiled schemas which depend on the changed file are removed."
+    for name, type_name in (("a", "integer"), ("b", "integer")):
+        (tmp_path / f"{name}.xsd").write_text(
+            SCHEMA_XSD.format(name, type_name), encoding="utf-8"
+        )
+    uri_a = (tmp_path / "a.xsd").as_uri()
+    uri_b = (tmp_path / "b.xsd").as_uri()
+    composite_uri = make_composite_uri(
+        [("http://example.org/a", uri_a), ("http://example.org/b", uri_b)]
+    )
+    validator_a = SchemaProvider.get_xsd(uri_a)
+    validator_b = SchemaProvider.get_xsd(uri_b)
+    composite = SchemaProvider.get_xsd(composite_uri)
+    assert not is_valid(composite, '<doc xmlns="http://example.org/b">x</doc>')
+
+    edit(tmp_path / "b.xsd", SCHEMA_XSD.format("b", "string"))
+    assert SchemaProvider.get_xsd(uri_a) is validator_a
+    assert SchemaProvider.get_xsd(uri_b) is not validator_b
+    new_composite = SchemaProvider.get_xsd(composite_uri)
+    assert new_composite is not composite
+    assert is_valid(new_composite, '<doc xmlns="http://example.org/b">x</doc>')
+
+
+def test_missing_schema_is_compiled_when_created(tmp_path):
+    "A schema which did not exist is compiled as soon as it exists."
+    schema_path = tmp_path / "late.xsd"
+    schema_uri = schema_path.as_uri()
+    assert not is_valid(SchemaProvider.get_xsd(schema_uri), "<doc>1</doc>")
+    schema_path.write_text(
+        '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+        '<xs:element name="doc" type="xs:integer"/></xs:schema>',
+        encoding="utf-8",
+    )
+    assert is_valid(SchemaProvider.get_xsd(schema_uri), "<doc>1</doc>")
+
+
+def test_changed_schematron_include(tmp_path, monkeypatch):
+    "The cached stylesheet of a Schematron schema is not used if an include has changed."
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "main.sch").write_text(MAIN_SCH, encoding="utf-8")
+    (tmp_path / "rule.sch").write_text(RULE_SCH.format(". = 1"), encoding="utf-8")
+    schema_uri = (tmp_path / "main.sch").as_uri()
+    assert not is_valid(SchemaProvider.get_schematron(schema_uri), "<count>2</count>")
+    edit(tmp_path / "rule.sch", RULE_SCH.format(". = 2"))
+    assert is_valid(SchemaProvider.get_schematron(schema_uri), "<count>2</count>")
@@ -0,0 +1,81 @@
+"""Tests for the schematroncache module."""
+
+import lxml.isoschematron
+import pytest
+from lxml import etree as ET
+
+from gamslib.validation.saxonruntime import SaxonRuntime
+from gamslib.validation.schematroncache import (
+    CachedLxmlSchematron,
+    SchematronCache,
+    lxml_transpiler_version,
+    schxslt_transpiler_version,
+)
+from gamslib.validation.xmlvalidator import SchematronValidator
+
+# pylint: disable=c-extension-no-member
+
+
+def test_make_key():
+    "The key must depend on content, transpiler version and binding."
+    key = SchematronCache.make_key(b"<schema/>", "v1", "xslt")
+    assert key == SchematronCache.make_key(b"<schema/>", "v1", "xslt")
+    assert key != SchematronCache.make_key(b"<schema />", "v1", "xslt")
+    assert key != SchematronCache.make_key(b"<schema/>", "v2", "xslt")
+    assert key != SchematronCache.make_key(b"<schema/>", "v1", "xslt2")
+
+
+def test_transpiler_versions():
+    "Transpiler versions are derived from transpile.xsl and lxml."
+    assert schxslt_transpiler_version().startswith("schxslt2-")
+    assert lxml_transpiler_version() == f"lxml-{ET.__version__}"
+
+
+def test_get_and_put(tmp_path):
+    "Test storing and loading stylesheets."
+    cache = SchematronCache(tmp_path / "cache")
+    assert cache.get("foo") is None
+    cache.put("foo", b"<xsl:stylesheet/>")
+    assert cache.get("foo") == b"<xsl:stylesheet/>"
+    assert cache.get_path("foo") == tmp_path / "cache" / "foo.xsl"
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == ["foo.xsl"]
+
+
+@pytest.mark.parametrize("schema_file", ["simple.sch", "simple_xslt2.sch"])
+def test_validator_uses_cache(schema_file, lazy_shared_datadir, tmp_path, monkeypatch):
+    "A second validator for the same schema must be created from the cache."
+    monkeypatch.chdir(tmp_path)
+    schema_uri = (lazy_shared_datadir / "schemas" / schema_file).resolve().as_uri()
+    tree = ET.parse(lazy_shared_datadir / "simple.xml")
+
+    first = SchematronValidator(schema_uri)
+    assert first._creation_error is None  # pylint: disable=protected-access
+    assert len(list((tmp_path / ".schema_cache" / "schematron").iterdir())) == 1
+
+    # make sure no transpiling happens for the second validator
+    def fail(*_args, **_kwargs):  # pragma: no cover
+        raise AssertionError("Schema should not be transpiled again.")
+
+    monkeypatch.setattr(lxml.isoschematron.Schematron, "__init__", fail)
+    monkeypatch.setattr(SaxonRuntime, "transpile_schematron", fail)
+    second = SchematronValidator(schema_uri)
+    assert second._creation_error is None  # pylint: disable=protected-access
+    assert second.validate(tree).is_valid == first.validate(tree).is_valid
+
+
+def test_cached_lxml_schematron(lazy_shared_datadir):
+    "A CachedLxmlSchematron must behave like the original validator."
+    schematron = lxml.isoschematron.Schematron(
+        ET.parse(lazy_shared_datadir / "schemas" / "simple.sch"),
+        store_xslt=True,
+        store_report=True,
+    )
+    cached = CachedLxmlSchematron(schematron.validator_xslt)
+    invalid_tree = ET.parse(lazy_shared_datadir / "simple_invalid.xml")
+    assert cached.validate(invalid_tree) == schematron.validate(invalid_tree)
+    assert ET.tostring(cached.validation_report) == ET.tostring(
+        schematron.validation_report
+    )
+    valid_tree = ET.parse(lazy_shared_datadir / "simple.xml")
+    assert cached.validate(valid_tree) == schematron.validate(valid_tree)
+    assert cached.validator_xslt is schematron.validator_xslt
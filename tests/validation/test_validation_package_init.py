@@ -1,13 +1,18 @@
 """Tests for the validation package (__init__.py)."""
+import io
+from concurrent.futures import Future
 from pathlib import Path
 from unittest import mock
 
 import pytest
 
+from gamslib import validation
 from gamslib.validation import (
     jsonvalidator,
     pdfvalidator,
+    rdfvalidator,
     validate,
+    validate_many,
     xmlvalidator,
 )
 from gamslib.validation.alwaysvalidvalidator import AlwaysValidValidator
@@ -20,7 +25,8 @@ from gamslib.validation.validator import ValidatorFactory
         ("application/json", jsonvalidator.JSONValidator),
         ("application/pdf", pdfvalidator.PDFValidator),
         ("application/ld+json", jsonvalidator.JSONValidator),
-        ("application/rdf+xml", xmlvalidator.XMLValidator),
+        ("application/schema+json", jsonvalidator.JSONValidator),
+        ("application/rdf+xml", rdfvalidator.RDFValidator),
         ("application/tei+xml", xmlvalidator.XMLValidator),
         ("application/xml", xmlvalidator.XMLValidator),
         ("text/xml", xmlvalidator.XMLValidator),
@@ -133,3 +139,129 @@ def test_validate_with_explicit_and_referenced_schema_location(lazy_shared_datad
     assert len(subresults) == 2
     assert any("DTD Validator" in subresult.validator_name for subresult in subresults)
     assert any("XMLSchema Validator" in subresult.validator_name for subresult in subresults)
+
+
+def test_validate_many_sequential(lazy_shared_datadir):
+    "validate_many with one worker validates all files in the current process."
+    files = [
+        lazy_shared_datadir / "simple.xml",
+        lazy_shared_datadir / "simple_invalid.xml",
+        lazy_shared_datadir / "minimal_wellformed.xml",
+    ]
+    results = {result.file_path: result for result in validate_many(files, workers=1)}
+    assert set(results) == set(files)
+    assert results[lazy_shared_datadir / "simple.xml"].is_valid
+    assert results[lazy_shared_datadir / "minimal_wellformed.xml"].is_valid
+
+
+def test_validate_many_matches_validate(lazy_shared_datadir):
+    "validate_many on a process pool returns the same results as validate."
+    files = [
+        lazy_shared_datadir / "simple_with_xsd_in_root.xml",
+        lazy_shared_datadir / "simple_with_external_dtd.xml",
+        lazy_shared_datadir / "minimal_wellformed.xml",
+        lazy_shared_datadir / "minimal_not_wellformed.xml",
+    ]
+    results = {result.file_path: result for result in validate_many(files, workers=2)}
+    assert set(results) == set(files)
+    assert not results[lazy_shared_datadir / "minimal_not_wellformed.xml"].is_valid
+    for file_path in files[:3]:
+        expected = validate(file_path)
+        assert results[file_path].is_valid == expected.is_valid
+        assert results[file_path].get_errors() == expected.get_errors()
+
+
+class FakeExecutor:
+    "Run submitted tasks immediately and count them."
+
+    def __init__(self, **_kwargs):
+        self.submitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        return False
+
+    def submit(self, function, *args):
+        "Run function and return a finished future."
+        self.submitted += 1
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+
+def test_validate_many_limits_pending_chunks(tmp_path, monkeypatch):
+    "Chunks are submitted as results are consumed, not all up front."
+    executor = FakeExecutor()
+    monkeypatch.setattr(validation, "ProcessPoolExecutor", lambda **_kwargs: executor)
+    monkeypatch.setattr(validation, "BATCH_CHUNK_SIZE", 1)
+    files = []
+    for index in range(20):
+        files.append(tmp_path / f"doc{index:02d}.xml")
+        files[-1].write_text("<doc/>", encoding="utf-8")
+    workers = 2
+    results = validate_many(files, workers=workers)
+    first = next(results)
+    assert executor.submitted <= workers * validation.MAX_PENDING_CHUNKS_PER_WORKER + 1
+    assert sorted([first.file_path, *(result.file_path for result in results)]) == files
+    assert executor.submitted == len(files)
+
+
+def test_validate_many_uses_one_context_per_file(lazy_shared_datadir, monkeypatch):
+    "Detection and validation of a file share one ValidationContext (one parse)."
+    contexts = []
+    original = validation.ValidationContext
+
+    def make_context(*args, **kwargs):
+        contexts.append(original(*args, **kwargs))
+        return contexts[-1]
+
+    monkeypatch.setattr(validation, "ValidationContext", make_context)
+    files = [
+        lazy_shared_datadir / "simple_with_external_dtd.xml",
+        lazy_shared_datadir / "minimal_wellformed.xml",
+        lazy_shared_datadir / "simple.xml",
+    ]
+    results = list(validate_many(files, workers=1))
+    assert [result.file_path for result in results] == files
+    assert [context.file_path for context in contexts] == files
+    assert all(context.is_parsed for context in contexts)
+
+
+def test_validate_many_detection_error(lazy_shared_datadir):
+    "If a file cannot be detected, an invalid result with the error is yielded."
+    files = [lazy_shared_datadir / "simple.xml", Path("foo/bar.xml")]
+    results = list(validate_many(files, workers=1))
+    assert sorted(result.file_path for result in results) == sorted(files)
+    error_result = next(r for r in results if r.file_path == Path("foo/bar.xml"))
+    assert not error_result.is_valid
+    assert "FileNotFoundError" in error_result.get_errors()[0]
+
+
+@pytest.mark.parametrize(
+    "name", ["simple_with_external_dtd.xml", "simple_with_xsd_in_root.xml"]
+)
+def test_validate_bytes(shared_datadir, name):
+    "In-memory documents are validated like files, relative references use base_url."
+    file_path = shared_datadir / name
+    expected = validate(file_path)
+    result = validation.validate_bytes(file_path.read_bytes(), base_url=file_path.as_uri())
+    assert result.is_valid and expected.is_valid
+    assert result.file_path == file_path
+    assert [sub.schema_uri for sub in result.get_subresults()] == [
+        sub.schema_uri for sub in expected.get_subresults()
+    ]
+
+
+def test_validate_stream(shared_datadir):
+    "The document of a stream is validated; base_url does not need to exist."
+    base_url = shared_datadir / "ingest.xml"
+    data = (shared_datadir / "simple_with_xsd_in_root.xml").read_bytes()
+    result = validation.validate_stream(
+        io.BytesIO(data.replace(b"<price>10.99", b"<price>ten")), base_url=base_url
+    )
+    assert not result.is_valid
+    assert result.file_path == base_url
+    assert "'ten' is not a valid value" in result.get_errors()[0]
+    assert not base_url.exists()
@@ -0,0 +1,179 @@
+"""Tests for the validationcontext module."""
+
+import io
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from lxml import etree as ET
+
+from gamslib.formatdetect import detect_format
+from gamslib.validation import validate
+from gamslib.validation.validationcontext import (
+    IN_MEMORY_NAME,
+    ValidationContext,
+    get_streaming_threshold,
+)
+from gamslib.validation.xmlvalidator import XMLValidator
+
+
+def test_format_info_is_detected_once(lazy_shared_datadir):
+    "The format is detected on first access only."
+    file_path = lazy_shared_datadir / "simple.xml"
+    with mock.patch(
+        "gamslib.formatdetect.detect_format", return_value="format"
+    ) as detect_format:
+        context = ValidationContext(file_path)
+        assert context.format_info == "format"
+        assert context.format_info == "format"
+    detect_format.assert_called_once_with(file_path)
+
+
+def test_format_info_given():
+    "A given format info is not detected again."
+    with mock.patch("gamslib.formatdetect.detect_format") as detect_format:
+        context = ValidationContext("foo.xml", format_info="format")
+        assert context.format_info == "format"
+    detect_format.assert_not_called()
+
+
+def test_tree_is_parsed_once(lazy_shared_datadir):
+    "The file is parsed on first access of tree only."
+    context = ValidationContext(lazy_shared_datadir / "simple.xml")
+    assert not context.is_parsed
+    tree = context.tree
+    assert context.is_parsed
+    assert context.tree is tree
+    assert tree.getroot().tag == "products"
+
+
+def test_tree_not_wellformed(lazy_shared_datadir):
+    "The parse error is raised on each access, but the file is parsed only once."
+    context = ValidationContext(lazy_shared_datadir / "minimal_not_wellformed.xml")
+    with mock.patch.object(ET, "parse", wraps=ET.parse) as parse:
+        with pytest.raises(ET.XMLSyntaxError):
+            _ = context.tree
+        with pytest.raises(ET.XMLSyntaxError):
+            _ = context.tree
+    assert parse.call_count == 1
+
+
+def test_validate_parses_file_once(shared_datadir):
+    "validate() parses the file once for schema extraction and all schema validators."
+    file_path = shared_datadir / "simple_with_external_dtd.xml"
+    schema_location = shared_datadir / "schemas" / "simple.xsd"
+    format_info = detect_format(file_path)
+    with mock.patch.object(ET, "parse", wraps=ET.parse) as parse:
+        result = validate(
+            file_path, schema_location=schema_location, format_info=format_info
+        )
+    assert result.is_valid
+    assert [sub.schema_uri for sub in result.get_subresults()] == [
+        schema_location.resolve().as_uri(),
+        (shared_datadir / "schemas" / "simple.dtd").as_uri(),
+    ]
+    file_parses = [call for call in parse.call_args_list if call.args[0] == file_path]
+    assert len(file_parses) == 1
+
+
+def test_xmlvalidator_validate_context(lazy_shared_datadir):
+    "XMLValidator uses the tree of the context."
+    context = ValidationContext(lazy_shared_datadir / "minimal_wellformed.xml")
+    _ = context.tree
+    with mock.patch.object(ET, "parse") as parse:
+        result = XMLValidator().validate_context(context, [])
+    assert result.is_valid
+    parse.assert_not_called()
+
+
+def test_header_tree(shared_datadir):
+    "The header tree contains the prolog and the root element."
+    context = ValidationContext(shared_datadir / "simple_with_rng_and_sch_in_pi.xml")
+    header = context.header_tree
+    assert header.getroot().tag == "products"
+    assert [pi.get("href") for pi in header.xpath("//processing-instruction('xml-model')")] == [
+        "schemas/simple.sch",
+        "./schemas/simple.rng",
+        "./schemas/simple2.rng",
+    ]
+    assert not context.is_parsed
+    # if the full tree is available, it is used
+    assert context.header_tree is header
+    tree = context.tree
+    assert context.header_tree is tree
+
+
+def test_header_tree_doctype(shared_datadir):
+    "The doctype is available in the header tree."
+    context = ValidationContext(shared_datadir / "simple_with_external_dtd.xml")
+    assert context.header_tree.docinfo.system_url == "schemas/simple.dtd"
+
+
+@pytest.mark.parametrize(
+    "threshold, expected", [("0", False), ("10", True), ("100000", False)]
+)
+def test_streaming_threshold(shared_datadir, monkeypatch, threshold, expected):
+    "Streaming mode is used for files larger than the threshold."
+    monkeypatch.setenv("GAMSLIB_STREAMING_VALIDATION_THRESHOLD", threshold)
+    assert get_streaming_threshold() == int(threshold)
+    assert ValidationContext(shared_datadir / "simple.xml").streaming is expected
+
+
+def test_streaming_threshold_from_config(shared_datadir, monkeypatch):
+    "The threshold is taken from the configuration."
+    monkeypatch.setenv("GAMSLIB_STREAMING_VALIDATION_THRESHOLD", "0")
+    threshold = 10
+    config = mock.Mock()
+    config.general.streaming_validation_threshold = threshold
+    with mock.patch(
+        "gamslib.validation.validationcontext.get_configuration", return_value=config
+    ):
+        assert get_streaming_threshold() == threshold
+        assert ValidationContext(shared_datadir / "simple.xml").streaming
+
+
+def test_streaming_forced(shared_datadir, monkeypatch):
+    "The streaming parameter overrides the threshold."
+    monkeypatch.setenv("GAMSLIB_STREAMING_VALIDATION_THRESHOLD", "10")
+    assert not ValidationContext(shared_datadir / "simple.xml", streaming=False).streaming
+
+
+def test_from_bytes(shared_datadir):
+    "In-memory documents are parsed with base_url as URL and are never read from disk."
+    base_url = shared_datadir / "ingest" / "doc.xml"
+    data = (shared_datadir / "simple_with_external_dtd.xml").read_bytes()
+    context = ValidationContext.from_bytes(data, base_url=base_url.as_uri())
+    assert context.in_memory
+    assert context.file_path == base_url
+    assert context.size == len(data)
+    assert context.format_info.mimetype == "application/xml"
+    assert Path(context.tree.docinfo.URL) == base_url
+    assert context.header_tree.docinfo.system_url == "schemas/simple.dtd"
+    with context.open() as f:
+        assert f.read() == data
+        assert f.name == str(base_url)
+    assert not base_url.exists()
+
+
+@pytest.mark.parametrize(
+    "data, mimetype",
+    [
+        (b"\xef\xbb\xbf\n <a/>", "application/xml"),
+        (b' {"a": 1}', "application/json"),
+        (b"[1]", "application/json"),
+        (b"%PDF-1.7", "application/octet-stream"),
+    ],
+)
+def test_guess_in_memory_format(data, mimetype):
+    "Without a format info, in-memory documents are recognized as XML or JSON."
+    assert ValidationContext.from_bytes(data).format_info.mimetype == mimetype
+
+
+def test_from_stream():
+    "Streams are read into memory, remote base URLs are not supported."
+    context = ValidationContext.from_stream(io.BytesIO(b"<a><b/></a>"), streaming=True)
+    assert context.file_path == Path(IN_MEMORY_NAME)
+    assert context.streaming
+    assert context.header_tree.getroot().tag == "a"
+    with pytest.raises(ValueError):
+        ValidationContext.from_bytes(b"<a/>", base_url="https://example.org/a.xml")
@@ -0,0 +1,227 @@
+"""Tests for the validationoptions module and error limits in the validators."""
+
+# pylint: disable=c-extension-no-member
+import json
+
+import pytest
+from lxml import etree as ET
+
+from gamslib.validation import validate
+from gamslib.validation.combined_resolver import CombinedCatalogResolver
+from gamslib.validation.jsonvalidator import JSONValidator
+from gamslib.validation.resultcache import ResultCache
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import (
+    DEFAULT_MAX_ERRORS,
+    ErrorCollector,
+    ValidationOptions,
+    collect_errors,
+    get_validation_options,
+    message_template,
+)
+from gamslib.validation.xmlvalidator import SchematronValidator, XMLValidator
+
+XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+    <xs:element name="products">
+        <xs:complexType>
+            <xs:sequence>
+                <xs:element name="product" type="xs:integer" maxOccurs="unbounded"/>
+            </xs:sequence>
+        </xs:complexType>
+    </xs:element>
+</xs:schema>
+"""
+
+RNG = """<?xml version="1.0" encoding="UTF-8"?>
+<element name="products" xmlns="http://relaxng.org/ns/structure/1.0">
+    <zeroOrMore><element name="item"><text/></element></zeroOrMore>
+</element>
+"""
+
+SVRL = """<svrl:schematron-output xmlns:svrl="http://purl.oclc.org/dsdl/svrl">
+  <svrl:failed-assert location="/products/product[1]" test="@id">
+    <svrl:text>Product 'a' has no id</svrl:text>
+  </svrl:failed-assert>
+  <svrl:failed-assert location="/products/product[2]" test="@id">
+    <svrl:text>Product 'b' has no id</svrl:text>
+  </svrl:failed-assert>
+  <svrl:failed-assert location="/products" test="count(product) &lt; 2">
+    <svrl:text>Too many products</svrl:text>
+  </svrl:failed-assert>
+</svrl:schematron-output>
+"""
+
+
+@pytest.fixture(name="project")
+def create_project(tmp_path):
+    "Create schemas and a document with 10 invalid product elements."
+    (tmp_path / "schema.xsd").write_text(XSD, encoding="utf-8")
+    (tmp_path / "schema.rng").write_text(RNG, encoding="utf-8")
+    products = "".join(f"<product>x{i}</product>" for i in range(10))
+    (tmp_path / "doc.xml").write_text(
+        f'<?xml version="1.0" encoding="UTF-8"?><products>{products}</products>',
+        encoding="utf-8",
+    )
+    return tmp_path
+
+
+def schemas(project) -> list[SchemaInfo]:
+    "Return SchemaInfo objects for the XSD and RNG schema in project."
+    return [
+        SchemaInfo((project / "schema.xsd").as_uri(), schema_type=SchemaType.XSD),
+        SchemaInfo((project / "schema.rng").as_uri(), schema_type=SchemaType.RNG),
+    ]
+
+
+def validate_doc(project, options, streaming=False):
+    "Validate doc.xml in project against both schemas."
+    context = ValidationContext(project / "doc.xml", streaming=streaming, options=options)
+    return XMLValidator().validate_context(context, schemas(project))
+
+
+def test_get_validation_options_defaults(monkeypatch, tmp_path):
+    "Without configuration, defaults or environment variables are used."
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("GAMSCFG_PROJECT_TOML", raising=False)
+    assert get_validation_options() == ValidationOptions()
+    assert get_validation_options().max_errors == DEFAULT_MAX_ERRORS
+
+    monkeypatch.setenv("GAMSLIB_VALIDATION_MAX_ERRORS", "3")
+    monkeypatch.setenv("GAMSLIB_VALIDATION_FAIL_FAST", "true")
+    monkeypatch.setenv("GAMSLIB_VALIDATION_AGGREGATE_ERRORS", "1")
+    monkeypatch.setenv("GAMSLIB_VALIDATION_MAX_LOCATIONS", "2")
+    assert get_validation_options() == ValidationOptions(3, True, True, 2)
+
+
+def test_context_options(tmp_path):
+    "The context returns the given options or the configured ones."
+    options = ValidationOptions(max_errors=1)
+    assert ValidationContext(tmp_path / "a.xml", options=options).options is options
+    assert isinstance(ValidationContext(tmp_path / "a.xml").options, ValidationOptions)
+
+
+def test_message_template():
+    "Quoted values and numbers are replaced."
+    assert message_template("Element 'a': 'x1' is not a valid value of 'xs:integer'.") == (
+        "Element '…': '…' is not a valid value of '…'."
+    )
+    assert message_template('Expected 12 items, got 3.5 at "foo"') == (
+        "Expected N items, got N at '…'"
+    )
+
+
+def test_error_collector_max_errors():
+    "Errors beyond max_errors are counted only."
+    errors = [f"error {i}" for i in range(5)]
+    assert collect_errors(errors, ValidationOptions(max_errors=2)) == [
+        "error 0",
+        "error 1",
+        "3 more errors omitted (max_errors=2)",
+    ]
+    assert collect_errors(errors, ValidationOptions(max_errors=0)) == errors
+    assert not collect_errors([], ValidationOptions(max_errors=2))
+
+
+def test_error_collector_aggregate():
+    "Errors are grouped by template with counts and the first locations."
+    collector = ErrorCollector(ValidationOptions(aggregate_errors=True, max_locations=2))
+    errors = [(f"Element 'x{line}' is wrong", f"line {line}") for line in range(1, 5)]
+    errors.append(("Something else", ""))
+    for error, location in errors:
+        collector.add(error, location=location)
+    assert collector.count == len(errors)
+    assert collector.get_errors() == [
+        "4 x Element '…' is wrong (first at: line 1, line 2)",
+        "1 x Something else",
+    ]
+
+
+def test_error_collector_aggregate_max_errors():
+    "max_errors limits the number of templates, other occurrences are counted."
+    collector = ErrorCollector(
+        ValidationOptions(max_errors=1, aggregate_errors=True), kind="warnings"
+    )
+    for message in ("a 1", "a 2", "b", "c"):
+        collector.add(message)
+    assert collector.get_errors() == [
+        "2 x a N",
+        "2 more warnings omitted (max_errors=1)",
+    ]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_xsd_max_errors(project, streaming):
+    "The errors of the XSD validator are capped."
+    result = validate_doc(project, ValidationOptions(max_errors=3), streaming)
+    xsd_result = next(result.get_subresults())
+    assert xsd_result.errors[3:] == ["7 more errors omitted (max_errors=3)"]
+
+
+def test_rng_and_xsd_aggregated(project):
+    "Aggregated errors contain counts and line numbers."
+    result = validate_doc(project, ValidationOptions(aggregate_errors=True))
+    xsd_result, rng_result = result.get_subresults()
+    assert len(xsd_result.errors) == 1
+    assert xsd_result.errors[0].startswith("10 x Element '…': '…' is not a valid value")
+    assert xsd_result.errors[0].endswith("(first at: line 1, line 1, line 1, line 1, line 1)")
+    assert rng_result.errors[0].startswith("1 x ")
+
+
+def test_fail_fast(project):
+    "In fail fast mode no further schemas are used after the first failing one."
+    all_results = list(validate_doc(project, ValidationOptions()).get_subresults())
+    result = validate_doc(project, ValidationOptions(fail_fast=True))
+    assert list(result.get_subresults()) == all_results[:1]
+    assert not result.is_valid
+
+
+def test_srvl_to_message_lists_with_options():
+    "SVRL errors are capped and aggregated by assertion and message template."
+    report_root = ET.fromstring(SVRL)
+    errors, _ = SchematronValidator.srvl_to_message_lists(
+        report_root, ValidationOptions(max_errors=1)
+    )
+    assert errors == [
+        "Error at /products/product[1] (@id): Product 'a' has no id",
+        "2 more errors omitted (max_errors=1)",
+    ]
+    errors, _ = SchematronValidator.srvl_to_message_lists(
+        report_root, ValidationOptions(aggregate_errors=True)
+    )
+    assert errors == [
+        "2 x Error (@id): Product '…' has no id "
+        "(first at: /products/product[1], /products/product[2])",
+        "1 x Error (count(product) < 2): Too many products (first at: /products)",
+    ]
+
+
+def test_json_max_errors(tmp_path):
+    "JSON schema errors are capped, too."
+    schema = {"type": "array", "items": {"type": "integer"}}
+    (tmp_path / "schema.json").write_text(json.dumps(schema), encoding="utf-8")
+    (tmp_path / "doc.json").write_text(json.dumps(["a", "b", "c"]), encoding="utf-8")
+    context = ValidationContext(tmp_path / "doc.json", options=ValidationOptions(max_errors=1))
+    result = JSONValidator().validate_context(
+        context, [SchemaInfo((tmp_path / "schema.json").as_uri())]
+    )
+    assert result.get_errors() == [
+        "$[0]: 'a' is not of type 'integer'",
+        "2 more errors omitted (max_errors=1)",
+    ]
+
+
+def test_result_cache_key_depends_on_options(project, tmp_path):
+    "Results validated with other options are not used."
+    cache = ResultCache(
+        tmp_path / "results", resolver=CombinedCatalogResolver([], cache_dir=None)
+    )
+    file_path = project / "doc.xml"
+    capped = ValidationOptions(max_errors=1)
+    result = validate(file_path, str(project / "schema.xsd"), cache=cache, options=capped)
+    # the key contains the resolved schema location
+    schema_uri = (project / "schema.xsd").as_uri()
+    assert cache.get(file_path, schema_uri, capped) is not None
+    assert cache.get(file_path, schema_uri, ValidationOptions()) is None
+    assert result.get_errors()[-1] == "9 more errors omitted (max_errors=1)"
@@ -85,3 +85,21 @@ def test_invalid_validationresult(subresult):
     assert result.get_warnings() == ["Warning 1", "Warning 2", "Warning 3"]
     assert result.get_messages() == ["msg1", "msg2"]
     assert list(result.get_subresults()) == [subresult, subresult2]
+
+
+def test_validationresult_to_dict_and_back(subresult):
+    "A ValidationResult can be converted to a dict and back."
+    subresult2 = copy.deepcopy(subresult)
+    subresult2.is_valid = False
+    subresult2.errors = ["Error 1"]
+    result = ValidationResult("foo/bar.xml")
+    result.add_subresult(subresult)
+    result.add_subresult(subresult2)
+
+    data = result.to_dict()
+    assert data["file_path"] == "foo/bar.xml"
+    assert data["subresults"][1]["errors"] == ["Error 1"]
+
+    restored = ValidationResult.from_dict(data)
+    assert str(restored.file_path) == "foo/bar.xml"
+    assert list(restored.get_subresults()) == [subresult, subresult2]
@@ -0,0 +1,226 @@
+"""Tests for the xinclude module and the validation of documents with XIncludes."""
+
+# pylint: disable=c-extension-no-member
+import pytest
+from lxml import etree as ET
+
+from gamslib.validation.resultcache import ResultCache
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.validationoptions import ValidationOptions
+from gamslib.validation.xinclude import (
+    FragmentCache,
+    XIncludeProcessor,
+    find_include_targets,
+    select_elements,
+)
+from gamslib.validation.xmlvalidator import XMLValidator
+
+XI = 'xmlns:xi="http://www.w3.org/2001/XInclude"'
+
+SCHEMA = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="book">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="header" type="xs:string"/>
+        <xs:element name="chapter" maxOccurs="unbounded">
+          <xs:complexType>
+            <xs:sequence>
+              <xs:element name="p" type="xs:string" maxOccurs="unbounded"/>
+            </xs:sequence>
+          </xs:complexType>
+        </xs:element>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+
+@pytest.fixture(name="project")
+def create_project(tmp_path):
+    "Create a book which includes a shared header and two chapters."
+    (tmp_path / "book.xsd").write_text(SCHEMA, encoding="utf-8")
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "header.xml").write_text(
+        "<header>Shared header</header>", encoding="utf-8"
+    )
+    (tmp_path / "chapters").mkdir()
+    (tmp_path / "chapters" / "ch1.xml").write_text(
+        "<chapter>\n<p>One</p>\n</chapter>", encoding="utf-8"
+    )
+    (tmp_path / "chapters" / "ch2.xml").write_text(
+        "<chapter>\n<p>Two</p>\n<q>wrong</q>\n</chapter>", encoding="utf-8"
+    )
+    return tmp_path
+
+
+def write_book(path, chapters=("ch1.xml",)):
+    "Write a book including the shared header and chapters."
+    includes = "".join(f'<xi:include href="chapters/{name}"/>' for name in chapters)
+    path.write_text(
+        f'<book {XI}>\n<xi:include href="shared/header.xml"/>{includes}\n</book>',
+        encoding="utf-8",
+    )
+    return path
+
+
+def expand(path, cache=None):
+    "Parse path and expand its XIncludes. Return the tree and the expansion."
+    tree = ET.parse(str(path))
+    return tree, XIncludeProcessor(cache or FragmentCache()).process(tree)
+
+
+def validate(path, **options):
+    "Validate path against book.xsd with XInclude expansion."
+    context = ValidationContext(path, options=ValidationOptions(xinclude=True, **options))
+    schema = SchemaInfo((path.parent / "book.xsd").as_uri(), schema_type=SchemaType.XSD)
+    return XMLValidator().validate_context(context, [schema])
+
+
+def test_expand(project):
+    "Includes are replaced by the included elements, text and tails are kept."
+    book = project / "book.xml"
+    book.write_text(
+        f'<book {XI}>a<xi:include href="shared/header.xml"/>b'
+        '<xi:include href="shared/header.xml" parse="text"/>c</book>',
+        encoding="utf-8",
+    )
+    tree, expansion = expand(book)
+    assert ET.tostring(tree).replace(b" " + XI.encode(), b"") == (
+        b"<book>a<header>Shared header</header>b&lt;header&gt;Shared header"
+        b"&lt;/header&gt;c</book>"
+    )
+    assert not expansion.errors
+    assert len(expansion) == 1
+
+
+def test_nested_includes_and_lines(project):
+    "Included files may include other files; elements keep their lines."
+    (project / "chapters" / "ch3.xml").write_text(
+        f'<chapter {XI}>\n\n<xi:include href="../shared/header.xml"/></chapter>',
+        encoding="utf-8",
+    )
+    tree, expansion = expand(write_book(project / "book.xml", ["ch3.xml"]))
+    header = tree.find("chapter/header")
+    assert header.sourceline == 1
+    assert expansion.locate(tree.getpath(header)) == str(project / "shared" / "header.xml")
+    chapter = tree.find("chapter")
+    assert expansion.locate(tree.getpath(chapter) + "/@n") == str(
+        project / "chapters" / "ch3.xml"
+    )
+    assert expansion.locate("/book") is None
+
+
+@pytest.mark.parametrize(
+    "xpointer, expected",
+    [
+        ("b", ["b"]),
+        ("element(/1/2)", ["b"]),
+        ("element(b/1)", ["c"]),
+        ("xpointer(//*[@n='x'])", ["a", "c"]),
+        ("xmlns(t=urn:t)xpointer(//t:d)", ["d"]),
+        ("xpointer(//missing)element(/1/1)", ["a"]),
+    ],
+)
+def test_select_elements(xpointer, expected):
+    "Shorthand, element() and xpointer() pointers are supported."
+    tree = ET.ElementTree(
+        ET.fromstring(
+            '<r><a n="x"/><b xml:id="b"><c n="x"/></b><d xmlns="urn:t"/></r>'
+        )
+    )
+    assert [ET.QName(e).localname for e in select_elements(tree, xpointer)] == expected
+
+
+def test_fallback_and_errors(project):
+    "Missing files use the fallback or are reported; loops are detected."
+    (project / "loop.xml").write_text(
+        f'<chapter {XI}><xi:include href="loop.xml"/></chapter>', encoding="utf-8"
+    )
+    book = project / "book.xml"
+    book.write_text(
+        f'<book {XI}><xi:include href="missing.xml"><xi:fallback><p>fallback</p>'
+        '</xi:fallback></xi:include>\n<xi:include href="missing.xml"/>'
+        '<xi:include href="loop.xml"/></book>',
+        encoding="utf-8",
+    )
+    tree, expansion = expand(book)
+    assert ET.tostring(tree).replace(b" " + XI.encode(), b"") == (
+        b"<book><p>fallback</p>\n<chapter/></book>"
+    )
+    missing_error, loop_error = expansion.errors
+    assert missing_error.startswith(f"{book}, line 2: Cannot include 'missing.xml'")
+    assert "inclusion loop" in loop_error
+
+
+def test_fragments_are_parsed_once(project):
+    "Shared fragments are parsed once for many documents and again after changes."
+    cache = FragmentCache()
+    books = 20
+    fragments = ["shared/header.xml", "chapters/ch1.xml"]
+    for i in range(books):
+        expand(write_book(project / f"book{i}.xml"), cache)
+    assert cache.stats().misses == len(fragments)
+    assert cache.stats().hits == (books - 1) * len(fragments)
+
+    header = project / "shared" / "header.xml"
+    header.write_text("<header>New header</header>", encoding="utf-8")
+    tree, _ = expand(project / "book0.xml", cache)
+    assert tree.findtext("header") == "New header"
+
+
+def test_validate_with_xinclude(project):
+    "The assembled document is validated, errors point into the included file."
+    book = write_book(project / "book.xml", ["ch1.xml", "ch2.xml"])
+    result = validate(book)
+    assert not result.is_valid
+    (error,) = result.get_errors()
+    assert error.startswith(f"{project / 'chapters' / 'ch2.xml'}:3:")
+    assert "Element 'q': This element is not expected" in error
+
+    result = validate(book, aggregate_errors=True)
+    assert f"(first at: {project / 'chapters' / 'ch2.xml'} line 3)" in result.get_errors()[0]
+
+    # without expansion, the shell is validated
+    context = ValidationContext(book, options=ValidationOptions())
+    schema = SchemaInfo((project / "book.xsd").as_uri(), schema_type=SchemaType.XSD)
+    result = XMLValidator().validate_context(context, [schema])
+    assert "Element '{http://www.w3.org/2001/XInclude}include'" in result.get_errors()[0]
+
+
+def test_validate_with_xinclude_errors(project):
+    "Includes which cannot be processed are reported in their own subresult."
+    book = write_book(project / "book.xml", ["ch1.xml", "missing.xml"])
+    result = validate(book)
+    assert not result.is_valid
+    assert [sub.validator_name for sub in result.get_subresults()] == [
+        "XInclude Processor",
+        "XMLSchema Validator",
+    ]
+    assert next(validate(book, fail_fast=True).get_subresults()).validator_name == (
+        "XInclude Processor"
+    )
+
+
+def test_xinclude_disables_streaming(project):
+    "XIncludes can only be expanded in a tree."
+    book = write_book(project / "book.xml")
+    assert not ValidationContext(book, options=ValidationOptions(xinclude=True)).streaming
+
+
+def test_result_cache_key_covers_includes(project):
+    "The result cache key changes if an included file changes."
+    book = write_book(project / "book.xml")
+    assert find_include_targets(book) == [
+        project / "shared" / "header.xml",
+        project / "chapters" / "ch1.xml",
+    ]
+    cache = ResultCache(cache_dir=project / "results")
+    options = ValidationOptions(xinclude=True)
+    key = cache.make_key(book, options=options)
+    (project / "chapters" / "ch1.xml").write_text("<chapter/>", encoding="utf-8")
+    assert cache.make_key(book, options=options) != key
+    assert cache.make_key(book, options=ValidationOptions()) == cache.make_key(
+        book, options=ValidationOptions()
+    )
@@ -7,6 +7,7 @@ import pytest
 
 from gamslib.formatdetect.formatinfo import SubType
 from gamslib.validation import xmlschemadetector
+from gamslib.validation.compositeschema import parse_composite_uri
 from gamslib.validation.schemainfo import SchemaType
 
 # pylint: disable=c-extension-no-member
@@ -133,7 +134,9 @@ def test_find_schema_in_root_element_with_no_namespace_schema_location(shared_da
     "Test if local schemas are detected in root element if the noSchemaLocation attribute is set."
     xml_file = shared_datadir / "simple_with_xsd_in_root.xml"
     xml = xml_file.read_text()
-    xml = xml.replace('schemaLocation="', 'noNamespaceSchemaLocation="')
+    xml = xml.replace(
+        'xsi:schemaLocation="http://example.com/foo ', 'xsi:noNamespaceSchemaLocation="'
+    )
     xml_file.write_text(xml)
 
     root = ET.parse(xml_file)
@@ -198,3 +201,102 @@ def test_find_schemas_apply_default_schema(
 
     assert schemata[0].schema_uri == expected_schema_uri
     assert schemata[0].schema_type == expected_schema_type
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "simple_with_rng_and_sch_in_pi.xml",
+        "simple_with_xsd_in_root.xml",
+        "simple_with_external_dtd.xml",
+    ],
+)
+def test_detect_schemata_from_header(shared_datadir, filename):
+    "Reading only the header finds the same schemas as parsing the whole file."
+    xml_file = shared_datadir / filename
+    format_info = Mock()
+    format_info.subtype = None
+    assert xmlschemadetector.detect_schemata(
+        xml_file, format_info
+    ) == xmlschemadetector.detect_schemata(xml_file, format_info, tree=ET.parse(xml_file))
+
+
+@pytest.mark.parametrize(
+    "root, expected",
+    [
+        ('<TEI xmlns="http://www.tei-c.org/ns/1.0"/>', SubType.TEIP5),
+        ("<TEI.2/>", SubType.TEIP4),
+        ('<lido:lido xmlns:lido="http://www.lido-schema.org"/>', SubType.LIDO),
+        ("<root/>", None),
+        ('<TEI.2 xmlns="urn:other"/>', None),
+    ],
+)
+def test_guess_subtype_from_header(tmp_path, root, expected):
+    "The subtype is taken from the root element."
+    xml_file = tmp_path / "doc.xml"
+    xml_file.write_text(root, encoding="utf-8")
+    tree = xmlschemadetector.read_header_tree(xml_file)
+    assert xmlschemadetector.guess_subtype_from_header(tree) == expected
+
+
+def test_detect_schemata_without_format_info(tmp_path):
+    "Without format_info, the default schema is chosen by the root element."
+    xml_file = tmp_path / "doc.xml"
+    xml_file.write_text('<TEI xmlns="http://www.tei-c.org/ns/1.0"/>', encoding="utf-8")
+    schemata = xmlschemadetector.detect_schemata(xml_file, None)
+    assert [schema.schema_uri for schema in schemata] == [
+        "http://www.tei-c.org/release/xml/tei/custom/schema/xsd/tei_all.xsd"
+    ]
+    assert xmlschemadetector.detect_schemata(xml_file, None, use_default_schema=False) == []
+
+
+def test_read_header_tree_stops_at_root(tmp_path):
+    "Only the header is parsed, so errors after the root start tag do not matter."
+    xml_file = tmp_path / "big.xml"
+    xml_file.write_text(
+        '<?xml-model href="schema.rng" type="application/xml" '
+        'schematypens="http://relaxng.org/ns/structure/1.0"?>\n'
+        '<root xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"\n'
+        '      xsi:schemaLocation="http://example.org/ns schema.xsd">'
+        + "<item>x</item>" * 100_000
+        + "<not-well-formed>",
+        encoding="utf-8",
+    )
+    tree = xmlschemadetector.read_header_tree(xml_file, chunk_size=16)
+    assert tree.getroot().tag == "root"
+    assert len(tree.getroot()) == 0
+    format_info = Mock()
+    format_info.subtype = None
+    schemata = xmlschemadetector.detect_schemata(xml_file, format_info)
+    assert [schema.schema_uri for schema in schemata] == [
+        (tmp_path / "schema.rng").as_uri(),
+        (tmp_path / "schema.xsd").as_uri(),
+    ]
+
+
+def test_read_header_tree_without_root(tmp_path):
+    "A file without root element raises an XMLSyntaxError."
+    xml_file = tmp_path / "empty.xml"
+    xml_file.write_text('<?xml version="1.0"?>\n', encoding="utf-8")
+    with pytest.raises(ET.XMLSyntaxError):
+        xmlschemadetector.read_header_tree(xml_file)
+
+
+def test_find_schemata_in_root_element_with_several_pairs(tmp_path):
+    "All schemaLocation pairs are combined into one composite schema."
+    xml_file = tmp_path / "doc.xml"
+    xml_file.write_text(
+        '<root xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xsi:schemaLocation="http://example.org/b b.xsd  http://example.org/a a.xsd" '
+        'xsi:noNamespaceSchemaLocation="c.xsd"/>',
+        encoding="utf-8",
+    )
+    (schema_info,) = xmlschemadetector.find_schemata_in_root_element(
+        ET.parse(xml_file), xml_file
+    )
+    assert schema_info.schema_type == SchemaType.XSD
+    assert parse_composite_uri(schema_info.schema_uri) == [
+        ("", (tmp_path / "c.xsd").as_uri()),
+        ("http://example.org/a", (tmp_path / "a.xsd").as_uri()),
+        ("http://example.org/b", (tmp_path / "b.xsd").as_uri()),
+    ]
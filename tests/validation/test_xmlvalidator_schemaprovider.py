@@ -1,7 +1,19 @@
 "Tests for the SchemaProvider class in xmlvalidator.py"
 
+# pylint: disable=c-extension-no-member
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
-from gamslib.validation.xmlvalidator import SchemaProvider
+from lxml import etree as ET
+
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.xmlvalidator import SchemaProvider, XMLSchemaValidator
+
+COUNT_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="count" type="xs:integer"/>
+</xs:schema>
+"""
 
 
 @pytest.mark.parametrize(
@@ -37,7 +49,7 @@ def test_get_simple_valid_schema(schema_uri, method_to_test, lazy_shared_datadir
     get_schema_method = getattr(SchemaProvider, method_to_test)
 
     # Clear cache to ensure the test is not affected by previous tests
-    get_schema_method.cache_clear()
+    SchemaProvider.get_cache().clear()
 
     schema = get_schema_method(schema_uri)
     assert schema is not None
@@ -45,6 +57,56 @@ def test_get_simple_valid_schema(schema_uri, method_to_test, lazy_shared_datadir
     # Second call should return the cached schema (same object)
     schema2 = get_schema_method(schema_uri)
     assert schema2 is schema
+    stats = SchemaProvider.get_cache().stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+
+def test_get_schemavalidator_unknown_type():
+    "An unknown schema type raises a ValueError."
+    with pytest.raises(ValueError, match="Unknown schema type"):
+        SchemaProvider.get_schemavalidator("file:///foo.xyz", SchemaType.UNKNOWN)
+
+
+def test_invalidate(lazy_shared_datadir):
+    "invalidate() removes all validators of a schema from the cache."
+    schema_uri = (lazy_shared_datadir / "schemas" / "simple.xsd").resolve().as_uri()
+    SchemaProvider.get_cache().clear()
+    schema = SchemaProvider.get_xsd(schema_uri)
+    assert SchemaProvider.invalidate(schema_uri) == 1
+    assert SchemaProvider.invalidate(schema_uri) == 0
+    assert SchemaProvider.get_xsd(schema_uri) is not schema
+
+
+def test_prewarm(lazy_shared_datadir):
+    "prewarm() compiles the validators in the background."
+    schemas = [
+        SchemaInfo((lazy_shared_datadir / "schemas" / name).resolve().as_uri())
+        for name in ("simple.xsd", "simple.rng")
+    ]
+    schemas.append(SchemaInfo("file:///foo.xyz", schema_type=SchemaType.UNKNOWN))
+    SchemaProvider.get_cache().clear()
+    SchemaProvider.prewarm(schemas).join()
+    cache = SchemaProvider.get_cache()
+    # the schema of unknown type is ignored
+    assert len(cache) == len(schemas) - 1
+    assert (SchemaType.XSD, schemas[0].schema_uri) in cache
+    SchemaProvider.get_xsd(schemas[0].schema_uri)
+    assert cache.stats().hits == 1
+
+
+def test_cache_size(lazy_shared_datadir):
+    "The cache size of a validator is estimated from its schema documents and pool."
+    schema_file = lazy_shared_datadir / "schemas" / "simple.xsd"
+    SchemaProvider.get_cache().clear()
+    validator = SchemaProvider.get_xsd(schema_file.resolve().as_uri())
+    assert validator.source_size == schema_file.stat().st_size
+    single_size = validator.source_size * XMLSchemaValidator.size_factor
+    assert validator.cache_size == single_size
+    assert SchemaProvider.get_cache().stats().size == single_size
+    with validator.checkout(), validator.checkout():
+        pass
+    SchemaProvider.get_xsd(schema_file.resolve().as_uri())
+    assert SchemaProvider.get_cache().stats().size == validator.pool_size * single_size
 
 
 # TODO: Implement tests for real documents
@@ -61,3 +123,41 @@ def test_get_simple_valid_schema(schema_uri, method_to_test, lazy_shared_datadir
 #     # Second call should return the cached schema (same object)
 #     schema2 = get_schema(uri)
 #     assert schema2 is schema
+
+
+def test_checkout_pool(tmp_path):
+    "A compiled schema object is only used by one thread at a time."
+    schema_file = tmp_path / "count.xsd"
+    schema_file.write_text(COUNT_SCHEMA, encoding="utf-8")
+    validator = XMLSchemaValidator(schema_file.as_uri())
+    assert validator.pool_size == 1
+    with validator.checkout() as first, validator.checkout() as second:
+        assert first is not second
+    copies = [first, second]
+    assert validator.pool_size == len(copies)
+    with validator.checkout() as third:
+        assert third in copies
+    assert validator.pool_size == len(copies)
+
+
+def test_validate_in_threads(tmp_path):
+    "Errors of concurrent validations against the same schema are not mixed up."
+    schema_file = tmp_path / "count.xsd"
+    schema_file.write_text(COUNT_SCHEMA, encoding="utf-8")
+    validator = SchemaProvider.get_xsd(schema_file.as_uri())
+    values = [str(i) if i % 2 else f"x{i}" for i in range(200)]
+
+    def validate(value):
+        tree = ET.ElementTree(ET.fromstring(f"<count>{value}</count>"))
+        return value, validator.validate(tree)
+
+    workers = 8
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for value, result in executor.map(validate, values):
+            if value.isdigit():
+                assert result.is_valid
+            else:
+                assert not result.is_valid
+                (error,) = result.errors
+                assert f"'{value}' is not a valid value" in error
+    assert 1 <= validator.pool_size <= workers
@@ -188,3 +188,27 @@ def test_schematron_validator_both_params_given(
         ValueError, match=r"Either a tree or a file_path must be given, but not both."
     ):
         lxml_schematron_validator.validate(tree=tree, file_path=xml_path)
+
+
+def test_schematron_saxon_validate_bytes(tmp_path):
+    "Saxon validates in-memory documents with base_url as base URI."
+    schema_path = tmp_path / "base.sch"
+    schema_path.write_text(
+        '<schema xmlns="http://purl.oclc.org/dsdl/schematron" queryBinding="xslt3">'
+        '<pattern><rule context="/products">'
+        "<assert test=\"ends-with(base-uri(.), '/ingest/doc.xml')\">wrong base</assert>"
+        '<assert test="product">no product</assert>'
+        "</rule></pattern></schema>",
+        encoding="utf-8",
+    )
+    validator = SchematronValidator(schema_path.as_uri())
+    base_url = tmp_path / "ingest" / "doc.xml"
+    result = validator.validate_bytes(b"<products><product/></products>", base_url)
+    assert result.is_valid
+    result = validator.validate_bytes(b"<products/>", base_url="other.xml")
+    assert [error.split(": ")[-1] for error in result.errors] == [
+        "wrong base",
+        "no product",
+    ]
+    result = validator.validate_bytes(b"<products>", base_url)
+    assert result.errors[0].startswith("Syntax error:")
@@ -0,0 +1,186 @@
+"Tests for the streaming mode of the XMLValidator and the SchemaValidators."
+
+from unittest import mock
+
+import pytest
+from lxml import etree as ET
+
+from gamslib.validation import validate
+from gamslib.validation.schemainfo import SchemaInfo, SchemaType
+from gamslib.validation.validationcontext import ValidationContext
+from gamslib.validation.xmlvalidator import (
+    DTDValidator,
+    RelaxNGValidator,
+    XMLSchemaValidator,
+    XMLValidator,
+    iterparse_errors,
+)
+
+# pylint: disable=c-extension-no-member
+
+
+def make_large_xml(path, num_products=2000, invalid=False):
+    "Write a 'large' xml file referencing simple.xsd and return its path."
+    products = "".join(
+        f"<product><name>Product {i}</name><price>{i}.5</price></product>"
+        for i in range(num_products)
+    )
+    if invalid:
+        products += "<produkt><name>Laptop</name><price>1000</price></produkt>"
+    path.write_text(
+        '<products xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xsi:schemaLocation="http://example.com/foo schemas/simple.xsd">'
+        f"{products}</products>",
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_iterparse_errors(shared_datadir):
+    "iterparse_errors returns the errors of a single pass parse."
+    assert iterparse_errors(shared_datadir / "simple.xml") == []
+    errors = iterparse_errors(shared_datadir / "minimal_not_wellformed.xml")
+    assert len(errors) == 1
+    assert "Opening and ending tag mismatch" in errors[0]
+
+
+def test_xsd_validate_stream(shared_datadir):
+    "XSD validation in streaming mode has the same result as tree based validation."
+    validator = XMLSchemaValidator(
+        (shared_datadir / "schemas" / "simple.xsd").resolve().as_uri()
+    )
+    context = ValidationContext(shared_datadir / "simple.xml", streaming=True)
+    result = validator.validate_stream(context)
+    assert result.is_valid
+    assert not context.is_parsed
+
+    context = ValidationContext(shared_datadir / "simple_invalid.xml", streaming=True)
+    result = validator.validate_stream(context)
+    assert not result.is_valid
+    assert result.message.startswith("Document does not validate against schema")
+    assert "produkt" in result.errors[0]
+    assert not context.is_parsed
+
+
+def test_dtd_validate_stream(shared_datadir):
+    "DTD validation in streaming mode uses the DTD declared in the doctype."
+    schema_uri = (shared_datadir / "schemas" / "simple.dtd").resolve().as_uri()
+    validator = DTDValidator(schema_uri)
+    context = ValidationContext(
+        shared_datadir / "simple_with_external_dtd.xml", streaming=True
+    )
+    result = validator.validate_stream(context)
+    assert result.is_valid
+    assert result.message == f"Document validates against DTD {schema_uri}"
+    assert not context.is_parsed
+
+    invalid_file = shared_datadir / "invalid_with_external_dtd.xml"
+    invalid_file.write_text(
+        context.file_path.read_text(encoding="utf-8").replace("<name>", "<nom>", 1)
+        .replace("</name>", "</nom>", 1),
+        encoding="utf-8",
+    )
+    result = validator.validate_stream(ValidationContext(invalid_file, streaming=True))
+    assert not result.is_valid
+    assert any("nom" in error for error in result.errors)
+
+
+def test_dtd_validate_stream_other_dtd(shared_datadir):
+    "A DTD not declared in the doctype cannot be validated in streaming mode."
+    validator = DTDValidator(
+        (shared_datadir / "schemas" / "simple.dtd").resolve().as_uri()
+    )
+    context = ValidationContext(shared_datadir / "simple.xml", streaming=True)
+    assert validator.validate_stream(context) is None
+
+
+def test_relaxng_no_stream(shared_datadir):
+    "RelaxNG needs the full tree."
+    validator = RelaxNGValidator(
+        (shared_datadir / "schemas" / "simple.rng").resolve().as_uri()
+    )
+    context = ValidationContext(shared_datadir / "simple.xml", streaming=True)
+    assert validator.validate_stream(context) is None
+
+
+def test_xmlvalidator_streaming_does_not_parse(shared_datadir):
+    "In streaming mode, the XMLValidator does not build a tree for XSD validation."
+    file_path = make_large_xml(shared_datadir / "large.xml")
+    schema_uri = (shared_datadir / "schemas" / "simple.xsd").resolve().as_uri()
+    context = ValidationContext(file_path, streaming=True)
+    with mock.patch.object(ET, "parse", wraps=ET.parse) as parse:
+        result = XMLValidator().validate_context(
+            context, [SchemaInfo(schema_uri, SchemaType.XSD)]
+        )
+    assert result.is_valid
+    assert not context.is_parsed
+    assert all(call.args[0] != file_path for call in parse.call_args_list)
+
+
+def test_xmlvalidator_streaming_invalid(shared_datadir):
+    "Errors are reported in streaming mode."
+    file_path = make_large_xml(shared_datadir / "large.xml", invalid=True)
+    schema_uri = (shared_datadir / "schemas" / "simple.xsd").resolve().as_uri()
+    result = XMLValidator().validate_context(
+        ValidationContext(file_path, streaming=True),
+        [SchemaInfo(schema_uri, SchemaType.XSD)],
+    )
+    assert not result.is_valid
+    assert "produkt" in result.get_errors()[0]
+
+
+def test_xmlvalidator_streaming_fallback_to_tree(shared_datadir):
+    "Validators which need the full tree get it in streaming mode."
+    schema_uri = (shared_datadir / "schemas" / "simple.rng").resolve().as_uri()
+    context = ValidationContext(shared_datadir / "simple.xml", streaming=True)
+    result = XMLValidator().validate_context(
+        context, [SchemaInfo(schema_uri, SchemaType.RNG)]
+    )
+    assert result.is_valid
+    assert context.is_parsed
+
+
+@pytest.mark.parametrize("schemata", [[], None])
+def test_xmlvalidator_streaming_not_wellformed(shared_datadir, schemata):
+    "Well-formedness is checked in streaming mode, even without schemas."
+    context = ValidationContext(
+        shared_datadir / "minimal_not_wellformed.xml", streaming=True
+    )
+    result = XMLValidator().validate_context(context, schemata)
+    assert not result.is_valid
+    subresult = next(result.get_subresults())
+    assert subresult.validator_name == "XML Wellformedness Validator"
+    assert subresult.errors[0].startswith("Syntax error:")
+    assert not context.is_parsed
+
+
+def test_validate_selects_streaming_by_size(shared_datadir, monkeypatch):
+    "Files larger than the threshold are validated in streaming mode."
+    file_path = make_large_xml(shared_datadir / "large.xml")
+    # format detection parses the file with a parser target, which builds no tree
+    monkeypatch.setenv("GAMSLIB_STREAMING_VALIDATION_THRESHOLD", "1000")
+    with mock.patch.object(ET, "parse", wraps=ET.parse) as parse:
+        result = validate(file_path)
+    assert result.is_valid
+    assert mock.call(file_path) not in parse.call_args_list
+
+    monkeypatch.setenv("GAMSLIB_STREAMING_VALIDATION_THRESHOLD", "0")
+    with mock.patch.object(ET, "parse", wraps=ET.parse) as parse:
+        result = validate(file_path)
+    assert result.is_valid
+    assert mock.call(file_path) in parse.call_args_list
+
+
+def test_validate_stream_in_memory(shared_datadir):
+    "In-memory documents are validated in streaming mode, too."
+    validator = DTDValidator((shared_datadir / "schemas" / "simple.dtd").resolve().as_uri())
+    data = (shared_datadir / "simple_with_external_dtd.xml").read_bytes()
+    context = ValidationContext.from_bytes(
+        data.replace(b"<name>Phone", b"<nome>Phone").replace(b"</name>", b"</nome>", 1),
+        base_url=shared_datadir / "ingest.xml",
+        streaming=True,
+    )
+    result = validator.validate_stream(context)
+    assert not result.is_valid
+    assert "No declaration for element nome" in result.errors[0]
+    assert not context.is_parsed